@@ -1,9 +1,18 @@
 """Azure AI Search client for vector operations."""
 
-from typing import List, Dict, Any
+import atexit
+import hashlib
+import json
+import logging
+from typing import AsyncIterator, Dict, Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
+from azure.core.exceptions import ResourceNotFoundError
+from azure.search.documents import IndexDocumentsBatch, SearchClient
+from azure.search.documents.aio import SearchClient as AsyncSearchClient
 from azure.search.documents.indexes import SearchIndexClient
+from azure.search.documents.indexes.aio import SearchIndexClient as AsyncSearchIndexClient
 from azure.search.documents.indexes.models import (
     SearchIndex,
     SearchField,
@@ -17,13 +26,607 @@ from azure.search.documents.indexes.models import (
 from azure.search.documents.models import VectorizedQuery
 
 from app.config import settings
+from app.index_writer import AsyncIndexWriter, IndexAction, IndexWriter
+from app.search_filters import ProfileFilter, SkillFilter, all_of, with_category
+
+logger = logging.getLogger(__name__)
+
+# ── Index definitions ─────────────────────────────────────────────────────────
+
+
+def _vector_search() -> VectorSearch:
+    return VectorSearch(
+        algorithms=[
+            HnswAlgorithmConfiguration(name="hnsw-config"),
+        ],
+        profiles=[
+            VectorSearchProfile(
+                name="vector-profile",
+                algorithm_configuration_name="hnsw-config",
+            ),
+        ],
+    )
+
+
+def build_profiles_index(index_name: str) -> SearchIndex:
+    """Schema of the profiles (swap-users) index."""
+    fields = [
+        SimpleField(name="id", type=SearchFieldDataType.String, key=True),
+        SimpleField(name="uid", type=SearchFieldDataType.String, filterable=True),
+        SearchableField(name="email", type=SearchFieldDataType.String),
+        SearchableField(name="display_name", type=SearchFieldDataType.String),
+        SimpleField(name="photo_url", type=SearchFieldDataType.String),
+        SearchableField(name="full_name", type=SearchFieldDataType.String),
+        SearchableField(name="username", type=SearchFieldDataType.String),
+        SearchableField(name="bio", type=SearchFieldDataType.String),
+        SearchableField(name="city", type=SearchFieldDataType.String, filterable=True),
+        SimpleField(name="timezone", type=SearchFieldDataType.String),
+        SearchableField(name="skills_to_offer", type=SearchFieldDataType.String),
+        SearchableField(name="services_needed", type=SearchFieldDataType.String),
+        SimpleField(name="dm_open", type=SearchFieldDataType.Boolean, filterable=True),
+        SimpleField(name="show_city", type=SearchFieldDataType.Boolean, filterable=True),
+        SimpleField(
+            name="swap_credits", type=SearchFieldDataType.Int32, filterable=True, sortable=True
+        ),
+        SimpleField(
+            name="swaps_completed",
+            type=SearchFieldDataType.Int32,
+            filterable=True,
+            sortable=True,
+        ),
+        # Vector fields
+        SearchField(
+            name="offer_vec",
+            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+            searchable=True,
+            vector_search_dimensions=settings.embedding_dim,
+            vector_search_profile_name="vector-profile",
+        ),
+        SearchField(
+            name="need_vec",
+            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+            searchable=True,
+            vector_search_dimensions=settings.embedding_dim,
+            vector_search_profile_name="vector-profile",
+        ),
+    ]
+    return SearchIndex(name=index_name, fields=fields, vector_search=_vector_search())
+
+
+def build_skills_index(index_name: str) -> SearchIndex:
+    """Schema of the skills (swap-skills) index."""
+    fields = [
+        SimpleField(name="id", type=SearchFieldDataType.String, key=True),
+        SimpleField(name="skill_id", type=SearchFieldDataType.String, filterable=True),
+        SimpleField(name="posted_by", type=SearchFieldDataType.String, filterable=True),
+        SearchableField(name="title", type=SearchFieldDataType.String),
+        SearchableField(name="description", type=SearchFieldDataType.String),
+        SearchableField(name="category", type=SearchFieldDataType.String, filterable=True),
+        SimpleField(name="difficulty", type=SearchFieldDataType.String, filterable=True),
+        SimpleField(name="estimated_hours", type=SearchFieldDataType.Double),
+        SimpleField(name="delivery", type=SearchFieldDataType.String, filterable=True),
+        SearchableField(
+            name="tags",
+            type=SearchFieldDataType.Collection(SearchFieldDataType.String),
+            filterable=True,
+        ),
+        SimpleField(name="poster_name", type=SearchFieldDataType.String),
+        SimpleField(name="poster_city", type=SearchFieldDataType.String, filterable=True),
+        SimpleField(name="poster_swap_credits", type=SearchFieldDataType.Int32, sortable=True),
+        SearchField(
+            name="skill_vec",
+            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+            searchable=True,
+            vector_search_dimensions=settings.embedding_dim,
+            vector_search_profile_name="vector-profile",
+        ),
+    ]
+    return SearchIndex(name=index_name, fields=fields, vector_search=_vector_search())
+
+
+# ── Schema migrations ─────────────────────────────────────────────────────────
+#
+# create_or_update_index is a management-plane round-trip, so services never
+# call it on construction. The definitions above are fingerprinted instead; the
+# fingerprint last applied to each index lives in Redis. When Redis has no
+# fingerprint (disabled, or evicted) the live definition is read with get_index
+# and compared, so workers without a shared cache don't each push the schema on
+# start. The schema is only pushed when the local definition differs (or with
+# force=True, as scripts/migrate_search_indexes.py does).
+
+_applied_fingerprints: Dict[str, str] = {}
+
+
+def index_fingerprint(index: SearchIndex) -> str:
+    """sha256 of the index definition exactly as create_or_update_index sends it."""
+    body = json.dumps(index.serialize(), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _fingerprint_key(index_name: str) -> str:
+    return f"search_index_schema:{index_name}"
+
+
+def recorded_fingerprint(index_name: str) -> Optional[str]:
+    """Fingerprint last applied to index_name (Redis, then this process), if known."""
+    from app.cache import get_cache_service
+
+    recorded = get_cache_service().get(_fingerprint_key(index_name))
+    return recorded or _applied_fingerprints.get(index_name)
+
+
+def _covers(live: Any, local: Any) -> bool:
+    """
+    True if the live definition has every value the local one sets.
+
+    The service fills in defaults (analyzers, retrievable, algorithm
+    parameters, e-tag) that the local definition leaves unset, so only the
+    local side's values are compared; named lists (fields, profiles) are
+    matched by name.
+    """
+    if isinstance(local, dict):
+        return isinstance(live, dict) and all(
+            value is None or _covers(live.get(key), value) for key, value in local.items()
+        )
+    if isinstance(local, list):
+        if not isinstance(live, list) or len(live) != len(local):
+            return False
+        if all(isinstance(item, dict) and "name" in item for item in local):
+            live_by_name = {item.get("name"): item for item in live if isinstance(item, dict)}
+            return all(_covers(live_by_name.get(item["name"]), item) for item in local)
+        return all(_covers(a, b) for a, b in zip(live, local))
+    return live == local
+
+
+def _live_schema_matches(index: SearchIndex, live: Any) -> bool:
+    return live is not None and _covers(live.serialize(), index.serialize())
+
+
+def _record_applied(cache, index: SearchIndex, fingerprint: str) -> None:
+    cache.set(_fingerprint_key(index.name), fingerprint, ttl=settings.search_index_fingerprint_ttl)
+    _applied_fingerprints[index.name] = fingerprint
+
+
+def _migration_blocked(index: SearchIndex) -> bool:
+    if settings.search_index_migrate == "never":
+        logger.warning(
+            "Search index %s schema differs from the live one; "
+            "run scripts/migrate_search_indexes.py to update it",
+            index.name,
+        )
+        return True
+    return False
+
+
+def migrate_index(index_client: SearchIndexClient, index: SearchIndex, force: bool = False) -> bool:
+    """Apply index if its schema changed. Returns True when the schema was pushed."""
+    from app.cache import get_cache_service
+
+    cache = get_cache_service()
+    fingerprint = index_fingerprint(index)
+    if not force:
+        recorded = (cache.get(_fingerprint_key(index.name)), _applied_fingerprints.get(index.name))
+        if fingerprint in recorded:
+            return False
+        try:
+            live = index_client.get_index(index.name)
+        except ResourceNotFoundError:
+            live = None
+        except Exception as exc:
+            logger.warning("Could not read search index %s (%s); applying schema", index.name, exc)
+            live = None
+        if _live_schema_matches(index, live):
+            _record_applied(cache, index, fingerprint)
+            return False
+        if _migration_blocked(index):
+            return False
+    index_client.create_or_update_index(index)
+    _record_applied(cache, index, fingerprint)
+    logger.info("Search index %s schema applied (%s)", index.name, fingerprint[:12])
+    return True
+
+
+async def migrate_index_async(
+    index_client: AsyncSearchIndexClient, index: SearchIndex, force: bool = False
+) -> bool:
+    """Async counterpart of migrate_index."""
+    from app.cache import get_cache_service
+
+    cache = get_cache_service()
+    fingerprint = index_fingerprint(index)
+    if not force:
+        cached = await cache.aget(_fingerprint_key(index.name))
+        if fingerprint in (cached, _applied_fingerprints.get(index.name)):
+            return False
+        try:
+            live = await index_client.get_index(index.name)
+        except ResourceNotFoundError:
+            live = None
+        except Exception as exc:
+            logger.warning("Could not read search index %s (%s); applying schema", index.name, exc)
+            live = None
+        if _live_schema_matches(index, live):
+            await cache.aset(
+                _fingerprint_key(index.name),
+                fingerprint,
+                ttl=settings.search_index_fingerprint_ttl,
+            )
+            _applied_fingerprints[index.name] = fingerprint
+            return False
+        if _migration_blocked(index):
+            return False
+    await index_client.create_or_update_index(index)
+    await cache.aset(
+        _fingerprint_key(index.name), fingerprint, ttl=settings.search_index_fingerprint_ttl
+    )
+    _applied_fingerprints[index.name] = fingerprint
+    logger.info("Search index %s schema applied (%s)", index.name, fingerprint[:12])
+    return True
+
+
+# ── Write-behind indexing ──────────────────────────────────────────────────────
+
+
+def _index_batch(actions: List[IndexAction]) -> IndexDocumentsBatch:
+    batch = IndexDocumentsBatch()
+    for action, document in actions:
+        getattr(batch, f"add_{action}_actions")([document])
+    return batch
+
+
+def _index_writer(search_client: SearchClient) -> Optional[IndexWriter]:
+    """Batching writer for search_client, or None to send each action inline."""
+    if not settings.search_write_behind_enabled:
+        return None
+    writer = IndexWriter(
+        lambda actions: search_client.index_documents(_index_batch(actions)),
+        max_batch=settings.search_write_batch_size,
+        flush_interval_ms=settings.search_write_flush_interval_ms,
+        max_retries=settings.search_write_max_retries,
+    )
+    # Scripts and sync workers exit without a lifespan hook
+    atexit.register(writer.close)
+    return writer
+
+
+def _async_index_writer(search_client: AsyncSearchClient) -> Optional[AsyncIndexWriter]:
+    if not settings.search_write_behind_enabled:
+        return None
+
+    async def send(actions: List[IndexAction]):
+        return await search_client.index_documents(_index_batch(actions))
+
+    return AsyncIndexWriter(
+        send,
+        max_batch=settings.search_write_batch_size,
+        flush_interval_ms=settings.search_write_flush_interval_ms,
+        max_retries=settings.search_write_max_retries,
+    )
+
+
+# ── Document / result mapping (shared by sync and async services) ────────────
+
+
+def _profile_document(
+    username: str,
+    offer_vec: List[float],
+    need_vec: List[float],
+    payload: Dict[str, Any],
+) -> Dict[str, Any]:
+    return {
+        "id": username,
+        "uid": payload.get("uid", username),
+        "email": payload.get("email", ""),
+        "display_name": payload.get("display_name", ""),
+        "photo_url": payload.get("photo_url", ""),
+        "full_name": payload.get("full_name", ""),
+        "username": payload.get("username", ""),
+        "bio": payload.get("bio", ""),
+        "city": payload.get("city", ""),
+        "timezone": payload.get("timezone", ""),
+        "skills_to_offer": payload.get("skills_to_offer", ""),
+        "services_needed": payload.get("services_needed", ""),
+        "dm_open": payload.get("dm_open", True),
+        "show_city": payload.get("show_city", True),
+        "swap_credits": payload.get("swap_credits", 0) or 0,
+        "swaps_completed": payload.get("swaps_completed", 0) or 0,
+        "offer_vec": offer_vec,
+        "need_vec": need_vec,
+    }
+
+
+# Index fields each search result model is built from (ProfileSearchResult and
+# SkillSearchResult in app/schemas.py). Searches send them as $select, so
+# results never carry the vector fields or anything else the response drops.
+PROFILE_RESULT_FIELDS: Tuple[str, ...] = (
+    "id",
+    "uid",
+    "email",
+    "display_name",
+    "photo_url",
+    "full_name",
+    "bio",
+    "city",
+    "timezone",
+    "skills_to_offer",
+    "services_needed",
+    "dm_open",
+    "show_city",
+    "swap_credits",
+    "swaps_completed",
+)
+_PROFILE_RESULT_DEFAULTS: Dict[str, Any] = {"swap_credits": 0, "swaps_completed": 0}
+
+
+def _profile_match(result: Dict[str, Any], score: float) -> Dict[str, Any]:
+    match = {"username": result.get("id"), "score": score}
+    for field in PROFILE_RESULT_FIELDS[1:]:
+        match[field] = result.get(field, _PROFILE_RESULT_DEFAULTS.get(field))
+    return match
+
+
+def _skill_document(
+    skill_id: str, skill_vec: List[float], payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    tags = payload.get("tags", [])
+    if not isinstance(tags, list):
+        tags = []
+    return {
+        "id": skill_id,
+        "skill_id": skill_id,
+        "posted_by": payload.get("posted_by", ""),
+        "title": payload.get("title", ""),
+        "description": payload.get("description", ""),
+        "category": payload.get("category", ""),
+        "difficulty": payload.get("difficulty", ""),
+        "estimated_hours": payload.get("estimated_hours", 1),
+        "delivery": payload.get("delivery", "Remote Only"),
+        "tags": tags,
+        "poster_name": payload.get("poster_name", ""),
+        "poster_city": payload.get("poster_city", ""),
+        "poster_swap_credits": payload.get("poster_swap_credits", 0) or 0,
+        "skill_vec": skill_vec,
+    }
+
+
+SKILL_RESULT_FIELDS: Tuple[str, ...] = (
+    "id",
+    "skill_id",
+    "posted_by",
+    "title",
+    "description",
+    "category",
+    "difficulty",
+    "estimated_hours",
+    "delivery",
+    "tags",
+    "poster_name",
+    "poster_city",
+    "poster_swap_credits",
+)
+_SKILL_RESULT_DEFAULTS: Dict[str, Any] = {
+    "estimated_hours": 1,
+    "delivery": "Remote Only",
+    "poster_name": "",
+    "poster_city": "",
+    "poster_swap_credits": 0,
+}
+
+
+def _skill_match(result: Dict[str, Any], score: float) -> Dict[str, Any]:
+    match = {
+        field: result.get(field, _SKILL_RESULT_DEFAULTS.get(field)) for field in SKILL_RESULT_FIELDS
+    }
+    if not isinstance(match["tags"], list):
+        match["tags"] = []
+    match["deliverables"] = []
+    match["score"] = score
+    return match
+
+
+def _vector_search_kwargs(
+    query_vec: List[float],
+    field: str,
+    limit: int,
+    filter_expr: Optional[str] = None,
+    skip: int = 0,
+    select: Iterable[str] = PROFILE_RESULT_FIELDS,
+) -> Dict[str, Any]:
+    """
+    Keyword arguments for SearchClient.search for a single-field k-NN query.
+
+    skip pages through the neighbours: k covers skip + limit, and $skip/$top
+    return only the new page (ranks skip .. skip + limit - 1). select is the
+    $select projection (the profile result fields unless given).
+    """
+    vector_query = VectorizedQuery(
+        vector=query_vec,
+        k_nearest_neighbors=skip + limit,
+        fields=field,
+    )
+    kwargs: Dict[str, Any] = {
+        "search_text": None,
+        "vector_queries": [vector_query],
+        "top": limit,
+        "select": list(select),
+    }
+    if skip:
+        kwargs["skip"] = skip
+    if filter_expr:
+        kwargs["filter"] = filter_expr
+    return kwargs
+
+
+_VECTOR_FIELDS = ["offer_vec", "need_vec"]
+
+# Per-field score keys on multi-vector results
+_FIELD_SCORE_KEYS = {"offer_vec": "offer_score", "need_vec": "need_score"}
+
+
+def azure_cosine_score(cos: np.ndarray) -> np.ndarray:
+    """Azure AI Search's @search.score for cosine similarity (range 1/3 .. 1)."""
+    return 1.0 / (2.0 - cos)
+
+
+def _multi_vector_search_kwargs(
+    queries: Mapping[str, List[float]],
+    limit: int,
+    filter_expr: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Keyword arguments for one SearchClient.search with a k-NN query per vector field.
+
+    Azure fuses the per-field neighbour lists into one ranking and, at this API
+    version, reports only the fused score, so the queried vector fields (and no
+    others) are selected for _field_scored_matches; top covers the whole union.
+    """
+    kwargs: Dict[str, Any] = {
+        "search_text": None,
+        "vector_queries": [
+            VectorizedQuery(vector=query_vec, k_nearest_neighbors=limit, fields=field)
+            for field, query_vec in queries.items()
+        ],
+        "top": limit * len(queries),
+        "select": [*PROFILE_RESULT_FIELDS, *queries],
+    }
+    if filter_expr:
+        kwargs["filter"] = filter_expr
+    return kwargs
+
+
+def _field_scored_matches(
+    results: List[Dict[str, Any]],
+    queries: Mapping[str, List[float]],
+    score_threshold: float,
+) -> List[Dict[str, Any]]:
+    """
+    Multi-vector hits scored per field, best first.
+
+    Each queried field's score is the cosine of the returned vector with that
+    field's query on Azure's scale (0 for a missing or zero vector), computed
+    for all hits at once. A hit scores as its best field and is dropped below
+    score_threshold; every field's score is kept under offer_score / need_score.
+    """
+    if not results:
+        return []
+    matches = [_profile_match(result, 0.0) for result in results]
+    best = np.zeros(len(results))
+    for field, query_vec in queries.items():
+        query = np.asarray(query_vec, dtype=np.float32)
+        vectors = np.zeros((len(results), query.size), dtype=np.float32)
+        for row, result in enumerate(results):
+            if result.get(field):
+                vectors[row] = result[field]
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        cosines = vectors @ query / np.where(norms > 0, norms, 1.0)
+        scores = np.where(norms > 0, azure_cosine_score(cosines), 0.0)
+        best = np.maximum(best, scores)
+        for match, score in zip(matches, scores.tolist()):
+            match[_FIELD_SCORE_KEYS[field]] = score
+    kept = []
+    for match, score in zip(matches, best.tolist()):
+        if score >= score_threshold:
+            match["score"] = score
+            kept.append(match)
+    kept.sort(key=lambda match: match["score"], reverse=True)
+    return kept
+
+
+# ── Hybrid (BM25 + vector) retrieval ────────────────────────────────────────
+#
+# A search with both search_text and vector_queries is ranked by Azure AI
+# Search itself: BM25 over search_fields and each k-NN query are fused with
+# reciprocal-rank fusion, score = sum over rankers of 1 / (60 + rank). That
+# score is rescaled to 0..1 (1 = first in every ranker) for the 0-1 score the
+# result models document; similarity thresholds don't apply to it.
+
+_RRF_K = 60  # Azure AI Search's RRF constant
+
+# Keyword fields searched alongside each vector field
+_HYBRID_TEXT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "offer_vec": ("skills_to_offer", "bio"),
+    "need_vec": ("services_needed",),
+    "skill_vec": ("title", "tags", "description"),
+}
+
+
+def _hybrid_search_kwargs(
+    query_text: str,
+    queries: Mapping[str, List[float]],
+    limit: int,
+    select: Iterable[str],
+    filter_expr: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Keyword arguments for one SearchClient.search fusing BM25 with a k-NN query per field."""
+    k = max(limit, settings.search_hybrid_k)
+    kwargs: Dict[str, Any] = {
+        "search_text": query_text,
+        "search_fields": [text for field in queries for text in _HYBRID_TEXT_FIELDS[field]],
+        "vector_queries": [
+            VectorizedQuery(vector=query_vec, k_nearest_neighbors=k, fields=field)
+            for field, query_vec in queries.items()
+        ],
+        "top": limit,
+        "select": list(select),
+    }
+    if filter_expr:
+        kwargs["filter"] = filter_expr
+    return kwargs
+
+
+def _fused_score(score: float, rankers: int) -> float:
+    """RRF @search.score rescaled to 0..1 (rankers: BM25 plus one per vector query)."""
+    return min(1.0, score * (_RRF_K + 1) / rankers)
+
+
+def _stored_vectors(document: Dict[str, Any]) -> Optional[Tuple[List[float], List[float]]]:
+    """(offer_vec, need_vec) from a profile document; None if either is missing or all zeros."""
+    offer_vec = document.get("offer_vec")
+    need_vec = document.get("need_vec")
+    if not offer_vec or not need_vec or not any(offer_vec) or not any(need_vec):
+        return None
+    return offer_vec, need_vec
+
+
+def _skill_filter(category_filter: Optional[str], filters: Optional[SkillFilter]) -> Optional[str]:
+    """$filter for a skill search: the category shorthand merged into filters."""
+    filters = with_category(filters, category_filter)
+    return filters.to_odata() if filters is not None else None
+
+
+def _profile_filter(
+    exclude_uids: Optional[Iterable[str]], filters: Optional[ProfileFilter]
+) -> Optional[str]:
+    """$filter for a profile search: exclusions AND the structured filters."""
+    return all_of(
+        exclusion_filter(exclude_uids), filters.to_odata() if filters is not None else None
+    )
+
+
+def exclusion_filter(exclude_uids: Optional[Iterable[str]], field: str = "uid") -> Optional[str]:
+    """
+    OData filter dropping documents whose `field` is in exclude_uids.
+
+    Compiles to one search.in() call, which Azure evaluates as a set lookup
+    (unlike a chain of `ne` clauses), so excluded profiles never take a top-k
+    slot. Values containing the delimiter fall back to `ne` clauses.
+    """
+    if not exclude_uids:
+        return None
+    values = sorted({u.replace("'", "''") for u in exclude_uids if u})
+    listed = [v for v in values if "," not in v]
+    clauses = []
+    if listed:
+        clauses.append(f"not search.in({field}, '{','.join(listed)}', ',')")
+    clauses.extend(f"{field} ne '{v}'" for v in values if "," in v)
+    return " and ".join(clauses) or None
 
 
 class AzureSearchService:
     """Service for managing Azure AI Search vector operations."""
 
     def __init__(self):
-        """Initialize Azure AI Search client and ensure index exists."""
+        """Initialize Azure AI Search clients (the index schema is not touched)."""
         credential = AzureKeyCredential(settings.azure_search_api_key)
 
         # Index client for schema management
@@ -40,67 +643,11 @@ class AzureSearchService:
         )
 
         self.index_name = settings.azure_search_index
-        self._ensure_index()
-
-    def _ensure_index(self):
-        """Create or update the index to ensure all fields exist."""
-        self._create_or_update_index()
-
-    def _create_or_update_index(self):
-        """Create or update the search index with all fields."""
-        fields = [
-            SimpleField(name="id", type=SearchFieldDataType.String, key=True),
-            SimpleField(name="uid", type=SearchFieldDataType.String, filterable=True),
-            SearchableField(name="email", type=SearchFieldDataType.String),
-            SearchableField(name="display_name", type=SearchFieldDataType.String),
-            SimpleField(name="photo_url", type=SearchFieldDataType.String),
-            SearchableField(name="full_name", type=SearchFieldDataType.String),
-            SearchableField(name="username", type=SearchFieldDataType.String),
-            SearchableField(name="bio", type=SearchFieldDataType.String),
-            SearchableField(name="city", type=SearchFieldDataType.String, filterable=True),
-            SimpleField(name="timezone", type=SearchFieldDataType.String),
-            SearchableField(name="skills_to_offer", type=SearchFieldDataType.String),
-            SearchableField(name="services_needed", type=SearchFieldDataType.String),
-            SimpleField(name="dm_open", type=SearchFieldDataType.Boolean, filterable=True),
-            SimpleField(name="show_city", type=SearchFieldDataType.Boolean, filterable=True),
-            SimpleField(name="swap_credits", type=SearchFieldDataType.Int32, filterable=True, sortable=True),
-            SimpleField(name="swaps_completed", type=SearchFieldDataType.Int32, filterable=True, sortable=True),
-            # Vector fields
-            SearchField(
-                name="offer_vec",
-                type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                searchable=True,
-                vector_search_dimensions=settings.vector_dim,
-                vector_search_profile_name="vector-profile",
-            ),
-            SearchField(
-                name="need_vec",
-                type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                searchable=True,
-                vector_search_dimensions=settings.vector_dim,
-                vector_search_profile_name="vector-profile",
-            ),
-        ]
-
-        vector_search = VectorSearch(
-            algorithms=[
-                HnswAlgorithmConfiguration(name="hnsw-config"),
-            ],
-            profiles=[
-                VectorSearchProfile(
-                    name="vector-profile",
-                    algorithm_configuration_name="hnsw-config",
-                ),
-            ],
-        )
-
-        index = SearchIndex(
-            name=self.index_name,
-            fields=fields,
-            vector_search=vector_search,
-        )
+        self.writer = _index_writer(self.search_client)
 
-        self.index_client.create_or_update_index(index)
+    def ensure_index(self, force: bool = False) -> bool:
+        """Create or update the index if its schema fingerprint changed."""
+        return migrate_index(self.index_client, build_profiles_index(self.index_name), force)
 
     def upsert_profile(
         self,
@@ -118,34 +665,20 @@ class AzureSearchService:
             need_vec: Embedding of services_needed
             payload: Profile metadata
         """
-        document = {
-            "id": username,
-            "uid": payload.get("uid", username),
-            "email": payload.get("email", ""),
-            "display_name": payload.get("display_name", ""),
-            "photo_url": payload.get("photo_url", ""),
-            "full_name": payload.get("full_name", ""),
-            "username": payload.get("username", ""),
-            "bio": payload.get("bio", ""),
-            "city": payload.get("city", ""),
-            "timezone": payload.get("timezone", ""),
-            "skills_to_offer": payload.get("skills_to_offer", ""),
-            "services_needed": payload.get("services_needed", ""),
-            "dm_open": payload.get("dm_open", True),
-            "show_city": payload.get("show_city", True),
-            "swap_credits": payload.get("swap_credits", 0) or 0,
-            "swaps_completed": payload.get("swaps_completed", 0) or 0,
-            "offer_vec": offer_vec,
-            "need_vec": need_vec,
-        }
-
-        self.search_client.merge_or_upload_documents([document])
+        document = _profile_document(username, offer_vec, need_vec, payload)
+        if self.writer is not None:
+            self.writer.merge_or_upload(document)
+        else:
+            self.search_client.merge_or_upload_documents([document])
 
     def search_offers(
         self,
         query_vec: List[float],
         limit: int = 10,
         score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search profiles by their offer vector.
@@ -154,54 +687,25 @@ class AzureSearchService:
             query_vec: Query embedding
             limit: Max results
             score_threshold: Minimum similarity score
+            skip: Nearest neighbours to skip (paging)
+            exclude_uids: Profiles filtered out inside the search (see exclusion_filter)
+            filters: Structured conditions (app.search_filters), also applied inside the search
 
         Returns:
             List of matching profiles with scores
         """
-        vector_query = VectorizedQuery(
-            vector=query_vec,
-            k_nearest_neighbors=limit,
-            fields="offer_vec",
+        return self._search_field(
+            "offer_vec", query_vec, limit, score_threshold, skip, exclude_uids, filters
         )
 
-        results = self.search_client.search(
-            search_text=None,
-            vector_queries=[vector_query],
-            top=limit,
-        )
-
-        matches = []
-        for result in results:
-            score = result.get("@search.score", 0)
-            # Azure AI Search returns scores differently, normalize if needed
-            # HNSW with cosine returns scores where higher is better
-            if score >= score_threshold:
-                matches.append({
-                    "username": result.get("id"),
-                    "score": score,
-                    "uid": result.get("uid"),
-                    "email": result.get("email"),
-                    "display_name": result.get("display_name"),
-                    "photo_url": result.get("photo_url"),
-                    "full_name": result.get("full_name"),
-                    "bio": result.get("bio"),
-                    "city": result.get("city"),
-                    "timezone": result.get("timezone"),
-                    "skills_to_offer": result.get("skills_to_offer"),
-                    "services_needed": result.get("services_needed"),
-                    "dm_open": result.get("dm_open"),
-                    "show_city": result.get("show_city"),
-                    "swap_credits": result.get("swap_credits", 0),
-                    "swaps_completed": result.get("swaps_completed", 0),
-                })
-
-        return matches
-
     def search_needs(
         self,
         query_vec: List[float],
         limit: int = 10,
         score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search profiles by their need vector.
@@ -210,50 +714,142 @@ class AzureSearchService:
             query_vec: Query embedding
             limit: Max results
             score_threshold: Minimum similarity score
+            skip: Nearest neighbours to skip (paging)
+            exclude_uids: Profiles filtered out inside the search (see exclusion_filter)
+            filters: Structured conditions (app.search_filters), also applied inside the search
 
         Returns:
             List of matching profiles with scores
         """
-        vector_query = VectorizedQuery(
-            vector=query_vec,
-            k_nearest_neighbors=limit,
-            fields="need_vec",
+        return self._search_field(
+            "need_vec", query_vec, limit, score_threshold, skip, exclude_uids, filters
+        )
+
+    def search_multi_vector(
+        self,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search several vector fields in one request (a k-NN query per field).
+
+        Args:
+            queries: Query embedding per field, e.g. {"offer_vec": q, "need_vec": q}
+            limit: Nearest neighbours per field
+            score_threshold: Minimum best-field score
+            exclude_uids: Profiles filtered out inside the search (see exclusion_filter)
+            filters: Structured conditions (app.search_filters), also applied inside the search
+
+        Returns:
+            The union of every field's neighbours (up to limit per field), best
+            first. score is the best field's score; offer_score / need_score are
+            each queried field's, so callers can slice the top limit or re-rank
+            by one field's score.
+        """
+        results = self.search_client.search(
+            **_multi_vector_search_kwargs(
+                queries, limit, filter_expr=_profile_filter(exclude_uids, filters)
+            )
         )
+        return _field_scored_matches(list(results), queries, score_threshold)
 
+    def search_hybrid(
+        self,
+        query_text: str,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Keyword + vector search in one request, ranked by reciprocal-rank fusion.
+
+        Args:
+            query_text: Searched with BM25 over the text fields of each queried
+                vector field (offer_vec: skills_to_offer and bio; need_vec:
+                services_needed)
+            queries: Query embedding per vector field
+            limit: Max results
+            exclude_uids: Profiles filtered out inside the search (see exclusion_filter)
+            filters: Structured conditions (app.search_filters), also applied inside the search
+
+        Returns:
+            Profiles in fused order; score is the fused rank score (0-1)
+        """
+        results = self.search_client.search(
+            **_hybrid_search_kwargs(
+                query_text,
+                queries,
+                limit,
+                PROFILE_RESULT_FIELDS,
+                _profile_filter(exclude_uids, filters),
+            )
+        )
+        rankers = 1 + len(queries)
+        return [
+            _profile_match(result, _fused_score(result.get("@search.score", 0), rankers))
+            for result in results
+        ]
+
+    def _search_field(
+        self,
+        field: str,
+        query_vec: List[float],
+        limit: int,
+        score_threshold: float,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
         results = self.search_client.search(
-            search_text=None,
-            vector_queries=[vector_query],
-            top=limit,
+            **_vector_search_kwargs(
+                query_vec,
+                field,
+                limit,
+                filter_expr=_profile_filter(exclude_uids, filters),
+                skip=skip,
+            )
         )
 
         matches = []
         for result in results:
             score = result.get("@search.score", 0)
+            # HNSW with cosine returns scores where higher is better
             if score >= score_threshold:
-                matches.append({
-                    "username": result.get("id"),
-                    "score": score,
-                    "uid": result.get("uid"),
-                    "email": result.get("email"),
-                    "display_name": result.get("display_name"),
-                    "photo_url": result.get("photo_url"),
-                    "full_name": result.get("full_name"),
-                    "bio": result.get("bio"),
-                    "city": result.get("city"),
-                    "timezone": result.get("timezone"),
-                    "skills_to_offer": result.get("skills_to_offer"),
-                    "services_needed": result.get("services_needed"),
-                    "dm_open": result.get("dm_open"),
-                    "show_city": result.get("show_city"),
-                    "swap_credits": result.get("swap_credits", 0),
-                    "swaps_completed": result.get("swaps_completed", 0),
-                })
-
+                matches.append(_profile_match(result, score))
         return matches
 
+    def get_profile_vectors(self, username: str) -> Optional[Tuple[List[float], List[float]]]:
+        """
+        Stored (offer_vec, need_vec) of one profile by key lookup (no embedding).
+
+        Returns:
+            The two vectors, or None if the profile is not indexed or lacks either
+        """
+        try:
+            document = self.search_client.get_document(key=username, selected_fields=_VECTOR_FIELDS)
+        except ResourceNotFoundError:
+            return None
+        return _stored_vectors(document)
+
+    def iter_profile_documents(self) -> Iterator[Dict[str, Any]]:
+        """Yield every profile document, vectors included (used to load the match engine)."""
+        # Without $top the paged iterator follows continuation tokens to the end
+        yield from self.search_client.search(search_text="*")
+
     def delete_profile(self, username: str):
         """Delete a profile from Azure AI Search."""
-        self.search_client.delete_documents([{"id": username}])
+        if self.writer is not None:
+            self.writer.delete({"id": username})
+        else:
+            self.search_client.delete_documents([{"id": username}])
+
+    def flush(self) -> int:
+        """Send queued index actions now (write-behind only). Returns how many succeeded."""
+        return self.writer.flush() if self.writer is not None else 0
 
 
 class SkillsSearchService:
@@ -271,75 +867,18 @@ class SkillsSearchService:
             credential=credential,
         )
         self.index_name = settings.azure_search_skills_index
-        self._ensure_index()
-
-    def _ensure_index(self):
-        fields = [
-            SimpleField(name="id", type=SearchFieldDataType.String, key=True),
-            SimpleField(name="skill_id", type=SearchFieldDataType.String, filterable=True),
-            SimpleField(name="posted_by", type=SearchFieldDataType.String, filterable=True),
-            SearchableField(name="title", type=SearchFieldDataType.String),
-            SearchableField(name="description", type=SearchFieldDataType.String),
-            SearchableField(name="category", type=SearchFieldDataType.String, filterable=True),
-            SimpleField(name="difficulty", type=SearchFieldDataType.String, filterable=True),
-            SimpleField(name="estimated_hours", type=SearchFieldDataType.Double),
-            SimpleField(name="delivery", type=SearchFieldDataType.String, filterable=True),
-            SearchableField(
-                name="tags",
-                type=SearchFieldDataType.Collection(SearchFieldDataType.String),
-                filterable=True,
-            ),
-            SimpleField(name="poster_name", type=SearchFieldDataType.String),
-            SimpleField(name="poster_city", type=SearchFieldDataType.String, filterable=True),
-            SimpleField(name="poster_swap_credits", type=SearchFieldDataType.Int32, sortable=True),
-            SearchField(
-                name="skill_vec",
-                type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                searchable=True,
-                vector_search_dimensions=settings.vector_dim,
-                vector_search_profile_name="vector-profile",
-            ),
-        ]
+        self.writer = _index_writer(self.search_client)
 
-        vector_search = VectorSearch(
-            algorithms=[HnswAlgorithmConfiguration(name="hnsw-config")],
-            profiles=[
-                VectorSearchProfile(
-                    name="vector-profile",
-                    algorithm_configuration_name="hnsw-config",
-                ),
-            ],
-        )
-
-        index = SearchIndex(
-            name=self.index_name,
-            fields=fields,
-            vector_search=vector_search,
-        )
-        self.index_client.create_or_update_index(index)
+    def ensure_index(self, force: bool = False) -> bool:
+        return migrate_index(self.index_client, build_skills_index(self.index_name), force)
 
     def upsert_skill(self, skill_id: str, skill_vec: List[float], payload: Dict[str, Any]):
         """Upsert a skill document to the search index."""
-        tags = payload.get("tags", [])
-        if not isinstance(tags, list):
-            tags = []
-        document = {
-            "id": skill_id,
-            "skill_id": skill_id,
-            "posted_by": payload.get("posted_by", ""),
-            "title": payload.get("title", ""),
-            "description": payload.get("description", ""),
-            "category": payload.get("category", ""),
-            "difficulty": payload.get("difficulty", ""),
-            "estimated_hours": payload.get("estimated_hours", 1),
-            "delivery": payload.get("delivery", "Remote Only"),
-            "tags": tags,
-            "poster_name": payload.get("poster_name", ""),
-            "poster_city": payload.get("poster_city", ""),
-            "poster_swap_credits": payload.get("poster_swap_credits", 0) or 0,
-            "skill_vec": skill_vec,
-        }
-        self.search_client.merge_or_upload_documents([document])
+        document = _skill_document(skill_id, skill_vec, payload)
+        if self.writer is not None:
+            self.writer.merge_or_upload(document)
+        else:
+            self.search_client.merge_or_upload_documents([document])
 
     def search_skills(
         self,
@@ -347,67 +886,345 @@ class SkillsSearchService:
         limit: int = 10,
         category_filter: str | None = None,
         score_threshold: float = 0.3,
+        filters: Optional[SkillFilter] = None,
     ) -> List[Dict[str, Any]]:
-        """Search skills by vector similarity with optional category filter."""
-        vector_query = VectorizedQuery(
-            vector=query_vec,
-            k_nearest_neighbors=limit,
-            fields="skill_vec",
+        """Search skills by vector similarity, filtered by category and/or filters in the search."""
+        results = self.search_client.search(
+            **_vector_search_kwargs(
+                query_vec,
+                "skill_vec",
+                limit,
+                filter_expr=_skill_filter(category_filter, filters),
+                select=SKILL_RESULT_FIELDS,
+            )
         )
 
-        filter_expr = None
-        if category_filter:
-            filter_expr = f"category eq '{category_filter}'"
+        matches = []
+        for result in results:
+            score = result.get("@search.score", 0)
+            if score >= score_threshold:
+                matches.append(_skill_match(result, score))
+        return matches
 
+    def search_skills_hybrid(
+        self,
+        query_text: str,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Keyword (title, tags, description) + vector skill search fused with RRF; score is 0-1."""
         results = self.search_client.search(
-            search_text=None,
-            vector_queries=[vector_query],
-            filter=filter_expr,
-            top=limit,
+            **_hybrid_search_kwargs(
+                query_text,
+                {"skill_vec": query_vec},
+                limit,
+                SKILL_RESULT_FIELDS,
+                _skill_filter(category_filter, filters),
+            )
+        )
+        return [
+            _skill_match(result, _fused_score(result.get("@search.score", 0), 2))
+            for result in results
+        ]
+
+    def delete_skill(self, skill_id: str):
+        """Delete a skill from the search index."""
+        if self.writer is not None:
+            self.writer.delete({"id": skill_id})
+        else:
+            self.search_client.delete_documents([{"id": skill_id}])
+
+    def flush(self) -> int:
+        """Send queued index actions now (write-behind only). Returns how many succeeded."""
+        return self.writer.flush() if self.writer is not None else 0
+
+
+# ── Async variants (azure.search.documents.aio) ───────────────────────────────
+
+
+class AsyncAzureSearchService:
+    """Async counterpart of AzureSearchService for async def routes."""
+
+    def __init__(self):
+        credential = AzureKeyCredential(settings.azure_search_api_key)
+        self.index_client = AsyncSearchIndexClient(
+            endpoint=settings.azure_search_endpoint,
+            credential=credential,
+        )
+        self.search_client = AsyncSearchClient(
+            endpoint=settings.azure_search_endpoint,
+            index_name=settings.azure_search_index,
+            credential=credential,
+        )
+        self.index_name = settings.azure_search_index
+        self.writer = _async_index_writer(self.search_client)
+
+    async def ensure_index(self, force: bool = False) -> bool:
+        """Create or update the index if its schema fingerprint changed (app lifespan)."""
+        return await migrate_index_async(
+            self.index_client, build_profiles_index(self.index_name), force
+        )
+
+    async def upsert_profile(
+        self,
+        username: str,
+        offer_vec: List[float],
+        need_vec: List[float],
+        payload: Dict[str, Any],
+    ):
+        """Upsert a profile to Azure AI Search."""
+        document = _profile_document(username, offer_vec, need_vec, payload)
+        if self.writer is not None:
+            self.writer.merge_or_upload(document)
+        else:
+            await self.search_client.merge_or_upload_documents([document])
+
+    async def search_offers(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search profiles by their offer vector."""
+        return await self._search_field(
+            "offer_vec", query_vec, limit, score_threshold, skip, exclude_uids, filters
+        )
+
+    async def search_needs(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search profiles by their need vector."""
+        return await self._search_field(
+            "need_vec", query_vec, limit, score_threshold, skip, exclude_uids, filters
+        )
+
+    async def search_multi_vector(
+        self,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Several vector fields in one request (see AzureSearchService.search_multi_vector)."""
+        results = await self.search_client.search(
+            **_multi_vector_search_kwargs(
+                queries, limit, filter_expr=_profile_filter(exclude_uids, filters)
+            )
+        )
+        hits = [result async for result in results]
+        return _field_scored_matches(hits, queries, score_threshold)
+
+    async def search_hybrid(
+        self,
+        query_text: str,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Keyword + vector search fused with RRF (see AzureSearchService.search_hybrid)."""
+        results = await self.search_client.search(
+            **_hybrid_search_kwargs(
+                query_text,
+                queries,
+                limit,
+                PROFILE_RESULT_FIELDS,
+                _profile_filter(exclude_uids, filters),
+            )
+        )
+        rankers = 1 + len(queries)
+        return [
+            _profile_match(result, _fused_score(result.get("@search.score", 0), rankers))
+            async for result in results
+        ]
+
+    async def _search_field(
+        self,
+        field: str,
+        query_vec: List[float],
+        limit: int,
+        score_threshold: float,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        results = await self.search_client.search(
+            **_vector_search_kwargs(
+                query_vec,
+                field,
+                limit,
+                filter_expr=_profile_filter(exclude_uids, filters),
+                skip=skip,
+            )
         )
 
         matches = []
-        for result in results:
+        async for result in results:
             score = result.get("@search.score", 0)
             if score >= score_threshold:
-                tags = result.get("tags", [])
-                if not isinstance(tags, list):
-                    tags = []
-                matches.append({
-                    "id": result.get("id"),
-                    "skill_id": result.get("skill_id"),
-                    "posted_by": result.get("posted_by"),
-                    "title": result.get("title"),
-                    "description": result.get("description"),
-                    "category": result.get("category"),
-                    "difficulty": result.get("difficulty"),
-                    "estimated_hours": result.get("estimated_hours", 1),
-                    "delivery": result.get("delivery", "Remote Only"),
-                    "tags": tags,
-                    "deliverables": [],
-                    "poster_name": result.get("poster_name", ""),
-                    "poster_city": result.get("poster_city", ""),
-                    "poster_swap_credits": result.get("poster_swap_credits", 0),
-                    "score": score,
-                })
+                matches.append(_profile_match(result, score))
+        return matches
+
+    async def get_profile_vectors(self, username: str) -> Optional[Tuple[List[float], List[float]]]:
+        """Stored (offer_vec, need_vec) of one profile by key lookup (no embedding)."""
+        try:
+            document = await self.search_client.get_document(
+                key=username, selected_fields=_VECTOR_FIELDS
+            )
+        except ResourceNotFoundError:
+            return None
+        return _stored_vectors(document)
+
+    async def iter_profile_documents(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every profile document, vectors included (used to load the match engine)."""
+        results = await self.search_client.search(search_text="*")
+        async for result in results:
+            yield result
+
+    async def delete_profile(self, username: str):
+        """Delete a profile from Azure AI Search."""
+        if self.writer is not None:
+            self.writer.delete({"id": username})
+        else:
+            await self.search_client.delete_documents([{"id": username}])
+
+    async def flush(self) -> int:
+        """Send queued index actions now (write-behind only). Returns how many succeeded."""
+        return await self.writer.flush() if self.writer is not None else 0
+
+    async def close(self):
+        if self.writer is not None:
+            await self.writer.close()
+        await self.search_client.close()
+        await self.index_client.close()
+
+
+class AsyncSkillsSearchService:
+    """Async counterpart of SkillsSearchService."""
+
+    def __init__(self):
+        credential = AzureKeyCredential(settings.azure_search_api_key)
+        self.index_client = AsyncSearchIndexClient(
+            endpoint=settings.azure_search_endpoint,
+            credential=credential,
+        )
+        self.search_client = AsyncSearchClient(
+            endpoint=settings.azure_search_endpoint,
+            index_name=settings.azure_search_skills_index,
+            credential=credential,
+        )
+        self.index_name = settings.azure_search_skills_index
+        self.writer = _async_index_writer(self.search_client)
+
+    async def ensure_index(self, force: bool = False) -> bool:
+        return await migrate_index_async(
+            self.index_client, build_skills_index(self.index_name), force
+        )
+
+    async def upsert_skill(self, skill_id: str, skill_vec: List[float], payload: Dict[str, Any]):
+        """Upsert a skill document to the search index."""
+        document = _skill_document(skill_id, skill_vec, payload)
+        if self.writer is not None:
+            self.writer.merge_or_upload(document)
+        else:
+            await self.search_client.merge_or_upload_documents([document])
+
+    async def search_skills(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        score_threshold: float = 0.3,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search skills by vector similarity, filtered by category and/or filters in the search."""
+        results = await self.search_client.search(
+            **_vector_search_kwargs(
+                query_vec,
+                "skill_vec",
+                limit,
+                filter_expr=_skill_filter(category_filter, filters),
+                select=SKILL_RESULT_FIELDS,
+            )
+        )
 
+        matches = []
+        async for result in results:
+            score = result.get("@search.score", 0)
+            if score >= score_threshold:
+                matches.append(_skill_match(result, score))
         return matches
 
-    def delete_skill(self, skill_id: str):
+    async def search_skills_hybrid(
+        self,
+        query_text: str,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Keyword + vector skill search fused with RRF (see search_skills_hybrid)."""
+        results = await self.search_client.search(
+            **_hybrid_search_kwargs(
+                query_text,
+                {"skill_vec": query_vec},
+                limit,
+                SKILL_RESULT_FIELDS,
+                _skill_filter(category_filter, filters),
+            )
+        )
+        return [
+            _skill_match(result, _fused_score(result.get("@search.score", 0), 2))
+            async for result in results
+        ]
+
+    async def delete_skill(self, skill_id: str):
         """Delete a skill from the search index."""
-        self.search_client.delete_documents([{"id": skill_id}])
+        if self.writer is not None:
+            self.writer.delete({"id": skill_id})
+        else:
+            await self.search_client.delete_documents([{"id": skill_id}])
+
+    async def flush(self) -> int:
+        """Send queued index actions now (write-behind only). Returns how many succeeded."""
+        return await self.writer.flush() if self.writer is not None else 0
+
+    async def close(self):
+        if self.writer is not None:
+            await self.writer.close()
+        await self.search_client.close()
+        await self.index_client.close()
 
 
 # Global instances
 _azure_search_service = None
 _skills_search_service = None
+_async_azure_search_service = None
+_async_skills_search_service = None
 
 
 def get_azure_search_service() -> AzureSearchService:
     """Get or create Azure Search service singleton."""
     global _azure_search_service
     if _azure_search_service is None:
-        _azure_search_service = AzureSearchService()
+        if settings.search_backend == "local":
+            from app.local_search import get_local_search_service
+
+            _azure_search_service = get_local_search_service()
+        else:
+            _azure_search_service = AzureSearchService()
     return _azure_search_service
 
 
@@ -415,5 +1232,41 @@ def get_skills_search_service() -> SkillsSearchService:
     """Get or create Skills Search service singleton."""
     global _skills_search_service
     if _skills_search_service is None:
-        _skills_search_service = SkillsSearchService()
+        if settings.search_backend == "local":
+            from app.local_search import get_local_skills_search_service
+
+            _skills_search_service = get_local_skills_search_service()
+        else:
+            _skills_search_service = SkillsSearchService()
     return _skills_search_service
+
+
+def get_async_azure_search_service() -> AsyncAzureSearchService:
+    """Get or create async Azure Search service singleton."""
+    global _async_azure_search_service
+    if _async_azure_search_service is None:
+        if settings.search_backend == "local":
+            from app.local_search import AsyncLocalSearchService, get_local_search_service
+
+            _async_azure_search_service = AsyncLocalSearchService(get_local_search_service())
+        else:
+            _async_azure_search_service = AsyncAzureSearchService()
+    return _async_azure_search_service
+
+
+def get_async_skills_search_service() -> AsyncSkillsSearchService:
+    """Get or create async Skills Search service singleton."""
+    global _async_skills_search_service
+    if _async_skills_search_service is None:
+        if settings.search_backend == "local":
+            from app.local_search import (
+                AsyncLocalSkillsSearchService,
+                get_local_skills_search_service,
+            )
+
+            _async_skills_search_service = AsyncLocalSkillsSearchService(
+                get_local_skills_search_service()
+            )
+        else:
+            _async_skills_search_service = AsyncSkillsSearchService()
+    return _async_skills_search_service
@@ -7,8 +7,9 @@ Cache hits are about 16x faster than Azure AI Search queries (~5ms vs ~80ms).
 
 import json
 import hashlib
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 import redis
+import redis.asyncio as aioredis
 from app.config import settings
 
 
@@ -18,6 +19,10 @@ class CacheService:
     def __init__(self):
         self.enabled = False
         self.redis_client = None
+        self.async_client = None
+        # Raw-bytes clients (no UTF-8 decoding) for compact binary values
+        self.binary_client = None
+        self.async_binary_client = None
         
         if not settings.redis_enabled:
             print("Redis cache disabled via config")
@@ -32,12 +37,37 @@ class CacheService:
                 socket_timeout=2,
             )
             self.redis_client.ping()
+            # Same server for async routes and binary values; connect lazily
+            self.async_client = aioredis.Redis(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
+            self.binary_client = redis.Redis(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                decode_responses=False,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
+            self.async_binary_client = aioredis.Redis(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                decode_responses=False,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+            )
             self.enabled = True
             print(f"Redis cache connected at {settings.redis_host}:{settings.redis_port}")
         except (redis.ConnectionError, redis.TimeoutError, Exception) as e:
             # Don't crash if Redis is down - just run without cache
             print(f"Redis unavailable, running without cache: {e}")
             self.redis_client = None
+            self.async_client = None
+            self.binary_client = None
+            self.async_binary_client = None
             self.enabled = False
     
     def _generate_key(self, prefix: str, data: Dict[str, Any]) -> str:
@@ -73,6 +103,61 @@ class CacheService:
             print(f"Cache set error: {e}")
             return False
     
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round-trip. Misses and errors come back as None."""
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            values = self.redis_client.mget(keys)
+            return [json.loads(v) if v else None for v in values]
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+        return [None] * len(keys)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set several values with the same TTL in one pipelined round-trip."""
+        if not self.enabled or not items:
+            return False
+
+        try:
+            ttl = ttl or settings.redis_ttl
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, json.dumps(value))
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache mset error: {e}")
+            return False
+
+    def get_bytes_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """MGET raw bytes values (no JSON). Misses and errors come back as None."""
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            return list(self.binary_client.mget(keys))
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+        return [None] * len(keys)
+
+    def set_bytes_many(self, items: Dict[str, bytes], ttl: Optional[int] = None) -> bool:
+        """Pipelined SETEX of raw bytes values."""
+        if not self.enabled or not items:
+            return False
+
+        try:
+            ttl = ttl or settings.redis_ttl
+            pipe = self.binary_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache mset error: {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
         if not self.enabled:
@@ -100,6 +185,109 @@ class CacheService:
             print(f"Cache clear error: {e}")
         return 0
     
+    # ── Async variants (for async def routes; never block the event loop) ────
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async get. Returns None on miss or error."""
+        if not self.enabled:
+            return None
+
+        try:
+            value = await self.async_client.get(key)
+            if value:
+                return json.loads(value)
+        except Exception as e:
+            print(f"Cache get error: {e}")
+        return None
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Async set with TTL. Returns False on error."""
+        if not self.enabled:
+            return False
+
+        try:
+            await self.async_client.setex(key, ttl or settings.redis_ttl, json.dumps(value))
+            return True
+        except Exception as e:
+            print(f"Cache set error: {e}")
+            return False
+
+    async def aget_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Async MGET. Misses and errors come back as None."""
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            values = await self.async_client.mget(keys)
+            return [json.loads(v) if v else None for v in values]
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+        return [None] * len(keys)
+
+    async def aset_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Async pipelined SETEX for several keys."""
+        if not self.enabled or not items:
+            return False
+
+        try:
+            ttl = ttl or settings.redis_ttl
+            pipe = self.async_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, json.dumps(value))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache mset error: {e}")
+            return False
+
+    async def aget_bytes_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Async variant of get_bytes_many."""
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        try:
+            return list(await self.async_binary_client.mget(keys))
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+        return [None] * len(keys)
+
+    async def aset_bytes_many(self, items: Dict[str, bytes], ttl: Optional[int] = None) -> bool:
+        """Async variant of set_bytes_many."""
+        if not self.enabled or not items:
+            return False
+
+        try:
+            ttl = ttl or settings.redis_ttl
+            pipe = self.async_binary_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache mset error: {e}")
+            return False
+
+    async def aclear_pattern(self, pattern: str) -> int:
+        """Async variant of clear_pattern."""
+        if not self.enabled:
+            return 0
+
+        try:
+            keys = await self.async_client.keys(pattern)
+            if keys:
+                deleted = await self.async_client.delete(*keys)
+                print(f"Cleared {deleted} cached keys matching '{pattern}'")
+                return deleted
+        except Exception as e:
+            print(f"Cache clear error: {e}")
+        return 0
+
+    async def aclose(self) -> None:
+        """Close the async connection pool (app shutdown)."""
+        for client in (self.async_client, self.async_binary_client):
+            if client is not None:
+                await client.aclose()
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         if not self.enabled:
@@ -1,6 +1,6 @@
 """Configuration management."""
 
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -24,12 +24,103 @@ class Settings(BaseSettings):
     azure_openai_api_version: str = "2024-02-01"
     azure_embedding_deployment: str = "text-embedding-3-large"
     vector_dim: int = 1536
+    # Matryoshka mode: keep only the first N dims (re-normalized) of each
+    # embedding; indexes and local scoring use N dims (see app/matryoshka.py)
+    embedding_truncate_dim: Optional[int] = None
+
+    # ── Embedding provider ────────────────────────────────────────────────────
+    # "azure" = Azure OpenAI deployment above; "local" = deterministic hashed
+    # character n-grams (offline, for load tests/benchmarks — not semantic)
+    embedding_provider: Literal["azure", "local"] = "azure"
+    local_embedding_seed: int = 0
+
+    # ── Profile vectors ───────────────────────────────────────────────────────
+    # "phrases": normalized mean of per-skill phrase embeddings (each distinct
+    # phrase embedded once); "whole": embed the full skills string
+    profile_embedding_mode: Literal["phrases", "whole"] = "phrases"
+
+    # ── Reciprocal matching ───────────────────────────────────────────────────
+    # "search": two Azure AI Search top-50 queries, intersected; "local": exact
+    # scoring of every profile in process (see app/match_engine.py)
+    matching_engine: Literal["search", "local"] = "search"
+    # Local engine: each worker rebuilds its copy from the index this often, so
+    # writes served by other workers show up (0 = load once at startup)
+    matching_engine_reload_interval: int = 300
+    # Search path: candidates per direction start at the initial depth and
+    # double until `limit` reciprocal matches are found or the cap is hit
+    matching_initial_depth: int = 20
+    matching_max_depth: int = 200
+    # Precomputed per-user match table (Cosmos "matches" container) served by
+    # GET /match/{uid}; refreshed by scripts/refresh_matches.py, or in-process
+    # every N seconds when match_table_refresh_interval > 0
+    match_table_top_k: int = 50
+    match_table_refresh_interval: int = 0
+    # Queue profile changes (Cosmos "match_updates") so
+    # scripts/refresh_matches.py --follow patches the affected rows between
+    # full refreshes. Only enable it where that follower runs: nothing else
+    # drains the queue, and every profile write pays for the extra item.
+    match_table_incremental: bool = False
+    # Indirect swap cycles (A teaches B, B teaches C, C teaches A) served by
+    # GET /match/cycles/{uid}; refreshed by scripts/find_swap_cycles.py.
+    # Edges need a teach score >= the min score; each profile keeps its best
+    # max_degree outgoing and incoming edges (see app/swap_cycles.py)
+    swap_cycle_min_score: float = 0.7
+    swap_cycle_max_degree: int = 15
+    swap_cycle_max_length: int = 4
+    swap_cycles_per_user: int = 10
+
+    # ── Embedding cache (in-process LRU in front of Redis) ────────────────────
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_ttl: int = 7 * 24 * 3600  # Embeddings are deterministic; keep a week
+    # See app/vector_codec.py
+    embedding_cache_codec: Literal["float32", "float16", "int8"] = "float16"
+
+    # ── Embedding micro-batching (coalesce concurrent encode() calls) ─────────
+    embedding_batch_enabled: bool = True
+    embedding_batch_max_wait_ms: float = 5.0
+    embedding_batch_max_size: int = 64
+
+    # ── Embedding request limits and throttling ──────────────────────────────
+    embedding_max_items_per_request: int = 2048  # Azure OpenAI hard limit
+    embedding_max_tokens_per_input: int = 8191
+    embedding_max_tokens_per_request: int = 300_000
+    embedding_max_concurrency: int = 4  # Chunks of one encode_batch in flight at once
+    embedding_max_retries: int = 5  # On 429 / 5xx / connection errors
+    embedding_retry_base_delay: float = 0.5
+    embedding_retry_max_delay: float = 30.0
 
     # ── Azure AI Search (for vector storage and search) ───────────────────────
+    # "azure": Azure AI Search; "local": exact in-process index with the same
+    # interface (app/local_search.py) for single-node deployments and tests.
+    # The local index lives in memory; LOCAL_SEARCH_SNAPSHOT_DIR persists it
+    # across restarts (saved at shutdown, loaded at startup)
+    search_backend: Literal["azure", "local"] = "azure"
+    local_search_snapshot_dir: Optional[str] = None
     azure_search_endpoint: Optional[str] = None
     azure_search_api_key: Optional[str] = None
     azure_search_index: str = "swap-users"
     azure_search_skills_index: str = "swap-skills"
+    # Index schemas are fingerprinted (see app/azure_search.py) and only pushed
+    # with create_or_update_index when the fingerprint differs from the one
+    # recorded in Redis (or, without one, the live definition differs).
+    # "on_change": the app lifespan applies changed schemas;
+    # "never": startup only warns, run scripts/migrate_search_indexes.py instead.
+    search_index_migrate: Literal["on_change", "never"] = "on_change"
+    search_index_fingerprint_ttl: int = 30 * 24 * 3600
+    # Write-behind indexing (app/index_writer.py): profile/skill upserts and
+    # deletes are queued and sent in batches instead of inside the request.
+    # Off by default: buffered writes are only safe in a long-running process
+    # (the Docker image and App Service turn it on). A serverless instance can
+    # freeze or exit with writes still queued, and reads of a just-written
+    # profile (uid matching, /search/similar) may see the previous vectors.
+    search_write_behind_enabled: bool = False
+    search_write_batch_size: int = 100  # Azure accepts up to 1000 actions / 16 MB
+    search_write_flush_interval_ms: float = 1000.0
+    search_write_max_retries: int = 3
+    # Hybrid retrieval (retrieval="hybrid" on /search and /search/skills):
+    # vector neighbours per field handed to reciprocal-rank fusion with BM25
+    search_hybrid_k: int = 50
 
     # ── Redis Cache ───────────────────────────────────────────────────────────
     redis_enabled: bool = True
@@ -51,6 +142,11 @@ class Settings(BaseSettings):
     app_name: str = "$wap"
     debug: bool = False
 
+    @property
+    def embedding_dim(self) -> int:
+        """Dimension of stored/searched vectors (truncated in Matryoshka mode)."""
+        return self.embedding_truncate_dim or self.vector_dim
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 import uuid
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set
 from datetime import datetime, timezone
 
+from azure.core import MatchConditions
 from azure.cosmos import CosmosClient, PartitionKey, exceptions as cosmos_exc
+from azure.cosmos.aio import CosmosClient as AsyncCosmosClient
 
 from app.config import settings
 
@@ -31,6 +34,9 @@ class CosmosService:
         "reports": "/uid",
         "points_transactions": "/uid",
         "skills": "/posted_by",
+        "matches": "/uid",
+        "match_updates": "/uid",
+        "swap_cycles": "/uid",
     }
 
     def __init__(self) -> None:
@@ -136,6 +142,14 @@ class CosmosService:
         )
         return [_clean(i) for i in items]
 
+    def iter_profiles(self, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Every profile, fetched page_size at a time (the SDK follows continuation tokens)."""
+        items = self._container("profiles").query_items(
+            query="SELECT * FROM c", enable_cross_partition_query=True, max_item_count=page_size
+        )
+        for item in items:
+            yield _clean(item)
+
     def get_profile_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Query profiles by email address."""
         query = "SELECT * FROM c WHERE c.email = @email OFFSET 0 LIMIT 1"
@@ -402,6 +416,31 @@ class CosmosService:
         block_rev = self.get_block(uid2, uid1)
         return block_rev is not None
 
+    def get_excluded_uids(self, uid: str) -> Set[str]:
+        """
+        Profiles never worth showing uid as a match or search result.
+
+        uid itself, users uid blocked or was blocked by (check_blocked), and
+        recipients of uid's pending requests (check_pending_request_exists):
+        create_swap_request would reject all of them.
+        """
+        blocked = self._container("blocks").query_items(
+            query="SELECT c.blocked_uid FROM c WHERE c.blocker_uid = @uid",
+            parameters=[{"name": "@uid", "value": uid}],
+            partition_key=uid,
+        )
+        blocked_by = self._container("blocks").query_items(
+            query="SELECT c.blocker_uid FROM c WHERE c.blocked_uid = @uid",
+            parameters=[{"name": "@uid", "value": uid}],
+            enable_cross_partition_query=True,
+        )
+        pending = self._container("swap_requests").query_items(
+            query=_PENDING_RECIPIENTS_QUERY,
+            parameters=[{"name": "@uid", "value": uid}],
+            partition_key=uid,
+        )
+        return _excluded_uids(uid, blocked, blocked_by, pending)
+
     # ── Reports ───────────────────────────────────────────────────────────────
 
     def create_report(self, reporter_uid: str, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -515,6 +554,140 @@ class CosmosService:
         """Delete a skill document."""
         self._container("skills").delete_item(item=skill_id, partition_key=posted_by)
 
+    # ── Precomputed match table ───────────────────────────────────────────────
+
+    def upsert_match_row(
+        self,
+        uid: str,
+        matches: List[Dict[str, Any]],
+        computed_at: Optional[str] = None,
+        floor: float = 0.0,
+    ) -> Dict[str, Any]:
+        """
+        Store uid's precomputed reciprocal matches with a freshness timestamp.
+
+        match_uids lets incremental updates find the rows a profile appears in;
+        floor is the lowest score a new candidate must beat to enter the row.
+        """
+        doc = {
+            "id": uid,
+            "uid": uid,
+            "matches": matches,
+            "match_uids": [m.get("uid") for m in matches],
+            "floor": floor,
+            "computed_at": computed_at or _utcnow_iso(),
+        }
+        self._container("matches").upsert_item(body=doc)
+        return doc
+
+    def get_match_row(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Fetch uid's precomputed matches. Returns None if never computed."""
+        try:
+            doc = self._container("matches").read_item(item=uid, partition_key=uid)
+            return _clean(doc)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            return None
+
+    def delete_match_row(self, uid: str) -> None:
+        """Drop uid's precomputed matches (no-op if absent)."""
+        try:
+            self._container("matches").delete_item(item=uid, partition_key=uid)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            pass
+
+    def query_match_rows_containing(self, uid: str) -> List[Dict[str, Any]]:
+        """Match rows in which uid currently appears."""
+        query = "SELECT * FROM c WHERE ARRAY_CONTAINS(c.match_uids, @uid)"
+        params = [{"name": "@uid", "value": uid}]
+        items = list(
+            self._container("matches").query_items(
+                query=query, parameters=params, enable_cross_partition_query=True
+            )
+        )
+        return [_clean(i) for i in items]
+
+    def list_match_floors(self) -> Dict[str, float]:
+        """uid → floor for every stored match row (small projection)."""
+        items = self._container("matches").query_items(
+            query="SELECT c.uid, c.floor FROM c", enable_cross_partition_query=True
+        )
+        return {i["uid"]: i.get("floor", 0.0) for i in items}
+
+    # ── Match table update queue ──────────────────────────────────────────────
+    # Web workers record which profiles changed; one process applies them to
+    # the match table (app.match_table.follow_match_updates).
+
+    def queue_match_update(self, uid: str, deleted: bool = False) -> None:
+        """Record that uid's vectors changed, or that it was deleted (repeats coalesce)."""
+        doc = {"id": uid, "uid": uid, "deleted": deleted, "queued_at": _utcnow_iso()}
+        self._container("match_updates").upsert_item(body=doc)
+
+    def list_match_updates(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Queued match updates, oldest first. Raw items: _etag is kept for delete_match_update."""
+        query = f"SELECT * FROM c ORDER BY c.queued_at OFFSET 0 LIMIT {limit}"
+        return list(
+            self._container("match_updates").query_items(
+                query=query, enable_cross_partition_query=True
+            )
+        )
+
+    def delete_match_update(self, item: Dict[str, Any]) -> bool:
+        """Remove an applied update unless it was queued again since it was read."""
+        try:
+            self._container("match_updates").delete_item(
+                item=item["id"],
+                partition_key=item["uid"],
+                etag=item.get("_etag"),
+                match_condition=MatchConditions.IfNotModified,
+            )
+        except cosmos_exc.CosmosResourceNotFoundError:
+            pass
+        except cosmos_exc.CosmosHttpResponseError as exc:
+            if getattr(exc, "status_code", None) == 412:
+                return False  # Re-queued meanwhile: applied again next time
+            raise
+        return True
+
+    # ── Swap cycles ───────────────────────────────────────────────────────────
+
+    def upsert_cycle_row(
+        self,
+        uid: str,
+        cycles: List[Dict[str, Any]],
+        computed_at: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Store uid's best indirect swap cycles (see app/swap_cycles.py)."""
+        doc = {
+            "id": uid,
+            "uid": uid,
+            "cycles": cycles,
+            "computed_at": computed_at or _utcnow_iso(),
+        }
+        self._container("swap_cycles").upsert_item(body=doc)
+        return doc
+
+    def get_cycle_row(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Fetch uid's swap cycles. Returns None if never computed."""
+        try:
+            doc = self._container("swap_cycles").read_item(item=uid, partition_key=uid)
+            return _clean(doc)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            return None
+
+    def list_cycle_row_stamps(self) -> Dict[str, str]:
+        """uid → computed_at for every stored swap cycle row (small projection)."""
+        items = self._container("swap_cycles").query_items(
+            query="SELECT c.uid, c.computed_at FROM c", enable_cross_partition_query=True
+        )
+        return {i["uid"]: i.get("computed_at", "") for i in items}
+
+    def delete_cycle_row(self, uid: str) -> None:
+        """Drop uid's swap cycles (no-op if absent)."""
+        try:
+            self._container("swap_cycles").delete_item(item=uid, partition_key=uid)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            pass
+
     # ── Generic helpers (used by migration script) ────────────────────────────
 
     def get_container(self, name: str):
@@ -526,8 +699,216 @@ class CosmosService:
         self._container(container_name).upsert_item(body=item)
 
 
+class AsyncCosmosService:
+    """
+    Async (azure.cosmos.aio) counterpart of CosmosService for async def routes.
+
+    Covers the read-heavy operations used by the hot endpoints (profiles,
+    search reindexing, matching, conversation reads). Databases and containers
+    are created by CosmosService at startup, so this class never provisions.
+    """
+
+    def __init__(self) -> None:
+        conn_str = getattr(settings, "cosmos_connection_string", None) or os.getenv(
+            "COSMOS_CONNECTION_STRING"
+        )
+        if not conn_str:
+            raise RuntimeError(
+                "COSMOS_CONNECTION_STRING is not set. "
+                "Provide it via the environment or Key Vault."
+            )
+        self._client = AsyncCosmosClient.from_connection_string(conn_str)
+        db_name = getattr(settings, "cosmos_database_name", CosmosService.DATABASE_NAME)
+        self._db = self._client.get_database_client(db_name)
+
+    def _container(self, name: str):
+        return self._db.get_container_client(name)
+
+    async def _query(self, container: str, query: str, params=None, partition_key=None):
+        kwargs: Dict[str, Any] = {"query": query}
+        if params:
+            kwargs["parameters"] = params
+        if partition_key is not None:
+            kwargs["partition_key"] = partition_key
+        return [_clean(i) async for i in self._container(container).query_items(**kwargs)]
+
+    # ── Profiles ──────────────────────────────────────────────────────────────
+
+    async def get_profile(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Fetch a profile by UID. Returns None if not found."""
+        try:
+            doc = await self._container("profiles").read_item(item=uid, partition_key=uid)
+            return _clean(doc)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            return None
+
+    async def update_profile(self, uid: str, profile_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Partially update an existing profile (merge patch)."""
+        existing = await self.get_profile(uid)
+        if existing is None:
+            raise KeyError(f"Profile {uid} not found")
+
+        profile_data["updated_at"] = _utcnow_iso()
+        merged = {**existing, **profile_data, "id": uid, "uid": uid}
+        await self._container("profiles").replace_item(item=uid, body=merged)
+        return _clean(merged)
+
+    async def upsert_profile(self, uid: str, profile_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create or update a profile."""
+        existing = await self.get_profile(uid)
+        now = _utcnow_iso()
+
+        if existing:
+            profile_data["updated_at"] = now
+            profile_data.setdefault("created_at", existing.get("created_at", now))
+        else:
+            profile_data["created_at"] = now
+            profile_data["updated_at"] = now
+
+        doc = {"id": uid, "uid": uid, **profile_data}
+        await self._container("profiles").upsert_item(body=doc)
+        return _clean(doc)
+
+    async def delete_profile(self, uid: str) -> bool:
+        """Delete a profile. Returns True on success."""
+        await self._container("profiles").delete_item(item=uid, partition_key=uid)
+        return True
+
+    async def get_profile_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Query profiles by email address."""
+        items = await self._query(
+            "profiles",
+            "SELECT * FROM c WHERE c.email = @email OFFSET 0 LIMIT 1",
+            [{"name": "@email", "value": email}],
+        )
+        return items[0] if items else None
+
+    # ── Skills ────────────────────────────────────────────────────────────────
+
+    async def get_skills_by_user(self, uid: str) -> List[Dict[str, Any]]:
+        """List all skills posted by a user."""
+        return await self._query(
+            "skills",
+            "SELECT * FROM c WHERE c.posted_by = @uid ORDER BY c.created_at DESC",
+            [{"name": "@uid", "value": uid}],
+            partition_key=uid,
+        )
+
+    # ── Conversations / messages (reads) ──────────────────────────────────────
+
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a conversation by ID. Returns None if not found."""
+        try:
+            doc = await self._container("conversations").read_item(
+                item=conversation_id, partition_key=conversation_id
+            )
+            return _clean(doc)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            return None
+
+    async def query_conversations_for_user(self, uid: str) -> List[Dict[str, Any]]:
+        """Return all conversations where uid is a participant."""
+        return await self._query(
+            "conversations",
+            "SELECT * FROM c WHERE ARRAY_CONTAINS(c.participant_uids, @uid)",
+            [{"name": "@uid", "value": uid}],
+        )
+
+    async def get_messages(
+        self, conversation_id: str, limit: int = 50, before: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch messages for a conversation, newest first."""
+        params = [{"name": "@conv_id", "value": conversation_id}]
+        cursor = ""
+        if before:
+            cursor = " AND c.sent_at < @before"
+            params.append({"name": "@before", "value": before})
+        query = (
+            f"SELECT * FROM c WHERE c.conversation_id = @conv_id{cursor}"
+            f" ORDER BY c.sent_at DESC OFFSET 0 LIMIT {limit}"
+        )
+        return await self._query("messages", query, params, partition_key=conversation_id)
+
+    # ── Blocks / swap requests (reads) ────────────────────────────────────────
+
+    async def list_blocks_by_user(self, blocker_uid: str) -> List[Dict[str, Any]]:
+        """List all blocks created by blocker_uid."""
+        results = await self._query(
+            "blocks",
+            "SELECT * FROM c WHERE c.blocker_uid = @uid",
+            [{"name": "@uid", "value": blocker_uid}],
+            partition_key=blocker_uid,
+        )
+        results.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        return results
+
+    async def query_outgoing_requests(
+        self, requester_uid: str, status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Requests sent BY requester_uid (within partition)."""
+        query = "SELECT * FROM c WHERE c.requester_uid = @uid"
+        params = [{"name": "@uid", "value": requester_uid}]
+        if status:
+            query += " AND c.status = @status"
+            params.append({"name": "@status", "value": status})
+        results = await self._query("swap_requests", query, params, partition_key=requester_uid)
+        results.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        return results
+
+    async def get_excluded_uids(self, uid: str) -> Set[str]:
+        """Profiles never worth showing uid (see CosmosService.get_excluded_uids)."""
+        params = [{"name": "@uid", "value": uid}]
+        blocked, blocked_by, pending = await asyncio.gather(
+            self._query(
+                "blocks",
+                "SELECT c.blocked_uid FROM c WHERE c.blocker_uid = @uid",
+                params,
+                partition_key=uid,
+            ),
+            self._query("blocks", "SELECT c.blocker_uid FROM c WHERE c.blocked_uid = @uid", params),
+            self._query("swap_requests", _PENDING_RECIPIENTS_QUERY, params, partition_key=uid),
+        )
+        return _excluded_uids(uid, blocked, blocked_by, pending)
+
+    # ── Precomputed match table ───────────────────────────────────────────────
+
+    async def get_match_row(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Fetch uid's precomputed matches. Returns None if never computed."""
+        try:
+            doc = await self._container("matches").read_item(item=uid, partition_key=uid)
+            return _clean(doc)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            return None
+
+    async def get_cycle_row(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Fetch uid's swap cycles. Returns None if never computed."""
+        try:
+            doc = await self._container("swap_cycles").read_item(item=uid, partition_key=uid)
+            return _clean(doc)
+        except cosmos_exc.CosmosResourceNotFoundError:
+            return None
+
+    async def close(self) -> None:
+        """Close the underlying aiohttp session (app shutdown)."""
+        await self._client.close()
+
+
 # ── Internal helpers ──────────────────────────────────────────────────────────
 
+_PENDING_RECIPIENTS_QUERY = (
+    "SELECT c.recipient_uid FROM c WHERE c.requester_uid = @uid AND c.status = 'pending'"
+)
+
+
+def _excluded_uids(uid: str, blocked, blocked_by, pending) -> Set[str]:
+    excluded = {uid}
+    excluded.update(i.get("blocked_uid") for i in blocked)
+    excluded.update(i.get("blocker_uid") for i in blocked_by)
+    excluded.update(i.get("recipient_uid") for i in pending)
+    excluded.discard(None)
+    return excluded
+
+
 def _clean(doc: Dict[str, Any]) -> Dict[str, Any]:
     """Remove Cosmos internal metadata fields before returning to callers."""
     cosmos_keys = {"_rid", "_self", "_etag", "_attachments", "_ts"}
@@ -545,3 +926,14 @@ def get_cosmos_service() -> CosmosService:
     if _cosmos_service is None:
         _cosmos_service = CosmosService()
     return _cosmos_service
+
+
+_async_cosmos_service: Optional[AsyncCosmosService] = None
+
+
+def get_async_cosmos_service() -> AsyncCosmosService:
+    """Return (or lazily create) the singleton AsyncCosmosService."""
+    global _async_cosmos_service
+    if _async_cosmos_service is None:
+        _async_cosmos_service = AsyncCosmosService()
+    return _async_cosmos_service
@@ -0,0 +1,231 @@
+"""
+Cross-request micro-batching for single-text embedding calls.
+
+Concurrent requests (/search, /match/reciprocal, /profiles/upsert) each need one
+embedding. Instead of one Azure OpenAI round-trip per request, encode() calls that
+arrive within a few milliseconds of each other are coalesced into one batched call
+and every caller gets back its own vector.
+
+A batch is flushed when it reaches max_batch texts or when the oldest queued text
+has waited max_wait_ms, whichever comes first.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds of the batch-size histogram buckets
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _BatchStats:
+    """Thread-safe batch-size / queue-wait counters shared by both batchers."""
+
+    def __init__(self, max_wait: float, max_batch: int):
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.total_wait_seconds = 0.0
+        self.errors = 0
+        self._histogram = {bucket: 0 for bucket in _SIZE_BUCKETS}
+
+    def record(self, queued_at: List[float], started: float) -> None:
+        size = len(queued_at)
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            self.total_wait_seconds += sum(started - queued for queued in queued_at)
+            for bucket in _SIZE_BUCKETS:
+                if size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            else:
+                self._histogram[_SIZE_BUCKETS[-1]] += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_queue_wait_ms": (
+                    round(self.total_wait_seconds / self.items * 1000, 3) if self.items else 0.0
+                ),
+                "batch_size_histogram": {
+                    f"<={bucket}": count for bucket, count in self._histogram.items()
+                },
+                "max_wait_ms": self.max_wait * 1000,
+                "max_batch": self.max_batch,
+            }
+
+
+class EmbeddingBatcher:
+    """Coalesces individual texts into batched embedding calls."""
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[str]], List[List[float]]],
+        max_wait_ms: float = 5.0,
+        max_batch: int = 64,
+        max_inflight: int = 4,
+    ):
+        """
+        Args:
+            flush_fn: Embeds a list of texts, returning vectors in the same order
+            max_wait_ms: Longest a queued text waits for companions
+            max_batch: Largest batch sent in one call
+            max_inflight: Batches that may be in flight at once
+        """
+        self.flush_fn = flush_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+
+        self.stats = _BatchStats(self.max_wait, self.max_batch)
+
+        self._pending: List[Tuple[str, Future, float]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_inflight), thread_name_prefix="embed-batch"
+        )
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text; the returned future resolves to its vector."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            self._pending.append((text, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """Queue a text and block until its vector is ready."""
+        return self.submit(text).result(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+
+                deadline = self._pending[0][2] + self.max_wait
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+
+            self._executor.submit(self._flush, batch)
+
+    def _flush(self, batch: List[Tuple[str, Future, float]]) -> None:
+        started = time.monotonic()
+        texts = [text for text, _, _ in batch]
+        try:
+            vectors = self.flush_fn(texts)
+        except Exception as exc:
+            self.stats.record_error()
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+
+        for (_, future, _), vec in zip(batch, vectors):
+            future.set_result(vec)
+        self.stats.record([queued for _, _, queued in batch], started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch-size metrics."""
+        return self.stats.snapshot()
+
+    def close(self) -> None:
+        """Flush whatever is queued and stop the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self._executor.shutdown(wait=True)
+
+
+class AsyncEmbeddingBatcher:
+    """
+    asyncio-native counterpart of EmbeddingBatcher for async def routes.
+
+    Must be used from a single event loop. Flushes run as tasks, so several
+    batches can be in flight while the next one is collected.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_wait_ms: float = 5.0,
+        max_batch: int = 64,
+    ):
+        self.flush_fn = flush_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.stats = _BatchStats(self.max_wait, self.max_batch)
+
+    async def encode(self, text: str) -> List[float]:
+        """Queue a text and wait for its vector."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.monotonic()))
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            task = asyncio.ensure_future(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        started = time.monotonic()
+        try:
+            vectors = await self.flush_fn([text for text, _, _ in batch])
+        except Exception as exc:
+            self.stats.record_error()
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future, _), vec in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vec)
+        self.stats.record([queued for _, _, queued in batch], started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch-size metrics."""
+        return self.stats.snapshot()
@@ -0,0 +1,181 @@
+"""
+Content-addressed embedding cache.
+
+Sits in front of the embedding provider so identical texts ("general help",
+popular search queries, common skills) are only ever embedded once.
+
+Two tiers:
+    1. Bounded in-process LRU (per worker, ~0.01ms)
+    2. Redis via CacheService (shared across workers, ~1-5ms)
+
+Both tiers hold vectors as compact bytes (app.vector_codec, float16 by default:
+~3 KB per 1536-dim vector instead of ~30 KB of JSON).
+
+Keys are a SHA-256 of (normalized text, deployment, dimension, codec), so
+changing the embedding deployment, vector size or codec never serves stale
+vectors.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from app import vector_codec
+from app.cache import CacheService
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so trivially different texts share a key."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """Two-tier (LRU + Redis) cache of embedding vectors."""
+
+    KEY_PREFIX = "emb"
+
+    def __init__(
+        self,
+        deployment: str,
+        dimension: int,
+        max_entries: int = 4096,
+        ttl: Optional[int] = None,
+        cache_service: Optional[CacheService] = None,
+        codec: str = "float16",
+    ):
+        if codec not in vector_codec.CODECS:
+            raise ValueError(f"Unknown vector codec: {codec!r}")
+        self.deployment = deployment
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_service = cache_service
+        self.codec = codec
+
+        # Vectors are held encoded (~3KB float16 / ~1.5KB int8 for 1536 dims)
+        # rather than as Python float lists (~50KB), so the LRU stays small.
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.lru_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def key_for(self, text: str) -> str:
+        """Content-addressed key for a (normalized) text."""
+        material = (
+            f"{self.deployment}\x1f{self.dimension}\x1f{self.codec}\x1f{normalize_text(text)}"
+        )
+        digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up vectors for texts. Order is preserved; misses are None.
+
+        LRU is checked first, then a single Redis MGET for whatever is left.
+        Redis hits are promoted into the LRU.
+        """
+        keys, results, remote_idx = self._lookup_local(texts)
+        if remote_idx and self.cache_service is not None:
+            remote = self.cache_service.get_bytes_many([keys[i] for i in remote_idx])
+            self._accept_remote(keys, results, remote_idx, remote)
+        self._count_misses(results)
+        return results
+
+    async def aget_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Async variant of get_many (Redis tier uses the async client)."""
+        keys, results, remote_idx = self._lookup_local(texts)
+        if remote_idx and self.cache_service is not None:
+            remote = await self.cache_service.aget_bytes_many([keys[i] for i in remote_idx])
+            self._accept_remote(keys, results, remote_idx, remote)
+        self._count_misses(results)
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        """Store freshly computed vectors in both tiers."""
+        items = self._remember_many(texts, vectors)
+        if items and self.cache_service is not None:
+            self.cache_service.set_bytes_many(items, ttl=self.ttl)
+
+    async def aput_many(self, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        """Async variant of put_many."""
+        items = self._remember_many(texts, vectors)
+        if items and self.cache_service is not None:
+            await self.cache_service.aset_bytes_many(items, ttl=self.ttl)
+
+    def _lookup_local(self, texts: Sequence[str]):
+        keys = [self.key_for(t) for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        remote_idx: List[int] = []
+
+        hits: Dict[int, bytes] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                data = self._lru.get(key)
+                if data is not None:
+                    self._lru.move_to_end(key)
+                    hits[i] = data
+                    self.lru_hits += 1
+                else:
+                    remote_idx.append(i)
+
+        for i, data in hits.items():
+            results[i] = vector_codec.decode(data).tolist()
+        return keys, results, remote_idx
+
+    def _accept_remote(self, keys, results, remote_idx, remote) -> None:
+        for i, data in zip(remote_idx, remote):
+            if not data or vector_codec.codec_of(data) != self.codec:
+                continue
+            vec = vector_codec.decode(data, self.dimension)
+            if vec is None:
+                continue
+            results[i] = vec.tolist()
+            self._remember(keys[i], data)
+            with self._lock:
+                self.redis_hits += 1
+
+    def _count_misses(self, results) -> None:
+        with self._lock:
+            self.misses += sum(1 for r in results if r is None)
+
+    def _remember_many(self, texts, vectors) -> Dict[str, bytes]:
+        items: Dict[str, bytes] = {}
+        for text, vec in zip(texts, vectors):
+            key = self.key_for(text)
+            data = vector_codec.encode(vec, self.codec)
+            self._remember(key, data)
+            items[key] = data
+        return items
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[key] = data
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis entries expire via TTL)."""
+        with self._lock:
+            self._lru.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for both tiers."""
+        with self._lock:
+            hits = self.lru_hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                "codec": self.codec,
+                "lru_entries": len(self._lru),
+                "lru_bytes": sum(len(data) for data in self._lru.values()),
+                "lru_max_entries": self.max_entries,
+                "lru_hits": self.lru_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
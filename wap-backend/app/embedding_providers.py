@@ -0,0 +1,180 @@
+"""
+Embedding providers used by EmbeddingService.
+
+    azure  — Azure OpenAI deployment (production)
+    local  — deterministic hashed character n-grams, fully offline
+
+The local provider exists so matching and search can be load-tested without
+spending Azure OpenAI quota. Its vectors are not semantically comparable to the
+Azure ones (only lexical overlap is captured), so never mix the two in one index.
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class EmbeddingProvider(ABC):
+    """Turns a batch of texts into vectors (same order, one per text)."""
+
+    name = "base"
+
+    # Request limits (None = unlimited); EmbeddingService chunks/truncates to fit
+    max_items_per_request: Optional[int] = None
+    max_tokens_per_input: Optional[int] = None
+    max_tokens_per_request: Optional[int] = None
+
+    def __init__(self, model_id: str, dimension: int):
+        self.model_id = model_id  # Namespaces the embedding cache
+        self.dimension = dimension
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Vectors for texts, in order (blocking)."""
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts)
+
+    async def aclose(self) -> None:
+        """Release network resources (app shutdown)."""
+
+
+class AzureOpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    Azure OpenAI embeddings deployment.
+
+    Pass an AzureOpenAI client for embed() or an AsyncAzureOpenAI client for aembed().
+    """
+
+    name = "azure"
+
+    def __init__(
+        self,
+        client,
+        deployment: str,
+        dimension: int,
+        max_items_per_request: int = 2048,
+        max_tokens_per_input: int = 8191,
+        max_tokens_per_request: int = 300_000,
+    ):
+        super().__init__(model_id=deployment, dimension=dimension)
+        self.client = client
+        self.deployment = deployment
+        self.max_items_per_request = max_items_per_request
+        self.max_tokens_per_input = max_tokens_per_input
+        self.max_tokens_per_request = max_tokens_per_request
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(
+            input=texts,
+            model=self.deployment,
+            dimensions=self.dimension,
+        )
+        return [item.embedding for item in response.data]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(
+            input=texts,
+            model=self.deployment,
+            dimensions=self.dimension,
+        )
+        return [item.embedding for item in response.data]
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+# 64-bit FNV-1a constants and the murmur3 finalizer multiplier
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_FMIX = np.uint64(0xFF51AFD7ED558CCD)
+_SEPARATOR = 0  # NUL byte between texts; n-grams never span it
+
+
+class LocalHashEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic offline embeddings from hashed character n-grams.
+
+    Each text is lower-cased and padded with spaces, its UTF-8 byte n-grams are
+    hashed (FNV-1a + murmur finalizer, seeded) into `dimension` buckets with a
+    ±1 sign, and the bucket counts are L2-normalized. Texts that share words
+    share n-grams, so cosine similarity tracks lexical overlap.
+
+    Hashing is vectorized over a whole batch at once; roughly 100k short
+    profile texts embed in a couple of seconds with embed_array().
+    """
+
+    name = "local"
+    CHUNK_SIZE = 2048  # Texts hashed per vectorized pass (bounds peak memory)
+
+    def __init__(
+        self,
+        dimension: int,
+        ngram_sizes: Sequence[int] = (3, 4, 5),
+        seed: int = 0,
+    ):
+        self.ngram_sizes: Tuple[int, ...] = tuple(sorted(set(ngram_sizes)))
+        self.seed = seed
+        sizes = "-".join(str(n) for n in self.ngram_sizes)
+        super().__init__(model_id=f"local-hash-v1-n{sizes}-s{seed}", dimension=dimension)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dimension) float32 matrix."""
+        out = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), self.CHUNK_SIZE):
+            chunk = texts[start : start + self.CHUNK_SIZE]
+            out[start : start + len(chunk)] = self._embed_chunk(chunk)
+        return out
+
+    def _embed_chunk(self, texts: Sequence[str]) -> np.ndarray:
+        n_texts = len(texts)
+        dim = self.dimension
+
+        # One NUL-separated byte buffer for the whole chunk
+        encoded = [f" {' '.join(t.lower().split())} ".encode("utf-8") for t in texts]
+        buf = np.frombuffer(b"\x00".join(encoded) + b"\x00", dtype=np.uint8)
+        lengths = np.fromiter((len(e) + 1 for e in encoded), dtype=np.int64, count=n_texts)
+        row_of_byte = np.repeat(np.arange(n_texts, dtype=np.int64), lengths)
+
+        # seps[k] = number of separators in buf[:k]
+        seps = np.concatenate(([0], np.cumsum(buf == _SEPARATOR)))
+
+        flat_idx = []
+        signs = []
+        for n in self.ngram_sizes:
+            n_pos = len(buf) - n + 1
+            if n_pos <= 0:
+                continue
+            starts = np.arange(n_pos)
+            valid = seps[starts + n] == seps[starts]
+            starts = starts[valid]
+            if not len(starts):
+                continue
+
+            h = np.full(len(starts), _FNV_OFFSET ^ np.uint64(self.seed * 1000003 + n))
+            for k in range(n):
+                h ^= buf[starts + k].astype(np.uint64)
+                h *= _FNV_PRIME
+            h ^= h >> np.uint64(33)
+            h *= _FMIX
+            h ^= h >> np.uint64(33)
+
+            flat_idx.append(row_of_byte[starts] * dim + (h % np.uint64(dim)).astype(np.int64))
+            signs.append(np.where(h >> np.uint64(63), -1.0, 1.0))
+
+        if not flat_idx:
+            return np.zeros((n_texts, dim), dtype=np.float32)
+
+        counts = np.bincount(
+            np.concatenate(flat_idx),
+            weights=np.concatenate(signs),
+            minlength=n_texts * dim,
+        ).reshape(n_texts, dim)
+
+        norms = np.linalg.norm(counts, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (counts / norms).astype(np.float32)
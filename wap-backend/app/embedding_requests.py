@@ -0,0 +1,178 @@
+"""
+Provider-legal chunking and throttling retries for embedding requests.
+
+Azure OpenAI rejects embedding requests with more than 2048 inputs, any input
+over 8191 tokens, or too many tokens in total, and answers 429 when the
+deployment's TPM/RPM quota is exhausted. EmbeddingService uses these helpers to
+split large batches into legal chunks (run concurrently) and to retry
+throttled / transient failures with jittered exponential backoff.
+
+Token counts are estimated from UTF-8 length (no tokenizer dependency). The
+estimate of 1 token per 3 bytes over-counts typical English (~4 bytes/token),
+so chunks stay under the limits with some headroom.
+"""
+
+import asyncio
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+BYTES_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate for text."""
+    return max(1, math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text so estimate_tokens(text) <= max_tokens (on a character boundary)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    raw = text.encode("utf-8")[: max_tokens * BYTES_PER_TOKEN]
+    return raw.decode("utf-8", errors="ignore")
+
+
+def plan_chunks(
+    texts: List[str],
+    max_items: Optional[int],
+    max_tokens: Optional[int],
+) -> List[Tuple[int, int]]:
+    """
+    Split texts into contiguous [start, end) ranges that respect both limits.
+
+    Contiguous ranges keep results trivially in input order when the chunks are
+    embedded concurrently and concatenated.
+
+    Args:
+        texts: Inputs (already truncated to the per-input limit)
+        max_items: Most inputs per request (None = unlimited)
+        max_tokens: Most estimated tokens per request (None = unlimited)
+
+    Returns:
+        List of (start, end) index ranges covering texts
+    """
+    if max_items is None and max_tokens is None:
+        return [(0, len(texts))] if texts else []
+
+    max_items = max_items or len(texts)
+    max_tokens = max_tokens or math.inf
+    chunks: List[Tuple[int, int]] = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if i > start and (i - start >= max_items or tokens + cost > max_tokens):
+            chunks.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        chunks.append((start, len(texts)))
+    return chunks
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for throttled (429) and transient (5xx) errors."""
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        on_retry: Optional[Callable[[Exception, float], None]] = None,
+    ):
+        """
+        Args:
+            max_retries: Retries after the first attempt (0 disables retrying)
+            base_delay: Backoff for the first retry, doubled each attempt
+            max_delay: Cap on any single wait (also caps Retry-After)
+            on_retry: Called with (error, delay) before each wait
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_retry = on_retry
+
+    def delay_for(self, attempt: int, exc: Exception) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        backoff = min(self.max_delay, self.base_delay * (2**attempt))
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            # The server knows when quota frees up; add a little jitter so
+            # throttled workers don't all come back in the same instant.
+            return min(self.max_delay, retry_after + random.uniform(0, self.base_delay))
+        # "Full jitter": spreads retries evenly over [0, backoff]
+        return random.uniform(0, backoff)
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run fn, retrying retryable errors."""
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                delay = self._before_retry(attempt, exc)
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of call (fn returns a fresh awaitable each attempt)."""
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                delay = self._before_retry(attempt, exc)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _before_retry(self, attempt: int, exc: Exception) -> float:
+        delay = self.delay_for(attempt, exc)
+        if self.on_retry:
+            self.on_retry(exc, delay)
+        return delay
+
+
+def is_retryable(exc: Exception) -> bool:
+    """429, 5xx, timeouts and dropped connections are worth retrying."""
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Parse retry-after-ms / Retry-After (seconds or HTTP date) from an API error."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return max(0.0, float(retry_ms) / 1000.0)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
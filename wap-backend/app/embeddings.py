@@ -1,61 +1,400 @@
-"""Embedding generation using Azure OpenAI."""
+"""Embedding generation (Azure OpenAI, or the offline local provider)."""
 
-from typing import List
-from openai import AzureOpenAI
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from openai import AzureOpenAI, AsyncAzureOpenAI
 
 from app.config import settings
+from app.cache import get_cache_service
+from app.embedding_cache import EmbeddingCache, normalize_text
+from app.embedding_batcher import AsyncEmbeddingBatcher, EmbeddingBatcher
+from app.embedding_providers import (
+    AzureOpenAIEmbeddingProvider,
+    EmbeddingProvider,
+    LocalHashEmbeddingProvider,
+)
+from app.embedding_requests import RetryPolicy, plan_chunks, truncate_to_tokens
+from app.matryoshka import truncate_list
+from app.skill_phrases import compose_vector, split_skill_phrases
 
 
-class EmbeddingService:
-    """Service for generating embeddings using Azure OpenAI."""
+def create_embedding_provider(use_async: bool = False) -> EmbeddingProvider:
+    """
+    Build the provider selected by settings.embedding_provider.
 
-    def __init__(self):
-        """Initialize the Azure OpenAI client."""
-        self.client = AzureOpenAI(
-            api_key=settings.azure_openai_api_key,
-            api_version=settings.azure_openai_api_version,
-            azure_endpoint=settings.azure_openai_endpoint,
+    In Matryoshka mode the Azure deployment is asked for embedding_dim directly
+    (the API truncates and re-normalizes server-side); the local provider keeps
+    producing vector_dim vectors, which EmbeddingService truncates.
+
+    Args:
+        use_async: Give the Azure provider an AsyncAzureOpenAI client (for aembed)
+
+    Returns:
+        EmbeddingProvider
+    """
+    if not 0 < settings.embedding_dim <= settings.vector_dim:
+        raise ValueError(
+            f"embedding_truncate_dim must be between 1 and vector_dim ({settings.vector_dim})"
+        )
+
+    if settings.embedding_provider == "local":
+        return LocalHashEmbeddingProvider(
+            dimension=settings.vector_dim,
+            seed=settings.local_embedding_seed,
+        )
+    if settings.embedding_provider != "azure":
+        raise ValueError(f"Unknown embedding provider: {settings.embedding_provider!r}")
+
+    client_cls = AsyncAzureOpenAI if use_async else AzureOpenAI
+    client = client_cls(
+        api_key=settings.azure_openai_api_key,
+        api_version=settings.azure_openai_api_version,
+        azure_endpoint=settings.azure_openai_endpoint,
+        max_retries=0,  # RetryPolicy owns backoff (honours Retry-After, counts retries)
+    )
+    return AzureOpenAIEmbeddingProvider(
+        client,
+        deployment=settings.azure_embedding_deployment,
+        dimension=settings.embedding_dim,
+        max_items_per_request=settings.embedding_max_items_per_request,
+        max_tokens_per_input=settings.embedding_max_tokens_per_input,
+        max_tokens_per_request=settings.embedding_max_tokens_per_request,
+    )
+
+
+class _EmbeddingServiceBase:
+    """Shared cache wiring and provider accounting for the sync/async services."""
+
+    def __init__(self, provider: EmbeddingProvider):
+        self.provider = provider
+        self.deployment = provider.model_id
+        self.dimension = settings.embedding_dim
+        self.cache: Optional[EmbeddingCache] = get_embedding_cache(provider.model_id)
+
+        # Large batches are split into provider-legal chunks, retried on 429/5xx
+        self.max_concurrency = max(1, settings.embedding_max_concurrency)
+        self.retry_policy = RetryPolicy(
+            max_retries=settings.embedding_max_retries,
+            base_delay=settings.embedding_retry_base_delay,
+            max_delay=settings.embedding_retry_max_delay,
+            on_retry=self._record_retry,
+        )
+
+        # Provider call accounting (used to estimate latency saved by the cache)
+        self._stats_lock = threading.Lock()
+        self.provider_calls = 0
+        self.provider_texts = 0
+        self.provider_seconds = 0.0
+        self.provider_retries = 0
+        self.provider_throttled = 0
+
+    def _record_provider_call(self, n_texts: int, elapsed: float) -> None:
+        with self._stats_lock:
+            self.provider_calls += 1
+            self.provider_texts += n_texts
+            self.provider_seconds += elapsed
+
+    def _record_retry(self, exc: Exception, delay: float) -> None:
+        status = getattr(exc, "status_code", None)
+        with self._stats_lock:
+            self.provider_retries += 1
+            if status == 429:
+                self.provider_throttled += 1
+        print(
+            f"⚠️ Embedding request failed ({status or type(exc).__name__}), "
+            f"retrying in {delay:.2f}s"
+        )
+
+    def _phrase_plan(self, texts: List[str]):
+        """Per-text phrase lists plus the distinct phrases to embed."""
+        if settings.profile_embedding_mode == "whole":
+            phrase_lists = [[normalize_text(t)] if t and t.strip() else [] for t in texts]
+        else:
+            phrase_lists = [split_skill_phrases(t or "") for t in texts]
+        unique = list(dict.fromkeys(p for phrases in phrase_lists for p in phrases))
+        return phrase_lists, unique
+
+    def _compose(self, phrase_lists, by_phrase) -> List[List[float]]:
+        return [
+            compose_vector([by_phrase[p] for p in phrases], self.dimension)
+            for phrases in phrase_lists
+        ]
+
+    def _fit_dimension(self, vectors: List[List[float]]) -> List[List[float]]:
+        """Matryoshka-truncate provider output that is wider than self.dimension."""
+        if self.provider.dimension > self.dimension:
+            return truncate_list(vectors, self.dimension)
+        return vectors
+
+    def _split(self, texts: List[str]) -> List[List[str]]:
+        """Truncate oversize inputs and split texts into provider-legal chunks."""
+        if self.provider.max_tokens_per_input:
+            texts = [truncate_to_tokens(t, self.provider.max_tokens_per_input) for t in texts]
+        ranges = plan_chunks(
+            texts,
+            max_items=self.provider.max_items_per_request,
+            max_tokens=self.provider.max_tokens_per_request,
         )
-        self.deployment = settings.azure_embedding_deployment
-        self.dimension = settings.vector_dim
+        return [texts[start:end] for start, end in ranges]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Provider usage plus cache hit/miss counters."""
+        with self._stats_lock:
+            calls = self.provider_calls
+            stats: Dict[str, Any] = {
+                "provider": self.provider.name,
+                "model": self.provider.model_id,
+                "provider_calls": calls,
+                "provider_texts": self.provider_texts,
+                "provider_retries": self.provider_retries,
+                "provider_throttled": self.provider_throttled,
+                "avg_provider_latency_ms": (
+                    round(self.provider_seconds / calls * 1000, 2) if calls else 0.0
+                ),
+            }
+
+        stats["batcher"] = self.batcher.get_stats() if self.batcher else {"enabled": False}
+
+        if self.cache:
+            cache_stats = self.cache.get_stats()
+            hits = cache_stats["lru_hits"] + cache_stats["redis_hits"]
+            cache_stats["estimated_latency_saved_ms"] = round(
+                hits * stats["avg_provider_latency_ms"], 2
+            )
+            stats["cache"] = cache_stats
+        else:
+            stats["cache"] = {"enabled": False}
+        return stats
+
+
+class EmbeddingService(_EmbeddingServiceBase):
+    """Service for generating embeddings (provider chosen via settings)."""
+
+    def __init__(self, provider: Optional[EmbeddingProvider] = None):
+        """Initialize the embedding provider (Azure OpenAI unless configured otherwise)."""
+        super().__init__(provider or create_embedding_provider())
+        self._chunk_executor: Optional[ThreadPoolExecutor] = None
+
+        # Coalesce concurrent single-text encode() calls into batched requests
+        self.batcher: Optional[EmbeddingBatcher] = None
+        if settings.embedding_batch_enabled:
+            self.batcher = EmbeddingBatcher(
+                flush_fn=self._embed_and_store,
+                max_wait_ms=settings.embedding_batch_max_wait_ms,
+                max_batch=settings.embedding_batch_max_size,
+            )
 
     def encode(self, text: str) -> List[float]:
         """
-        Generate embedding for text using Azure OpenAI.
+        Generate embedding for text.
+
+        Cached texts return immediately. Misses are queued on the micro-batcher
+        so concurrent requests share one provider call.
 
         Args:
             text: Input text to encode
 
         Returns:
-            1536-dimensional vector
+            embedding_dim-dimensional vector
         """
-        response = self.client.embeddings.create(
-            input=text,
-            model=self.deployment,
-            dimensions=self.dimension,
-        )
-        return response.data[0].embedding
+        if self.batcher is None:
+            return self.encode_batch([text])[0]
+
+        text = normalize_text(text)
+        if self.cache:
+            cached = self.cache.get_many([text])[0]
+            if cached is not None:
+                return cached
+        return self.batcher.encode(text)
 
     def encode_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts.
 
+        Cached texts are served without a network call; duplicates within the
+        batch are only sent to the provider once. Large inputs are split into
+        provider-legal chunks embedded concurrently (see _create_embeddings).
+
         Args:
             texts: List of texts to encode
 
         Returns:
-            List of vectors
+            List of vectors (same order as texts)
         """
-        response = self.client.embeddings.create(
-            input=texts,
-            model=self.deployment,
-            dimensions=self.dimension,
-        )
-        return [item.embedding for item in response.data]
+        normalized = [normalize_text(t) for t in texts]
+        cached = self.cache.get_many(normalized) if self.cache else [None] * len(normalized)
+
+        missing = [t for t, v in zip(normalized, cached) if v is None]
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            fresh = dict(zip(missing, self._embed_and_store(missing)))
 
+        return [v if v is not None else fresh[t] for t, v in zip(normalized, cached)]
 
-# Global instance
+    def encode_profile_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed profile skill strings (skills_to_offer / services_needed).
+
+        With profile_embedding_mode="phrases" each text is split into skill
+        phrases, every distinct phrase across all texts is embedded once
+        (cache-first), and each text's vector is the normalized mean of its
+        phrase vectors. Empty texts get a zero vector. In "whole" mode each
+        text is embedded as a single phrase.
+
+        Args:
+            texts: Skill strings, e.g. "Python (Intermediate), Guitar (Beginner)"
+
+        Returns:
+            List of vectors (same order as texts)
+        """
+        phrase_lists, unique = self._phrase_plan(texts)
+        by_phrase = dict(zip(unique, self.encode_batch(unique))) if unique else {}
+        return self._compose(phrase_lists, by_phrase)
+
+    def _embed_and_store(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts (sending each distinct text once) and populate the cache."""
+        unique = list(dict.fromkeys(texts))
+        vectors = self._create_embeddings(unique)
+        if self.cache:
+            self.cache.put_many(unique, vectors)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[t] for t in texts]
+
+    def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Call the provider for texts (no caching).
+
+        Texts are split into provider-legal chunks; up to embedding_max_concurrency
+        chunks are in flight at once and each is retried on 429/5xx. Output order
+        matches input order.
+        """
+        chunks = self._split(texts)
+        if len(chunks) <= 1:
+            return self._embed_chunk(chunks[0]) if chunks else []
+
+        if self._chunk_executor is None:
+            self._chunk_executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="embed-chunk"
+            )
+        parts = self._chunk_executor.map(self._embed_chunk, chunks)
+        return [vec for part in parts for vec in part]
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = self.retry_policy.call(lambda: self.provider.embed(texts))
+        self._record_provider_call(len(texts), time.perf_counter() - started)
+        return self._fit_dimension(vectors)
+
+
+class AsyncEmbeddingService(_EmbeddingServiceBase):
+    """Async counterpart of EmbeddingService for async def routes."""
+
+    def __init__(self, provider: Optional[EmbeddingProvider] = None):
+        super().__init__(provider or create_embedding_provider(use_async=True))
+
+        self.batcher: Optional[AsyncEmbeddingBatcher] = None
+        if settings.embedding_batch_enabled:
+            self.batcher = AsyncEmbeddingBatcher(
+                flush_fn=self._embed_and_store,
+                max_wait_ms=settings.embedding_batch_max_wait_ms,
+                max_batch=settings.embedding_batch_max_size,
+            )
+
+    async def encode(self, text: str) -> List[float]:
+        """Async variant of EmbeddingService.encode."""
+        if self.batcher is None:
+            return (await self.encode_batch([text]))[0]
+
+        text = normalize_text(text)
+        if self.cache:
+            cached = (await self.cache.aget_many([text]))[0]
+            if cached is not None:
+                return cached
+        return await self.batcher.encode(text)
+
+    async def encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of EmbeddingService.encode_batch."""
+        normalized = [normalize_text(t) for t in texts]
+        if self.cache:
+            cached = await self.cache.aget_many(normalized)
+        else:
+            cached = [None] * len(normalized)
+
+        missing = [t for t, v in zip(normalized, cached) if v is None]
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            fresh = dict(zip(missing, await self._embed_and_store(missing)))
+
+        return [v if v is not None else fresh[t] for t, v in zip(normalized, cached)]
+
+    async def encode_profile_texts(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of EmbeddingService.encode_profile_texts."""
+        phrase_lists, unique = self._phrase_plan(texts)
+        by_phrase = dict(zip(unique, await self.encode_batch(unique))) if unique else {}
+        return self._compose(phrase_lists, by_phrase)
+
+    async def _embed_and_store(self, texts: List[str]) -> List[List[float]]:
+        unique = list(dict.fromkeys(texts))
+        vectors = await self._create_embeddings(unique)
+        if self.cache:
+            await self.cache.aput_many(unique, vectors)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[t] for t in texts]
+
+    async def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        chunks = self._split(texts)
+        if len(chunks) <= 1:
+            return await self._embed_chunk(chunks[0]) if chunks else []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_chunk(chunk)
+
+        parts = await asyncio.gather(*(bounded(chunk) for chunk in chunks))
+        return [vec for part in parts for vec in part]
+
+    async def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = await self.retry_policy.acall(lambda: self.provider.aembed(texts))
+        self._record_provider_call(len(texts), time.perf_counter() - started)
+        return self._fit_dimension(vectors)
+
+    async def close(self) -> None:
+        """Close the provider's HTTP client (app shutdown)."""
+        await self.provider.aclose()
+
+
+# Global instances
+_embedding_cache = None
 _embedding_service = None
+_async_embedding_service = None
+
+
+def get_embedding_cache(model_id: Optional[str] = None) -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache (shared by the sync and async services).
+
+    Args:
+        model_id: Provider model id used to namespace keys (defaults to the Azure deployment)
+    """
+    global _embedding_cache
+    if not settings.embedding_cache_enabled:
+        return None
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            deployment=model_id or settings.azure_embedding_deployment,
+            dimension=settings.embedding_dim,
+            max_entries=settings.embedding_cache_max_entries,
+            ttl=settings.embedding_cache_ttl,
+            cache_service=get_cache_service(),
+            codec=settings.embedding_cache_codec,
+        )
+    return _embedding_cache
 
 
 def get_embedding_service() -> EmbeddingService:
@@ -64,3 +403,11 @@ def get_embedding_service() -> EmbeddingService:
     if _embedding_service is None:
         _embedding_service = EmbeddingService()
     return _embedding_service
+
+
+def get_async_embedding_service() -> AsyncEmbeddingService:
+    """Get or create async embedding service singleton."""
+    global _async_embedding_service
+    if _async_embedding_service is None:
+        _async_embedding_service = AsyncEmbeddingService()
+    return _async_embedding_service
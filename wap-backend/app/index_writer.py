@@ -0,0 +1,424 @@
+"""
+Write-behind buffering for Azure AI Search index actions.
+
+Profile and skill writes used to send a one-document merge_or_upload_documents
+or delete_documents request inside the user's HTTP request. IndexWriter (and
+its asyncio counterpart) queue those actions instead and send them as one
+index_documents batch when max_batch actions are pending or flush_interval
+has passed since the oldest one was queued, whichever comes first.
+
+Actions on the same document key are coalesced while queued, so a burst of
+profile edits costs one indexed document:
+
+    merge_or_upload + merge_or_upload -> merge_or_upload (fields merged)
+    upload          + merge_or_upload -> upload (fields merged)
+    delete          + merge_or_upload -> upload (the delete's replacement)
+    anything        + delete          -> delete
+    anything        + upload          -> upload
+
+Items the service rejects with a transient status (409, 422, 429, 5xx), and
+whole batches that raise, are requeued until max_retries attempts have
+failed. A requeued action is coalesced under any newer action for its key.
+After a batch with requeued items nothing more is sent for flush_interval,
+even if max_batch actions are pending, so a failing index isn't hammered.
+
+flush() sends everything pending right away (tests, shutdown, scripts).
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# (action, document) — action is "upload", "merge_or_upload" or "delete"
+IndexAction = Tuple[str, Dict[str, Any]]
+
+_RETRYABLE_STATUS = frozenset({409, 422, 429, 500, 502, 503, 504})
+
+
+class _Pending:
+    __slots__ = ("action", "document", "queued_at", "attempts")
+
+    def __init__(self, action: str, document: Dict[str, Any], queued_at: float, attempts: int = 0):
+        self.action = action
+        self.document = document
+        self.queued_at = queued_at
+        self.attempts = attempts
+
+
+def _coalesce(older: _Pending, newer: _Pending) -> _Pending:
+    """One action with the effect of older followed by newer."""
+    if newer.action == "merge_or_upload" and older.action != "delete":
+        action = older.action
+        document = {**older.document, **newer.document}
+    elif newer.action == "merge_or_upload":
+        action, document = "upload", newer.document
+    else:
+        action, document = newer.action, newer.document
+    return _Pending(action, document, min(older.queued_at, newer.queued_at), newer.attempts)
+
+
+class _IndexStats:
+    """Thread-safe flush counters shared by both writers."""
+
+    def __init__(self, max_batch: int, flush_interval: float, max_retries: int):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.sent = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.dropped = 0
+        self.batch_errors = 0
+        self.total_flush_seconds = 0.0
+        self.total_wait_seconds = 0.0
+        self.last_flush_at: Optional[float] = None
+
+    def record_queued(self, coalesced: bool) -> None:
+        with self._lock:
+            self.queued += 1
+            self.coalesced += int(coalesced)
+
+    def record_batch(
+        self,
+        batch_size: int,
+        started: float,
+        waited: float,
+        succeeded: int,
+        retried: int,
+        dropped: int,
+        error: bool = False,
+    ) -> None:
+        finished = time.monotonic()
+        with self._lock:
+            self.batches += 1
+            self.sent += batch_size
+            self.succeeded += succeeded
+            self.retried += retried
+            self.dropped += dropped
+            self.batch_errors += int(error)
+            self.total_flush_seconds += finished - started
+            self.total_wait_seconds += waited
+            self.last_flush_at = time.time()
+
+    def snapshot(self, pending: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": pending,
+                "queued": self.queued,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "sent": self.sent,
+                "succeeded": self.succeeded,
+                "retried": self.retried,
+                "dropped": self.dropped,
+                "batch_errors": self.batch_errors,
+                "avg_batch_size": round(self.sent / self.batches, 2) if self.batches else 0.0,
+                "avg_flush_ms": (
+                    round(self.total_flush_seconds / self.batches * 1000, 3)
+                    if self.batches
+                    else 0.0
+                ),
+                "avg_queue_wait_ms": (
+                    round(self.total_wait_seconds / self.sent * 1000, 3) if self.sent else 0.0
+                ),
+                "last_flush_at": self.last_flush_at,
+                "max_batch": self.max_batch,
+                "flush_interval_ms": self.flush_interval * 1000,
+                "max_retries": self.max_retries,
+            }
+
+
+class _Buffer:
+    """Pending actions keyed by document key (insertion-ordered), plus result handling."""
+
+    def __init__(self, key_field: str, max_batch: int, flush_interval_ms: float, max_retries: int):
+        self.key_field = key_field
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_retries = max(1, max_retries)
+        self.pending: Dict[str, _Pending] = {}
+        # No batch is sent before this (monotonic) time; set after a failed batch
+        self.backoff_until = 0.0
+        self.stats = _IndexStats(self.max_batch, self.flush_interval, self.max_retries)
+
+    def add(self, item: _Pending) -> None:
+        key = item.document[self.key_field]
+        older = self.pending.pop(key, None)
+        # Re-inserting moves the key to the back: it is sent after older keys
+        self.pending[key] = _coalesce(older, item) if older else item
+        self.stats.record_queued(older is not None)
+
+    def take(self) -> List[_Pending]:
+        keys = list(self.pending)[: self.max_batch]
+        return [self.pending.pop(key) for key in keys]
+
+    def due_at(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        return min(item.queued_at for item in self.pending.values()) + self.flush_interval
+
+    def ready_at(self) -> Optional[float]:
+        """When the next batch should be sent.
+
+        Now if a full batch is pending, otherwise when the oldest action is due.
+        """
+        due_at = self.due_at()
+        if due_at is None:
+            return None
+        if len(self.pending) >= self.max_batch:
+            due_at = min(due_at, time.monotonic())
+        return max(due_at, self.backoff_until)
+
+    def requeue(self, item: _Pending) -> bool:
+        """Requeue a failed item under any newer action for its key; False once out of attempts."""
+        item.attempts += 1
+        if item.attempts >= self.max_retries:
+            return False
+        # A full interval before the retry, so a failing index isn't hammered
+        item.queued_at = time.monotonic()
+        key = item.document[self.key_field]
+        newer = self.pending.pop(key, None)
+        self.pending[key] = _coalesce(item, newer) if newer else item
+        return True
+
+    def settle(self, batch: List[_Pending], started: float, results: Optional[List[Any]]) -> int:
+        """Apply per-item results (None: the whole batch failed). Returns items that succeeded."""
+        waited = sum(started - item.queued_at for item in batch)
+        if results is None:
+            retried = sum(self.requeue(item) for item in batch)
+            self.stats.record_batch(
+                len(batch), started, waited, 0, retried, len(batch) - retried, error=True
+            )
+            self._back_off(retried)
+            return 0
+
+        outcome = {result.key: result for result in results}
+        succeeded = retried = dropped = 0
+        for item in batch:
+            result = outcome.get(str(item.document[self.key_field]))
+            if result is not None and result.succeeded:
+                succeeded += 1
+            elif (result is None or result.status_code in _RETRYABLE_STATUS) and self.requeue(item):
+                retried += 1
+            else:
+                dropped += 1
+        self.stats.record_batch(len(batch), started, waited, succeeded, retried, dropped)
+        self._back_off(retried)
+        return succeeded
+
+    def _back_off(self, retried: int) -> None:
+        self.backoff_until = time.monotonic() + self.flush_interval if retried else 0.0
+
+
+class IndexWriter:
+    """Buffers index actions and sends them in batches from a background thread."""
+
+    def __init__(
+        self,
+        send_fn: Callable[[List[IndexAction]], List[Any]],
+        key_field: str = "id",
+        max_batch: int = 100,
+        flush_interval_ms: float = 1000.0,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            send_fn: Sends a batch of actions, returning one result per action
+                (objects with key, succeeded and status_code)
+            key_field: Document key field actions are coalesced on
+            max_batch: Largest batch sent in one call
+            flush_interval_ms: Longest an action waits before being sent
+            max_retries: Attempts per action before it is dropped
+        """
+        self.send_fn = send_fn
+        self._buffer = _Buffer(key_field, max_batch, flush_interval_ms, max_retries)
+        self.stats = self._buffer.stats
+        self._cond = threading.Condition()
+        # Held while a batch is taken and sent, so a key is never in flight twice
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="index-writer", daemon=True)
+        self._worker.start()
+
+    def upload(self, document: Dict[str, Any]) -> None:
+        self._enqueue("upload", document)
+
+    def merge_or_upload(self, document: Dict[str, Any]) -> None:
+        self._enqueue("merge_or_upload", document)
+
+    def delete(self, document: Dict[str, Any]) -> None:
+        self._enqueue("delete", document)
+
+    def _enqueue(self, action: str, document: Dict[str, Any]) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("IndexWriter is closed")
+            self._buffer.add(_Pending(action, document, time.monotonic()))
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    ready_at = self._buffer.ready_at()
+                    if ready_at is not None and ready_at <= time.monotonic():
+                        break
+                    self._cond.wait(None if ready_at is None else ready_at - time.monotonic())
+                if self._closed:
+                    return
+            self._send_one_batch()
+
+    def _send_one_batch(self) -> Tuple[int, int]:
+        """Send up to max_batch pending actions. Returns (sent, succeeded)."""
+        with self._send_lock:
+            with self._cond:
+                batch = self._buffer.take()
+            if not batch:
+                return 0, 0
+            started = time.monotonic()
+            try:
+                results = self.send_fn([(item.action, item.document) for item in batch])
+            except Exception:
+                results = None
+            with self._cond:
+                return len(batch), self._buffer.settle(batch, started, results)
+
+    def flush(self) -> int:
+        """
+        Send every pending action now, on the calling thread.
+
+        Failed items are requeued for the next flush rather than retried here.
+        Returns the number of actions that succeeded.
+        """
+        # Waits out a batch the worker has in flight, so its results are settled first
+        with self._send_lock, self._cond:
+            remaining = len(self._buffer.pending)
+        succeeded = 0
+        while remaining > 0:
+            sent, ok = self._send_one_batch()
+            if not sent:
+                break
+            remaining -= sent
+            succeeded += ok
+        return succeeded
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flush metrics."""
+        with self._cond:
+            pending = len(self._buffer.pending)
+        return self.stats.snapshot(pending)
+
+    def close(self) -> None:
+        """Stop the worker and flush whatever is queued."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        self.flush()
+
+
+class AsyncIndexWriter:
+    """
+    asyncio-native counterpart of IndexWriter for the async services.
+
+    Must be used from a single event loop. Batches are sent by a task, so
+    enqueueing never waits on Azure AI Search.
+    """
+
+    def __init__(
+        self,
+        send_fn: Callable[[List[IndexAction]], Awaitable[List[Any]]],
+        key_field: str = "id",
+        max_batch: int = 100,
+        flush_interval_ms: float = 1000.0,
+        max_retries: int = 3,
+    ):
+        self.send_fn = send_fn
+        self._buffer = _Buffer(key_field, max_batch, flush_interval_ms, max_retries)
+        self.stats = self._buffer.stats
+        self._send_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    def upload(self, document: Dict[str, Any]) -> None:
+        self._enqueue("upload", document)
+
+    def merge_or_upload(self, document: Dict[str, Any]) -> None:
+        self._enqueue("merge_or_upload", document)
+
+    def delete(self, document: Dict[str, Any]) -> None:
+        self._enqueue("delete", document)
+
+    def _enqueue(self, action: str, document: Dict[str, Any]) -> None:
+        self._buffer.add(_Pending(action, document, time.monotonic()))
+        ready_at = self._buffer.ready_at()
+        if ready_at is not None and ready_at <= time.monotonic():
+            self._dispatch()
+        else:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        ready_at = self._buffer.ready_at()
+        if self._timer is None and ready_at is not None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(max(0.0, ready_at - time.monotonic()), self._dispatch)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.ensure_future(self._drain())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self) -> None:
+        await self.flush()
+        # Requeued items wait for the next interval
+        self._schedule()
+
+    async def _send_one_batch(self) -> Tuple[int, int]:
+        async with self._send_lock:
+            batch = self._buffer.take()
+            if not batch:
+                return 0, 0
+            started = time.monotonic()
+            try:
+                results = await self.send_fn([(item.action, item.document) for item in batch])
+            except Exception:
+                results = None
+            return len(batch), self._buffer.settle(batch, started, results)
+
+    async def flush(self) -> int:
+        """Send every pending action now. Returns the number that succeeded."""
+        remaining = len(self._buffer.pending)
+        succeeded = 0
+        while remaining > 0:
+            sent, ok = await self._send_one_batch()
+            if not sent:
+                break
+            remaining -= sent
+            succeeded += ok
+        return succeeded
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flush metrics."""
+        return self.stats.snapshot(len(self._buffer.pending))
+
+    async def close(self) -> None:
+        """Cancel the timer, wait for in-flight batches and flush the rest."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,778 @@
+"""
+In-process exact vector index with the AzureSearchService interface.
+
+With SEARCH_BACKEND=local, get_azure_search_service() and friends return the
+services here instead of Azure AI Search clients: single-node deployments,
+tests and benchmarks run the whole app at memory speed with no search
+service. Sync and async services share one store per index.
+
+ExactVectorIndex keeps each vector field as a contiguous float32 matrix of
+unit rows (so cosine is a dot product) with id <-> row maps. Upserts of a
+known id overwrite its row; deletes only tombstone the row and the matrix is
+compacted once tombstones reach a quarter of it. A search is one
+matrix-vector product over the live rows plus np.argpartition for the exact
+top-k; scores use azure_cosine_score, the scale Azure reports for cosine
+HNSW fields, so thresholds carry over unchanged.
+
+Hybrid search fuses the vector ranking with an idf-weighted keyword-overlap
+ranking by the same reciprocal-rank fusion Azure uses; it is a stand-in for
+BM25, not a reimplementation of it.
+
+Contents live in process memory. Set LOCAL_SEARCH_SNAPSHOT_DIR to save them
+at shutdown and load them at startup.
+"""
+
+import asyncio
+import json
+import math
+import re
+import threading
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from app.azure_search import (
+    _FIELD_SCORE_KEYS,
+    _HYBRID_TEXT_FIELDS,
+    _RRF_K,
+    _fused_score,
+    _profile_document,
+    _profile_match,
+    _skill_document,
+    _skill_match,
+    _stored_vectors,
+    azure_cosine_score,
+)
+from app.config import settings
+from app.search_filters import ProfileFilter, SkillFilter, with_category
+
+_PROFILE_VECTOR_FIELDS = ("offer_vec", "need_vec")
+_SKILL_VECTOR_FIELDS = ("skill_vec",)
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(value: Any) -> List[str]:
+    if isinstance(value, list):
+        value = " ".join(str(v) for v in value)
+    return _TOKEN.findall(str(value or "").lower())
+
+
+class ExactVectorIndex:
+    """Exact k-NN over named float32 vector fields, with tombstoned deletes."""
+
+    def __init__(self, fields: Sequence[str], dimension: int, initial_capacity: int = 1024):
+        self.fields = tuple(fields)
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._reset(max(1, initial_capacity))
+
+    def _reset(self, capacity: int) -> None:
+        self._vectors = {
+            field: np.zeros((capacity, self.dimension), dtype=np.float32) for field in self.fields
+        }
+        # Row has a (non-zero) vector for the field
+        self._has = {field: np.zeros(capacity, dtype=bool) for field in self.fields}
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[str, int] = {}
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _unit(self, vec: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+        if vec is None or len(vec) == 0:
+            return None
+        arr = np.asarray(vec, dtype=np.float32)
+        if arr.shape != (self.dimension,):
+            raise ValueError(f"vector has shape {arr.shape}, index expects ({self.dimension},)")
+        norm = float(np.linalg.norm(arr))
+        return arr / norm if norm else None
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def upsert(self, doc_id: str, document: Dict[str, Any]) -> None:
+        """Insert or replace a document; its vector fields become index rows."""
+        units = {field: self._unit(document.get(field)) for field in self.fields}
+        metadata = {k: v for k, v in document.items() if k not in self.fields}
+        with self._lock:
+            row = self._row_of.get(doc_id)
+            if row is None:
+                row = len(self._ids)
+                self._grow(row + 1)
+                self._ids.append(doc_id)
+                self._documents.append(metadata)
+                self._row_of[doc_id] = row
+                self._alive[row] = True
+            else:
+                self._documents[row] = metadata
+            for field, unit in units.items():
+                self._vectors[field][row] = unit if unit is not None else 0.0
+                self._has[field][row] = unit is not None
+
+    def delete(self, doc_id: str) -> bool:
+        """Tombstone a document's row; compacts once a quarter of the rows are dead."""
+        with self._lock:
+            row = self._row_of.pop(doc_id, None)
+            if row is None:
+                return False
+            self._alive[row] = False
+            for has in self._has.values():
+                has[row] = False
+            self._documents[row] = None
+            self._tombstones += 1
+            if self._tombstones * 4 >= len(self._ids):
+                self._compact()
+            return True
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._alive)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        self._resize(capacity, np.arange(len(self._ids)))
+
+    def _compact(self) -> None:
+        live = np.flatnonzero(self._alive[: len(self._ids)])
+        self._resize(max(1024, 2 * len(live)), live)
+        self._ids = [self._ids[row] for row in live]
+        self._documents = [self._documents[row] for row in live]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._tombstones = 0
+
+    def _resize(self, capacity: int, rows: np.ndarray) -> None:
+        """New arrays with `rows` moved to the front.
+
+        Readers holding the old arrays stay consistent.
+        """
+        n = len(rows)
+        for field in self.fields:
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            vectors[:n] = self._vectors[field][rows]
+            self._vectors[field] = vectors
+            has = np.zeros(capacity, dtype=bool)
+            has[:n] = self._has[field][rows]
+            self._has[field] = has
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:n] = self._alive[rows]
+        self._alive = alive
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def _snapshot(
+        self,
+    ) -> Tuple[int, np.ndarray, Dict[str, np.ndarray], Dict[str, np.ndarray], List, Dict[str, int]]:
+        with self._lock:
+            n = len(self._ids)
+            # Copies of the field dicts: _resize swaps in new arrays, never edits old ones
+            return (
+                n,
+                self._alive[:n].copy(),
+                dict(self._vectors),
+                dict(self._has),
+                self._documents,
+                self._row_of,
+            )
+
+    def search(
+        self,
+        queries: Mapping[str, Sequence[float]],
+        k: int,
+        skip: int = 0,
+        exclude_ids: Optional[Iterable[str]] = None,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[int]], Dict[str, np.ndarray]]:
+        """
+        Exact top-(skip + k) per queried field, ranks skip .. skip + k - 1 kept.
+
+        Returns (documents by row, rows per field best first, Azure-scale
+        scores per field over all rows; ineligible rows are -inf).
+        """
+        n, eligible, vectors, has, documents, row_of = self._snapshot()
+        for doc_id in exclude_ids or ():
+            row = row_of.get(doc_id)
+            if row is not None and row < n:
+                eligible[row] = False
+        if where is not None:
+            eligible &= [doc is not None and where(doc) for doc in documents[:n]]
+
+        rows: Dict[str, List[int]] = {}
+        scores: Dict[str, np.ndarray] = {}
+        for field, query_vec in queries.items():
+            unit = self._unit(query_vec)
+            field_eligible = eligible & has[field][:n]
+            if unit is None:
+                field_eligible[:] = False
+            field_scores = np.full(n, -np.inf, dtype=np.float32)
+            if field_eligible.any():
+                field_scores = np.where(
+                    field_eligible, azure_cosine_score(vectors[field][:n] @ unit), -np.inf
+                )
+            scores[field] = field_scores
+            top = min(skip + k, int(field_eligible.sum()))
+            if top <= skip:
+                rows[field] = []
+                continue
+            best = np.argpartition(-field_scores, top - 1)[:top]
+            best = best[np.argsort(-field_scores[best], kind="stable")]
+            rows[field] = best[skip:].tolist()
+        return documents, rows, scores
+
+    def documents_where(
+        self, predicate: Callable[[Dict[str, Any]], bool]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        n, _, _, _, documents, _ = self._snapshot()
+        return [
+            (row, doc)
+            for row, doc in enumerate(documents[:n])
+            if doc is not None and predicate(doc)
+        ]
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Document with its vector fields (unit-normalized; None where unset)."""
+        with self._lock:
+            row = self._row_of.get(doc_id)
+            if row is None:
+                return None
+            return self._with_vectors(row)
+
+    def _with_vectors(self, row: int) -> Dict[str, Any]:
+        document = dict(self._documents[row])
+        for field in self.fields:
+            document[field] = self._vectors[field][row].tolist() if self._has[field][row] else None
+        return document
+
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            ids = list(self._row_of)
+        for doc_id in ids:
+            document = self.get(doc_id)
+            if document is not None:
+                yield document
+
+    # ── Snapshots ────────────────────────────────────────────────────────────
+
+    def save(self, path: Path) -> None:
+        """Write live rows to an .npz (vector matrices + documents as JSON)."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: len(self._ids)])
+            arrays = {f"vectors_{field}": self._vectors[field][live] for field in self.fields}
+            arrays.update({f"has_{field}": self._has[field][live] for field in self.fields})
+            ids = [self._ids[row] for row in live]
+            documents = [self._documents[row] for row in live]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path, ids=np.array(json.dumps(ids)), documents=np.array(json.dumps(documents)), **arrays
+        )
+
+    def load(self, path: Path) -> int:
+        """Replace the contents with a snapshot written by save(). Returns the row count."""
+        with np.load(path) as data:
+            ids = json.loads(str(data["ids"]))
+            documents = json.loads(str(data["documents"]))
+            if data[f"vectors_{self.fields[0]}"].shape[1:] != (self.dimension,):
+                raise ValueError(f"snapshot {path} has a different vector dimension")
+            with self._lock:
+                self._reset(max(1024, 2 * len(ids)))
+                for field in self.fields:
+                    self._vectors[field][: len(ids)] = data[f"vectors_{field}"]
+                    self._has[field][: len(ids)] = data[f"has_{field}"]
+                self._alive[: len(ids)] = True
+                self._ids = ids
+                self._documents = documents
+                self._row_of = {doc_id: row for row, doc_id in enumerate(ids)}
+        return len(ids)
+
+
+def _keyword_ranks(
+    index: ExactVectorIndex,
+    query_text: str,
+    text_fields: Sequence[str],
+    eligible: Callable[[Dict[str, Any]], bool],
+) -> List[int]:
+    """Rows containing any query term, by summed idf of the terms they contain."""
+    terms = set(_tokens(query_text))
+    if not terms:
+        return []
+    matched = []
+    doc_freq: Counter = Counter()
+    for row, document in index.documents_where(eligible):
+        found = terms.intersection(
+            token for field in text_fields for token in _tokens(document.get(field))
+        )
+        if found:
+            matched.append((row, found))
+            doc_freq.update(found)
+    total = max(len(index), 1)
+    idf = {term: math.log(1 + total / count) for term, count in doc_freq.items()}
+    matched.sort(key=lambda item: sum(idf[t] for t in item[1]), reverse=True)
+    return [row for row, _ in matched]
+
+
+def _hybrid_rows(
+    index: ExactVectorIndex,
+    query_text: str,
+    queries: Mapping[str, Sequence[float]],
+    limit: int,
+    exclude_ids: Optional[Iterable[str]] = None,
+    where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Tuple[int, float]]]:
+    """(documents by row, [(row, fused 0-1 score)] best first) via reciprocal-rank fusion."""
+    excluded = set(exclude_ids or ())
+    k = max(limit, settings.search_hybrid_k)
+    documents, vector_rows, _ = index.search(queries, k, exclude_ids=excluded, where=where)
+    text_fields = [text for field in queries for text in _HYBRID_TEXT_FIELDS[field]]
+
+    def eligible(doc: Dict[str, Any]) -> bool:
+        return doc.get("id") not in excluded and (where is None or where(doc))
+
+    rankings = [*vector_rows.values(), _keyword_ranks(index, query_text, text_fields, eligible)[:k]]
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (_RRF_K + rank)
+    best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return documents, [(row, _fused_score(score, len(rankings))) for row, score in best]
+
+
+class LocalSearchService:
+    """
+    AzureSearchService over an in-process ExactVectorIndex (SEARCH_BACKEND=local).
+
+    Profiles are keyed by uid (the profile routes upsert with username=uid),
+    so exclude_uids are document ids here.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        self.index_name = settings.azure_search_index
+        self.index = ExactVectorIndex(
+            _PROFILE_VECTOR_FIELDS, dimension or settings.embedding_dim, initial_capacity
+        )
+        # Writes are already in memory; nothing to buffer
+        self.writer = None
+
+    def ensure_index(self, force: bool = False) -> bool:
+        return False
+
+    def upsert_profile(
+        self,
+        username: str,
+        offer_vec: List[float],
+        need_vec: List[float],
+        payload: Dict[str, Any],
+    ):
+        """Upsert a profile (same signature as AzureSearchService.upsert_profile)."""
+        self.index.upsert(username, _profile_document(username, offer_vec, need_vec, payload))
+
+    def search_offers(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search profiles by their offer vector."""
+        return self._search_field(
+            "offer_vec", query_vec, limit, score_threshold, skip, exclude_uids, filters
+        )
+
+    def search_needs(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search profiles by their need vector."""
+        return self._search_field(
+            "need_vec", query_vec, limit, score_threshold, skip, exclude_uids, filters
+        )
+
+    def _search_field(
+        self,
+        field: str,
+        query_vec: List[float],
+        limit: int,
+        score_threshold: float,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        documents, rows, scores = self.index.search(
+            {field: query_vec},
+            limit,
+            skip=skip,
+            exclude_ids=exclude_uids,
+            where=_predicate(filters),
+        )
+        return [
+            _profile_match(documents[row], float(scores[field][row]))
+            for row in rows[field]
+            if scores[field][row] >= score_threshold
+        ]
+
+    def search_multi_vector(
+        self,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Union of each field's neighbours with per-field scores (see AzureSearchService)."""
+        documents, rows, scores = self.index.search(
+            queries, limit, exclude_ids=exclude_uids, where=_predicate(filters)
+        )
+        union = dict.fromkeys(row for field_rows in rows.values() for row in field_rows)
+        matches = []
+        for row in union:
+            field_scores = {
+                _FIELD_SCORE_KEYS[field]: max(float(scores[field][row]), 0.0) for field in queries
+            }
+            best = max(field_scores.values())
+            if best >= score_threshold:
+                match = _profile_match(documents[row], best)
+                match.update(field_scores)
+                matches.append(match)
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return matches
+
+    def search_hybrid(
+        self,
+        query_text: str,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Keyword + vector search fused by reciprocal rank; score is 0-1."""
+        documents, ranked = _hybrid_rows(
+            self.index,
+            query_text,
+            queries,
+            limit,
+            exclude_ids=exclude_uids,
+            where=_predicate(filters),
+        )
+        return [_profile_match(documents[row], score) for row, score in ranked]
+
+    def get_profile_vectors(self, username: str) -> Optional[Tuple[List[float], List[float]]]:
+        """Stored (offer_vec, need_vec) for a profile, or None."""
+        document = self.index.get(username)
+        return _stored_vectors(document) if document is not None else None
+
+    def iter_profile_documents(self) -> Iterator[Dict[str, Any]]:
+        """Yield every profile document, vectors included."""
+        yield from self.index.iter_documents()
+
+    def delete_profile(self, username: str):
+        self.index.delete(username)
+
+    def flush(self) -> int:
+        return 0
+
+
+class LocalSkillsSearchService:
+    """SkillsSearchService over an in-process ExactVectorIndex (SEARCH_BACKEND=local)."""
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        self.index_name = settings.azure_search_skills_index
+        self.index = ExactVectorIndex(
+            _SKILL_VECTOR_FIELDS, dimension or settings.embedding_dim, initial_capacity
+        )
+        self.writer = None
+
+    def ensure_index(self, force: bool = False) -> bool:
+        return False
+
+    def upsert_skill(self, skill_id: str, skill_vec: List[float], payload: Dict[str, Any]):
+        self.index.upsert(skill_id, _skill_document(skill_id, skill_vec, payload))
+
+    def search_skills(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        score_threshold: float = 0.3,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search skills by vector similarity, filtered by category and/or filters."""
+        documents, rows, scores = self.index.search(
+            {"skill_vec": query_vec},
+            limit,
+            where=_predicate(with_category(filters, category_filter)),
+        )
+        return [
+            _skill_match(documents[row], float(scores["skill_vec"][row]))
+            for row in rows["skill_vec"]
+            if scores["skill_vec"][row] >= score_threshold
+        ]
+
+    def search_skills_hybrid(
+        self,
+        query_text: str,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        documents, ranked = _hybrid_rows(
+            self.index,
+            query_text,
+            {"skill_vec": query_vec},
+            limit,
+            where=_predicate(with_category(filters, category_filter)),
+        )
+        return [_skill_match(documents[row], score) for row, score in ranked]
+
+    def delete_skill(self, skill_id: str):
+        self.index.delete(skill_id)
+
+    def flush(self) -> int:
+        return 0
+
+
+def _predicate(
+    filters: Union[ProfileFilter, SkillFilter, None],
+) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """filters.matches as a search `where`, or None when there is nothing to filter."""
+    if filters is None or filters.is_empty():
+        return None
+    return filters.matches
+
+
+# ── Async variants (same store; searches run in a worker thread) ─────────────
+
+# Documents read per worker-thread hop by iter_profile_documents
+_ITER_CHUNK = 256
+
+
+class AsyncLocalSearchService:
+    """
+    Async counterpart of LocalSearchService, sharing its index.
+
+    A search is a matrix product over every row, so each call runs in a worker
+    thread (asyncio.to_thread) instead of blocking the event loop; the index's
+    lock makes that safe.
+    """
+
+    def __init__(self, service: LocalSearchService):
+        self.service = service
+        self.index_name = service.index_name
+        self.writer = None
+
+    async def ensure_index(self, force: bool = False) -> bool:
+        return False
+
+    async def upsert_profile(
+        self,
+        username: str,
+        offer_vec: List[float],
+        need_vec: List[float],
+        payload: Dict[str, Any],
+    ):
+        await asyncio.to_thread(self.service.upsert_profile, username, offer_vec, need_vec, payload)
+
+    async def search_offers(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.service.search_offers,
+            query_vec,
+            limit,
+            score_threshold,
+            skip,
+            exclude_uids,
+            filters,
+        )
+
+    async def search_needs(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        skip: int = 0,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.service.search_needs,
+            query_vec,
+            limit,
+            score_threshold,
+            skip,
+            exclude_uids,
+            filters,
+        )
+
+    async def search_multi_vector(
+        self,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        score_threshold: float = 0.3,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.service.search_multi_vector, queries, limit, score_threshold, exclude_uids, filters
+        )
+
+    async def search_hybrid(
+        self,
+        query_text: str,
+        queries: Mapping[str, List[float]],
+        limit: int = 10,
+        exclude_uids: Optional[Iterable[str]] = None,
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.service.search_hybrid, query_text, queries, limit, exclude_uids, filters
+        )
+
+    async def get_profile_vectors(self, username: str) -> Optional[Tuple[List[float], List[float]]]:
+        return await asyncio.to_thread(self.service.get_profile_vectors, username)
+
+    async def iter_profile_documents(self) -> AsyncIterator[Dict[str, Any]]:
+        documents = self.service.iter_profile_documents()
+        while True:
+            chunk = await asyncio.to_thread(list, islice(documents, _ITER_CHUNK))
+            if not chunk:
+                return
+            for document in chunk:
+                yield document
+
+    async def delete_profile(self, username: str):
+        await asyncio.to_thread(self.service.delete_profile, username)
+
+    async def flush(self) -> int:
+        return 0
+
+    async def close(self):
+        pass
+
+
+class AsyncLocalSkillsSearchService:
+    """Async counterpart of LocalSkillsSearchService, sharing its index."""
+
+    def __init__(self, service: LocalSkillsSearchService):
+        self.service = service
+        self.index_name = service.index_name
+        self.writer = None
+
+    async def ensure_index(self, force: bool = False) -> bool:
+        return False
+
+    async def upsert_skill(self, skill_id: str, skill_vec: List[float], payload: Dict[str, Any]):
+        await asyncio.to_thread(self.service.upsert_skill, skill_id, skill_vec, payload)
+
+    async def search_skills(
+        self,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        score_threshold: float = 0.3,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.service.search_skills, query_vec, limit, category_filter, score_threshold, filters
+        )
+
+    async def search_skills_hybrid(
+        self,
+        query_text: str,
+        query_vec: List[float],
+        limit: int = 10,
+        category_filter: str | None = None,
+        filters: Optional[SkillFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self.service.search_skills_hybrid,
+            query_text,
+            query_vec,
+            limit,
+            category_filter,
+            filters,
+        )
+
+    async def delete_skill(self, skill_id: str):
+        await asyncio.to_thread(self.service.delete_skill, skill_id)
+
+    async def flush(self) -> int:
+        return 0
+
+    async def close(self):
+        pass
+
+
+# ── Shared instances and snapshots ────────────────────────────────────────────
+
+_local_search_service: Optional[LocalSearchService] = None
+_local_skills_search_service: Optional[LocalSkillsSearchService] = None
+
+
+def get_local_search_service() -> LocalSearchService:
+    global _local_search_service
+    if _local_search_service is None:
+        _local_search_service = LocalSearchService()
+    return _local_search_service
+
+
+def get_local_skills_search_service() -> LocalSkillsSearchService:
+    global _local_skills_search_service
+    if _local_skills_search_service is None:
+        _local_skills_search_service = LocalSkillsSearchService()
+    return _local_skills_search_service
+
+
+def _snapshot_paths() -> List[Tuple[ExactVectorIndex, Path]]:
+    directory = Path(settings.local_search_snapshot_dir)
+    return [
+        (get_local_search_service().index, directory / "profiles.npz"),
+        (get_local_skills_search_service().index, directory / "skills.npz"),
+    ]
+
+
+def load_snapshots() -> int:
+    """Load saved indexes from LOCAL_SEARCH_SNAPSHOT_DIR (app startup). Returns documents loaded."""
+    if not settings.local_search_snapshot_dir:
+        return 0
+    loaded = 0
+    for index, path in _snapshot_paths():
+        if path.exists():
+            loaded += index.load(path)
+    return loaded
+
+
+def save_snapshots() -> None:
+    """Save both indexes to LOCAL_SEARCH_SNAPSHOT_DIR (app shutdown)."""
+    if not settings.local_search_snapshot_dir:
+        return
+    for index, path in _snapshot_paths():
+        index.save(path)
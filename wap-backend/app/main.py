@@ -1,5 +1,6 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -47,16 +48,100 @@ async def lifespan(app: FastAPI):
     except Exception as exc:
         logger.warning("Cosmos DB not configured (non-fatal): %s", exc)
 
-    # Embedding model warm-up
+    # Embedding model warm-up (async client serves the hot routes)
     try:
-        from app.embeddings import get_embedding_service
-        get_embedding_service().encode("warmup")
+        from app.embeddings import get_async_embedding_service
+        await get_async_embedding_service().encode("warmup")
         logger.info("Embedding model ready")
     except Exception as exc:
         logger.warning("Embedding service unavailable (non-fatal): %s", exc)
 
+    # Local search backend (SEARCH_BACKEND=local): restore the saved indexes
+    if settings.search_backend == "local":
+        try:
+            from app.local_search import load_snapshots
+            logger.info("Local search index loaded %d documents", load_snapshots())
+        except Exception as exc:
+            logger.warning("Local search snapshot load failed; starting empty: %s", exc)
+
+    # Azure AI Search indexes: schemas are pushed only when their fingerprint
+    # changed (SEARCH_INDEX_MIGRATE), so a normal start skips the management API
+    try:
+        from app.azure_search import (
+            get_async_azure_search_service,
+            get_async_skills_search_service,
+        )
+        applied = await get_async_azure_search_service().ensure_index()
+        applied |= await get_async_skills_search_service().ensure_index()
+        logger.info(
+            "Azure AI Search indexes ready (%s)",
+            "schema updated" if applied else "schema unchanged",
+        )
+    except Exception as exc:
+        logger.warning("Azure AI Search unavailable (non-fatal): %s", exc)
+
+    # In-process reciprocal match engine (MATCHING_ENGINE=local)
+    reload_task = None
+    try:
+        from app.azure_search import get_async_azure_search_service
+        from app.match_engine import get_match_engine, load_match_engine, run_periodic_reload
+        if get_match_engine() is not None:
+            loaded = await load_match_engine(get_async_azure_search_service())
+            logger.info("Match engine loaded %d profiles", loaded)
+            if settings.matching_engine_reload_interval > 0:
+                reload_task = asyncio.create_task(
+                    run_periodic_reload(
+                        settings.matching_engine_reload_interval,
+                        get_async_azure_search_service(),
+                    )
+                )
+    except Exception as exc:
+        logger.warning("Match engine load failed; matching stays on Azure AI Search: %s", exc)
+
+    # Periodic match-table refresh (MATCH_TABLE_REFRESH_INTERVAL > 0)
+    refresh_task = None
+    if settings.match_table_refresh_interval > 0:
+        from app.match_table import run_periodic_refresh
+        refresh_task = asyncio.create_task(
+            run_periodic_refresh(settings.match_table_refresh_interval)
+        )
+
     yield
-    # Shutdown — nothing to clean up for now
+
+    if refresh_task is not None:
+        refresh_task.cancel()
+    if reload_task is not None:
+        reload_task.cancel()
+
+    # Shutdown — close pooled async HTTP clients
+    await _close_async_clients()
+
+    if settings.search_backend == "local":
+        try:
+            from app.local_search import save_snapshots
+            save_snapshots()
+        except Exception as exc:
+            logger.warning("Local search snapshot save failed: %s", exc)
+
+
+async def _close_async_clients() -> None:
+    from app import azure_search, cache, cosmos_db, embeddings
+
+    for service in (
+        embeddings._async_embedding_service,
+        azure_search._async_azure_search_service,
+        azure_search._async_skills_search_service,
+        cosmos_db._async_cosmos_service,
+    ):
+        if service is None:
+            continue
+        try:
+            await service.close()
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Error closing %s: %s", type(service).__name__, exc)
+
+    if cache._cache_service is not None:
+        await cache._cache_service.aclose()
 
 
 # ── App ───────────────────────────────────────────────────────────────────────
@@ -89,10 +174,6 @@ app.include_router(profiles.router)
 app.include_router(search.router)
 app.include_router(swaps.router)
 app.include_router(swap_requests.router)
-app.include_router(swap_completion.router)
-app.include_router(reviews.router)
-app.include_router(points.router)
-app.include_router(portfolio.router)
 app.include_router(messages.router)
 app.include_router(moderation.router)
 app.include_router(points.router)
@@ -129,6 +210,36 @@ def health_check():
     }
 
 
+@app.get("/metrics", tags=["ops"])
+def metrics():
+    """In-process performance counters.
+
+    Embedding usage, cache hits, match engine size and index writes.
+    """
+    from app import azure_search, embeddings, match_engine
+
+    service = embeddings._embedding_service
+    async_service = embeddings._async_embedding_service
+    engine = match_engine._match_engine
+
+    def writer_stats(search_service):
+        if search_service is None:
+            return {"initialized": False}
+        return search_service.writer.get_stats() if search_service.writer else {"enabled": False}
+
+    return {
+        "embeddings": service.get_stats() if service else {"initialized": False},
+        "embeddings_async": async_service.get_stats() if async_service else {"initialized": False},
+        "match_engine": engine.get_stats() if engine else {"initialized": False},
+        "index_writes": {
+            "profiles": writer_stats(azure_search._azure_search_service),
+            "profiles_async": writer_stats(azure_search._async_azure_search_service),
+            "skills": writer_stats(azure_search._skills_search_service),
+            "skills_async": writer_stats(azure_search._async_skills_search_service),
+        },
+    }
+
+
 @app.get("/", tags=["ops"])
 def root():
     """Root endpoint."""
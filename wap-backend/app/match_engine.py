@@ -0,0 +1,582 @@
+"""
+In-process exact reciprocal matching over all profile vectors.
+
+compute_reciprocal_matches asks Azure AI Search for two top-50 lists and keeps
+their intersection, so a pair that is a strong *mutual* fit but misses either
+top-50 is never seen. This engine instead holds every profile's offer and need
+vector in two contiguous float32 matrices and scores all candidates at once:
+
+    need_score  = azure_cosine_score(needs  @ my_offer)   # they want what I offer
+    offer_score = azure_cosine_score(offers @ my_need)    # they offer what I need
+    reciprocal  = 2ab / (a + b)                           # harmonic mean, as remote
+
+azure_cosine_score() maps cosine to the same scale Azure AI Search reports for cosine
+HNSW fields (1 / (2 - cos)), so thresholds and reciprocal scores are
+interchangeable with the remote path. The exact top-k is selected with
+np.argpartition (O(n)) and only those k rows are sorted.
+
+Cost is two matrix-vector products, bound by memory bandwidth: memory is
+2 × n × embedding_dim × 4 B (240 MB at 20k profiles × 1536 dims), and each
+query streams all of it, ~25 ms on one core and proportionally less with
+multi-threaded BLAS. Matryoshka truncation (EMBEDDING_TRUNCATE_DIM=256) cuts
+both by 6× and brings a query under 5 ms.
+
+Enable with MATCHING_ENGINE=local; the engine is loaded from the search index
+at startup and kept in sync by the profile routes. Each worker process holds
+its own copy and only sees the writes it serves, so every worker also rebuilds
+it from the shared index every MATCHING_ENGINE_RELOAD_INTERVAL seconds (writes
+made through other workers show up within that interval). Not suited to
+serverless instances, which would load the whole index on every cold start.
+
+Structured filters (ProfileFilter) are applied as boolean masks over per-field
+columns kept next to the matrices, not by testing each profile's metadata.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.azure_search import _profile_document, _profile_match, azure_cosine_score
+from app.config import settings
+from app.search_filters import ProfileFilter
+
+logger = logging.getLogger(__name__)
+
+_VECTOR_FIELDS = ("offer_vec", "need_vec")
+
+# Profile fields ProfileFilter tests, stored as columns (see ProfileFilter.mask)
+_FILTER_COLUMNS = {
+    "city": np.int32,
+    "dm_open": np.int8,
+    "show_city": np.int8,
+    "swap_credits": np.int64,
+    "swaps_completed": np.int64,
+}
+
+
+def _flag(value: Any) -> int:
+    """1/0 for a boolean field, -1 for null."""
+    return -1 if value is None else int(bool(value))
+
+
+def _match_entry(
+    profile: Dict[str, Any],
+    need_score: float,
+    offer_score: float,
+    reciprocal: float,
+) -> Dict[str, Any]:
+    """Match dict in the shape combine_reciprocal_matches returns."""
+    match = _profile_match(profile, float(need_score))
+    match["reciprocal_score"] = round(float(reciprocal), 4)
+    match["offer_match_score"] = round(float(offer_score), 4)
+    match["need_match_score"] = round(float(need_score), 4)
+    return match
+
+
+def _unit(vec: Sequence[float], dimension: int) -> Optional[np.ndarray]:
+    """vec as a unit-norm float32 row, or None if it is empty / zero / wrong size."""
+    if vec is None:
+        return None
+    arr = np.asarray(vec, dtype=np.float32)
+    if arr.shape != (dimension,):
+        return None
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0:
+        return None
+    return arr / norm
+
+
+def _unit_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-normalised float32 copy of matrix plus a mask of its non-zero rows."""
+    norms = np.linalg.norm(matrix, axis=1)
+    nonzero = norms > 0.0
+    unit = matrix / np.where(nonzero, norms, 1.0)[:, None]
+    return unit.astype(np.float32, copy=False), nonzero
+
+
+class ReciprocalMatchEngine:
+    """Exact brute-force reciprocal matcher over in-memory offer/need matrices."""
+
+    def __init__(self, dimension: int, initial_capacity: int = 1024):
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._offers = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._needs = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        # Rows whose offer AND need vectors are set; others can't be reciprocal
+        self._valid = np.zeros(initial_capacity, dtype=bool)
+        self._columns = {
+            name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in _FILTER_COLUMNS.items()
+        }
+        self._city_codes: Dict[str, int] = {}
+        self._uids: List[str] = []
+        self._profiles: List[Dict[str, Any]] = []
+        self._row_of: Dict[str, int] = {}
+        # Set once fully loaded; until then matching stays on Azure AI Search
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._uids)
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def upsert(
+        self,
+        uid: str,
+        offer_vec: Optional[Sequence[float]],
+        need_vec: Optional[Sequence[float]],
+        profile: Dict[str, Any],
+    ) -> None:
+        """
+        Insert or replace one profile.
+
+        Args:
+            uid: Profile id (the search document id)
+            offer_vec: Embedding of skills_to_offer (zero/None = no offers)
+            need_vec: Embedding of services_needed (zero/None = no needs)
+            profile: Metadata returned with matches (a search document works)
+        """
+        offer = _unit(offer_vec, self.dimension)
+        need = _unit(need_vec, self.dimension)
+        with self._lock:
+            row = self._row_of.get(uid)
+            if row is None:
+                row = len(self._uids)
+                self._grow(row + 1)
+                self._uids.append(uid)
+                self._profiles.append(profile)
+                self._row_of[uid] = row
+            else:
+                self._profiles[row] = profile
+            self._set_columns(row, profile)
+            self._offers[row] = offer if offer is not None else 0.0
+            self._needs[row] = need if need is not None else 0.0
+            self._valid[row] = offer is not None and need is not None
+
+    def upsert_document(self, document: Dict[str, Any]) -> None:
+        """Upsert from a profile search document (id, offer_vec, need_vec, metadata)."""
+        profile = {k: v for k, v in document.items() if k not in _VECTOR_FIELDS}
+        self.upsert(document["id"], document.get("offer_vec"), document.get("need_vec"), profile)
+
+    def upsert_profile(
+        self,
+        username: str,
+        offer_vec: List[float],
+        need_vec: List[float],
+        payload: Dict[str, Any],
+    ) -> None:
+        """Same signature as AzureSearchService.upsert_profile (routes call both)."""
+        self.upsert_document(_profile_document(username, offer_vec, need_vec, payload))
+
+    def remove(self, uid: str) -> bool:
+        """Remove a profile; the last row moves into its slot to keep rows contiguous."""
+        with self._lock:
+            row = self._row_of.pop(uid, None)
+            if row is None:
+                return False
+            last = len(self._uids) - 1
+            if row != last:
+                moved = self._uids[last]
+                self._uids[row] = moved
+                self._profiles[row] = self._profiles[last]
+                self._offers[row] = self._offers[last]
+                self._needs[row] = self._needs[last]
+                self._valid[row] = self._valid[last]
+                for column in self._columns.values():
+                    column[row] = column[last]
+                self._row_of[moved] = row
+            self._uids.pop()
+            self._profiles.pop()
+            self._valid[last] = False
+            return True
+
+    def load_documents(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Upsert many search documents; returns how many were loaded."""
+        count = 0
+        for document in documents:
+            self.upsert_document(document)
+            count += 1
+        return count
+
+    def load_snapshot(self, snapshot, block_size: int = 8192) -> int:
+        """
+        Bulk-load a VectorSnapshot (app.vector_snapshot); returns rows loaded.
+
+        Rows are normalised and copied a block at a time straight from the
+        memory-mapped matrix, without building per-profile vector lists.
+
+        Raises:
+            ValueError: the snapshot's dimension differs from the engine's
+        """
+        if snapshot.dimension != self.dimension:
+            raise ValueError(
+                f"Snapshot dimension {snapshot.dimension} does not match "
+                f"engine dimension {self.dimension}"
+            )
+        offer_col = snapshot.fields.index("offer_vec")
+        need_col = snapshot.fields.index("need_vec")
+        count = 0
+        for start, block in snapshot.iter_blocks(block_size):
+            offers, offer_set = _unit_rows(block[:, offer_col])
+            needs, need_set = _unit_rows(block[:, need_col])
+            profiles = snapshot.read_documents(start, start + len(block))
+            with self._lock:
+                rows = np.empty(len(block), dtype=np.int64)
+                for i, profile in enumerate(profiles):
+                    uid = snapshot.ids[start + i]
+                    row = self._row_of.get(uid)
+                    if row is None:
+                        row = len(self._uids)
+                        self._uids.append(uid)
+                        self._profiles.append(profile)
+                        self._row_of[uid] = row
+                    else:
+                        self._profiles[row] = profile
+                    rows[i] = row
+                self._grow(len(self._uids))
+                for row, profile in zip(rows, profiles):
+                    self._set_columns(row, profile)
+                self._offers[rows] = offers
+                self._needs[rows] = needs
+                self._valid[rows] = offer_set & need_set
+            count += len(block)
+        return count
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._offers.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ("_offers", "_needs"):
+            old = getattr(self, name)
+            grown = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+            grown[:capacity] = old
+            setattr(self, name, grown)
+        valid = np.zeros(new_capacity, dtype=bool)
+        valid[:capacity] = self._valid
+        self._valid = valid
+        for name, column in self._columns.items():
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:capacity] = column
+            self._columns[name] = grown
+
+    def _set_columns(self, row: int, profile: Dict[str, Any]) -> None:
+        """Copy profile's filterable fields into the columns (caller holds the lock)."""
+        city = profile.get("city")
+        codes = self._city_codes
+        self._columns["city"][row] = codes.setdefault(city, len(codes)) if city else -1
+        self._columns["dm_open"][row] = _flag(profile.get("dm_open", True))
+        self._columns["show_city"][row] = _flag(profile.get("show_city", True))
+        self._columns["swap_credits"][row] = profile.get("swap_credits") or 0
+        self._columns["swaps_completed"][row] = profile.get("swaps_completed") or 0
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def top_matches(
+        self,
+        my_offer_vec: Sequence[float],
+        my_need_vec: Sequence[float],
+        limit: int = 10,
+        score_threshold: float = 0.2,
+        exclude_uids: Iterable[str] = (),
+        filters: Optional[ProfileFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Exact top-k reciprocal matches.
+
+        Args:
+            my_offer_vec: Embedding of what I offer (scored against their needs)
+            my_need_vec: Embedding of what I need (scored against their offers)
+            limit: Number of results to return
+            score_threshold: Minimum per-direction score (Azure score scale)
+            exclude_uids: Profiles never to return (e.g. myself)
+            filters: Conditions every returned profile must meet
+
+        Returns:
+            Same shape as combine_reciprocal_matches: profile fields plus
+            score, reciprocal_score, offer_match_score and need_match_score
+        """
+        my_offer = _unit(my_offer_vec, self.dimension)
+        my_need = _unit(my_need_vec, self.dimension)
+        if my_offer is None or my_need is None or limit <= 0:
+            return []
+
+        with self._lock:
+            n = len(self._uids)
+            if n == 0:
+                return []
+            need_scores = azure_cosine_score(self._needs[:n] @ my_offer)
+            offer_scores = azure_cosine_score(self._offers[:n] @ my_need)
+            eligible = (
+                self._valid[:n]
+                & (need_scores >= score_threshold)
+                & (offer_scores >= score_threshold)
+            )
+            for uid in exclude_uids:
+                row = self._row_of.get(uid)
+                if row is not None:
+                    eligible[row] = False
+            if filters is not None and not filters.is_empty():
+                columns = {name: column[:n] for name, column in self._columns.items()}
+                eligible &= filters.mask(columns, self._city_codes)
+
+            return self._select(need_scores, offer_scores, eligible, limit)
+
+    def top_matches_for(
+        self,
+        uid: str,
+        limit: int = 10,
+        score_threshold: float = 0.2,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        top_matches using uid's stored vectors, never returning uid itself.
+
+        Returns:
+            Matches, or None if uid is unknown or lacks an offer/need vector
+        """
+        with self._lock:
+            row = self._row_of.get(uid)
+            if row is None or not self._valid[row]:
+                return None
+            my_offer = self._offers[row].copy()
+            my_need = self._needs[row].copy()
+        return self.top_matches(my_offer, my_need, limit, score_threshold, exclude_uids=[uid])
+
+    def get_vectors(self, uid: str) -> Optional[Tuple[List[float], List[float]]]:
+        """uid's stored (offer_vec, need_vec), unit-normalized; None unless both are set."""
+        with self._lock:
+            row = self._row_of.get(uid)
+            if row is None or not self._valid[row]:
+                return None
+            return self._offers[row].tolist(), self._needs[row].tolist()
+
+    def score_as_candidate(
+        self,
+        uid: str,
+        score_threshold: float = 0.2,
+    ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score uid as a match candidate for every profile (incremental updates).
+
+        Returns:
+            (uids, reciprocal, need_scores, offer_scores) aligned by index, where
+            uids[i] is the querying profile; reciprocal is -inf where uid is not
+            an eligible match for uids[i] (incl. uid itself)
+        """
+        with self._lock:
+            n = len(self._uids)
+            uids = list(self._uids)
+            row = self._row_of.get(uid)
+            if row is None or not self._valid[row]:
+                empty = np.full(n, -np.inf)
+                return uids, empty, empty, empty
+            # Querying profile q: need = cand.need · q.offer, offer = cand.offer · q.need
+            need_scores = azure_cosine_score(self._offers[:n] @ self._needs[row])
+            offer_scores = azure_cosine_score(self._needs[:n] @ self._offers[row])
+            eligible = (
+                self._valid[:n]
+                & (need_scores >= score_threshold)
+                & (offer_scores >= score_threshold)
+            )
+            eligible[row] = False
+        reciprocal = 2 * need_scores * offer_scores / (need_scores + offer_scores)
+        return uids, np.where(eligible, reciprocal, -np.inf), need_scores, offer_scores
+
+    def match_entry(
+        self, uid: str, need_score: float, offer_score: float
+    ) -> Optional[Dict[str, Any]]:
+        """uid's profile formatted as a match with the given direction scores."""
+        profile = self.profile(uid)
+        if profile is None:
+            return None
+        reciprocal = 2 * need_score * offer_score / (need_score + offer_score)
+        return _match_entry(profile, need_score, offer_score, reciprocal)
+
+    def iter_all_top_matches(
+        self,
+        limit: int = 50,
+        score_threshold: float = 0.2,
+        block_size: int = 256,
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Top-k reciprocal matches for every matchable profile (batch job).
+
+        Profiles are scored block_size at a time with two matrix-matrix
+        products, which is far faster than one top_matches call per profile.
+        A profile never matches itself.
+
+        Yields:
+            (uid, matches) for each profile with both vectors set
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._valid[: len(self._uids)])
+
+        for start in range(0, len(rows), block_size):
+            with self._lock:
+                n = len(self._uids)
+                block = rows[start : start + block_size]
+                block = block[block < n]
+                if not len(block):
+                    continue
+                # Column j scores every profile against query profile block[j]
+                need_scores = azure_cosine_score(self._needs[:n] @ self._offers[block].T)
+                offer_scores = azure_cosine_score(self._offers[:n] @ self._needs[block].T)
+                results = []
+                for j, row in enumerate(block):
+                    eligible = (
+                        self._valid[:n]
+                        & (need_scores[:, j] >= score_threshold)
+                        & (offer_scores[:, j] >= score_threshold)
+                    )
+                    eligible[row] = False
+                    results.append(
+                        (
+                            self._uids[row],
+                            self._select(need_scores[:, j], offer_scores[:, j], eligible, limit),
+                        )
+                    )
+            yield from results
+
+    def iter_teach_edges(
+        self,
+        min_score: float,
+        max_degree: int,
+        block_size: int = 256,
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Sparse "X can teach what Y needs" edges (swap-cycle batch job).
+
+        For every profile X with both vectors set, the up to max_degree
+        profiles Y (also with both set, Y != X) whose need vector best matches
+        X's offer vector with azure_cosine_score >= min_score. Scored a block of
+        X at a time with one matrix-matrix product, like iter_all_top_matches.
+
+        Yields:
+            (x, ys, scores): row indices into uids(), best first
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._valid[: len(self._uids)])
+
+        for start in range(0, len(rows), block_size):
+            with self._lock:
+                n = len(self._uids)
+                block = rows[start : start + block_size]
+                block = block[block < n]
+                if not len(block):
+                    continue
+                # Row j scores what block[j] offers against every profile's need
+                scores = azure_cosine_score(self._offers[block] @ self._needs[:n].T)
+                scores[:, ~self._valid[:n]] = -np.inf
+                scores[np.arange(len(block)), block] = -np.inf
+            k = min(max_degree, n)
+            if k == 0:
+                continue
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for j, x in enumerate(block):
+                ys = top[j][np.argsort(-scores[j, top[j]], kind="stable")]
+                ys = ys[scores[j, ys] >= min_score]
+                yield int(x), ys, scores[j, ys]
+
+    def uids(self) -> List[str]:
+        """Profile ids by row (indexes for iter_teach_edges)."""
+        with self._lock:
+            return list(self._uids)
+
+    def profile(self, uid: str) -> Optional[Dict[str, Any]]:
+        """Stored metadata for uid (vector fields stripped), or None."""
+        with self._lock:
+            row = self._row_of.get(uid)
+            return self._profiles[row] if row is not None else None
+
+    def _select(
+        self,
+        need_scores: np.ndarray,
+        offer_scores: np.ndarray,
+        eligible: np.ndarray,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Exact top-`limit` eligible rows by harmonic mean (caller holds the lock)."""
+        reciprocal = 2 * need_scores * offer_scores / (need_scores + offer_scores)
+        reciprocal = np.where(eligible, reciprocal, -np.inf)
+
+        k = min(limit, int(eligible.sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-reciprocal, k - 1)[:k]
+        top = top[np.argsort(-reciprocal[top], kind="stable")]
+
+        return [
+            _match_entry(self._profiles[row], need_scores[row], offer_scores[row], reciprocal[row])
+            for row in top
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._uids)
+            return {
+                "ready": self.ready,
+                "profiles": n,
+                "matchable": int(self._valid[:n].sum()),
+                "dimension": self.dimension,
+                "matrix_bytes": int(self._offers.nbytes + self._needs.nbytes),
+            }
+
+
+# Global instance
+_match_engine = None
+
+
+def get_match_engine() -> Optional[ReciprocalMatchEngine]:
+    """Get the in-process match engine, or None unless MATCHING_ENGINE=local."""
+    global _match_engine
+    if settings.matching_engine != "local":
+        return None
+    if _match_engine is None:
+        _match_engine = ReciprocalMatchEngine(dimension=settings.embedding_dim)
+    return _match_engine
+
+
+async def load_match_engine(search_service) -> int:
+    """Fill the engine from every document in the profiles index (app startup)."""
+    engine = get_match_engine()
+    if engine is None:
+        return 0
+    count = 0
+    async for document in search_service.iter_profile_documents():
+        engine.upsert_document(document)
+        count += 1
+    engine.ready = True
+    return count
+
+
+async def reload_match_engine(search_service) -> int:
+    """
+    Rebuild the engine from the profiles index and swap it in.
+
+    Picks up profile writes served by other workers. The old engine keeps
+    serving until the new one is complete, so memory briefly doubles.
+    """
+    global _match_engine
+    if get_match_engine() is None:
+        return 0
+    engine = ReciprocalMatchEngine(dimension=settings.embedding_dim)
+    count = 0
+    async for document in search_service.iter_profile_documents():
+        engine.upsert_document(document)
+        count += 1
+    engine.ready = True
+    _match_engine = engine
+    return count
+
+
+async def run_periodic_reload(interval: float, search_service) -> None:
+    """Reload the engine every `interval` seconds (app lifespan task)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            loaded = await reload_match_engine(search_service)
+            logger.info("Match engine reloaded %d profiles", loaded)
+        except Exception as exc:
+            logger.warning("Match engine reload failed; keeping the loaded copy: %s", exc)
@@ -0,0 +1,368 @@
+"""
+Precomputed per-user reciprocal match table.
+
+A user's reciprocal matches only change when some profile changes, yet every
+POST /match/reciprocal pays for two embeddings and two vector searches. The
+batch job here scores every profile against every other one with the
+harmonic-mean scoring of compute_reciprocal_matches (via the in-process
+ReciprocalMatchEngine, so the table is exact rather than limited to two
+top-50 lists) and stores the top-K per uid in the Cosmos "matches" container:
+
+    {"id": uid, "uid": uid, "matches": [...], "computed_at": "<UTC ISO>"}
+
+GET /match/{uid} then serves a row with one point read.
+
+Run it with scripts/refresh_matches.py (e.g. from cron), or set
+MATCH_TABLE_REFRESH_INTERVAL to refresh in the API process.
+
+Between full refreshes, MatchTableUpdater keeps the table current as profiles
+change. Web workers only queue the changed uid (update_match_rows): each
+worker's match engine misses writes made through the others, so patching
+there would overwrite shared rows from stale vectors. One process runs
+follow_match_updates (scripts/refresh_matches.py --follow); every change flows
+through it, and it re-reads each changed profile's vectors from the search
+index into its own engine before patching. Each row also stores match_uids
+and a floor (its K-th score), so a changed profile P only touches:
+
+    - P's own row (recomputed),
+    - rows that contain P (P's entry is rescored, or dropped), found with one
+      ARRAY_CONTAINS query,
+    - rows whose floor P's new score beats (P enters).
+
+P's score against every profile is two matrix-vector products in the match
+engine; comparing those scores with the cached floors skips every other row
+without reading it, so Cosmos traffic grows with the affected users only.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.match_engine import ReciprocalMatchEngine
+from app.vector_snapshot import open_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def row_floor(matches: List[Dict[str, Any]], top_k: int) -> float:
+    """
+    Score a new candidate must beat to enter a row.
+
+    A row shorter than top_k already holds every eligible candidate, so any
+    eligible one may enter (floor 0); a full row's floor is its K-th score.
+    """
+    if len(matches) < top_k:
+        return 0.0
+    return matches[top_k - 1]["reciprocal_score"]
+
+
+def refresh_match_table(
+    top_k: Optional[int] = None,
+    score_threshold: float = 0.2,
+    search_service=None,
+    cosmos_service=None,
+    snapshot_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Recompute and store the top-K reciprocal matches of every profile.
+
+    Profile vectors are read back from the search index (no re-embedding),
+    or from a vector snapshot file when snapshot_path is given.
+    All rows written in one run share the same computed_at.
+
+    Args:
+        top_k: Matches kept per user (default settings.match_table_top_k)
+        score_threshold: Minimum per-direction score, as in compute_reciprocal_matches
+        search_service: Sync AzureSearchService (default singleton)
+        cosmos_service: Sync CosmosService (default singleton)
+        snapshot_path: Vector snapshot to load instead of the search index
+            (see app.vector_snapshot)
+
+    Returns:
+        Run summary: profiles loaded, rows written/failed, computed_at, seconds
+    """
+    if search_service is None and snapshot_path is None:
+        from app.azure_search import get_azure_search_service
+
+        search_service = get_azure_search_service()
+    if cosmos_service is None:
+        from app.cosmos_db import get_cosmos_service
+
+        cosmos_service = get_cosmos_service()
+    top_k = top_k or settings.match_table_top_k
+
+    started = time.perf_counter()
+    engine = ReciprocalMatchEngine(dimension=settings.embedding_dim)
+    if snapshot_path is not None:
+        with open_snapshot(snapshot_path) as snapshot:
+            loaded = engine.load_snapshot(snapshot)
+    else:
+        loaded = engine.load_documents(search_service.iter_profile_documents())
+
+    computed_at = datetime.now(timezone.utc).isoformat()
+    written = 0
+    failed = 0
+    for uid, matches in engine.iter_all_top_matches(limit=top_k, score_threshold=score_threshold):
+        try:
+            cosmos_service.upsert_match_row(
+                uid, matches, computed_at=computed_at, floor=row_floor(matches, top_k)
+            )
+            written += 1
+        except Exception as exc:
+            failed += 1
+            logger.warning("Match table write failed for %s: %s", uid, exc)
+
+    summary = {
+        "profiles": loaded,
+        "written": written,
+        "failed": failed,
+        "computed_at": computed_at,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Match table refreshed: %s", summary)
+    return summary
+
+
+async def run_periodic_refresh(interval: float) -> None:
+    """Refresh the match table every `interval` seconds (app lifespan task)."""
+    while True:
+        try:
+            # Blocking SDK clients + NumPy; keep it off the event loop
+            await asyncio.to_thread(refresh_match_table)
+        except Exception as exc:
+            logger.warning("Match table refresh failed: %s", exc)
+        await asyncio.sleep(interval)
+
+
+class MatchTableUpdater:
+    """
+    Change-driven maintenance of the match table.
+
+    Needs a loaded match engine that sees every profile change, so run it in
+    one process only (follow_match_updates), never per web worker.
+    """
+
+    FLOORS_TTL = 300.0  # Seconds before row floors are re-read (external refreshes)
+
+    def __init__(
+        self,
+        engine: ReciprocalMatchEngine,
+        cosmos_service,
+        top_k: int,
+        score_threshold: float = 0.2,
+    ):
+        self.engine = engine
+        self.cosmos = cosmos_service
+        self.top_k = top_k
+        self.score_threshold = score_threshold
+        self._floors: Dict[str, float] = {}
+        self._floors_loaded_at: Optional[float] = None
+
+    def _get_floors(self) -> Dict[str, float]:
+        now = time.monotonic()
+        if self._floors_loaded_at is None or now - self._floors_loaded_at > self.FLOORS_TTL:
+            self._floors = self.cosmos.list_match_floors()
+            self._floors_loaded_at = now
+        return self._floors
+
+    def _write(self, uid: str, matches: List[Dict[str, Any]], computed_at: str) -> None:
+        floor = row_floor(matches, self.top_k)
+        self.cosmos.upsert_match_row(uid, matches, computed_at=computed_at, floor=floor)
+        self._floors[uid] = floor
+
+    def _recompute(self, uid: str, computed_at: str) -> bool:
+        matches = self.engine.top_matches_for(uid, self.top_k, self.score_threshold)
+        if matches is None:
+            self.cosmos.delete_match_row(uid)
+            self._floors.pop(uid, None)
+            return False
+        self._write(uid, matches, computed_at)
+        return True
+
+    def apply_queued(
+        self, search_service, settle_seconds: float = 0.0, limit: int = 500
+    ) -> Dict[str, int]:
+        """
+        Apply queued profile changes (CosmosService.queue_match_update).
+
+        Each uid's vectors are re-read from the search index and its profile
+        from Cosmos into this updater's engine before its rows are patched; a
+        deleted or no longer indexed profile is removed. Updates queued less
+        than settle_seconds ago wait, since a write-behind index write may not
+        have been sent yet.
+
+        Returns:
+            Counts: updates applied, deferred
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)).isoformat()
+        applied = deferred = 0
+        for item in self.cosmos.list_match_updates(limit=limit):
+            if item["queued_at"] > cutoff:
+                deferred += 1
+                continue
+            uid = item["uid"]
+            vectors = None if item.get("deleted") else search_service.get_profile_vectors(uid)
+            profile = self.cosmos.get_profile(uid) if vectors is not None else None
+            if profile is None:
+                self.engine.remove(uid)
+                self.on_profile_deleted(uid)
+            else:
+                self.engine.upsert_profile(uid, vectors[0], vectors[1], profile)
+                self.on_profile_changed(uid)
+            self.cosmos.delete_match_update(item)
+            applied += 1
+        return {"applied": applied, "deferred": deferred}
+
+    def on_profile_changed(self, uid: str) -> Dict[str, int]:
+        """
+        Patch the table after uid's vectors changed (engine already updated).
+
+        Returns:
+            Counts: rows patched in place, rows fully recomputed, rows skipped
+        """
+        computed_at = datetime.now(timezone.utc).isoformat()
+        self._recompute(uid, computed_at)
+
+        uids, reciprocal, need_scores, offer_scores = self.engine.score_as_candidate(
+            uid, self.score_threshold
+        )
+        floors = self._get_floors()
+        floor_arr = np.fromiter(
+            (floors.get(u, np.inf) for u in uids), dtype=np.float64, count=len(uids)
+        )
+        entering = {uids[i] for i in np.flatnonzero(np.round(reciprocal, 4) > floor_arr)}
+
+        containing = {row["uid"]: row for row in self.cosmos.query_match_rows_containing(uid)}
+        position = {u: i for i, u in enumerate(uids)} if entering or containing else {}
+
+        patched = recomputed = 0
+        for owner in (entering | set(containing)) - {uid}:
+            row = containing.get(owner) or self.cosmos.get_match_row(owner)
+            if row is None:
+                continue
+            i = position.get(owner)
+            entry = None
+            if i is not None and reciprocal[i] > -np.inf:
+                entry = self.engine.match_entry(uid, need_scores[i], offer_scores[i])
+            if self._patch_row(owner, row, uid, entry, computed_at):
+                patched += 1
+            else:
+                recomputed += 1
+
+        return {
+            "patched": patched,
+            "recomputed": recomputed,
+            "skipped": max(0, len(uids) - 1 - patched - recomputed),
+        }
+
+    def on_profile_deleted(self, uid: str) -> Dict[str, int]:
+        """Drop uid from every row it appears in, and its own row (engine already updated)."""
+        computed_at = datetime.now(timezone.utc).isoformat()
+        self.cosmos.delete_match_row(uid)
+        self._floors.pop(uid, None)
+
+        patched = recomputed = 0
+        for row in self.cosmos.query_match_rows_containing(uid):
+            if self._patch_row(row["uid"], row, uid, None, computed_at):
+                patched += 1
+            else:
+                recomputed += 1
+        return {"patched": patched, "recomputed": recomputed}
+
+    def _patch_row(
+        self,
+        owner: str,
+        row: Dict[str, Any],
+        uid: str,
+        entry: Optional[Dict[str, Any]],
+        computed_at: str,
+    ) -> bool:
+        """
+        Replace uid's entry in owner's row with `entry` (None = drop it).
+
+        Returns False when the row had to be recomputed instead: it was full
+        and uid left it (or fell below the old floor), so the next-best
+        candidate outside the row is unknown.
+        """
+        matches = row.get("matches", [])
+        was_full = len(matches) >= self.top_k
+        old_floor = row_floor(matches, self.top_k)
+        was_member = any(m.get("uid") == uid for m in matches)
+        kept = [m for m in matches if m.get("uid") != uid]
+
+        if was_member and was_full and (entry is None or entry["reciprocal_score"] < old_floor):
+            self._recompute(owner, computed_at)
+            return False
+
+        if entry is not None:
+            kept.append(entry)
+            kept.sort(key=lambda m: m["reciprocal_score"], reverse=True)
+            kept = kept[: self.top_k]
+        self._write(owner, kept, computed_at)
+        return True
+
+
+def follow_match_updates(
+    interval: float = 10.0,
+    top_k: Optional[int] = None,
+    score_threshold: float = 0.2,
+    search_service=None,
+    cosmos_service=None,
+) -> None:
+    """
+    Keep the match table current from the update queue (runs until stopped).
+
+    Run in one process only (scripts/refresh_matches.py --follow). Loads a
+    match engine from the search index, then applies queued updates every
+    `interval` seconds, keeping that engine current as it goes.
+    """
+    if search_service is None:
+        from app.azure_search import get_azure_search_service
+
+        search_service = get_azure_search_service()
+    if cosmos_service is None:
+        from app.cosmos_db import get_cosmos_service
+
+        cosmos_service = get_cosmos_service()
+
+    engine = ReciprocalMatchEngine(dimension=settings.embedding_dim)
+    loaded = engine.load_documents(search_service.iter_profile_documents())
+    logger.info("Match table follower loaded %d profiles", loaded)
+    updater = MatchTableUpdater(
+        engine,
+        cosmos_service,
+        top_k=top_k or settings.match_table_top_k,
+        score_threshold=score_threshold,
+    )
+    # After twice the write-behind interval, a queued update's index write has
+    # been sent (the web workers may batch writes even if this process does not)
+    settle = 2 * settings.search_write_flush_interval_ms / 1000
+    while True:
+        try:
+            counts = updater.apply_queued(search_service, settle_seconds=settle)
+            if counts["applied"]:
+                logger.info("Match table updates applied: %s", counts)
+        except Exception as exc:
+            logger.warning("Applying match table updates failed: %s", exc)
+        time.sleep(interval)
+
+
+def update_match_rows(uid: str, deleted: bool = False) -> None:
+    """
+    Background task run after a profile's vectors change (no-op if disabled).
+
+    Only queues uid for follow_match_updates; the rows are patched there.
+    """
+    if not settings.match_table_incremental:
+        return
+    try:
+        from app.cosmos_db import get_cosmos_service
+
+        get_cosmos_service().queue_match_update(uid, deleted=deleted)
+    except Exception as exc:
+        logger.warning("Could not queue match table update for %s: %s", uid, exc)
@@ -1,84 +1,391 @@
 """Matching logic for reciprocal skill swaps."""
 
-from typing import List, Dict, Any
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from app.embeddings import get_embedding_service
-from app.azure_search import get_azure_search_service
+from app.config import settings
+from app.embeddings import get_embedding_service, get_async_embedding_service
+from app.azure_search import get_azure_search_service, get_async_azure_search_service
+from app.cosmos_db import get_async_cosmos_service
+from app.match_engine import get_match_engine
+from app.search_filters import ProfileFilter
+
+logger = logging.getLogger(__name__)
+
+# Runs the two directional searches of a sync match concurrently
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="match-search")
+
+
+def _ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+# Direction → bound search method (needs: they want what I offer)
+_SEARCHES = {
+    "needs": lambda service: service.search_needs,
+    "offers": lambda service: service.search_offers,
+}
+
+
+def _match_key(match: Dict[str, Any]) -> Any:
+    return match.get("uid", match.get("username"))
+
+
+class _Deepening:
+    """Per-request iterative-deepening state over both search directions."""
+
+    def __init__(self, limit: int, exclude_uids: Iterable[str] = ()):
+        self.limit = limit
+        self.exclude = set(exclude_uids)
+        self.max_depth = max(settings.matching_max_depth, 1)
+        self.depth = 0  # Candidates fetched so far per direction
+        self.next_depth = min(max(settings.matching_initial_depth, limit), self.max_depth)
+        self.rounds = 0
+        # Results of earlier rounds, so pages are never refetched
+        self.results: Dict[str, Dict[Any, Dict[str, Any]]] = {"needs": {}, "offers": {}}
+        self.exhausted = {"needs": False, "offers": False}
+
+    def pages(self) -> List[Tuple[str, int, int]]:
+        """(direction, skip, size) of the next page for each live direction."""
+        size = self.next_depth - self.depth
+        return [(d, self.depth, size) for d in ("needs", "offers") if not self.exhausted[d]]
+
+    def add(self, direction: str, page: List[Dict[str, Any]], size: int) -> None:
+        for match in page:
+            key = _match_key(match)
+            if key not in self.exclude:
+                self.results[direction].setdefault(key, match)
+        # Fewer than asked (after the score threshold) means nothing further down
+        if len(page) < size:
+            self.exhausted[direction] = True
+
+    def advance(self) -> None:
+        self.rounds += 1
+        self.depth = self.next_depth
+        self.next_depth = min(self.depth * 2, self.max_depth)
+
+    def found(self) -> int:
+        return len(self.results["needs"].keys() & self.results["offers"].keys())
+
+    def done(self) -> bool:
+        if self.rounds == 0:
+            return False
+        return (
+            self.found() >= self.limit
+            or self.depth >= self.max_depth
+            or all(self.exhausted.values())
+        )
+
+    def matches(self) -> List[Dict[str, Any]]:
+        return combine_reciprocal_matches(
+            list(self.results["needs"].values()),
+            list(self.results["offers"].values()),
+            self.limit,
+        )
 
 
 def compute_reciprocal_matches(
     my_offer_text: str,
     my_need_text: str,
     limit: int = 10,
+    exclude_uids: Iterable[str] = (),
+    filters: Optional[ProfileFilter] = None,
 ) -> List[Dict[str, Any]]:
     """
     Find reciprocal skill swap matches using harmonic mean.
-    
+
     The algorithm:
-    1. Embed my_offer_text and search for profiles whose needs match (they want what I offer)
-    2. Embed my_need_text and search for profiles whose offers match (they offer what I want)
+    1. Embed my_offer_text and my_need_text (one encode_batch call)
+    2. Concurrently search for profiles whose needs match what I offer and
+       profiles whose offers match what I need
     3. Compute harmonic mean of scores for profiles in both result sets
     4. Return top-k by harmonic mean score
-    
+
+    Step 2 deepens iteratively: both directions start at MATCHING_INITIAL_DEPTH
+    candidates and double (fetching only the new page each round) until
+    `limit` profiles appear in both, both directions run out, or
+    MATCHING_MAX_DEPTH is reached. Popular skills stop after one small round;
+    niche skills search deeper instead of returning an empty list.
+
+    Latency is about one embedding round-trip plus one search round-trip;
+    per-stage timings are logged.
+
+    With MATCHING_ENGINE=local, steps 2-4 run exactly over every profile in
+    process instead (see app/match_engine.py).
+
+    exclude_uids (e.g. CosmosService.get_excluded_uids) and filters (city,
+    dm_open, credits, ... see app.search_filters) are applied inside each
+    search, so every top-k slot goes to an eligible profile I could send a
+    request.
+
     Args:
         my_offer_text: What I can offer
         my_need_text: What I want to learn
         limit: Number of results to return
-        
+        exclude_uids: Profiles never to return
+        filters: Conditions every returned profile must meet
+
     Returns:
         List of matched profiles with reciprocal scores
     """
-    embedding_service = get_embedding_service()
-    search_service = get_azure_search_service()
+    start = time.perf_counter()
+    my_offer_vec, my_need_vec = get_embedding_service().encode_batch([my_offer_text, my_need_text])
+    timings = {"embed": _ms(start)}
+    return match_vectors(my_offer_vec, my_need_vec, limit, exclude_uids, filters, timings=timings)
 
-    # Generate embeddings
-    my_offer_vec = embedding_service.encode(my_offer_text)
-    my_need_vec = embedding_service.encode(my_need_text)
 
-    # Search 1: Find people who want what I offer (search their needs)
-    they_need_matches = search_service.search_needs(
-        query_vec=my_offer_vec,
-        limit=50,
-        score_threshold=0.2,
+async def compute_reciprocal_matches_async(
+    my_offer_text: str,
+    my_need_text: str,
+    limit: int = 10,
+    exclude_uids: Iterable[str] = (),
+    filters: Optional[ProfileFilter] = None,
+) -> List[Dict[str, Any]]:
+    """Async variant of compute_reciprocal_matches (aio embedding + search clients)."""
+    start = time.perf_counter()
+    my_offer_vec, my_need_vec = await get_async_embedding_service().encode_batch(
+        [my_offer_text, my_need_text]
+    )
+    timings = {"embed": _ms(start)}
+    return await match_vectors_async(
+        my_offer_vec, my_need_vec, limit, exclude_uids, filters, timings=timings
     )
 
-    # Search 2: Find people who offer what I need (search their offers)
-    they_offer_matches = search_service.search_offers(
-        query_vec=my_need_vec,
-        limit=50,
-        score_threshold=0.2,
+
+def compute_reciprocal_matches_for_uid(
+    uid: str,
+    limit: int = 10,
+    exclude_uids: Iterable[str] = (),
+    filters: Optional[ProfileFilter] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Reciprocal matches for an indexed user from their stored vectors.
+
+    No embedding call (see get_stored_vectors). The user never matches
+    themselves, nor anyone in exclude_uids or failing filters.
+
+    Returns:
+        Matches, or None if uid has no stored vectors
+    """
+    start = time.perf_counter()
+    vectors = get_stored_vectors(uid)
+    if vectors is None:
+        return None
+    timings = {"lookup": _ms(start)}
+    return match_vectors(*vectors, limit, {uid, *exclude_uids}, filters, timings=timings)
+
+
+async def compute_reciprocal_matches_for_uid_async(
+    uid: str,
+    limit: int = 10,
+    exclude_uids: Iterable[str] = (),
+    filters: Optional[ProfileFilter] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Async variant of compute_reciprocal_matches_for_uid."""
+    start = time.perf_counter()
+    vectors = await get_stored_vectors_async(uid)
+    if vectors is None:
+        return None
+    timings = {"lookup": _ms(start)}
+    return await match_vectors_async(
+        *vectors, limit, {uid, *exclude_uids}, filters, timings=timings
     )
-    
+
+
+def get_stored_vectors(uid: str) -> Optional[Tuple[List[float], List[float]]]:
+    """
+    An indexed user's (offer_vec, need_vec) without re-embedding their skills.
+
+    Served from the match engine when it is loaded, otherwise by one key lookup
+    in the profiles index. None if the user lacks either vector.
+    """
+    return _engine_vectors(uid) or get_azure_search_service().get_profile_vectors(uid)
+
+
+async def get_stored_vectors_async(uid: str) -> Optional[Tuple[List[float], List[float]]]:
+    """Async variant of get_stored_vectors."""
+    return _engine_vectors(uid) or await get_async_azure_search_service().get_profile_vectors(uid)
+
+
+async def get_excluded_uids_async(uid: str) -> Set[str]:
+    """
+    uid's exclusion set for matching and search (CosmosService.get_excluded_uids).
+
+    Falls back to just {uid} if Cosmos is unavailable: create_swap_request
+    still enforces blocks and pending requests, so this only costs slots.
+    """
+    try:
+        return await get_async_cosmos_service().get_excluded_uids(uid)
+    except Exception as exc:
+        logger.warning("Exclusion lookup failed for %s: %s", uid, exc)
+        return {uid}
+
+
+def _engine_vectors(uid: str) -> Optional[Tuple[List[float], List[float]]]:
+    engine = get_match_engine()
+    if engine is None or not engine.ready:
+        return None
+    return engine.get_vectors(uid)
+
+
+def match_vectors(
+    my_offer_vec: List[float],
+    my_need_vec: List[float],
+    limit: int = 10,
+    exclude_uids: Iterable[str] = (),
+    filters: Optional[ProfileFilter] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Reciprocal matches for already-embedded offer/need vectors (steps 2-4).
+
+    Args:
+        my_offer_vec: Embedding of what I offer
+        my_need_vec: Embedding of what I need
+        limit: Number of results to return
+        exclude_uids: Profiles never to return (e.g. myself)
+        filters: Conditions every returned profile must meet
+        timings: Earlier stage timings (ms) to include in the log line
+    """
+    timings = dict(timings or {})
+    engine = get_match_engine()
+    if engine is not None and engine.ready:
+        start = time.perf_counter()
+        matches = engine.top_matches(
+            my_offer_vec, my_need_vec, limit=limit, score_threshold=0.2, exclude_uids=exclude_uids,
+            filters=filters,
+        )
+        timings["engine"] = _ms(start)
+        _log_timings(timings)
+        return matches
+
+    search_service = get_azure_search_service()
+    start = time.perf_counter()
+    deepening = _Deepening(limit, exclude_uids)
+    while not deepening.done():
+        # Next page of both directions concurrently (skip what earlier rounds fetched)
+        futures = [
+            (direction, size, _search_pool.submit(
+                _SEARCHES[direction](search_service),
+                query_vec=my_offer_vec if direction == "needs" else my_need_vec,
+                limit=size,
+                score_threshold=0.2,
+                skip=skip,
+                exclude_uids=deepening.exclude,
+                filters=filters,
+            ))
+            for direction, skip, size in deepening.pages()
+        ]
+        for direction, size, future in futures:
+            deepening.add(direction, future.result(), size)
+        deepening.advance()
+    timings["search"] = _ms(start)
+
+    start = time.perf_counter()
+    matches = deepening.matches()
+    timings["combine"] = _ms(start)
+    _log_timings(timings, deepening)
+    return matches
+
+
+async def match_vectors_async(
+    my_offer_vec: List[float],
+    my_need_vec: List[float],
+    limit: int = 10,
+    exclude_uids: Iterable[str] = (),
+    filters: Optional[ProfileFilter] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """Async variant of match_vectors (aio search client)."""
+    timings = dict(timings or {})
+    engine = get_match_engine()
+    if engine is not None and engine.ready:
+        start = time.perf_counter()
+        matches = engine.top_matches(
+            my_offer_vec, my_need_vec, limit=limit, score_threshold=0.2, exclude_uids=exclude_uids,
+            filters=filters,
+        )
+        timings["engine"] = _ms(start)
+        _log_timings(timings)
+        return matches
+
+    search_service = get_async_azure_search_service()
+    start = time.perf_counter()
+    deepening = _Deepening(limit, exclude_uids)
+    while not deepening.done():
+        pages = deepening.pages()
+        results = await asyncio.gather(*(
+            _SEARCHES[direction](search_service)(
+                query_vec=my_offer_vec if direction == "needs" else my_need_vec,
+                limit=size,
+                score_threshold=0.2,
+                skip=skip,
+                exclude_uids=deepening.exclude,
+                filters=filters,
+            )
+            for direction, skip, size in pages
+        ))
+        for (direction, _, size), page in zip(pages, results):
+            deepening.add(direction, page, size)
+        deepening.advance()
+    timings["search"] = _ms(start)
+
+    start = time.perf_counter()
+    matches = deepening.matches()
+    timings["combine"] = _ms(start)
+    _log_timings(timings, deepening)
+    return matches
+
+
+def _log_timings(timings: Dict[str, float], deepening: Optional["_Deepening"] = None) -> None:
+    stages = " ".join(f"{stage}={ms:.1f}ms" for stage, ms in timings.items())
+    if deepening is not None:
+        stages += f" (depth={deepening.depth} rounds={deepening.rounds})"
+    logger.info("reciprocal match: %s", stages)
+
+
+def combine_reciprocal_matches(
+    they_need_matches: List[Dict[str, Any]],
+    they_offer_matches: List[Dict[str, Any]],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """
+    Intersect the two search directions and rank by harmonic mean.
+
+    Args:
+        they_need_matches: Profiles whose needs match what I offer
+        they_offer_matches: Profiles whose offers match what I need
+        limit: Number of results to return
+
+    Returns:
+        Profiles present in both lists, with reciprocal scores, best first
+    """
     # Build score dictionaries (using uid as key)
-    need_scores = {m.get("uid", m.get("username")): m["score"] for m in they_need_matches}
+    need_profiles = {m.get("uid", m.get("username")): m for m in they_need_matches}
     offer_scores = {m.get("uid", m.get("username")): m["score"] for m in they_offer_matches}
-    
-    # Find intersection and compute harmonic mean
-    common_users = set(need_scores.keys()).intersection(offer_scores.keys())
-    
+
     reciprocal_matches = []
-    for user_id in common_users:
-        score_they_need = need_scores[user_id]
+    for user_id, profile in need_profiles.items():
+        if user_id not in offer_scores:
+            continue
+        score_they_need = profile["score"]
         score_they_offer = offer_scores[user_id]
-        
+
         # Harmonic mean
         harmonic_mean = (
             2 * score_they_need * score_they_offer
         ) / (score_they_need + score_they_offer)
-        
-        # Get full profile from one of the result sets
-        profile = next(
-            (m for m in they_need_matches if m.get("uid", m.get("username")) == user_id), None
-        )
-        
-        if profile:
-            profile["reciprocal_score"] = round(harmonic_mean, 4)
-            profile["offer_match_score"] = round(score_they_offer, 4)
-            profile["need_match_score"] = round(score_they_need, 4)
-            reciprocal_matches.append(profile)
-    
+
+        match = dict(profile)
+        match["reciprocal_score"] = round(harmonic_mean, 4)
+        match["offer_match_score"] = round(score_they_offer, 4)
+        match["need_match_score"] = round(score_they_need, 4)
+        reciprocal_matches.append(match)
+
     # Sort by reciprocal score
     reciprocal_matches.sort(key=lambda x: x["reciprocal_score"], reverse=True)
-    
-    return reciprocal_matches[:limit]
 
+    return reciprocal_matches[:limit]
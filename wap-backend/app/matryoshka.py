@@ -0,0 +1,46 @@
+"""
+Matryoshka dimension truncation.
+
+text-embedding-3 models are trained so that a prefix of the embedding is itself
+a usable embedding. Keeping the first N dimensions and re-normalizing to unit
+length gives a smaller vector whose cosine scores closely track the full one.
+This is exactly what the Azure OpenAI `dimensions` parameter does server-side.
+
+With settings.embedding_truncate_dim set, EmbeddingService returns truncated
+vectors, both Azure AI Search indexes are built with that many dimensions, and
+local scoring works on the shorter vectors. Switching the dimension requires a
+fresh index (vector field sizes can't change in place) and a reindex.
+
+benchmarks/matryoshka_recall.py reports recall@k against the full dimension.
+"""
+
+from typing import List, Sequence, Union
+
+import numpy as np
+
+
+def truncate(vectors: Union[np.ndarray, Sequence[Sequence[float]]], dim: int) -> np.ndarray:
+    """
+    Keep the first `dim` components of each row and re-normalize to unit length.
+
+    Args:
+        vectors: (n, d) matrix or a single (d,) vector, d >= dim
+        dim: Target dimension
+
+    Returns:
+        float32 array of shape (n, dim) or (dim,); all-zero rows stay zero
+    """
+    arr = np.asarray(vectors, dtype=np.float32)
+    if dim <= 0 or dim > arr.shape[-1]:
+        raise ValueError(f"Cannot truncate {arr.shape[-1]}-dim vectors to {dim}")
+    head = arr[..., :dim]
+    norms = np.linalg.norm(head, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return head / norms
+
+
+def truncate_list(vectors: List[List[float]], dim: int) -> List[List[float]]:
+    """truncate() for the List[List[float]] shape EmbeddingService returns."""
+    if not vectors:
+        return []
+    return truncate(vectors, dim).tolist()
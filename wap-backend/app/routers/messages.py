@@ -1,5 +1,6 @@
 """Messaging endpoints for conversations and messages."""
 
+import asyncio
 from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query
@@ -15,7 +16,7 @@ from app.schemas import (
     SwapRequestStatus,
     MessageType,
 )
-from app.cosmos_db import get_cosmos_service
+from app.cosmos_db import get_cosmos_service, get_async_cosmos_service
 from app.email_service import get_email_service
 from app.cache import get_cache_service
 
@@ -31,13 +32,15 @@ def _convert_timestamp(value) -> Optional[str]:
     return str(value)
 
 
-def _get_other_participant(participant_uids: List[str], current_uid: str) -> Optional[OtherParticipant]:
+async def _get_other_participant(
+    participant_uids: List[str], current_uid: str
+) -> Optional[OtherParticipant]:
     """Get the other participant's profile info."""
     other_uid = next((uid for uid in participant_uids if uid != current_uid), None)
     if not other_uid:
         return None
-    cosmos = get_cosmos_service()
-    profile = cosmos.get_profile(other_uid)
+    cosmos = get_async_cosmos_service()
+    profile = await cosmos.get_profile(other_uid)
     if not profile:
         return None
     return OtherParticipant(
@@ -48,7 +51,7 @@ def _get_other_participant(participant_uids: List[str], current_uid: str) -> Opt
     )
 
 
-def _build_conversation_response(data: dict, uid: str) -> ConversationResponse:
+async def _build_conversation_response(data: dict, uid: str) -> ConversationResponse:
     """Build a ConversationResponse from a Cosmos document."""
     unread_counts = data.get("unread_counts", {})
     unread_count = unread_counts.get(uid, 0)
@@ -62,7 +65,7 @@ def _build_conversation_response(data: dict, uid: str) -> ConversationResponse:
             sent_at=_convert_timestamp(lm.get("sent_at")) or datetime.utcnow().isoformat(),
         )
 
-    other_participant = _get_other_participant(data.get("participant_uids", []), uid)
+    other_participant = await _get_other_participant(data.get("participant_uids", []), uid)
 
     return ConversationResponse(
         id=data["id"],
@@ -78,7 +81,7 @@ def _build_conversation_response(data: dict, uid: str) -> ConversationResponse:
 
 
 @router.get("", response_model=ConversationListResponse)
-def list_conversations(
+async def list_conversations(
     uid: str = Query(..., description="UID of the user"),
     limit: int = Query(20, ge=1, le=50, description="Max conversations to return"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
@@ -91,8 +94,8 @@ def list_conversations(
     - Enriches with other participant's profile info
     - Excludes blocked conversations
     """
-    cosmos = get_cosmos_service()
-    all_docs = cosmos.query_conversations_for_user(uid)
+    cosmos = get_async_cosmos_service()
+    all_docs = await cosmos.query_conversations_for_user(uid)
 
     # Filter to active conversations only
     active = [d for d in all_docs if d.get("status") == ConversationStatus.active.value]
@@ -104,16 +107,21 @@ def list_conversations(
     paginated = active[offset: offset + limit]
     has_more = (offset + limit) < total
 
-    conversations = [_build_conversation_response(d, uid) for d in paginated]
+    # Participant profile lookups run concurrently instead of one after another
+    conversations = await asyncio.gather(
+        *(_build_conversation_response(d, uid) for d in paginated)
+    )
 
-    return ConversationListResponse(conversations=conversations, total=total, has_more=has_more)
+    return ConversationListResponse(
+        conversations=list(conversations), total=total, has_more=has_more
+    )
 
 
 @router.get("/unread-count")
-def get_total_unread(uid: str = Query(..., description="UID of the user")):
+async def get_total_unread(uid: str = Query(..., description="UID of the user")):
     """Get total unread message count across all conversations."""
-    cosmos = get_cosmos_service()
-    all_docs = cosmos.query_conversations_for_user(uid)
+    cosmos = get_async_cosmos_service()
+    all_docs = await cosmos.query_conversations_for_user(uid)
 
     total_unread = sum(
         d.get("unread_counts", {}).get(uid, 0)
@@ -124,25 +132,25 @@ def get_total_unread(uid: str = Query(..., description="UID of the user")):
 
 
 @router.get("/{conversation_id}", response_model=ConversationResponse)
-def get_conversation(
+async def get_conversation(
     conversation_id: str,
     uid: str = Query(..., description="UID of the requesting user"),
 ):
     """Get a single conversation by ID."""
-    cosmos = get_cosmos_service()
+    cosmos = get_async_cosmos_service()
 
-    data = cosmos.get_conversation(conversation_id)
+    data = await cosmos.get_conversation(conversation_id)
     if not data:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     if uid not in data.get("participant_uids", []):
         raise HTTPException(status_code=403, detail="Not authorized to view this conversation")
 
-    return _build_conversation_response(data, uid)
+    return await _build_conversation_response(data, uid)
 
 
 @router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
-def get_messages(
+async def get_messages(
     conversation_id: str,
     uid: str = Query(..., description="UID of the requesting user"),
     limit: int = Query(50, ge=1, le=100, description="Max messages to return"),
@@ -154,15 +162,15 @@ def get_messages(
     - Returns messages sorted by sent_at descending (newest first)
     - Use 'before' parameter for pagination (pass the oldest message's sent_at)
     """
-    cosmos = get_cosmos_service()
+    cosmos = get_async_cosmos_service()
 
-    conv = cosmos.get_conversation(conversation_id)
+    conv = await cosmos.get_conversation(conversation_id)
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
     if uid not in conv.get("participant_uids", []):
         raise HTTPException(status_code=403, detail="Not authorized to view this conversation")
 
-    messages = cosmos.get_messages(conversation_id, limit=limit, before=before)
+    messages = await cosmos.get_messages(conversation_id, limit=limit, before=before)
 
     return [
         MessageResponse(
@@ -1,14 +1,15 @@
 """Profile management endpoints."""
 
 from typing import Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from datetime import datetime
 
-from app.config import settings
 from app.schemas import ProfileCreate, ProfileUpdate, ProfileResponse
-from app.cosmos_db import get_cosmos_service
-from app.embeddings import get_embedding_service
-from app.azure_search import get_azure_search_service
+from app.cosmos_db import get_async_cosmos_service
+from app.embeddings import get_async_embedding_service
+from app.azure_search import get_async_azure_search_service
+from app.match_engine import get_match_engine
+from app.match_table import update_match_rows
 from app.cache import get_cache_service
 from app.email_service import get_email_service
 
@@ -16,7 +17,7 @@ router = APIRouter(prefix="/profiles", tags=["profiles"])
 
 
 @router.post("/upsert", response_model=ProfileResponse)
-def upsert_profile(profile_data: ProfileCreate):
+async def upsert_profile(profile_data: ProfileCreate, background_tasks: BackgroundTasks):
     """
     Create or update a profile in Cosmos DB and Azure AI Search.
 
@@ -25,13 +26,13 @@ def upsert_profile(profile_data: ProfileCreate):
     3. Upserts vectors to Azure AI Search
     """
     # Get services
-    cosmos_service = get_cosmos_service()
-    embedding_service = get_embedding_service()
-    search_service = get_azure_search_service()
+    cosmos_service = get_async_cosmos_service()
+    embedding_service = get_async_embedding_service()
+    search_service = get_async_azure_search_service()
     email_service = get_email_service()
 
     # Check if this is a new profile (for welcome email)
-    existing_profile = cosmos_service.get_profile(profile_data.uid)
+    existing_profile = await cosmos_service.get_profile(profile_data.uid)
     is_new_profile = existing_profile is None
 
     # Prepare profile data for Cosmos DB
@@ -53,7 +54,7 @@ def upsert_profile(profile_data: ProfileCreate):
     }
     
     # Upsert to Cosmos DB
-    saved_profile = cosmos_service.upsert_profile(profile_data.uid, profile_dict)
+    saved_profile = await cosmos_service.upsert_profile(profile_data.uid, profile_dict)
     
     # Generate embeddings if either skills_to_offer or services_needed is provided.
     # Use a zero vector for whichever field is empty so the profile is still searchable.
@@ -61,9 +62,11 @@ def upsert_profile(profile_data: ProfileCreate):
     has_needs = bool(profile_data.services_needed and profile_data.services_needed.strip())
 
     if has_offers or has_needs:
-        zero_vec = [0.0] * settings.vector_dim
-        offer_vec = embedding_service.encode(profile_data.skills_to_offer) if has_offers else zero_vec
-        need_vec = embedding_service.encode(profile_data.services_needed) if has_needs else zero_vec
+        # Composed from per-skill phrase vectors; an empty field gets a zero vector
+        offer_vec, need_vec = await embedding_service.encode_profile_texts([
+            profile_data.skills_to_offer if has_offers else "",
+            profile_data.services_needed if has_needs else "",
+        ])
 
         payload = {
             "uid": profile_data.uid,
@@ -83,22 +86,29 @@ def upsert_profile(profile_data: ProfileCreate):
             "swaps_completed": saved_profile.get("swaps_completed", 0),
         }
 
-        search_service.upsert_profile(
+        await search_service.upsert_profile(
             username=profile_data.uid,
             offer_vec=offer_vec,
             need_vec=need_vec,
             payload=payload,
         )
+        match_engine = get_match_engine()
+        if match_engine is not None:
+            match_engine.upsert_profile(profile_data.uid, offer_vec, need_vec, payload)
+        # Queue the match-table rows this profile enters or leaves for patching
+        background_tasks.add_task(update_match_rows, profile_data.uid)
     
     # Invalidate search cache when profile changes
     cache_service = get_cache_service()
-    cleared = cache_service.clear_pattern("search:*")
+    cleared = await cache_service.aclear_pattern("search:*")
     if cleared > 0:
         print(f"Cleared {cleared} cached search results (profile updated)")
 
-    # Send welcome email for new profiles (if email updates enabled)
+    # Send welcome email for new profiles (if email updates enabled).
+    # The email client is synchronous, so it runs after the response is sent.
     if is_new_profile and profile_data.email_updates is not False:
-        email_service.send_welcome(
+        background_tasks.add_task(
+            email_service.send_welcome,
             to_email=profile_data.email,
             user_name=profile_data.display_name,
             skills_to_offer=profile_data.skills_to_offer,
@@ -109,10 +119,10 @@ def upsert_profile(profile_data: ProfileCreate):
 
 
 @router.get("/{uid}", response_model=ProfileResponse)
-def get_profile(uid: str):
+async def get_profile(uid: str):
     """Get a profile by UID."""
-    cosmos_service = get_cosmos_service()
-    profile = cosmos_service.get_profile(uid)
+    cosmos_service = get_async_cosmos_service()
+    profile = await cosmos_service.get_profile(uid)
 
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -121,10 +131,10 @@ def get_profile(uid: str):
 
 
 @router.get("/email/{email}", response_model=ProfileResponse)
-def get_profile_by_email(email: str):
+async def get_profile_by_email(email: str):
     """Get a profile by email address."""
-    cosmos_service = get_cosmos_service()
-    profile = cosmos_service.get_profile_by_email(email)
+    cosmos_service = get_async_cosmos_service()
+    profile = await cosmos_service.get_profile_by_email(email)
 
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -133,14 +143,16 @@ def get_profile_by_email(email: str):
 
 
 @router.patch("/{uid}", response_model=ProfileResponse)
-def update_profile(uid: str, profile_update: ProfileUpdate):
+async def update_profile(
+    uid: str, profile_update: ProfileUpdate, background_tasks: BackgroundTasks
+):
     """Partially update a profile."""
-    cosmos_service = get_cosmos_service()
-    embedding_service = get_embedding_service()
-    search_service = get_azure_search_service()
+    cosmos_service = get_async_cosmos_service()
+    embedding_service = get_async_embedding_service()
+    search_service = get_async_azure_search_service()
 
     # Check if profile exists
-    existing_profile = cosmos_service.get_profile(uid)
+    existing_profile = await cosmos_service.get_profile(uid)
     if not existing_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
@@ -148,7 +160,7 @@ def update_profile(uid: str, profile_update: ProfileUpdate):
     update_dict = profile_update.model_dump(exclude_unset=True)
 
     # Update Cosmos DB
-    updated_profile = cosmos_service.update_profile(uid, update_dict)
+    updated_profile = await cosmos_service.update_profile(uid, update_dict)
     
     # If skills changed, update search index embeddings
     if 'skills_to_offer' in update_dict or 'services_needed' in update_dict:
@@ -159,9 +171,10 @@ def update_profile(uid: str, profile_update: ProfileUpdate):
         has_needs = bool(services_needed and services_needed.strip())
 
         if has_offers or has_needs:
-            zero_vec = [0.0] * settings.vector_dim
-            offer_vec = embedding_service.encode(skills_to_offer) if has_offers else zero_vec
-            need_vec = embedding_service.encode(services_needed) if has_needs else zero_vec
+            offer_vec, need_vec = await embedding_service.encode_profile_texts([
+                skills_to_offer if has_offers else "",
+                services_needed if has_needs else "",
+            ])
 
             payload = {
                 "uid": uid,
@@ -181,28 +194,36 @@ def update_profile(uid: str, profile_update: ProfileUpdate):
                 "swaps_completed": updated_profile.get('swaps_completed', 0),
             }
 
-            search_service.upsert_profile(
+            await search_service.upsert_profile(
                 username=uid,
                 offer_vec=offer_vec,
                 need_vec=need_vec,
                 payload=payload,
             )
+            match_engine = get_match_engine()
+            if match_engine is not None:
+                match_engine.upsert_profile(uid, offer_vec, need_vec, payload)
+            background_tasks.add_task(update_match_rows, uid)
     
     return ProfileResponse(**updated_profile)
 
 
 @router.delete("/{uid}")
-def delete_profile(uid: str):
+async def delete_profile(uid: str, background_tasks: BackgroundTasks):
     """Delete a profile from Cosmos DB and Azure AI Search."""
-    cosmos_service = get_cosmos_service()
-    search_service = get_azure_search_service()
+    cosmos_service = get_async_cosmos_service()
+    search_service = get_async_azure_search_service()
 
-    existing_profile = cosmos_service.get_profile(uid)
+    existing_profile = await cosmos_service.get_profile(uid)
     if not existing_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    cosmos_service.delete_profile(uid)
-    search_service.delete_profile(uid)
+    await cosmos_service.delete_profile(uid)
+    await search_service.delete_profile(uid)
+    match_engine = get_match_engine()
+    if match_engine is not None:
+        match_engine.remove(uid)
+    background_tasks.add_task(update_match_rows, uid, deleted=True)
 
     return {"message": "Profile deleted successfully", "uid": uid}
 
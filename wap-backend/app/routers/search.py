@@ -1,34 +1,56 @@
 """Search endpoints."""
 
+import asyncio
+import logging
+import time
 from typing import List, Literal, Dict, Any, Optional
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from app.schemas import ProfileSearchResult, SkillSearchResult
-from app.embeddings import get_embedding_service
-from app.azure_search import get_azure_search_service, get_skills_search_service
+from app.embeddings import get_async_embedding_service
+from app.azure_search import get_async_azure_search_service, get_async_skills_search_service
 from app.cache import get_cache_service
-from app.firebase_db import get_firebase_service
+from app.cosmos_db import get_async_cosmos_service
+from app.match_engine import get_match_engine
+from app.matching import get_excluded_uids_async, get_stored_vectors_async
+from app.search_filters import ProfileFilter, SkillFilter
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
 class SearchRequest(BaseModel):
     """Request model for semantic search."""
-    
+
     query: str = Field(..., min_length=1, description="Search query")
     limit: int = Field(10, ge=1, le=100, description="Max results")
     score_threshold: float = Field(0.65, ge=0, le=1, description="Minimum similarity score")
     mode: Literal["offers", "needs", "both"] = Field("offers", description="Which vector to search")
+    retrieval: Literal["vector", "hybrid"] = Field(
+        "vector",
+        description="hybrid: also match the query's keywords (BM25), fused with the vector "
+        "ranking by reciprocal rank; score_threshold does not apply",
+    )
+    my_uid: Optional[str] = Field(
+        None, description="Your user ID: excludes you, blocked users and pending-request recipients"
+    )
+    filters: Optional[ProfileFilter] = Field(
+        None,
+        description="Only profiles meeting these conditions (applied inside the vector search)",
+    )
 
 
 @router.post("", response_model=List[ProfileSearchResult])
-def search_profiles(request: SearchRequest):
+async def search_profiles(request: SearchRequest):
     """
     Semantic search for profiles with optional Redis caching.
 
     Uses Azure OpenAI embeddings to find profiles whose skills semantically match
     the search query. Results are cached for 1 hour to improve performance.
+    Searches with my_uid are not cached: their exclusions (blocks, pending
+    requests) can change at any time.
 
     Performance:
         - Cache Hit: ~5ms (16x faster)
@@ -39,186 +61,296 @@ def search_profiles(request: SearchRequest):
         Returns: Profiles of people who can teach guitar, music theory, etc.
     """
     cache_service = get_cache_service()
-    embedding_service = get_embedding_service()
-    search_service = get_azure_search_service()
-    
-    # Try cache first
-    cache_key = cache_service._generate_key(
-        "search",
-        {
-            "query": request.query,
-            "limit": request.limit,
-            "threshold": request.score_threshold,
-            "mode": request.mode,
-        }
-    )
-    
-    cached = cache_service.get(cache_key)
-    if cached:
-        print(f"✅ Cache HIT: '{request.query}' (mode={request.mode})")
-        return [ProfileSearchResult(**result) for result in cached]
-    
-    print(f"❌ Cache MISS: '{request.query}' (mode={request.mode})")
-    
-    # Generate query embedding
-    query_vec = embedding_service.encode(request.query)
-    
+    embedding_service = get_async_embedding_service()
+    search_service = get_async_azure_search_service()
+
+    # Try cache first (anonymous searches only: a cached exclusion set would
+    # keep showing a user someone they just blocked or sent a request to)
+    cache_key = None
+    if not request.my_uid:
+        cache_key = cache_service._generate_key(
+            "search",
+            {
+                "query": request.query,
+                "limit": request.limit,
+                "threshold": request.score_threshold,
+                "mode": request.mode,
+                # Only non-default options join the key, so existing entries stay valid
+                **({"retrieval": request.retrieval} if request.retrieval != "vector" else {}),
+                **_filters_key(request.filters),
+            },
+        )
+
+        cached = await cache_service.aget(cache_key)
+        if cached:
+            print(f"✅ Cache HIT: '{request.query}' (mode={request.mode})")
+            return [ProfileSearchResult(**result) for result in cached]
+
+        print(f"❌ Cache MISS: '{request.query}' (mode={request.mode})")
+
+    # Generate query embedding (and the caller's exclusion set alongside)
+    start = time.perf_counter()
+    if request.my_uid:
+        query_vec, exclude_uids = await asyncio.gather(
+            embedding_service.encode(request.query), get_excluded_uids_async(request.my_uid)
+        )
+    else:
+        query_vec, exclude_uids = await embedding_service.encode(request.query), None
+    embed_ms = (time.perf_counter() - start) * 1000
+
     # Search by mode
     mode = request.mode
+    if request.retrieval == "hybrid":
+        fields = {
+            "offers": ["offer_vec"],
+            "needs": ["need_vec"],
+            "both": ["offer_vec", "need_vec"],
+        }[mode]
+        results = await search_service.search_hybrid(
+            request.query,
+            {field: query_vec for field in fields},
+            limit=request.limit,
+            exclude_uids=exclude_uids,
+            filters=request.filters,
+        )
+        if cache_key:
+            await cache_service.aset(cache_key, results, ttl=3600)
+        return [ProfileSearchResult(**result) for result in results]
     if mode == "offers":
-        results = search_service.search_offers(
+        results = await search_service.search_offers(
             query_vec=query_vec,
             limit=request.limit,
             score_threshold=request.score_threshold,
+            exclude_uids=exclude_uids,
+            filters=request.filters,
         )
         # Cache the results
-        cache_service.set(cache_key, results, ttl=3600)
+        if cache_key:
+            await cache_service.aset(cache_key, results, ttl=3600)
         return [ProfileSearchResult(**result) for result in results]
     if mode == "needs":
-        results = search_service.search_needs(
+        results = await search_service.search_needs(
             query_vec=query_vec,
             limit=request.limit,
             score_threshold=request.score_threshold,
+            exclude_uids=exclude_uids,
+            filters=request.filters,
         )
         # Cache the results
-        cache_service.set(cache_key, results, ttl=3600)
+        if cache_key:
+            await cache_service.aset(cache_key, results, ttl=3600)
         return [ProfileSearchResult(**result) for result in results]
 
-    # mode == "both": combine offers and needs; pick the higher score per uid
-    offer_results = search_service.search_offers(
-        query_vec=query_vec,
+    # mode == "both": offer_vec and need_vec k-NN queries in one request; each
+    # profile scores as its better field (the max of the per-field scores)
+    start = time.perf_counter()
+    combined_list = await search_service.search_multi_vector(
+        {"offer_vec": query_vec, "need_vec": query_vec},
         limit=request.limit,
         score_threshold=request.score_threshold,
+        exclude_uids=exclude_uids,
+        filters=request.filters,
     )
-    need_results = search_service.search_needs(
-        query_vec=query_vec,
-        limit=request.limit,
-        score_threshold=request.score_threshold,
-    )
-    
-    combined_by_uid = {}
-    for item in offer_results + need_results:
-        uid = item.get("uid") or item.get("username")
-        if uid is None:
-            # Fallback to pushing without dedupe if no uid present
-            combined_by_uid[item.get("username")] = item
-            continue
-        prev = combined_by_uid.get(uid)
-        if prev is None or item.get("score", 0) > prev.get("score", 0):
-            combined_by_uid[uid] = item
-    
-    combined_list = list(combined_by_uid.values())
-    # Sort by score desc and cap to limit
-    combined_list.sort(key=lambda x: x.get("score", 0), reverse=True)
     combined_list = combined_list[: request.limit]
-    
+    search_ms = (time.perf_counter() - start) * 1000
+
+    logger.debug("search mode=both: embed=%.1fms search=%.1fms", embed_ms, search_ms)
+
     # Cache the results
-    cache_service.set(cache_key, combined_list, ttl=3600)
-    
+    if cache_key:
+        await cache_service.aset(cache_key, combined_list, ttl=3600)
+
     return [ProfileSearchResult(**result) for result in combined_list]
 
 
+def _filters_key(filters: Optional[BaseModel]) -> Dict[str, Any]:
+    """Cache-key entry for structured filters; none when unset, so existing keys stay valid."""
+    if filters is None or filters.is_empty():
+        return {}
+    return {"filters": filters.model_dump(exclude_none=True)}
+
+
+def _field_hits(
+    hits: List[Dict[str, Any]], score_key: str, limit: int, score_threshold: float
+) -> List[Dict[str, Any]]:
+    """One field's results out of search_multi_vector hits, scored by that field."""
+    field_hits = [
+        {**hit, "score": hit[score_key]} for hit in hits if hit.get(score_key, 0) >= score_threshold
+    ]
+    field_hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return field_hits[:limit]
+
+
+@router.get("/similar/{uid}", response_model=List[ProfileSearchResult])
+async def similar_profiles(
+    uid: str,
+    limit: int = Query(10, ge=1, le=100, description="Max results"),
+    score_threshold: float = Query(0.65, ge=0, le=1, description="Minimum similarity score"),
+    mode: Literal["offers", "needs", "both"] = Query(
+        "offers", description="offers: teach what this user teaches; needs: want what they want"
+    ),
+):
+    """
+    Profiles similar to an indexed user, using their stored vectors.
+
+    The user's offer_vec / need_vec come from the match engine (when loaded) or
+    one key lookup in the index, so no embedding call is made. The user is
+    never returned as similar to themselves.
+    """
+    vectors = await get_stored_vectors_async(uid)
+    if vectors is None:
+        raise HTTPException(status_code=404, detail="No indexed skills for this user")
+    offer_vec, need_vec = vectors
+    search_service = get_async_azure_search_service()
+
+    # The user is filtered out inside the search, so all `limit` slots are others
+    if mode == "offers":
+        results = await search_service.search_offers(
+            query_vec=offer_vec,
+            limit=limit,
+            score_threshold=score_threshold,
+            exclude_uids=[uid],
+        )
+    elif mode == "needs":
+        results = await search_service.search_needs(
+            query_vec=need_vec,
+            limit=limit,
+            score_threshold=score_threshold,
+            exclude_uids=[uid],
+        )
+    else:
+        results = await search_service.search_multi_vector(
+            {"offer_vec": offer_vec, "need_vec": need_vec},
+            limit=limit,
+            score_threshold=score_threshold,
+            exclude_uids=[uid],
+        )
+        results = results[:limit]
+
+    return [ProfileSearchResult(**result) for result in results]
+
+
 class SkillSearchRequest(BaseModel):
     """Request model for skill-centric search."""
+
     query: str = Field(..., min_length=1, description="Search query")
     limit: int = Field(10, ge=1, le=100, description="Max results")
     category: Optional[str] = Field(None, description="Filter by category")
+    filters: Optional[SkillFilter] = Field(
+        None,
+        description="Difficulty, delivery, tag and category conditions, applied in the search",
+    )
+    retrieval: Literal["vector", "hybrid"] = Field(
+        "vector",
+        description="hybrid: also match keywords in title, tags and description (BM25 + RRF)",
+    )
 
 
 @router.post("/skills", response_model=List[SkillSearchResult])
-def search_skills(request: SkillSearchRequest):
+async def search_skills(request: SkillSearchRequest):
     """
     Semantic search for individual skills (skill-centric marketplace).
 
     Returns skill cards with poster info denormalized.
     """
     cache_service = get_cache_service()
-    embedding_service = get_embedding_service()
-    skills_search = get_skills_search_service()
+    embedding_service = get_async_embedding_service()
+    skills_search = get_async_skills_search_service()
 
     cache_key = cache_service._generate_key(
         "skill_search",
-        {"query": request.query, "limit": request.limit, "category": request.category or ""},
+        {
+            "query": request.query,
+            "limit": request.limit,
+            "category": request.category or "",
+            **({"retrieval": request.retrieval} if request.retrieval != "vector" else {}),
+            **_filters_key(request.filters),
+        },
     )
 
-    cached = cache_service.get(cache_key)
+    cached = await cache_service.aget(cache_key)
     if cached:
         return [SkillSearchResult(**r) for r in cached]
 
-    query_vec = embedding_service.encode(request.query)
-    results = skills_search.search_skills(
-        query_vec=query_vec,
-        limit=request.limit,
-        category_filter=request.category,
-    )
+    query_vec = await embedding_service.encode(request.query)
+    if request.retrieval == "hybrid":
+        results = await skills_search.search_skills_hybrid(
+            request.query,
+            query_vec,
+            limit=request.limit,
+            category_filter=request.category,
+            filters=request.filters,
+        )
+    else:
+        results = await skills_search.search_skills(
+            query_vec=query_vec,
+            limit=request.limit,
+            category_filter=request.category,
+            filters=request.filters,
+        )
 
-    cache_service.set(cache_key, results, ttl=3600)
+    await cache_service.aset(cache_key, results, ttl=3600)
     return [SkillSearchResult(**r) for r in results]
 
 
 class SkillRecommendationRequest(BaseModel):
     """Request for skill recommendations."""
-    
+
     current_skills: str = Field(..., min_length=1, description="User's current skills or interests")
     limit: int = Field(5, ge=1, le=20, description="Number of recommendations")
 
 
 class SkillRecommendation(BaseModel):
     """A recommended skill."""
-    
+
     skill: str
     score: float
     reason: str
 
 
 @router.post("/recommend-skills", response_model=List[SkillRecommendation])
-def recommend_skills(request: SkillRecommendationRequest):
+async def recommend_skills(request: SkillRecommendationRequest):
     """
     Recommend complementary skills based on user's current skills.
-    
+
     Analyzes what skills are commonly learned together by finding profiles
     with similar skills and extracting their other skills.
-    
+
     Example:
         Input: "Python programming"
         Output: ["SQL databases", "Docker", "Git version control", ...]
     """
     cache_service = get_cache_service()
-    embedding_service = get_embedding_service()
-    search_service = get_azure_search_service()
+    embedding_service = get_async_embedding_service()
+    search_service = get_async_azure_search_service()
 
     # Try cache first
     cache_key = cache_service._generate_key(
-        "skill_recommend",
-        {"skills": request.current_skills, "limit": request.limit}
+        "skill_recommend", {"skills": request.current_skills, "limit": request.limit}
     )
-    
-    cached = cache_service.get(cache_key)
+
+    cached = await cache_service.aget(cache_key)
     if cached:
         print(f"✅ Cache HIT: Skill recommendations for '{request.current_skills}'")
         return [SkillRecommendation(**rec) for rec in cached]
-    
+
     print(f"❌ Cache MISS: Generating skill recommendations for '{request.current_skills}'")
-    
+
     # Encode the current skills
-    query_vec = embedding_service.encode(request.current_skills)
-    
-    # Search for people with similar skills (both offers and needs)
-    similar_offers = search_service.search_offers(
-        query_vec=query_vec,
-        limit=20,
-        score_threshold=0.4,
-    )
+    query_vec = await embedding_service.encode(request.current_skills)
 
-    similar_needs = search_service.search_needs(
-        query_vec=query_vec,
+    # Search for people with similar skills (offers and needs in one request)
+    hits = await search_service.search_multi_vector(
+        {"offer_vec": query_vec, "need_vec": query_vec},
         limit=20,
         score_threshold=0.4,
     )
-    
+    similar_offers = _field_hits(hits, "offer_score", limit=20, score_threshold=0.4)
+    similar_needs = _field_hits(hits, "need_score", limit=20, score_threshold=0.4)
+
     # Extract and rank complementary skills
     skill_frequencies: Dict[str, Dict[str, Any]] = {}
-    
+
     # Process offers (what people can teach)
     for profile in similar_offers:
         offers = profile.get("skills_to_offer", "")
@@ -231,7 +363,7 @@ def recommend_skills(request: SkillRecommendationRequest):
                         skill_frequencies[skill] = {"count": 0, "total_score": 0.0}
                     skill_frequencies[skill]["count"] += 1
                     skill_frequencies[skill]["total_score"] += profile.get("score", 0.5)
-    
+
     # Process needs (what people want to learn - indicates trending skills)
     for profile in similar_needs:
         needs = profile.get("services_needed", "")
@@ -242,28 +374,30 @@ def recommend_skills(request: SkillRecommendationRequest):
                     if skill not in skill_frequencies:
                         skill_frequencies[skill] = {"count": 0, "total_score": 0.0}
                     skill_frequencies[skill]["count"] += 1
-                    skill_frequencies[skill]["total_score"] += profile.get("score", 0.5) * 0.8  # Weight needs slightly lower
-    
+                    skill_frequencies[skill]["total_score"] += (
+                        profile.get("score", 0.5) * 0.8
+                    )  # Weight needs slightly lower
+
     # Rank by frequency and relevance
     recommendations = []
     for skill, data in skill_frequencies.items():
         avg_score = data["total_score"] / max(data["count"], 1)
-        combined_score = (data["count"] * 0.3) + (avg_score * 0.7)  # Balance frequency and relevance
-        
+        combined_score = (data["count"] * 0.3) + (
+            avg_score * 0.7
+        )  # Balance frequency and relevance
+
         reason = f"Common among {data['count']} similar profiles"
-        recommendations.append({
-            "skill": skill,
-            "score": round(combined_score, 3),
-            "reason": reason
-        })
-    
+        recommendations.append(
+            {"skill": skill, "score": round(combined_score, 3), "reason": reason}
+        )
+
     # Sort by combined score and take top N
     recommendations.sort(key=lambda x: x["score"], reverse=True)
-    recommendations = recommendations[:request.limit]
-    
+    recommendations = recommendations[: request.limit]
+
     # Cache for 2 hours
-    cache_service.set(cache_key, recommendations, ttl=7200)
-    
+    await cache_service.aset(cache_key, recommendations, ttl=7200)
+
     return [SkillRecommendation(**rec) for rec in recommendations]
 
 
@@ -277,110 +411,117 @@ def _skills_to_text(skills):
         parts = []
         for s in skills:
             if isinstance(s, dict):
-                name = s.get('name') or s.get('title', '')
-                level = s.get('level') or s.get('difficulty', '')
+                name = s.get("name") or s.get("title", "")
+                level = s.get("level") or s.get("difficulty", "")
                 if name:
                     parts.append(f"{name} ({level})" if level else name)
             elif isinstance(s, str):
                 parts.append(s)
-        return ', '.join(parts) if parts else None
+        return ", ".join(parts) if parts else None
     return None
 
 
 class ReindexUserRequest(BaseModel):
     """Request to reindex a single user."""
+
     uid: str = Field(..., description="User ID to reindex")
 
 
 class ReindexResponse(BaseModel):
     """Response from reindex operation."""
+
     success: bool
     message: str
     skills_indexed: Optional[str] = None
 
 
 @router.post("/reindex-user", response_model=ReindexResponse)
-def reindex_user(request: ReindexUserRequest):
+async def reindex_user(request: ReindexUserRequest):
     """
     Reindex a single user's skills in Azure AI Search.
-    
+
     This should be called after a user posts a new skill to update
     the search index with their latest skills.
-    
+
     Args:
         request: Contains the user ID to reindex
-        
+
     Returns:
         Success status and message
     """
-    firebase_service = get_firebase_service()
-    embedding_service = get_embedding_service()
-    azure_search_service = get_azure_search_service()
-    
+    cosmos_service = get_async_cosmos_service()
+    embedding_service = get_async_embedding_service()
+    azure_search_service = get_async_azure_search_service()
+
     uid = request.uid
-    
+
     try:
         # Get user profile
-        profile = firebase_service.get_profile(uid)
+        profile = await cosmos_service.get_profile(uid)
         if not profile:
             raise HTTPException(status_code=404, detail=f"Profile not found for uid: {uid}")
-        
+
         # Get skills from skills collection (single source of truth)
-        user_skills = firebase_service.get_skills_by_user(uid)
+        user_skills = await cosmos_service.get_skills_by_user(uid)
         skills_to_offer = _skills_to_text(user_skills) if user_skills else None
-        
+
         # Fallback to profile.skillsToOffer for backwards compat
         if not skills_to_offer:
             skills_to_offer = _skills_to_text(
-                profile.get('skills_to_offer') or profile.get('skillsToOffer')
+                profile.get("skills_to_offer") or profile.get("skillsToOffer")
             )
-        
+
         # Get services needed from profile
         services_needed = _skills_to_text(
-            profile.get('services_needed') or profile.get('servicesNeeded')
+            profile.get("services_needed") or profile.get("servicesNeeded")
         )
-        
+
         # Use placeholder if missing
         skills_to_offer = skills_to_offer or "general help"
         services_needed = services_needed or "general services"
-        
+
         # Generate embeddings
-        offer_vec = embedding_service.encode(skills_to_offer)
-        need_vec = embedding_service.encode(services_needed)
-        
+        offer_vec, need_vec = await embedding_service.encode_profile_texts(
+            [skills_to_offer, services_needed]
+        )
+
         # Prepare payload
         payload = {
             "uid": uid,
-            "email": profile.get('email'),
-            "display_name": profile.get('display_name') or profile.get('displayName') or profile.get('fullName'),
-            "photo_url": profile.get('photo_url') or profile.get('photoUrl'),
-            "full_name": profile.get('full_name') or profile.get('fullName'),
-            "username": profile.get('username'),
-            "bio": profile.get('bio'),
-            "city": profile.get('city'),
-            "timezone": profile.get('timezone'),
+            "email": profile.get("email"),
+            "display_name": profile.get("display_name")
+            or profile.get("displayName")
+            or profile.get("fullName"),
+            "photo_url": profile.get("photo_url") or profile.get("photoUrl"),
+            "full_name": profile.get("full_name") or profile.get("fullName"),
+            "username": profile.get("username"),
+            "bio": profile.get("bio"),
+            "city": profile.get("city"),
+            "timezone": profile.get("timezone"),
             "skills_to_offer": skills_to_offer,
             "services_needed": services_needed,
-            "dm_open": profile.get('dm_open', profile.get('dmOpen', True)),
-            "show_city": profile.get('show_city', profile.get('showCity', True)),
+            "dm_open": profile.get("dm_open", profile.get("dmOpen", True)),
+            "show_city": profile.get("show_city", profile.get("showCity", True)),
         }
-        
+
         # Upsert to Azure AI Search
-        azure_search_service.upsert_profile(
+        await azure_search_service.upsert_profile(
             username=uid,
             offer_vec=offer_vec,
             need_vec=need_vec,
             payload=payload,
         )
-        
+        match_engine = get_match_engine()
+        if match_engine is not None:
+            match_engine.upsert_profile(uid, offer_vec, need_vec, payload)
+
         return ReindexResponse(
             success=True,
             message=f"Successfully reindexed user {uid}",
-            skills_indexed=skills_to_offer
+            skills_indexed=skills_to_offer,
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reindex user: {str(e)}")
-
@@ -1,12 +1,17 @@
 """Swap matching endpoints."""
 
 from typing import List, Optional
-from fastapi import APIRouter
-from pydantic import BaseModel, Field
-
-from app.schemas import ReciprocalMatchResult
-from app.matching import compute_reciprocal_matches
-from app.cosmos_db import get_cosmos_service
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from pydantic import BaseModel, Field, model_validator
+
+from app.schemas import MatchTableResponse, ReciprocalMatchResult, SwapCycle, SwapCycleResponse
+from app.matching import (
+    compute_reciprocal_matches_async,
+    compute_reciprocal_matches_for_uid_async,
+    get_excluded_uids_async,
+)
+from app.cosmos_db import get_async_cosmos_service, get_cosmos_service
+from app.search_filters import ProfileFilter
 from app.email_service import get_email_service
 
 router = APIRouter(prefix="/match", tags=["matching"])
@@ -18,15 +23,36 @@ _notified_pairs: set = set()
 class ReciprocalMatchRequest(BaseModel):
     """Request model for reciprocal matching."""
 
-    my_offer_text: str = Field(..., min_length=1, description="What you can teach")
-    my_need_text: str = Field(..., min_length=1, description="What you want to learn")
+    my_offer_text: Optional[str] = Field(None, min_length=1, description="What you can teach")
+    my_need_text: Optional[str] = Field(None, min_length=1, description="What you want to learn")
     limit: int = Field(10, ge=1, le=50, description="Max results")
-    my_uid: Optional[str] = Field(None, description="Your user ID (required for notifications)")
+    my_uid: Optional[str] = Field(
+        None,
+        description=(
+            "Your user ID (required for notifications). "
+            "Without texts, your indexed skills are used"
+        ),
+    )
     notify_matches: bool = Field(False, description="Send email notifications to high-score matches")
+    filters: Optional[ProfileFilter] = Field(
+        None, description="Only match profiles meeting these conditions (e.g. city, dm_open)"
+    )
+
+    @model_validator(mode="after")
+    def _texts_or_uid(self):
+        given = (self.my_offer_text is not None) + (self.my_need_text is not None)
+        if given == 1:
+            raise ValueError("Provide both my_offer_text and my_need_text, or neither")
+        if given == 0 and not self.my_uid:
+            raise ValueError("Provide my_offer_text and my_need_text, or my_uid")
+        return self
 
 
 @router.post("/reciprocal", response_model=List[ReciprocalMatchResult])
-def find_reciprocal_matches(request: ReciprocalMatchRequest):
+async def find_reciprocal_matches(
+    request: ReciprocalMatchRequest,
+    background_tasks: BackgroundTasks,
+):
     """
     Find reciprocal skill swap matches using semantic similarity and harmonic mean.
 
@@ -39,6 +65,13 @@ def find_reciprocal_matches(request: ReciprocalMatchRequest):
     4. Compute harmonic mean: 2 * (score_A * score_B) / (score_A + score_B)
     5. Return top matches sorted by reciprocal score
 
+    uid mode: send only my_uid (no texts) to match on your indexed offer/need
+    vectors. Nothing is embedded, so this skips the slowest step.
+
+    With my_uid, you, users blocked either way and users you have a pending
+    request to are never returned. filters (city, dm_open, minimum credits,
+    ...) are applied inside the candidate searches, so every slot is eligible.
+
     Optional: If notify_matches=true and my_uid is provided, sends email
     notifications to high-score matches (>70%) who have email_updates enabled.
 
@@ -49,19 +82,81 @@ def find_reciprocal_matches(request: ReciprocalMatchRequest):
         Returns: Guitarists who want to learn Python, ranked by how well
                  both sides of the skill swap match.
     """
-    results = compute_reciprocal_matches(
-        my_offer_text=request.my_offer_text,
-        my_need_text=request.my_need_text,
-        limit=request.limit,
-    )
+    # Yourself, blocked users and pending-request recipients are filtered
+    # inside the searches, so every returned match can be sent a request
+    exclude_uids = await get_excluded_uids_async(request.my_uid) if request.my_uid else set()
+
+    if request.my_offer_text is not None and request.my_need_text is not None:
+        results = await compute_reciprocal_matches_async(
+            my_offer_text=request.my_offer_text,
+            my_need_text=request.my_need_text,
+            limit=request.limit,
+            exclude_uids=exclude_uids,
+            filters=request.filters,
+        )
+    else:
+        # uid mode: the caller's stored vectors, no embedding call
+        results = await compute_reciprocal_matches_for_uid_async(
+            request.my_uid, limit=request.limit, exclude_uids=exclude_uids, filters=request.filters
+        )
+        if results is None:
+            raise HTTPException(status_code=404, detail="No indexed skills for this user")
 
-    # Send notifications for high-score matches if requested
+    # Send notifications for high-score matches if requested. The Cosmos/email
+    # calls are blocking, so they run in the threadpool after the response.
     if request.notify_matches and request.my_uid:
-        _send_match_notifications(request.my_uid, results)
+        background_tasks.add_task(_send_match_notifications, request.my_uid, results)
 
     return [ReciprocalMatchResult(**result) for result in results]
 
 
+@router.get("/cycles/{uid}", response_model=SwapCycleResponse)
+async def get_swap_cycles(
+    uid: str,
+    limit: int = Query(10, ge=1, le=50, description="Max cycles"),
+):
+    """
+    Serve a user's indirect swap cycles (one Cosmos point read).
+
+    Each cycle is a 3-4 person ring starting with this user: every member
+    teaches the next, and the last teaches this user. Cycles are ranked by
+    their weakest link. Rows are written by the swap-cycle batch job
+    (scripts/find_swap_cycles.py); 404 until it has covered this user.
+    """
+    row = await get_async_cosmos_service().get_cycle_row(uid)
+    if not row:
+        raise HTTPException(status_code=404, detail="No swap cycles computed for this user")
+
+    return SwapCycleResponse(
+        uid=uid,
+        computed_at=row["computed_at"],
+        cycles=[SwapCycle(**c) for c in row.get("cycles", [])[:limit]],
+    )
+
+
+@router.get("/{uid}", response_model=MatchTableResponse)
+async def get_precomputed_matches(
+    uid: str,
+    limit: int = Query(10, ge=1, le=50, description="Max results"),
+):
+    """
+    Serve a user's precomputed reciprocal matches (one Cosmos point read).
+
+    Rows are written by the match-table batch job (scripts/refresh_matches.py);
+    computed_at says how fresh they are. 404 until the job has covered this
+    user — clients can fall back to POST /match/reciprocal.
+    """
+    row = await get_async_cosmos_service().get_match_row(uid)
+    if not row:
+        raise HTTPException(status_code=404, detail="No precomputed matches for this user")
+
+    return MatchTableResponse(
+        uid=uid,
+        computed_at=row["computed_at"],
+        matches=[ReciprocalMatchResult(**m) for m in row.get("matches", [])[:limit]],
+    )
+
+
 def _send_match_notifications(my_uid: str, matches: List[dict]):
     """Send email notifications to high-score matches."""
     cosmos = get_cosmos_service()
@@ -3,7 +3,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import Optional, List, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, EmailStr, Field
 
 
 class ProfileBase(BaseModel):
@@ -115,6 +115,43 @@ class ReciprocalMatchResult(ProfileSearchResult):
     need_match_score: float = Field(..., description="How well you offer what they need")
 
 
+class MatchTableResponse(BaseModel):
+    """Precomputed reciprocal matches for one user."""
+
+    uid: str
+    computed_at: str = Field(..., description="When these matches were last computed (UTC ISO)")
+    matches: List[ReciprocalMatchResult]
+
+
+class SwapCycleMember(BaseModel):
+    """One user in an indirect swap cycle; teaches the next member (the last teaches the first)."""
+
+    uid: str
+    username: Optional[str] = None
+    display_name: Optional[str] = None
+    photo_url: Optional[str] = None
+    skills_to_offer: Optional[str] = None
+    services_needed: Optional[str] = None
+    teach_score: float = Field(
+        ..., description="How well this member's offer fits the next member's need"
+    )
+
+
+class SwapCycle(BaseModel):
+    """A 3- or 4-person swap ring, starting with the requesting user."""
+
+    score: float = Field(..., description="Weakest teach_score in the ring")
+    members: List[SwapCycleMember]
+
+
+class SwapCycleResponse(BaseModel):
+    """Precomputed indirect swap cycles for one user."""
+
+    uid: str
+    computed_at: str = Field(..., description="When these cycles were last computed (UTC ISO)")
+    cycles: List[SwapCycle]
+
+
 # =============================================================================
 # Skill Schemas
 # =============================================================================
@@ -179,6 +216,12 @@ class SwapRequestStatus(str, Enum):
     completed = "completed"
 
 
+class SwapType(str, Enum):
+    """Whether both sides teach (direct) or one side pays in points (indirect)."""
+    direct = "direct"
+    indirect = "indirect"
+
+
 class SwapRequestCreate(BaseModel):
     """Schema for creating a swap request."""
 
@@ -0,0 +1,185 @@
+"""
+Typed structured filters for profile and skill search.
+
+Each filter compiles two ways from one definition:
+
+    to_odata()      an OData $filter for Azure AI Search. It is applied inside
+                    the k-NN search, so all top-k slots go to eligible documents
+                    rather than being filtered client-side afterwards.
+    matches(doc)    the same condition as a predicate, for the in-process
+                    backend (app/local_search.py).
+
+ProfileFilter also compiles to mask(columns), a boolean array over the match
+engine's per-field columns, so the engine filters every profile at once.
+
+Only index fields marked filterable are used. Field names are fixed here, and
+values always become escaped string literals or validated numbers/booleans,
+so request input can never change the shape of the expression.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+# Longest value list accepted per field (keeps $filter well under Azure's limits)
+_MAX_VALUES = 50
+
+
+def odata_literal(value: str) -> str:
+    """value as an OData string literal (single quotes doubled)."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def one_of(field: str, values: Iterable[str]) -> Optional[str]:
+    """
+    OData condition "field is any of values"; None if values is empty.
+
+    Several values compile to one search.in() call. Values containing the
+    delimiter fall back to `eq` clauses.
+    """
+    distinct = sorted({v for v in values if v})
+    if not distinct:
+        return None
+    if len(distinct) == 1:
+        return f"{field} eq {odata_literal(distinct[0])}"
+    listed = [v.replace("'", "''") for v in distinct if "," not in v]
+    clauses = [f"search.in({field}, '{','.join(listed)}', ',')"] if listed else []
+    clauses.extend(f"{field} eq {odata_literal(v)}" for v in distinct if "," in v)
+    return clauses[0] if len(clauses) == 1 else "(" + " or ".join(clauses) + ")"
+
+
+def all_of(*clauses: Optional[str]) -> Optional[str]:
+    """AND of the non-empty clauses (parenthesised when combined); None if none."""
+    present = [c for c in clauses if c]
+    if len(present) <= 1:
+        return present[0] if present else None
+    return " and ".join(f"({c})" for c in present)
+
+
+class ProfileFilter(BaseModel):
+    """Conditions on profile documents (all given conditions must hold)."""
+
+    city: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=100,
+        description="Exact city; only profiles that show their city can match",
+    )
+    dm_open: Optional[bool] = Field(None, description="Accepts direct messages")
+    show_city: Optional[bool] = Field(None, description="Shows their city publicly")
+    min_swap_credits: Optional[int] = Field(
+        None, ge=0, description="At least this many swap credits"
+    )
+    min_swaps_completed: Optional[int] = Field(
+        None, ge=0, description="At least this many completed swaps"
+    )
+
+    def is_empty(self) -> bool:
+        return not self.model_dump(exclude_none=True)
+
+    def to_odata(self) -> Optional[str]:
+        clauses = []
+        if self.city is not None:
+            # A hidden city must not be discoverable by filtering on it
+            clauses.append(f"city eq {odata_literal(self.city)} and show_city eq true")
+        if self.dm_open is not None:
+            clauses.append(f"dm_open eq {str(self.dm_open).lower()}")
+        if self.show_city is not None:
+            clauses.append(f"show_city eq {str(self.show_city).lower()}")
+        if self.min_swap_credits is not None:
+            clauses.append(f"swap_credits ge {self.min_swap_credits}")
+        if self.min_swaps_completed is not None:
+            clauses.append(f"swaps_completed ge {self.min_swaps_completed}")
+        return " and ".join(clauses) or None
+
+    def matches(self, document: Dict[str, Any]) -> bool:
+        if self.city is not None and (
+            document.get("city") != self.city or not document.get("show_city", True)
+        ):
+            return False
+        if self.dm_open is not None and document.get("dm_open", True) != self.dm_open:
+            return False
+        if self.show_city is not None and document.get("show_city", True) != self.show_city:
+            return False
+        if (
+            self.min_swap_credits is not None
+            and (document.get("swap_credits") or 0) < self.min_swap_credits
+        ):
+            return False
+        if self.min_swaps_completed is not None and (
+            (document.get("swaps_completed") or 0) < self.min_swaps_completed
+        ):
+            return False
+        return True
+
+    def mask(self, columns: Mapping[str, np.ndarray], city_codes: Mapping[str, int]) -> np.ndarray:
+        """
+        The matches() condition for every row of columns at once.
+
+        columns holds equal-length arrays: city as codes from city_codes
+        (-1 = none), dm_open/show_city as 1/0/-1 (true/false/null, missing counts as
+        true), swap_credits/swaps_completed as integers (null counts as 0).
+        """
+        keep = np.ones(len(columns["dm_open"]), dtype=bool)
+        if self.city is not None:
+            keep &= columns["city"] == city_codes.get(self.city, -2)
+            keep &= columns["show_city"] == 1
+        if self.dm_open is not None:
+            keep &= columns["dm_open"] == int(self.dm_open)
+        if self.show_city is not None:
+            keep &= columns["show_city"] == int(self.show_city)
+        if self.min_swap_credits is not None:
+            keep &= columns["swap_credits"] >= self.min_swap_credits
+        if self.min_swaps_completed is not None:
+            keep &= columns["swaps_completed"] >= self.min_swaps_completed
+        return keep
+
+
+class SkillFilter(BaseModel):
+    """Conditions on skill documents; list fields match any of their values."""
+
+    category: Optional[str] = Field(
+        None, min_length=1, max_length=100, description="Exact category"
+    )
+    difficulty: Optional[List[str]] = Field(
+        None, max_length=_MAX_VALUES, description="Any of these difficulty levels"
+    )
+    delivery: Optional[List[str]] = Field(
+        None, max_length=_MAX_VALUES, description="Any of these delivery methods"
+    )
+    tags: Optional[List[str]] = Field(
+        None, max_length=_MAX_VALUES, description="Has any of these tags"
+    )
+
+    def is_empty(self) -> bool:
+        return not any(self.model_dump(exclude_none=True).values())
+
+    def to_odata(self) -> Optional[str]:
+        tags = one_of("t", self.tags or ())
+        return all_of(
+            one_of("category", [self.category] if self.category else ()),
+            one_of("difficulty", self.difficulty or ()),
+            one_of("delivery", self.delivery or ()),
+            f"tags/any(t: {tags})" if tags else None,
+        )
+
+    def matches(self, document: Dict[str, Any]) -> bool:
+        if self.category and document.get("category") != self.category:
+            return False
+        if self.difficulty and document.get("difficulty") not in self.difficulty:
+            return False
+        if self.delivery and document.get("delivery") not in self.delivery:
+            return False
+        if self.tags and not set(self.tags).intersection(document.get("tags") or ()):
+            return False
+        return True
+
+
+def with_category(filters: Optional[SkillFilter], category: Optional[str]) -> Optional[SkillFilter]:
+    """filters with category set (the older category_filter argument); None if nothing to filter."""
+    if category:
+        filters = (filters or SkillFilter()).model_copy(update={"category": category})
+    if filters is None or filters.is_empty():
+        return None
+    return filters
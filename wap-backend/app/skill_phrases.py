@@ -0,0 +1,66 @@
+"""
+Skill-phrase decomposition for profile embeddings.
+
+Profiles list skills as comma-separated phrases, e.g. "Python (Intermediate),
+Guitar (Beginner)" — the format _rebuild_profile_skills and _skills_to_text
+produce. Instead of embedding each whole string, every distinct phrase is
+embedded once (the content-addressed embedding cache acts as the shared
+phrase → vector dictionary) and a profile's vector is the normalized mean of
+its phrase vectors.
+
+Most users list common skills, so a new or edited profile usually needs no new
+provider calls, and editing one skill only embeds that phrase.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+from app.embedding_cache import normalize_text
+
+
+def split_skill_phrases(text: str) -> List[str]:
+    """
+    Split a skills string into distinct phrases.
+
+    Splits on commas outside parentheses (so "Python (Advanced, 5 yrs)" stays
+    one phrase), collapses whitespace and drops empty/duplicate phrases
+    (case-insensitive). Text without commas is a single phrase.
+    """
+    if not text:
+        return []
+
+    phrases: List[str] = []
+    depth = 0
+    current: List[str] = []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        if char == "," and depth == 0:
+            phrases.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    phrases.append("".join(current))
+
+    seen = set()
+    result = []
+    for phrase in phrases:
+        phrase = normalize_text(phrase)
+        if phrase and phrase.lower() not in seen:
+            seen.add(phrase.lower())
+            result.append(phrase)
+    return result
+
+
+def compose_vector(phrase_vectors: Sequence[Sequence[float]], dimension: int) -> List[float]:
+    """Normalized mean of phrase vectors (zero vector if there are none)."""
+    if not len(phrase_vectors):
+        return [0.0] * dimension
+    mean = np.mean(np.asarray(phrase_vectors, dtype=np.float32), axis=0)
+    norm = float(np.linalg.norm(mean))
+    if norm == 0:
+        return [0.0] * dimension
+    return (mean / norm).tolist()
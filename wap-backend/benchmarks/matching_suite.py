@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Latency, throughput and recall of matching and search, fully offline.
+
+Generates seeded synthetic profiles (benchmarks/synthetic.py: realistic skill
+vocabulary, Zipfian popularity), embeds them with the local hashed n-gram
+provider through the real EmbeddingService (phrase mode, as the profile
+routes index them), and serves them from local stand-ins:
+
+    search  — app.local_search.LocalSearchService (SEARCH_BACKEND=local), an
+              exact in-memory AzureSearchService
+    local   — ReciprocalMatchEngine (MATCHING_ENGINE=local)
+
+Workloads, per profile count:
+
+    match   compute_reciprocal_matches(offer_text, need_text) for unseen
+            query profiles, via the search path and the local engine
+    search  POST /search mode=offers: embed the query, one search_offers
+
+Each reports p50/p95/p99/mean latency in ms, sequential throughput (qps) and
+recall@k against exact ground truth at full dimension (--full-dim). With
+--dim below --full-dim the served vectors are Matryoshka-truncated, so recall
+also shows what truncation costs. The local provider is lexical, not semantic:
+compare runs with each other, not with production numbers.
+
+Usage:
+    cd wap-backend
+    python benchmarks/matching_suite.py                       # 1k, 10k, 100k
+    python benchmarks/matching_suite.py --profiles 1000 --queries 50
+    python benchmarks/matching_suite.py --dim 128 --json results/dim128.json
+    python benchmarks/matching_suite.py --json results/new.json --compare results/old.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import matching
+from app.config import settings
+from app.embedding_providers import LocalHashEmbeddingProvider
+from app.embeddings import EmbeddingService
+from app.local_search import LocalSearchService
+from app.match_engine import ReciprocalMatchEngine, azure_cosine_score
+
+from benchmarks.synthetic import generate_profiles, generate_search_queries
+
+SCORE_THRESHOLD = 0.2  # compute_reciprocal_matches' per-direction threshold
+TIE_DEPTH = 5  # Ground-truth depth (× k) searched for ties with the k-th match
+
+
+def embedding_service(full_dim: int, dim: int, seed: int) -> EmbeddingService:
+    """Local-provider EmbeddingService serving `dim` dims (no cache, no batching)."""
+    settings.vector_dim = full_dim
+    settings.embedding_truncate_dim = dim if dim < full_dim else None
+    settings.embedding_cache_enabled = False
+    settings.embedding_batch_enabled = False
+    settings.profile_embedding_mode = "phrases"
+    return EmbeddingService(provider=LocalHashEmbeddingProvider(dimension=full_dim, seed=seed))
+
+
+def load_search(
+    dim: int, profiles: List[Dict], offers: np.ndarray, needs: np.ndarray
+) -> LocalSearchService:
+    service = LocalSearchService(dimension=dim, initial_capacity=len(profiles))
+    for profile, offer, need in zip(profiles, offers, needs):
+        service.upsert_profile(profile["uid"], offer, need, profile)
+    return service
+
+
+def profile_matrices(service: EmbeddingService, profiles: List[Dict]) -> tuple:
+    offers = service.encode_profile_texts([p["skills_to_offer"] for p in profiles])
+    needs = service.encode_profile_texts([p["services_needed"] for p in profiles])
+    return np.asarray(offers, dtype=np.float32), np.asarray(needs, dtype=np.float32)
+
+
+def load_engine(
+    dim: int, profiles: List[Dict], offers: np.ndarray, needs: np.ndarray
+) -> ReciprocalMatchEngine:
+    engine = ReciprocalMatchEngine(dimension=dim, initial_capacity=len(profiles))
+    for profile, offer, need in zip(profiles, offers, needs):
+        engine.upsert(profile["uid"], offer, need, profile)
+    engine.ready = True
+    return engine
+
+
+def latency_stats(seconds: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "qps": round(len(ms) / (ms.sum() / 1000), 1) if ms.sum() else None,
+    }
+
+
+def recall(found: Sequence[str], truth: Tuple[Set[str], int]) -> Optional[float]:
+    """
+    Tie-aware recall@k: a hit is any result scoring at least the true k-th score.
+
+    Synthetic profiles repeat skill sets, so exact ties at the k-th place are
+    common; truth is (every uid tied into the top-k, k or fewer if fewer exist).
+    """
+    tied, k = truth
+    if not k:
+        return None
+    return min(len(set(found) & tied), k) / k
+
+
+def measure(
+    run_query: Callable[[int], List[str]], truths: List[Tuple[Set[str], int]]
+) -> Dict[str, float]:
+    """Time run_query(i) for every query; recall of its uids against truths[i]."""
+    seconds, recalls = [], []
+    for i, truth in enumerate(truths):
+        started = time.perf_counter()
+        found = run_query(i)
+        seconds.append(time.perf_counter() - started)
+        r = recall(found, truth)
+        if r is not None:
+            recalls.append(r)
+    stats = latency_stats(seconds)
+    stats["recall"] = round(float(np.mean(recalls)), 4) if recalls else None
+    stats["queries_with_truth"] = len(recalls)
+    return stats
+
+
+def run_size(n: int, queries: int, k: int, dim: int, full_dim: int, seed: int) -> List[Dict]:
+    setup = time.perf_counter()
+    profiles = generate_profiles(n, seed)
+    query_profiles = generate_profiles(queries, seed, prefix="query")
+    search_queries = generate_search_queries(queries, seed)
+
+    full_service = embedding_service(full_dim, full_dim, seed)
+    served_service = embedding_service(full_dim, dim, seed)
+    full_offers, full_needs = profile_matrices(full_service, profiles)
+    offers, needs = (
+        profile_matrices(served_service, profiles) if dim < full_dim else (full_offers, full_needs)
+    )
+
+    truth_engine = load_engine(full_dim, profiles, full_offers, full_needs)
+    served_engine = load_engine(dim, profiles, offers, needs) if dim < full_dim else truth_engine
+    search_service = load_search(dim, profiles, offers, needs)
+    setup_seconds = round(time.perf_counter() - setup, 2)
+
+    # ── Ground truth (exact, full dimension) ──
+    match_truth = []
+    for q in query_profiles:
+        offer_vec, need_vec = full_service.encode_batch(
+            [q["skills_to_offer"], q["services_needed"]]
+        )
+        # Deep enough to see every profile tied with the k-th
+        top = truth_engine.top_matches(
+            offer_vec, need_vec, limit=TIE_DEPTH * k, score_threshold=SCORE_THRESHOLD
+        )
+        if len(top) < k:
+            match_truth.append(({m["uid"] for m in top}, len(top)))
+            continue
+        kth = top[k - 1]["reciprocal_score"]
+        match_truth.append(({m["uid"] for m in top if m["reciprocal_score"] >= kth - 1e-4}, k))
+    search_truth = []
+    for text in search_queries:
+        scores = azure_cosine_score(
+            full_offers @ np.asarray(full_service.encode(text), dtype=np.float32)
+        )
+        kth = np.partition(-scores, k - 1)[k - 1] * -1
+        search_truth.append(
+            ({profiles[row]["uid"] for row in np.flatnonzero(scores >= kth - 1e-6)}, k)
+        )
+
+    def match_with(engine):
+        def run_query(i):
+            q = query_profiles[i]
+            with (
+                patch.object(matching, "get_embedding_service", return_value=served_service),
+                patch.object(matching, "get_azure_search_service", return_value=search_service),
+                patch.object(matching, "get_match_engine", return_value=engine),
+            ):
+                top = matching.compute_reciprocal_matches(
+                    q["skills_to_offer"], q["services_needed"], limit=k
+                )
+            return [m["uid"] for m in top]
+
+        return run_query
+
+    def search_offers(i):
+        query_vec = served_service.encode(search_queries[i])
+        return [
+            m["uid"] for m in search_service.search_offers(query_vec, limit=k, score_threshold=0.0)
+        ]
+
+    base = {"profiles": n, "queries": queries, "k": k, "setup_seconds": setup_seconds}
+    return [
+        {**base, "workload": "match", "system": "search", **measure(match_with(None), match_truth)},
+        {
+            **base,
+            "workload": "match",
+            "system": "local",
+            **measure(match_with(served_engine), match_truth),
+        },
+        {**base, "workload": "search", "system": "search", **measure(search_offers, search_truth)},
+    ]
+
+
+def compare(report: Dict, baseline: Dict) -> None:
+    """Print p50/p99/recall changes against an earlier report."""
+
+    def key(row):
+        return row["profiles"], row["workload"], row["system"]
+
+    old = {key(row): row for row in baseline.get("results", [])}
+    print(f"\nvs {baseline.get('started_at', 'baseline')}:")
+    for row in report["results"]:
+        prev = old.get(key(row))
+        if prev is None:
+            continue
+        deltas = []
+        for metric in ("p50_ms", "p99_ms"):
+            if prev.get(metric):
+                deltas.append(f"{metric} {100 * (row[metric] / prev[metric] - 1):+.1f}%")
+        if row.get("recall") is not None and prev.get("recall") is not None:
+            deltas.append(f"recall {row['recall'] - prev['recall']:+.4f}")
+        print(
+            f"  {row['profiles']:>7} {row['workload']:<6} {row['system']:<6} " + ", ".join(deltas)
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline matching/search benchmark suite")
+    parser.add_argument("--profiles", default="1000,10000,100000", help="Comma-separated sizes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--full-dim", type=int, default=384, help="Provider (ground truth) dimension"
+    )
+    parser.add_argument("--dim", type=int, default=None, help="Served dimension (default: full)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Earlier --json report to diff against")
+    args = parser.parse_args()
+    dim = min(args.dim or args.full_dim, args.full_dim)
+
+    report = {
+        "benchmark": "matching_suite",
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "queries": args.queries,
+            "k": args.k,
+            "full_dim": args.full_dim,
+            "dim": dim,
+            "seed": args.seed,
+            "matching_initial_depth": settings.matching_initial_depth,
+            "matching_max_depth": settings.matching_max_depth,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+            "machine": platform.machine(),
+        },
+        "results": [],
+    }
+
+    print(f"k={args.k} queries={args.queries} dim={dim}/{args.full_dim} seed={args.seed}")
+    print(
+        f"{'profiles':>9} {'workload':<8} {'system':<7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'qps':>8} {'recall':>7}"
+    )
+    for n in [int(s) for s in args.profiles.split(",") if s]:
+        for row in run_size(n, args.queries, args.k, dim, args.full_dim, args.seed):
+            report["results"].append(row)
+            recall_text = f"{row['recall']:.4f}" if row["recall"] is not None else "-"
+            print(
+                f"{row['profiles']:>9} {row['workload']:<8} {row['system']:<7} {row['p50_ms']:>8} "
+                f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['qps']:>8} {recall_text:>7}"
+            )
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Recall of Matryoshka-truncated embeddings vs. the full-dimension baseline.
+
+Embeds synthetic skill-swap profiles and queries once at full dimension, takes
+the exact top-k at full dimension as ground truth, then reports recall@k
+(tie-aware: a hit is any result scoring at least the true k-th score),
+vector size and brute-force query latency for each truncated dimension.
+
+Usage:
+    cd wap-backend
+    python benchmarks/matryoshka_recall.py
+    python benchmarks/matryoshka_recall.py --profiles 50000 --dims 128,256,512
+    python benchmarks/matryoshka_recall.py --provider azure --profiles 2000   # spends quota
+    python benchmarks/matryoshka_recall.py --json results/matryoshka.json
+
+The local provider (hashed n-grams) is not Matryoshka-trained, so its numbers
+are a pessimistic stand-in; run with --provider azure for production figures.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.matryoshka import truncate
+
+SKILLS = [
+    "Python",
+    "JavaScript",
+    "React",
+    "SQL",
+    "Data analysis",
+    "Machine learning",
+    "Guitar",
+    "Piano",
+    "Singing",
+    "Music production",
+    "Photography",
+    "Video editing",
+    "Graphic design",
+    "UI design",
+    "Spanish",
+    "French",
+    "Japanese",
+    "Mandarin",
+    "Cooking",
+    "Baking",
+    "Yoga",
+    "Running coaching",
+    "Chess",
+    "Public speaking",
+    "Resume review",
+    "Interview prep",
+    "Excel",
+    "Accounting",
+    "Creative writing",
+    "Calculus tutoring",
+    "Physics tutoring",
+    "Drawing",
+    "Painting",
+    "Knitting",
+    "Woodworking",
+    "Car maintenance",
+    "Gardening",
+    "Web development",
+    "iOS development",
+]
+
+
+def synthetic_texts(n: int, seed: int) -> List[str]:
+    """Comma-separated skill lists, 1-4 skills each, popular skills more likely."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(SKILLS))]
+    return [", ".join(rng.choices(SKILLS, weights=weights, k=rng.randint(1, 4))) for _ in range(n)]
+
+
+def embed_full(texts: List[str], provider: str) -> np.ndarray:
+    if provider == "local":
+        from app.config import settings
+        from app.embedding_providers import LocalHashEmbeddingProvider
+
+        return LocalHashEmbeddingProvider(dimension=settings.vector_dim).embed_array(texts)
+
+    from app.embeddings import EmbeddingService, create_embedding_provider
+    from app.config import settings
+
+    settings.embedding_truncate_dim = None  # Ground truth needs full-dimension vectors
+    return np.asarray(
+        EmbeddingService(create_embedding_provider()).encode_batch(texts), dtype=np.float32
+    )
+
+
+def top_k(queries: np.ndarray, docs: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ docs.T
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return idx
+
+
+def run(profiles: int, queries: int, k: int, dims: List[int], provider: str, seed: int) -> Dict:
+    docs_text = synthetic_texts(profiles, seed)
+    query_text = synthetic_texts(queries, seed + 1)
+
+    started = time.perf_counter()
+    full = embed_full(docs_text + query_text, provider)
+    embed_seconds = time.perf_counter() - started
+    docs, qs = full[:profiles], full[profiles:]
+    full_dim = docs.shape[1]
+
+    # Synthetic profiles repeat skill sets, so exact ties are common; count a
+    # result as a hit if its full-dimension score reaches the true k-th score.
+    full_scores = qs @ docs.T
+    kth_score = np.partition(-full_scores, k - 1, axis=1)[:, k - 1] * -1
+    results = []
+    for dim in sorted(set(dims + [full_dim])):
+        if dim > full_dim:
+            continue
+        d_docs = truncate(docs, dim) if dim < full_dim else docs
+        d_qs = truncate(qs, dim) if dim < full_dim else qs
+
+        started = time.perf_counter()
+        found = top_k(d_qs, d_docs, k)
+        query_ms = (time.perf_counter() - started) / len(qs) * 1000
+
+        found_scores = np.take_along_axis(full_scores, found, axis=1)
+        hits = int((found_scores >= kth_score[:, None] - 1e-6).sum())
+        results.append(
+            {
+                "dim": dim,
+                f"recall@{k}": round(hits / (len(qs) * k), 4),
+                "bytes_per_vector": dim * 4,
+                "index_mb": round(d_docs.nbytes / 1e6, 1),
+                "query_ms": round(query_ms, 3),
+            }
+        )
+
+    return {
+        "benchmark": "matryoshka_recall",
+        "provider": provider,
+        "profiles": profiles,
+        "queries": queries,
+        "k": k,
+        "seed": seed,
+        "embed_seconds": round(embed_seconds, 2),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Matryoshka truncation recall benchmark")
+    parser.add_argument("--profiles", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dims", default="64,128,256,512,768,1024")
+    parser.add_argument("--provider", choices=["local", "azure"], default="local")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    report = run(
+        profiles=args.profiles,
+        queries=args.queries,
+        k=args.k,
+        dims=[int(d) for d in args.dims.split(",") if d],
+        provider=args.provider,
+        seed=args.seed,
+    )
+
+    print(
+        f"{report['profiles']} profiles, {report['queries']} queries, provider={report['provider']}"
+    )
+    print(
+        f"{'dim':>6} {'recall@' + str(args.k):>10} {'bytes/vec':>10} "
+        f"{'index MB':>9} {'ms/query':>9}"
+    )
+    for row in report["results"]:
+        print(
+            f"{row['dim']:>6} {row[f'recall@{args.k}']:>10.4f} {row['bytes_per_vector']:>10} "
+            f"{row['index_mb']:>9} {row['query_ms']:>9.3f}"
+        )
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Swap-cycle finder throughput on synthetic profiles.
+
+Each synthetic profile offers one skill topic and needs another (popular
+topics more likely); its vectors are the topic centroids plus noise, so
+teach scores cluster the way real skill embeddings do. For each profile
+count the benchmark loads a ReciprocalMatchEngine and times the two batch
+stages of scripts/find_swap_cycles.py separately:
+
+    graph   — degree-bounded teach graph (block GEMM + argpartition)
+    cycles  — 3/4-cycle enumeration and per-user ranking
+
+Usage:
+    cd wap-backend
+    python benchmarks/swap_cycles.py
+    python benchmarks/swap_cycles.py --profiles 10000,30000 --dim 1536
+    python benchmarks/swap_cycles.py --json results/swap_cycles.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.match_engine import ReciprocalMatchEngine
+from app.swap_cycles import build_teach_graph, find_cycles
+
+
+def synthetic_engine(
+    profiles: int, dim: int, topics: int, noise: float, seed: int
+) -> ReciprocalMatchEngine:
+    """Engine holding `profiles` synthetic offer/need vector pairs."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((topics, dim)).astype(np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    weights = 1.0 / np.arange(1, topics + 1)
+    weights /= weights.sum()
+
+    offer_topic = rng.choice(topics, size=profiles, p=weights)
+    need_topic = rng.choice(topics, size=profiles, p=weights)
+    scale = noise / np.sqrt(dim)
+    offers = centroids[offer_topic] + scale * rng.standard_normal((profiles, dim)).astype(
+        np.float32
+    )
+    needs = centroids[need_topic] + scale * rng.standard_normal((profiles, dim)).astype(np.float32)
+
+    engine = ReciprocalMatchEngine(dimension=dim, initial_capacity=profiles)
+    for i in range(profiles):
+        engine.upsert(f"user{i}", offers[i], needs[i], {"id": f"user{i}", "uid": f"user{i}"})
+    return engine
+
+
+def run(
+    sizes: List[int],
+    dim: int,
+    topics: int,
+    noise: float,
+    min_score: float,
+    max_degree: int,
+    max_length: int,
+    per_user: int,
+    seed: int,
+) -> Dict:
+    results = []
+    for profiles in sizes:
+        engine = synthetic_engine(profiles, dim, topics, noise, seed)
+
+        started = time.perf_counter()
+        graph = build_teach_graph(engine, min_score, max_degree)
+        graph_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cycles = find_cycles(graph, max_length=max_length, per_user=per_user)
+        cycle_seconds = time.perf_counter() - started
+
+        best = [entries[0][0] for entries in cycles.values()]
+        results.append(
+            {
+                "profiles": profiles,
+                "edges": graph.edge_count,
+                "users_with_cycles": len(cycles),
+                "coverage": round(len(cycles) / profiles, 4),
+                "median_best_score": round(float(np.median(best)), 4) if best else None,
+                "graph_seconds": round(graph_seconds, 2),
+                "cycle_seconds": round(cycle_seconds, 2),
+            }
+        )
+
+    return {
+        "benchmark": "swap_cycles",
+        "dim": dim,
+        "topics": topics,
+        "noise": noise,
+        "min_score": min_score,
+        "max_degree": max_degree,
+        "max_length": max_length,
+        "per_user": per_user,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Swap-cycle finder benchmark")
+    parser.add_argument("--profiles", default="1000,10000,30000", help="Comma-separated sizes")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.7, help="Noise norm relative to centroids")
+    parser.add_argument("--min-score", type=float, default=0.7)
+    parser.add_argument("--max-degree", type=int, default=15)
+    parser.add_argument("--max-length", type=int, choices=(3, 4), default=4)
+    parser.add_argument("--per-user", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    report = run(
+        sizes=[int(n) for n in args.profiles.split(",") if n],
+        dim=args.dim,
+        topics=args.topics,
+        noise=args.noise,
+        min_score=args.min_score,
+        max_degree=args.max_degree,
+        max_length=args.max_length,
+        per_user=args.per_user,
+        seed=args.seed,
+    )
+
+    print(
+        f"dim={report['dim']} max_degree={report['max_degree']} max_length={report['max_length']}"
+    )
+    print(
+        f"{'profiles':>9} {'edges':>9} {'in cycles':>10} "
+        f"{'best p50':>9} {'graph s':>8} {'cycles s':>9}"
+    )
+    for row in report["results"]:
+        print(
+            f"{row['profiles']:>9} {row['edges']:>9} {row['coverage']:>10.2%} "
+            f"{row['median_best_score'] or 0:>9.4f} {row['graph_seconds']:>8} "
+            f"{row['cycle_seconds']:>9}"
+        )
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
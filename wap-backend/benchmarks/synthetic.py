@@ -0,0 +1,252 @@
+"""Seeded synthetic skill-swap profiles for benchmarks.
+
+Skills come from a fixed vocabulary grouped by category (the categories the
+skills index uses), with Zipfian popularity: the r-th most popular skill is
+picked with weight 1 / r^s. Each user has a home category that about half of
+their skills come from, so offers and needs cluster like real profiles do.
+Skill strings use the "Python (Intermediate), Guitar (Beginner)" format that
+the profile routes index.
+
+Everything is derived from the seed, so two runs with the same arguments
+generate identical profiles and queries.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Sequence
+
+VOCABULARY: Dict[str, List[str]] = {
+    "Programming": [
+        "Python",
+        "JavaScript",
+        "TypeScript",
+        "React",
+        "Node.js",
+        "SQL",
+        "Java",
+        "C++",
+        "Rust",
+        "Go",
+        "iOS development",
+        "Android development",
+        "Web development",
+        "Git and GitHub",
+        "Docker",
+        "AWS",
+        "Data structures and algorithms",
+    ],
+    "Data": [
+        "Data analysis",
+        "Machine learning",
+        "Excel",
+        "Power BI",
+        "Tableau",
+        "Statistics",
+        "Deep learning",
+        "Data visualization",
+        "R programming",
+        "Pandas",
+    ],
+    "Design": [
+        "Graphic design",
+        "UI design",
+        "UX research",
+        "Figma",
+        "Photoshop",
+        "Illustrator",
+        "Logo design",
+        "Typography",
+        "3D modeling",
+        "Animation",
+    ],
+    "Music": [
+        "Guitar",
+        "Piano",
+        "Singing",
+        "Music production",
+        "Drums",
+        "Violin",
+        "Music theory",
+        "Ukulele",
+        "DJing",
+        "Songwriting",
+        "Bass guitar",
+    ],
+    "Languages": [
+        "Spanish",
+        "French",
+        "Japanese",
+        "Mandarin",
+        "German",
+        "Korean",
+        "Italian",
+        "Portuguese",
+        "Arabic",
+        "English conversation",
+        "Sign language",
+    ],
+    "Cooking": [
+        "Cooking",
+        "Baking",
+        "Bread making",
+        "Vegan cooking",
+        "Meal prep",
+        "Knife skills",
+        "Cake decorating",
+        "Fermentation",
+        "Coffee brewing",
+    ],
+    "Fitness": [
+        "Yoga",
+        "Running coaching",
+        "Weight training",
+        "Pilates",
+        "Swimming",
+        "Rock climbing",
+        "Martial arts",
+        "Cycling",
+        "Nutrition planning",
+    ],
+    "Career": [
+        "Resume review",
+        "Interview prep",
+        "Public speaking",
+        "Negotiation",
+        "LinkedIn profile",
+        "Project management",
+        "Leadership coaching",
+        "Time management",
+    ],
+    "Finance": [
+        "Accounting",
+        "Personal budgeting",
+        "Investing basics",
+        "Tax preparation",
+        "Bookkeeping",
+        "Financial modeling",
+    ],
+    "Academics": [
+        "Calculus tutoring",
+        "Physics tutoring",
+        "Chemistry tutoring",
+        "Essay writing",
+        "SAT prep",
+        "Biology tutoring",
+        "Linear algebra",
+        "History tutoring",
+    ],
+    "Arts": [
+        "Drawing",
+        "Painting",
+        "Watercolor",
+        "Photography",
+        "Video editing",
+        "Pottery",
+        "Calligraphy",
+        "Creative writing",
+        "Acting",
+    ],
+    "Crafts": [
+        "Knitting",
+        "Sewing",
+        "Woodworking",
+        "Jewelry making",
+        "Crochet",
+        "Embroidery",
+    ],
+    "Home": [
+        "Car maintenance",
+        "Gardening",
+        "Home repair",
+        "Plumbing basics",
+        "Interior design",
+        "Bike repair",
+        "Electrical basics",
+    ],
+    "Games": ["Chess", "Poker strategy", "Speedcubing", "Game design"],
+}
+
+LEVELS = ("Beginner", "Intermediate", "Advanced", "Expert")
+
+CATEGORY_OF: Dict[str, str] = {
+    skill: category for category, skills in VOCABULARY.items() for skill in skills
+}
+
+
+class SkillSampler:
+    """Zipfian skill draws with a per-user home category."""
+
+    def __init__(self, seed: int, zipf_s: float = 1.1, home_bias: float = 0.5):
+        rng = random.Random(seed)
+        self.skills = [skill for skills in VOCABULARY.values() for skill in skills]
+        # Popularity order is part of the seed, not the vocabulary order
+        rng.shuffle(self.skills)
+        self.weights = [1.0 / (rank + 1) ** zipf_s for rank in range(len(self.skills))]
+        self.home_bias = home_bias
+        self._by_category = {
+            category: [
+                (s, w) for s, w in zip(self.skills, self.weights) if CATEGORY_OF[s] == category
+            ]
+            for category in VOCABULARY
+        }
+
+    def draw(self, rng: random.Random, k: int, home: str, exclude: Sequence[str] = ()) -> List[str]:
+        """k distinct skills, none in exclude."""
+        chosen: List[str] = []
+        while len(chosen) < k:
+            pool = self._by_category[home] if rng.random() < self.home_bias else None
+            if pool:
+                skill = rng.choices([s for s, _ in pool], weights=[w for _, w in pool])[0]
+            else:
+                skill = rng.choices(self.skills, weights=self.weights)[0]
+            if skill not in chosen and skill not in exclude:
+                chosen.append(skill)
+        return chosen
+
+
+def _skills_text(rng: random.Random, skills: Sequence[str]) -> str:
+    return ", ".join(f"{skill} ({rng.choice(LEVELS)})" for skill in skills)
+
+
+def generate_profiles(
+    n: int, seed: int = 42, zipf_s: float = 1.1, prefix: str = "user"
+) -> List[Dict[str, str]]:
+    """
+    n profiles in the shape the profiles index stores (metadata only).
+
+    Each offers 1-4 skills and needs 1-3 others. Skill popularity depends
+    only on seed; prefix selects an independent stream of users, so query
+    profiles (prefix="query") follow the same popularity as indexed ones.
+    """
+    sampler = SkillSampler(seed, zipf_s)
+    rng = random.Random(f"{seed}:{prefix}")
+    categories = list(VOCABULARY)
+    profiles = []
+    for i in range(n):
+        home = rng.choice(categories)
+        offers = sampler.draw(rng, rng.randint(1, 4), home)
+        needs = sampler.draw(rng, rng.randint(1, 3), rng.choice(categories), exclude=offers)
+        uid = f"{prefix}{i}"
+        profiles.append(
+            {
+                "id": uid,
+                "uid": uid,
+                "username": uid,
+                "display_name": f"User {i}",
+                "skills_to_offer": _skills_text(rng, offers),
+                "services_needed": _skills_text(rng, needs),
+            }
+        )
+    return profiles
+
+
+def generate_search_queries(n: int, seed: int = 42, zipf_s: float = 1.1) -> List[str]:
+    """n free-text search queries: one or two skills, as users type them."""
+    sampler = SkillSampler(seed, zipf_s, home_bias=0.0)
+    rng = random.Random(f"{seed}:search")
+    queries = []
+    for _ in range(n):
+        skills = sampler.draw(rng, rng.choice((1, 1, 2)), home="")
+        queries.append(" and ".join(s.lower() for s in skills))
+    return queries
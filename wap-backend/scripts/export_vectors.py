@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Export every profile vector to a memory-mapped snapshot file.
+
+The snapshot (see app/vector_snapshot.py) lets the offline jobs run without
+Azure AI Search or the embedding provider:
+
+    python scripts/refresh_matches.py --snapshot vectors.snap
+    python scripts/find_swap_cycles.py --snapshot vectors.snap
+    python scripts/reindex.py --snapshot vectors.snap
+
+Sources:
+    index   read stored vectors back from Azure AI Search (no re-embedding)
+    cosmos  embed Cosmos DB profiles, as scripts/reindex.py does
+
+Usage:
+    cd wap-backend
+    python scripts/export_vectors.py vectors.snap
+    python scripts/export_vectors.py vectors.snap --dtype float32
+    python scripts/export_vectors.py vectors.snap --source cosmos --append
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.vector_snapshot import export_cosmos_snapshot, export_index_snapshot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export profile vectors to a snapshot file")
+    parser.add_argument("path", help="Snapshot file to write")
+    parser.add_argument(
+        "--source", choices=("index", "cosmos"), default="index", help="Where vectors come from"
+    )
+    parser.add_argument(
+        "--dtype", choices=("float16", "float32"), default="float16", help="Stored precision"
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Update an existing snapshot in place (cosmos: embed only profiles it lacks)",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Max Cosmos profiles (cosmos source; default all)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="Profiles embedded per batch (cosmos source)"
+    )
+    args = parser.parse_args()
+
+    if args.source == "index":
+        summary = export_index_snapshot(args.path, dtype=args.dtype, append=args.append)
+    else:
+        summary = export_cosmos_snapshot(
+            args.path,
+            dtype=args.dtype,
+            append=args.append,
+            limit=args.limit,
+            batch_size=args.batch_size,
+        )
+    print(
+        f"Snapshot written — {summary['written']} profiles exported, {summary['rows']} rows in "
+        f"{args.path} ({summary['bytes'] / 1e6:.1f} MB, {summary['seconds']}s)"
+    )
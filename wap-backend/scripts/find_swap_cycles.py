@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Recompute indirect swap cycles (Cosmos "swap_cycles" container).
+
+Reads every profile's vectors from Azure AI Search (or from a vector snapshot
+written by scripts/export_vectors.py), builds the sparse
+"X can teach what Y needs" graph in process, and stores each user's best
+3-4 person swap rings with a computed_at timestamp. Served by
+GET /match/cycles/{uid}.
+
+Usage:
+    cd wap-backend
+    python scripts/find_swap_cycles.py
+    python scripts/find_swap_cycles.py --min-score 0.75 --max-length 3
+    python scripts/find_swap_cycles.py --snapshot vectors.snap
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.swap_cycles import refresh_swap_cycles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find indirect skill swap cycles")
+    parser.add_argument(
+        "--min-score", type=float, default=None, help="Minimum teach score per edge"
+    )
+    parser.add_argument(
+        "--max-degree", type=int, default=None, help="Edges kept per profile and direction"
+    )
+    parser.add_argument(
+        "--max-length", type=int, choices=(3, 4), default=None, help="Longest cycle"
+    )
+    parser.add_argument("--per-user", type=int, default=None, help="Cycles kept per user")
+    parser.add_argument("--snapshot", default=None, help="Read vectors from this snapshot file")
+    args = parser.parse_args()
+
+    summary = refresh_swap_cycles(
+        min_score=args.min_score,
+        max_degree=args.max_degree,
+        max_length=args.max_length,
+        per_user=args.per_user,
+        snapshot_path=args.snapshot,
+    )
+    print(
+        f"Swap cycles refreshed — {summary['users_with_cycles']} users in cycles, "
+        f"{summary['written']} rows written, {summary['failed']} failed, "
+        f"{summary['removed']} stale removed "
+        f"({summary['profiles']} profiles, {summary['edges']} edges, {summary['seconds']}s)"
+    )
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Apply the Azure AI Search index schemas (profiles and skills).
+
+Services never call create_or_update_index on construction; the app lifespan
+only pushes a schema whose fingerprint differs from the one recorded in Redis,
+or, when none is recorded, that differs from the live index (and not at all
+with SEARCH_INDEX_MIGRATE=never). Run this after deploying a schema change,
+or with --force to re-apply regardless of the fingerprint.
+
+Usage:
+    cd wap-backend
+    python scripts/migrate_search_indexes.py
+    python scripts/migrate_search_indexes.py --force
+    python scripts/migrate_search_indexes.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.azure_search import (
+    build_profiles_index,
+    build_skills_index,
+    get_azure_search_service,
+    get_skills_search_service,
+    index_fingerprint,
+    recorded_fingerprint,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply Azure AI Search index schemas")
+    parser.add_argument(
+        "--force", action="store_true", help="Apply even if the fingerprint is unchanged"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only report which schemas changed")
+    args = parser.parse_args()
+
+    for service, build in (
+        (get_azure_search_service(), build_profiles_index),
+        (get_skills_search_service(), build_skills_index),
+    ):
+        index = build(service.index_name)
+        fingerprint = index_fingerprint(index)
+        recorded = recorded_fingerprint(index.name)
+        state = "unchanged" if recorded == fingerprint else "changed" if recorded else "unknown"
+        if args.dry_run:
+            print(f"{index.name}: {state} ({fingerprint[:12]})")
+            continue
+        # Explicit migration: "unknown"/"changed" are applied even with SEARCH_INDEX_MIGRATE=never
+        applied = service.ensure_index(force=args.force or state != "unchanged")
+        print(f"{index.name}: {'applied' if applied else 'up to date'} ({fingerprint[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Recompute the precomputed reciprocal match table (Cosmos "matches" container).
+
+Reads every profile's vectors from Azure AI Search (or from a vector snapshot
+written by scripts/export_vectors.py), scores all pairs in
+process and stores each user's top-K matches with a computed_at timestamp.
+Served by GET /match/{uid}.
+
+With --follow it then keeps running and applies the profile changes web
+workers queue to the affected rows. Run exactly one follower, and set
+MATCH_TABLE_INCREMENTAL=true on the web app only when it runs (nothing else
+drains the queue).
+
+Usage:
+    cd wap-backend
+    python scripts/refresh_matches.py
+    python scripts/refresh_matches.py --top-k 100
+    python scripts/refresh_matches.py --snapshot vectors.snap
+    python scripts/refresh_matches.py --follow 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.match_table import follow_match_updates, refresh_match_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the precomputed reciprocal match table")
+    parser.add_argument("--top-k", type=int, default=None, help="Matches kept per user")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Minimum per-direction score")
+    parser.add_argument("--snapshot", default=None, help="Read vectors from this snapshot file")
+    parser.add_argument(
+        "--follow",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="After the refresh, apply queued profile changes every SECONDS (runs until stopped)",
+    )
+    args = parser.parse_args()
+
+    summary = refresh_match_table(
+        top_k=args.top_k, score_threshold=args.threshold, snapshot_path=args.snapshot
+    )
+    print(
+        f"Match table refreshed — {summary['written']} rows written, {summary['failed']} failed "
+        f"({summary['profiles']} profiles, {summary['seconds']}s, "
+        f"computed_at {summary['computed_at']})"
+    )
+
+    if args.follow is not None:
+        follow_match_updates(interval=args.follow, top_k=args.top_k, score_threshold=args.threshold)
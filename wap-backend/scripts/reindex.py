@@ -5,12 +5,15 @@ Usage:
     cd wap-backend
     python scripts/reindex.py
     python scripts/reindex.py --limit 500
+    python scripts/reindex.py --batch-size 1000
+    python scripts/reindex.py --snapshot vectors.snap   # no re-embedding
 """
 
 from __future__ import annotations
 
 import argparse
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -19,8 +22,71 @@ from app.embeddings import get_embedding_service
 from app.azure_search import get_azure_search_service
 
 
-def reindex_all_profiles(limit: int = 10000) -> None:
-    """Reindex all profiles from Cosmos DB to Azure AI Search."""
+def _payload(profile: dict) -> dict:
+    return {
+        "uid": profile.get("uid"),
+        "email": profile.get("email"),
+        "display_name": profile.get("display_name"),
+        "photo_url": profile.get("photo_url"),
+        "full_name": profile.get("full_name"),
+        "username": profile.get("username"),
+        "bio": profile.get("bio"),
+        "city": profile.get("city"),
+        "timezone": profile.get("timezone"),
+        "skills_to_offer": profile.get("skills_to_offer"),
+        "services_needed": profile.get("services_needed"),
+        "dm_open": profile.get("dm_open", True),
+        "show_city": profile.get("show_city", True),
+    }
+
+
+class _IndexTally:
+    """
+    Documents that actually reached the index.
+
+    With write-behind on, upsert_profile only queues: the writer's worker sends
+    full batches in the background and flush() sends the rest, so successes and
+    drops are read from the writer's counters after each flush. Inline writes
+    raise on failure, so every upsert that returned was indexed.
+    """
+
+    def __init__(self, search_service):
+        self.search_service = search_service
+        self.writer = getattr(search_service, "writer", None)
+        self._base = self._counts()
+        self.indexed = 0
+        self.dropped = 0
+
+    def _counts(self) -> tuple:
+        if self.writer is None:
+            return 0, 0
+        stats = self.writer.get_stats()
+        return stats["succeeded"], stats["dropped"]
+
+    def settle(self, upserted: int) -> None:
+        """Flush everything queued (requeued retries included) and update the counts."""
+        if self.writer is None:
+            self.indexed += upserted
+            return
+        self.search_service.flush()
+        while self.writer.get_stats()["pending"]:
+            # Transient failures were requeued; retry after the writer's interval
+            time.sleep(self.writer.stats.flush_interval)
+            self.search_service.flush()
+        succeeded, dropped = self._counts()
+        self.indexed = succeeded - self._base[0]
+        self.dropped = dropped - self._base[1]
+
+
+def reindex_all_profiles(limit: int = 10000, batch_size: int = 500) -> None:
+    """
+    Reindex all profiles from Cosmos DB to Azure AI Search.
+
+    Profiles are embedded batch_size at a time with one encode_profile_texts
+    call (offer + need texts together): each distinct skill phrase in the batch
+    is embedded once, and EmbeddingService splits the uncached phrases into
+    provider-legal chunks, runs them concurrently and backs off on 429s.
+    """
     from app.cosmos_db import get_cosmos_service
 
     svc = get_cosmos_service()
@@ -35,61 +101,116 @@ def reindex_all_profiles(limit: int = 10000) -> None:
     embedding_service = get_embedding_service()
     search_service = get_azure_search_service()
 
-    ok = 0
-    skipped = 0
+    tally = _IndexTally(search_service)
     failed = 0
 
-    for i, profile in enumerate(profiles, 1):
-        uid = profile.get("uid")
-        print(f"[{i}/{len(profiles)}] Indexing {uid}...")
+    eligible = [p for p in profiles if p.get("skills_to_offer") and p.get("services_needed")]
+    skipped = len(profiles) - len(eligible)
+    if skipped:
+        print(f"  - Skipping {skipped} profiles with no skills defined")
 
-        try:
-            skills_to_offer = profile.get("skills_to_offer")
-            services_needed = profile.get("services_needed")
-
-            if not skills_to_offer or not services_needed:
-                print(f"  - Skipped {uid} (no skills defined)")
-                skipped += 1
-                continue
-
-            offer_vec = embedding_service.encode(skills_to_offer)
-            need_vec = embedding_service.encode(services_needed)
-
-            payload = {
-                "uid": uid,
-                "email": profile.get("email"),
-                "display_name": profile.get("display_name"),
-                "photo_url": profile.get("photo_url"),
-                "full_name": profile.get("full_name"),
-                "username": profile.get("username"),
-                "bio": profile.get("bio"),
-                "city": profile.get("city"),
-                "timezone": profile.get("timezone"),
-                "skills_to_offer": skills_to_offer,
-                "services_needed": services_needed,
-                "dm_open": profile.get("dm_open", True),
-                "show_city": profile.get("show_city", True),
-            }
-
-            search_service.upsert_profile(
-                username=uid,
-                offer_vec=offer_vec,
-                need_vec=need_vec,
-                payload=payload,
-            )
-            print(f"  + Indexed {uid}")
-            ok += 1
+    for start in range(0, len(eligible), batch_size):
+        batch = eligible[start:start + batch_size]
+        print(
+            f"[{start + 1}-{start + len(batch)}/{len(eligible)}] "
+            f"Embedding {len(batch)} profiles..."
+        )
 
+        texts = [p["skills_to_offer"] for p in batch] + [p["services_needed"] for p in batch]
+        try:
+            vectors = embedding_service.encode_profile_texts(texts)
         except Exception as exc:
-            print(f"  ! Error indexing {uid}: {exc}")
-            failed += 1
+            print(f"  ! Error embedding batch: {exc}")
+            failed += len(batch)
             continue
 
-    print(f"\nReindex complete — {ok} indexed, {skipped} skipped, {failed} failed")
+        offer_vecs, need_vecs = vectors[:len(batch)], vectors[len(batch):]
+        upserted = 0
+        for profile, offer_vec, need_vec in zip(batch, offer_vecs, need_vecs):
+            uid = profile.get("uid")
+            try:
+                search_service.upsert_profile(
+                    username=uid,
+                    offer_vec=offer_vec,
+                    need_vec=need_vec,
+                    payload=_payload(profile),
+                )
+                upserted += 1
+            except Exception as exc:
+                print(f"  ! Error indexing {uid}: {exc}")
+                failed += 1
+
+        # Write-behind: wait for this batch's documents to reach the index
+        tally.settle(upserted)
+        print(f"  + Indexed {tally.indexed} so far ({tally.dropped} dropped by the index)")
+
+    print(
+        f"\nReindex complete — {tally.indexed} indexed, {skipped} skipped, "
+        f"{failed + tally.dropped} failed ({tally.dropped} dropped by the index)"
+    )
+
+
+def reindex_from_snapshot(path: str, batch_size: int = 500) -> None:
+    """
+    Upload every document of a vector snapshot (scripts/export_vectors.py)
+    to Azure AI Search, without calling the embedding provider.
+
+    Restores an index (or fills a new one after a schema change) from vectors
+    already paid for; the snapshot is read a block at a time.
+    """
+    from app.config import settings
+    from app.vector_snapshot import open_snapshot
+
+    search_service = get_azure_search_service()
+
+    tally = _IndexTally(search_service)
+    upserted = 0
+    failed = 0
+    with open_snapshot(path) as snapshot:
+        if snapshot.dimension != settings.embedding_dim:
+            print(
+                f"Snapshot dimension {snapshot.dimension} does not match "
+                f"EMBEDDING_DIM {settings.embedding_dim}; aborting"
+            )
+            return
+        print(f"Found {len(snapshot)} profiles in {path}")
+
+        documents = snapshot.iter_documents(block_size=batch_size)
+        for position, document in enumerate(documents, start=1):
+            try:
+                search_service.upsert_profile(
+                    username=document["id"],
+                    offer_vec=document["offer_vec"],
+                    need_vec=document["need_vec"],
+                    payload=document,
+                )
+                upserted += 1
+            except Exception as exc:
+                print(f"  ! Error indexing {document['id']}: {exc}")
+                failed += 1
+            if position % batch_size == 0:
+                tally.settle(upserted)
+                upserted = 0
+                print(f"  + Indexed {tally.indexed} so far ({tally.dropped} dropped by the index)")
+
+    tally.settle(upserted)
+    print(
+        f"\nReindex from snapshot complete — {tally.indexed} indexed, "
+        f"{failed + tally.dropped} failed ({tally.dropped} dropped by the index)"
+    )
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Reindex profiles into Azure AI Search")
     parser.add_argument("--limit", type=int, default=10000, help="Max profiles to process")
+    parser.add_argument("--batch-size", type=int, default=500, help="Profiles embedded per batch")
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        help="Upload vectors from this snapshot file instead of embedding",
+    )
     args = parser.parse_args()
-    reindex_all_profiles(limit=args.limit)
+    if args.snapshot:
+        reindex_from_snapshot(args.snapshot, batch_size=args.batch_size)
+    else:
+        reindex_all_profiles(limit=args.limit, batch_size=args.batch_size)
@@ -11,7 +11,7 @@ import uuid
 from datetime import datetime, timezone
 from types import ModuleType
 from typing import Any, Dict, List, Optional
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -31,11 +31,14 @@ def _install_azure_mocks():
         "CosmosHttpResponseError", (Exception,), {}
     )
 
+    # Likewise for azure.core's not-found error (search document lookups)
+    _azure.core.exceptions.ResourceNotFoundError = type("ResourceNotFoundError", (Exception,), {})
+
     for mod_path in [
-        "azure", "azure.cosmos", "azure.cosmos.exceptions",
-        "azure.core", "azure.core.credentials",
-        "azure.search", "azure.search.documents",
-        "azure.search.documents.indexes",
+        "azure", "azure.cosmos", "azure.cosmos.exceptions", "azure.cosmos.aio",
+        "azure.core", "azure.core.credentials", "azure.core.exceptions",
+        "azure.search", "azure.search.documents", "azure.search.documents.aio",
+        "azure.search.documents.indexes", "azure.search.documents.indexes.aio",
         "azure.search.documents.indexes.models",
         "azure.search.documents.models",
         "azure.identity",
@@ -166,6 +169,19 @@ class InMemoryStore:
             or f"{uid2}:{uid1}" in self._blocks
         )
 
+    def get_excluded_uids(self, uid: str) -> set:
+        excluded = {uid}
+        for block in self._blocks.values():
+            if block.get("blocker_uid") == uid:
+                excluded.add(block.get("blocked_uid"))
+            if block.get("blocked_uid") == uid:
+                excluded.add(block.get("blocker_uid"))
+        for req in self._swap_requests.values():
+            if req.get("requester_uid") == uid and req.get("status") == "pending":
+                excluded.add(req.get("recipient_uid"))
+        excluded.discard(None)
+        return excluded
+
     # ── Reports ───────────────────────────────────────────────────────────────
 
     def create_report(self, reporter_uid: str, data: Dict) -> Dict:
@@ -319,16 +335,101 @@ def mock_embedding_service():
     return svc
 
 
+class AsyncStoreAdapter:
+    """Exposes InMemoryStore methods as coroutines (AsyncCosmosService interface)."""
+
+    def __init__(self, store: InMemoryStore):
+        self._store = store
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._store, name)
+        if not callable(attr):
+            return attr
+
+        async def _call(*args, **kwargs):
+            return attr(*args, **kwargs)
+
+        return _call
+
+
+@pytest.fixture(scope="session")
+def async_store(store):
+    return AsyncStoreAdapter(store)
+
+
+@pytest.fixture(scope="session")
+def mock_async_search_service():
+    svc = AsyncMock()
+    svc.search_offers.return_value = []
+    svc.search_needs.return_value = []
+    svc.search_multi_vector.return_value = []
+    return svc
+
+
+@pytest.fixture(scope="session")
+def mock_async_skills_search_service():
+    svc = AsyncMock()
+    svc.search_skills.return_value = []
+    return svc
+
+
+@pytest.fixture(scope="session")
+def mock_async_embedding_service():
+    svc = AsyncMock()
+    svc.encode.return_value = [0.1] * 1536
+    svc.encode_batch.side_effect = lambda texts: [[0.1] * 1536 for _ in texts]
+    svc.encode_profile_texts.side_effect = lambda texts: [[0.1] * 1536 for _ in texts]
+    svc.dimension = 1536
+    return svc
+
+
 @pytest.fixture
-def client(store, mock_search_service, mock_embedding_service):
+def client(
+    store,
+    async_store,
+    mock_search_service,
+    mock_embedding_service,
+    mock_async_search_service,
+    mock_async_skills_search_service,
+    mock_async_embedding_service,
+):
     """Test client with all external services mocked."""
     with (
         patch("app.cosmos_db.get_cosmos_service", return_value=store),
         patch("app.azure_search.get_azure_search_service", return_value=mock_search_service),
         patch("app.embeddings.get_embedding_service", return_value=mock_embedding_service),
-        patch("app.routers.profiles.get_cosmos_service", return_value=store),
-        patch("app.routers.profiles.get_azure_search_service", return_value=mock_search_service),
-        patch("app.routers.profiles.get_embedding_service", return_value=mock_embedding_service),
+        patch("app.routers.profiles.get_async_cosmos_service", return_value=async_store),
+        patch(
+            "app.routers.profiles.get_async_azure_search_service",
+            return_value=mock_async_search_service,
+        ),
+        patch(
+            "app.routers.profiles.get_async_embedding_service",
+            return_value=mock_async_embedding_service,
+        ),
+        patch("app.routers.search.get_async_cosmos_service", return_value=async_store),
+        patch(
+            "app.routers.search.get_async_azure_search_service",
+            return_value=mock_async_search_service,
+        ),
+        patch(
+            "app.routers.search.get_async_skills_search_service",
+            return_value=mock_async_skills_search_service,
+        ),
+        patch(
+            "app.routers.search.get_async_embedding_service",
+            return_value=mock_async_embedding_service,
+        ),
+        patch(
+            "app.matching.get_async_azure_search_service",
+            return_value=mock_async_search_service,
+        ),
+        patch(
+            "app.matching.get_async_embedding_service",
+            return_value=mock_async_embedding_service,
+        ),
+        patch("app.matching.get_async_cosmos_service", return_value=async_store),
+        patch("app.routers.messages.get_async_cosmos_service", return_value=async_store),
         patch("app.routers.swap_requests.get_cosmos_service", return_value=store),
         patch("app.routers.messages.get_cosmos_service", return_value=store),
         patch("app.routers.moderation.get_cosmos_service", return_value=store),
@@ -1,4 +1,6 @@
 """General API integration tests — smoke tests covering all routers."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
 
 
@@ -75,6 +77,21 @@ class TestSearchEndpoints:
         resp = client.post("/search", json={"query": "test", "mode": "invalid"})
         assert resp.status_code == 422
 
+    def test_anonymous_search_is_cached(self, client):
+        cache = MagicMock(aget=AsyncMock(return_value=None), aset=AsyncMock())
+        with patch("app.routers.search.get_cache_service", return_value=cache):
+            assert client.post("/search", json={"query": "python"}).status_code == 200
+        cache.aset.assert_awaited_once()
+
+    def test_search_with_my_uid_is_not_cached(self, client):
+        # Blocks and pending requests change the result at any time
+        cache = MagicMock(aget=AsyncMock(return_value=None), aset=AsyncMock())
+        with patch("app.routers.search.get_cache_service", return_value=cache):
+            response = client.post("/search", json={"query": "python", "my_uid": "me"})
+            assert response.status_code == 200
+        cache.aget.assert_not_called()
+        cache.aset.assert_not_called()
+
 
 class TestValidation:
     def test_upsert_missing_email_returns_422(self, client):
@@ -88,6 +105,16 @@ class TestValidation:
     def test_search_missing_query_returns_422(self, client):
         assert client.post("/search", json={}).status_code == 422
 
+    def test_reciprocal_match_needs_texts_or_uid(self, client):
+        assert client.post("/match/reciprocal", json={"limit": 5}).status_code == 422
+
+    def test_reciprocal_match_rejects_half_a_text_pair(self, client):
+        resp = client.post(
+            "/match/reciprocal", json={"my_offer_text": "Python", "my_uid": "me"}
+        )
+        assert resp.status_code == 422
+        assert "or neither" in resp.text
+
     def test_block_yourself_returns_400(self, client):
         resp = client.post(
             "/moderation/block",
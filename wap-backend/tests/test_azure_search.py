@@ -0,0 +1,303 @@
+"""Tests for fingerprint-gated Azure AI Search schema migrations."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app import azure_search
+from app.azure_search import index_fingerprint, migrate_index, migrate_index_async
+
+
+class _Index:
+    def __init__(self, name="swap-users", dims=384):
+        self.name = name
+        self.dims = dims
+
+    def serialize(self):
+        return {"name": self.name, "fields": [{"name": "offer_vec", "dimensions": self.dims}]}
+
+
+class _LiveIndex(_Index):
+    """The index as get_index returns it: service defaults filled in."""
+
+    def serialize(self):
+        body = super().serialize()
+        body["@odata.etag"] = "0x1"
+        body["fields"][0].update(retrievable=True, analyzer=None)
+        return body
+
+
+class _Cache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = value
+        return True
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, ttl=None):
+        return self.set(key, value, ttl)
+
+
+@pytest.fixture
+def cache():
+    cache = _Cache()
+    with (
+        patch("app.cache.get_cache_service", return_value=cache),
+        patch.dict(azure_search._applied_fingerprints, clear=True),
+    ):
+        yield cache
+
+
+class TestIndexFingerprint:
+    def test_stable_and_schema_sensitive(self):
+        assert index_fingerprint(_Index()) == index_fingerprint(_Index())
+        assert index_fingerprint(_Index(dims=256)) != index_fingerprint(_Index())
+
+
+class TestMigrateIndex:
+    def test_applies_once_then_skips(self, cache):
+        client = MagicMock()
+
+        assert migrate_index(client, _Index()) is True
+        assert migrate_index(client, _Index()) is False
+
+        client.create_or_update_index.assert_called_once()
+        assert cache.values["search_index_schema:swap-users"] == index_fingerprint(_Index())
+
+    def test_fingerprint_recorded_by_another_worker_skips(self, cache):
+        cache.values["search_index_schema:swap-users"] = index_fingerprint(_Index())
+        client = MagicMock()
+
+        assert migrate_index(client, _Index()) is False
+        client.create_or_update_index.assert_not_called()
+
+    def test_changed_schema_is_applied(self, cache):
+        cache.values["search_index_schema:swap-users"] = index_fingerprint(_Index(dims=256))
+        client = MagicMock()
+
+        assert migrate_index(client, _Index()) is True
+        client.create_or_update_index.assert_called_once()
+
+    def test_never_mode_only_warns(self, cache):
+        client = MagicMock()
+        with patch.object(azure_search.settings, "search_index_migrate", "never"):
+            assert migrate_index(client, _Index()) is False
+            assert migrate_index(client, _Index(), force=True) is True
+        client.create_or_update_index.assert_called_once()
+
+    def test_force_reapplies_unchanged_schema(self, cache):
+        client = MagicMock()
+        migrate_index(client, _Index())
+
+        assert migrate_index(client, _Index(), force=True) is True
+        assert client.create_or_update_index.call_count == 2
+
+    def test_matching_live_index_is_not_pushed(self, cache):
+        # No fingerprint in Redis (disabled, or another process applied it)
+        client = MagicMock()
+        client.get_index.return_value = _LiveIndex()
+
+        assert migrate_index(client, _Index()) is False
+        client.create_or_update_index.assert_not_called()
+        assert cache.values["search_index_schema:swap-users"] == index_fingerprint(_Index())
+
+    def test_live_index_that_differs_is_pushed(self, cache):
+        client = MagicMock()
+        client.get_index.return_value = _LiveIndex(dims=256)
+
+        assert migrate_index(client, _Index()) is True
+        client.create_or_update_index.assert_called_once()
+
+    def test_missing_index_is_created(self, cache):
+        client = MagicMock()
+        client.get_index.side_effect = azure_search.ResourceNotFoundError("no index")
+
+        assert migrate_index(client, _Index()) is True
+        client.create_or_update_index.assert_called_once()
+
+    async def test_async_variant(self, cache):
+        client = MagicMock()
+        client.get_index = AsyncMock(side_effect=azure_search.ResourceNotFoundError("no index"))
+        client.create_or_update_index = AsyncMock()
+
+        assert await migrate_index_async(client, _Index()) is True
+        assert await migrate_index_async(client, _Index()) is False
+        client.create_or_update_index.assert_awaited_once()
+
+    async def test_async_matching_live_index_is_not_pushed(self, cache):
+        client = MagicMock()
+        client.get_index = AsyncMock(return_value=_LiveIndex())
+        client.create_or_update_index = AsyncMock()
+
+        assert await migrate_index_async(client, _Index()) is False
+        client.create_or_update_index.assert_not_awaited()
+
+
+class TestServiceConstruction:
+    def test_sync_services_do_not_touch_the_index(self):
+        with patch.object(azure_search, "SearchIndexClient") as index_client_cls:
+            azure_search.AzureSearchService()
+            azure_search.SkillsSearchService()
+
+        index_client_cls.return_value.create_or_update_index.assert_not_called()
+
+
+class TestResultProjection:
+    def test_searches_select_only_result_fields(self):
+        with patch.object(azure_search, "SearchClient") as client_cls:
+            search = client_cls.return_value.search
+            search.return_value = [{"id": "u1", "uid": "u1", "@search.score": 0.9}]
+            azure_search.AzureSearchService().search_offers([0.1], limit=5)
+            profile_select = search.call_args.kwargs["select"]
+            azure_search.SkillsSearchService().search_skills([0.1])
+            skill_select = search.call_args.kwargs["select"]
+
+        assert profile_select == list(azure_search.PROFILE_RESULT_FIELDS)
+        assert skill_select == list(azure_search.SKILL_RESULT_FIELDS)
+        for select in (profile_select, skill_select):
+            assert not {"offer_vec", "need_vec", "skill_vec"} & set(select)
+
+    def test_profile_match_keeps_result_shape(self):
+        match = azure_search._profile_match({"id": "u1", "uid": "u1", "bio": "hi"}, 0.8)
+
+        assert match["username"] == "u1" and match["score"] == 0.8
+        assert match["swap_credits"] == 0 and match["city"] is None
+        assert set(match) == {"username", "score", *azure_search.PROFILE_RESULT_FIELDS[1:]}
+
+    def test_skill_match_defaults(self):
+        match = azure_search._skill_match({"id": "s1", "tags": None}, 0.7)
+
+        assert match["tags"] == [] and match["deliverables"] == []
+        assert match["delivery"] == "Remote Only" and match["estimated_hours"] == 1
+        assert match["score"] == 0.7
+
+
+class TestMultiVectorSearch:
+    def _service(self, documents):
+        with patch.object(azure_search, "SearchClient") as client_cls:
+            client_cls.return_value.search.return_value = documents
+            return azure_search.AzureSearchService(), client_cls.return_value.search
+
+    def test_one_request_with_a_query_per_field(self):
+        service, search = self._service([])
+        with patch.object(azure_search, "VectorizedQuery") as query_cls:
+            service.search_multi_vector(
+                {"offer_vec": [1.0, 0.0], "need_vec": [1.0, 0.0]}, limit=5, exclude_uids={"me"}
+            )
+
+        search.assert_called_once()
+        assert [c.kwargs["fields"] for c in query_cls.call_args_list] == ["offer_vec", "need_vec"]
+        assert all(c.kwargs["k_nearest_neighbors"] == 5 for c in query_cls.call_args_list)
+        kwargs = search.call_args.kwargs
+        assert len(kwargs["vector_queries"]) == 2 and kwargs["top"] == 10
+        assert kwargs["filter"] == "not search.in(uid, 'me', ',')"
+
+    def test_selects_only_the_queried_vector_fields(self):
+        service, search = self._service([])
+        service.search_multi_vector({"offer_vec": [1.0, 0.0]})
+
+        select = search.call_args.kwargs["select"]
+        assert select == [*azure_search.PROFILE_RESULT_FIELDS, "offer_vec"]
+
+    def test_per_field_scores_and_best_field_ranking(self):
+        service, _ = self._service(
+            [
+                {
+                    "id": "learner",
+                    "uid": "learner",
+                    "offer_vec": [-1.0, 0.0],
+                    "need_vec": [0.6, 0.8],
+                },
+                {
+                    "id": "teacher",
+                    "uid": "teacher",
+                    "offer_vec": [2.0, 0.0],
+                    "need_vec": [0.0, 1.0],
+                },
+                {"id": "far", "uid": "far", "offer_vec": [0.0, -1.0], "need_vec": None},
+            ]
+        )
+
+        matches = service.search_multi_vector(
+            {"offer_vec": [1.0, 0.0], "need_vec": [1.0, 0.0]}, score_threshold=0.6
+        )
+
+        assert [m["uid"] for m in matches] == ["teacher", "learner"]
+        teacher, learner = matches
+        assert teacher["score"] == teacher["offer_score"] == pytest.approx(1.0)
+        assert teacher["need_score"] == pytest.approx(0.5)
+        assert learner["score"] == learner["need_score"] == pytest.approx(1 / 1.4)
+        assert learner["offer_score"] == pytest.approx(1 / 3)
+        assert "offer_vec" not in teacher and "need_vec" not in teacher
+
+    async def test_async_sends_one_request(self):
+        calls = []
+
+        async def results(docs):
+            for doc in docs:
+                yield doc
+
+        async def search(**kwargs):
+            calls.append(kwargs)
+            return results(
+                [{"id": "u1", "uid": "u1", "offer_vec": [1.0, 0.0], "need_vec": [1.0, 0.0]}]
+            )
+
+        with patch.object(azure_search, "AsyncSearchClient") as client_cls:
+            client_cls.return_value.search = search
+            service = azure_search.AsyncAzureSearchService()
+            matches = await service.search_multi_vector(
+                {"offer_vec": [1.0, 0.0], "need_vec": [1.0, 0.0]}
+            )
+
+        assert len(calls) == 1 and len(calls[0]["vector_queries"]) == 2
+        assert [m["uid"] for m in matches] == ["u1"]
+        assert matches[0]["offer_score"] == matches[0]["need_score"] == pytest.approx(1.0)
+
+
+class TestHybridSearch:
+    def test_profiles_send_text_and_vectors_in_one_request(self):
+        with patch.object(azure_search, "SearchClient") as client_cls:
+            search = client_cls.return_value.search
+            search.return_value = [
+                {"id": "u1", "uid": "u1", "@search.score": 3 / 61},  # first in all three rankers
+                {"id": "u2", "uid": "u2", "@search.score": 1 / 62},
+            ]
+            with patch.object(azure_search, "VectorizedQuery") as query_cls:
+                matches = azure_search.AzureSearchService().search_hybrid(
+                    "Figma", {"offer_vec": [0.1], "need_vec": [0.1]}, limit=5, exclude_uids=["me"]
+                )
+
+        kwargs = search.call_args.kwargs
+        assert search.call_count == 1
+        assert kwargs["search_text"] == "Figma"
+        assert kwargs["search_fields"] == ["skills_to_offer", "bio", "services_needed"]
+        assert kwargs["top"] == 5 and "me" in kwargs["filter"]
+        assert (
+            query_cls.call_args.kwargs["k_nearest_neighbors"]
+            == azure_search.settings.search_hybrid_k
+        )
+        assert matches[0]["score"] == pytest.approx(1.0)
+        assert matches[1]["score"] == pytest.approx(61 / 62 / 3)
+
+    def test_skills_search_keyword_fields_with_category_filter(self):
+        with patch.object(azure_search, "SearchClient") as client_cls:
+            search = client_cls.return_value.search
+            search.return_value = [{"id": "s1", "title": "Kubernetes", "@search.score": 1 / 61}]
+            matches = azure_search.SkillsSearchService().search_skills_hybrid(
+                "Kubernetes", [0.1], limit=3, category_filter="Programming"
+            )
+
+        kwargs = search.call_args.kwargs
+        assert kwargs["search_fields"] == ["title", "tags", "description"]
+        assert kwargs["filter"] == "category eq 'Programming'"
+        assert kwargs["select"] == list(azure_search.SKILL_RESULT_FIELDS)
+        assert matches[0]["score"] == pytest.approx(0.5)
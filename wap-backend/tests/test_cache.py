@@ -125,6 +125,68 @@ class TestCacheSet:
         assert svc.set("k", "v") is False
 
 
+# ── Enabled cache — get_many / set_many ───────────────────────────────────────
+
+class TestCacheMany:
+    def test_get_many_preserves_order_and_misses(self):
+        svc, mock_redis = _make_cache_service()
+        mock_redis.mget.return_value = [json.dumps([1.0]), None, json.dumps([3.0])]
+
+        assert svc.get_many(["a", "b", "c"]) == [[1.0], None, [3.0]]
+        mock_redis.mget.assert_called_once_with(["a", "b", "c"])
+
+    def test_get_many_returns_nones_on_error(self):
+        svc, mock_redis = _make_cache_service()
+        mock_redis.mget.side_effect = Exception("Redis error")
+
+        assert svc.get_many(["a", "b"]) == [None, None]
+
+    def test_get_many_returns_nones_when_disabled(self):
+        svc, _ = _make_cache_service(redis_enabled=False)
+        assert svc.get_many(["a"]) == [None]
+
+    def test_set_many_pipelines_setex(self):
+        svc, mock_redis = _make_cache_service()
+        pipe = mock_redis.pipeline.return_value
+
+        assert svc.set_many({"a": [1.0], "b": [2.0]}, ttl=60) is True
+        assert pipe.setex.call_count == 2
+        pipe.setex.assert_any_call("a", 60, json.dumps([1.0]))
+        pipe.execute.assert_called_once()
+
+    def test_set_many_returns_false_on_error(self):
+        svc, mock_redis = _make_cache_service()
+        mock_redis.pipeline.return_value.execute.side_effect = Exception("Redis down")
+
+        assert svc.set_many({"a": 1}) is False
+
+
+class TestCacheBytes:
+    def test_get_bytes_many_returns_raw_values(self):
+        svc, mock_redis = _make_cache_service()
+        mock_redis.mget.return_value = [b"\x02\x00\x3c", None]
+
+        assert svc.get_bytes_many(["a", "b"]) == [b"\x02\x00\x3c", None]
+
+    def test_get_bytes_many_returns_nones_on_error(self):
+        svc, mock_redis = _make_cache_service()
+        mock_redis.mget.side_effect = Exception("Redis error")
+
+        assert svc.get_bytes_many(["a"]) == [None]
+
+    def test_set_bytes_many_stores_bytes_unchanged(self):
+        svc, mock_redis = _make_cache_service()
+        pipe = mock_redis.pipeline.return_value
+
+        assert svc.set_bytes_many({"a": b"\x01\xff"}, ttl=60) is True
+        pipe.setex.assert_called_once_with("a", 60, b"\x01\xff")
+
+    def test_bytes_methods_noop_when_disabled(self):
+        svc, _ = _make_cache_service(redis_enabled=False)
+        assert svc.get_bytes_many(["a"]) == [None]
+        assert svc.set_bytes_many({"a": b"x"}) is False
+
+
 # ── Enabled cache — delete ─────────────────────────────────────────────────────
 
 class TestCacheDelete:
@@ -241,6 +241,20 @@ class TestListProfiles:
         assert result == []
 
 
+class TestIterProfiles:
+    def test_pages_through_every_profile_without_a_limit(self):
+        svc, mock_db = _make_cosmos_service()
+        container = MagicMock()
+        container.query_items.return_value = iter([_make_item(f"uid{i}") for i in range(3)])
+        mock_db.get_container_client.return_value = container
+
+        result = list(svc.iter_profiles(page_size=2))
+
+        assert [p["uid"] for p in result] == ["uid0", "uid1", "uid2"]
+        kwargs = container.query_items.call_args.kwargs
+        assert "LIMIT" not in kwargs["query"] and kwargs["max_item_count"] == 2
+
+
 # ── CosmosService.get_profile_by_email ───────────────────────────────────────
 
 class TestGetProfileByEmail:
@@ -321,3 +335,24 @@ class TestGetCosmosService:
                 assert svc1 is svc2
         finally:
             module._cosmos_service = original
+
+
+# ── CosmosService.get_excluded_uids ───────────────────────────────────────────
+
+class TestGetExcludedUids:
+    def test_unions_self_blocks_both_ways_and_pending(self):
+        svc, mock_db = _make_cosmos_service()
+        blocks = MagicMock()
+        blocks.query_items.side_effect = [
+            [{"blocked_uid": "spammer"}],
+            [{"blocker_uid": "grumpy"}],
+        ]
+        requests = MagicMock()
+        requests.query_items.return_value = [{"recipient_uid": "pending1"}]
+        mock_db.get_container_client.side_effect = (
+            lambda name: {"blocks": blocks, "swap_requests": requests}[name]
+        )
+
+        assert svc.get_excluded_uids("me") == {"me", "spammer", "grumpy", "pending1"}
+        assert requests.query_items.call_args.kwargs["partition_key"] == "me"
+        assert "pending" in requests.query_items.call_args.kwargs["query"]
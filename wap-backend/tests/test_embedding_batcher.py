@@ -0,0 +1,137 @@
+"""Tests for cross-request embedding micro-batching."""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.embedding_batcher import AsyncEmbeddingBatcher, EmbeddingBatcher
+
+
+class _RecordingFlush:
+    """flush_fn that records every batch it receives."""
+
+    def __init__(self):
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+class TestEmbeddingBatcher:
+    def test_single_text_round_trip(self):
+        flush = _RecordingFlush()
+        batcher = EmbeddingBatcher(flush, max_wait_ms=1, max_batch=8)
+        try:
+            assert batcher.encode("abc") == [3.0]
+        finally:
+            batcher.close()
+
+    def test_concurrent_calls_are_coalesced(self):
+        flush = _RecordingFlush()
+        batcher = EmbeddingBatcher(flush, max_wait_ms=50, max_batch=64)
+        texts = [f"text-{i:02d}" + "x" * i for i in range(20)]
+        try:
+            with ThreadPoolExecutor(max_workers=20) as pool:
+                results = list(pool.map(batcher.encode, texts))
+        finally:
+            batcher.close()
+
+        # Every caller gets its own vector back
+        assert results == [[float(len(t))] for t in texts]
+        # ...from far fewer provider calls than callers
+        assert len(flush.batches) < len(texts)
+        assert sum(len(b) for b in flush.batches) == len(texts)
+
+    def test_respects_max_batch(self):
+        flush = _RecordingFlush()
+        batcher = EmbeddingBatcher(flush, max_wait_ms=50, max_batch=4)
+        try:
+            futures = [batcher.submit(f"t{i}") for i in range(10)]
+            for f in futures:
+                f.result(timeout=5)
+        finally:
+            batcher.close()
+
+        assert max(len(b) for b in flush.batches) <= 4
+
+    def test_errors_propagate_to_every_caller(self):
+        def failing(texts):
+            raise RuntimeError("429 Too Many Requests")
+
+        batcher = EmbeddingBatcher(failing, max_wait_ms=20, max_batch=8)
+        try:
+            futures = [batcher.submit("a"), batcher.submit("b")]
+            for f in futures:
+                with pytest.raises(RuntimeError):
+                    f.result(timeout=5)
+        finally:
+            batcher.close()
+        assert batcher.get_stats()["errors"] >= 1
+
+    def test_stats_track_batch_sizes(self):
+        flush = _RecordingFlush()
+        batcher = EmbeddingBatcher(flush, max_wait_ms=50, max_batch=8)
+        try:
+            futures = [batcher.submit(f"t{i}") for i in range(3)]
+            for f in futures:
+                f.result(timeout=5)
+        finally:
+            batcher.close()
+
+        stats = batcher.get_stats()
+        assert stats["items"] == 3
+        assert stats["batches"] == len(flush.batches)
+        assert stats["max_batch_size"] == max(len(b) for b in flush.batches)
+        assert sum(stats["batch_size_histogram"].values()) == stats["batches"]
+
+    def test_submit_after_close_raises(self):
+        batcher = EmbeddingBatcher(_RecordingFlush(), max_wait_ms=1, max_batch=8)
+        batcher.close()
+        with pytest.raises(RuntimeError):
+            batcher.submit("late")
+
+
+class TestAsyncEmbeddingBatcher:
+    @staticmethod
+    def _async_flush(flush):
+        async def _call(texts):
+            return flush(texts)
+
+        return _call
+
+    async def test_concurrent_calls_are_coalesced(self):
+        flush = _RecordingFlush()
+        batcher = AsyncEmbeddingBatcher(self._async_flush(flush), max_wait_ms=20, max_batch=64)
+        texts = [f"t{i}" + "x" * i for i in range(10)]
+
+        results = await asyncio.gather(*(batcher.encode(t) for t in texts))
+
+        assert results == [[float(len(t))] for t in texts]
+        assert len(flush.batches) == 1
+        assert batcher.get_stats()["items"] == 10
+
+    async def test_full_batch_flushes_without_waiting(self):
+        flush = _RecordingFlush()
+        batcher = AsyncEmbeddingBatcher(self._async_flush(flush), max_wait_ms=10_000, max_batch=4)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.encode(f"t{i}") for i in range(4))), timeout=5
+        )
+
+        assert len(results) == 4
+        assert flush.batches == [["t0", "t1", "t2", "t3"]]
+
+    async def test_flush_errors_propagate(self):
+        async def failing(texts):
+            raise RuntimeError("provider down")
+
+        batcher = AsyncEmbeddingBatcher(failing, max_wait_ms=1, max_batch=8)
+        with pytest.raises(RuntimeError):
+            await batcher.encode("a")
+        assert batcher.get_stats()["errors"] == 1
@@ -0,0 +1,205 @@
+"""Tests for the content-addressed embedding cache."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app import vector_codec
+from app.embedding_cache import EmbeddingCache, normalize_text
+
+
+def _fake_response(texts):
+    """Mimic openai's embeddings.create response: one vector per input."""
+    return SimpleNamespace(
+        data=[SimpleNamespace(embedding=[float(len(t)), 0.5, 0.25]) for t in texts]
+    )
+
+
+def _make_embedding_service(cache_service=None, max_entries=16):
+    """EmbeddingService with a mocked AzureOpenAI client and a 3-dim cache."""
+    mock_client = MagicMock()
+    mock_client.embeddings.create.side_effect = lambda input, **_: _fake_response(input)
+
+    import app.embeddings as embeddings_module
+
+    embeddings_module._embedding_cache = None
+
+    with (
+        patch("app.embeddings.AzureOpenAI", return_value=mock_client),
+        patch("app.embeddings.get_cache_service", return_value=cache_service),
+        patch("app.embeddings.settings") as mock_settings,
+    ):
+        mock_settings.azure_embedding_deployment = "test-deployment"
+        mock_settings.embedding_provider = "azure"
+        mock_settings.vector_dim = 3
+        mock_settings.embedding_dim = 3
+        mock_settings.embedding_cache_enabled = True
+        mock_settings.embedding_cache_max_entries = max_entries
+        mock_settings.embedding_cache_ttl = 60
+        mock_settings.embedding_cache_codec = "float16"
+        mock_settings.embedding_batch_enabled = False
+        mock_settings.embedding_max_items_per_request = 2048
+        mock_settings.embedding_max_tokens_per_input = 8191
+        mock_settings.embedding_max_tokens_per_request = 300_000
+        mock_settings.embedding_max_concurrency = 4
+        mock_settings.embedding_max_retries = 0
+        mock_settings.embedding_retry_base_delay = 0.0
+        mock_settings.embedding_retry_max_delay = 0.0
+        from app.embeddings import EmbeddingService
+
+        svc = EmbeddingService()
+    return svc, mock_client
+
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+
+class TestKeys:
+    def test_normalize_collapses_whitespace(self):
+        assert normalize_text("  general   help\n") == "general help"
+
+    def test_whitespace_variants_share_key(self):
+        cache = EmbeddingCache("dep", 3)
+        assert cache.key_for("general help") == cache.key_for(" general\thelp ")
+
+    def test_key_depends_on_deployment_and_dimension(self):
+        base = EmbeddingCache("dep", 3).key_for("python")
+        assert EmbeddingCache("other", 3).key_for("python") != base
+        assert EmbeddingCache("dep", 256).key_for("python") != base
+
+    def test_key_has_prefix(self):
+        assert EmbeddingCache("dep", 3).key_for("x").startswith("emb:")
+
+    def test_key_depends_on_codec(self):
+        base = EmbeddingCache("dep", 3, codec="float16").key_for("python")
+        assert EmbeddingCache("dep", 3, codec="int8").key_for("python") != base
+
+    def test_unknown_codec_rejected(self):
+        with pytest.raises(ValueError):
+            EmbeddingCache("dep", 3, codec="float8")
+
+
+# ── LRU tier ──────────────────────────────────────────────────────────────────
+
+
+class TestLruTier:
+    def test_miss_then_hit(self):
+        cache = EmbeddingCache("dep", 3)
+        assert cache.get_many(["python"]) == [None]
+
+        cache.put_many(["python"], [[0.5, 0.25, 0.125]])
+        assert cache.get_many(["python"]) == [[0.5, 0.25, 0.125]]
+
+        stats = cache.get_stats()
+        assert stats["lru_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used(self):
+        cache = EmbeddingCache("dep", 3, max_entries=2)
+        cache.put_many(["a", "b"], [[1.0] * 3, [2.0] * 3])
+        cache.get_many(["a"])  # touch "a" so "b" is oldest
+        cache.put_many(["c"], [[3.0] * 3])
+
+        assert cache.get_many(["a", "b", "c"]) == [[1.0] * 3, None, [3.0] * 3]
+        assert cache.get_stats()["lru_entries"] == 2
+
+
+# ── Redis tier ────────────────────────────────────────────────────────────────
+
+
+class TestRedisTier:
+    def test_redis_hit_is_promoted_to_lru(self):
+        redis_cache = MagicMock()
+        redis_cache.get_bytes_many.return_value = [vector_codec.encode([0.5, 0.5, 0.5])]
+        cache = EmbeddingCache("dep", 3, cache_service=redis_cache)
+
+        assert cache.get_many(["x"]) == [[0.5, 0.5, 0.5]]
+        assert cache.get_many(["x"]) == [[0.5, 0.5, 0.5]]
+
+        redis_cache.get_bytes_many.assert_called_once()
+        stats = cache.get_stats()
+        assert stats["redis_hits"] == 1
+        assert stats["lru_hits"] == 1
+
+    def test_redis_vector_with_wrong_dimension_is_ignored(self):
+        redis_cache = MagicMock()
+        redis_cache.get_bytes_many.return_value = [vector_codec.encode([0.5, 0.5])]
+        cache = EmbeddingCache("dep", 3, cache_service=redis_cache)
+
+        assert cache.get_many(["x"]) == [None]
+
+    def test_redis_value_with_other_codec_is_ignored(self):
+        redis_cache = MagicMock()
+        redis_cache.get_bytes_many.return_value = [vector_codec.encode([0.5] * 3, "int8")]
+        cache = EmbeddingCache("dep", 3, cache_service=redis_cache, codec="float16")
+
+        assert cache.get_many(["x"]) == [None]
+
+    def test_legacy_json_value_is_a_miss(self):
+        redis_cache = MagicMock()
+        redis_cache.get_bytes_many.return_value = [b"[0.5, 0.5, 0.5]"]
+        cache = EmbeddingCache("dep", 3, cache_service=redis_cache)
+
+        assert cache.get_many(["x"]) == [None]
+
+    def test_put_writes_encoded_bytes_through_to_redis(self):
+        redis_cache = MagicMock()
+        cache = EmbeddingCache("dep", 3, ttl=60, cache_service=redis_cache, codec="int8")
+        cache.put_many(["x"], [[1.0, 2.0, 3.0]])
+
+        items = redis_cache.set_bytes_many.call_args[0][0]
+        (data,) = items.values()
+        assert isinstance(data, bytes)
+        assert vector_codec.decode(data).tolist() == pytest.approx([1.0, 2.0, 3.0], abs=0.02)
+        assert redis_cache.set_bytes_many.call_args[1]["ttl"] == 60
+
+    def test_int8_lru_uses_less_memory(self):
+        vec = [0.01 * i for i in range(1536)]
+        small = EmbeddingCache("dep", 1536, codec="int8")
+        large = EmbeddingCache("dep", 1536, codec="float32")
+        small.put_many(["x"], [vec])
+        large.put_many(["x"], [vec])
+
+        assert small.get_stats()["lru_bytes"] * 3 < large.get_stats()["lru_bytes"]
+
+
+# ── EmbeddingService integration ──────────────────────────────────────────────
+
+
+class TestEmbeddingServiceCaching:
+    def test_repeated_encode_makes_one_provider_call(self):
+        svc, client = _make_embedding_service()
+        first = svc.encode("general help")
+        second = svc.encode("general  help")
+
+        assert first == second
+        assert client.embeddings.create.call_count == 1
+
+    def test_batch_only_sends_uncached_unique_texts(self):
+        svc, client = _make_embedding_service()
+        svc.encode("python")
+
+        vectors = svc.encode_batch(["python", "guitar", "guitar", "chess"])
+
+        assert len(vectors) == 4
+        assert vectors[1] == vectors[2]
+        sent = client.embeddings.create.call_args[1]["input"]
+        assert sent == ["guitar", "chess"]
+
+    def test_batch_preserves_input_order(self):
+        svc, _ = _make_embedding_service()
+        vectors = svc.encode_batch(["a", "bbb", "cc"])
+        assert [v[0] for v in vectors] == [1.0, 3.0, 2.0]
+
+    def test_stats_report_hits_and_provider_calls(self):
+        svc, _ = _make_embedding_service()
+        svc.encode("python")
+        svc.encode("python")
+
+        stats = svc.get_stats()
+        assert stats["provider_calls"] == 1
+        assert stats["cache"]["lru_hits"] == 1
+        assert "estimated_latency_saved_ms" in stats["cache"]
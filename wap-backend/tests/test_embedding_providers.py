@@ -0,0 +1,163 @@
+"""Tests for pluggable embedding providers."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.embedding_providers import (
+    AzureOpenAIEmbeddingProvider,
+    EmbeddingProvider,
+    LocalHashEmbeddingProvider,
+)
+
+
+# ── Local hashed n-gram provider ──────────────────────────────────────────────
+
+
+class TestLocalHashEmbeddingProvider:
+    def test_vectors_have_configured_dimension(self):
+        provider = LocalHashEmbeddingProvider(dimension=64)
+        vectors = provider.embed(["Python programming", "Guitar lessons"])
+        assert len(vectors) == 2
+        assert all(len(v) == 64 for v in vectors)
+
+    def test_vectors_are_l2_normalized(self):
+        provider = LocalHashEmbeddingProvider(dimension=256)
+        matrix = provider.embed_array(["Python programming", "Guitar lessons", "a"])
+        np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+
+    def test_deterministic_across_instances(self):
+        a = LocalHashEmbeddingProvider(dimension=128).embed(["Web development"])
+        b = LocalHashEmbeddingProvider(dimension=128).embed(["Web development"])
+        assert a == b
+
+    def test_seed_changes_vectors_and_model_id(self):
+        a = LocalHashEmbeddingProvider(dimension=128, seed=0)
+        b = LocalHashEmbeddingProvider(dimension=128, seed=1)
+        assert a.embed(["Web development"]) != b.embed(["Web development"])
+        assert a.model_id != b.model_id
+
+    def test_batch_matches_individual_calls(self):
+        provider = LocalHashEmbeddingProvider(dimension=128)
+        texts = ["Python", "Guitar lessons", "Python", "Spanish tutoring"]
+        batch = provider.embed(texts)
+        assert batch == [provider.embed([t])[0] for t in texts]
+
+    def test_batch_spanning_chunks_keeps_order(self):
+        provider = LocalHashEmbeddingProvider(dimension=32)
+        provider.CHUNK_SIZE = 3
+        texts = [f"skill number {i}" for i in range(10)]
+        assert provider.embed(texts) == [provider.embed([t])[0] for t in texts]
+
+    def test_case_and_whitespace_insensitive(self):
+        provider = LocalHashEmbeddingProvider(dimension=128)
+        assert provider.embed(["Python  Programming"]) == provider.embed(["python programming"])
+
+    def test_empty_text_is_zero_vector(self):
+        provider = LocalHashEmbeddingProvider(dimension=16)
+        assert provider.embed([""]) == [[0.0] * 16]
+
+    def test_lexical_overlap_drives_similarity(self):
+        provider = LocalHashEmbeddingProvider(dimension=1536)
+        a, b, c = provider.embed_array(
+            [
+                "Python programming and coding",
+                "Python development and software engineering",
+                "Guitar music and jazz",
+            ]
+        )
+        assert a @ b > a @ c
+
+    async def test_aembed_matches_embed(self):
+        provider = LocalHashEmbeddingProvider(dimension=64)
+        assert await provider.aembed(["Python"]) == provider.embed(["Python"])
+
+
+class TestEmbeddingProviderBase:
+    def test_provider_without_embed_cannot_be_created(self):
+        class Incomplete(EmbeddingProvider):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete(model_id="incomplete", dimension=4)
+
+
+# ── Azure OpenAI provider ─────────────────────────────────────────────────────
+
+
+class TestAzureOpenAIEmbeddingProvider:
+    def test_embed_calls_deployment_with_dimension(self):
+        client = MagicMock()
+        client.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=[1.0, 0.0]), SimpleNamespace(embedding=[0.0, 1.0])]
+        )
+        provider = AzureOpenAIEmbeddingProvider(client, deployment="dep", dimension=2)
+
+        assert provider.embed(["a", "b"]) == [[1.0, 0.0], [0.0, 1.0]]
+        client.embeddings.create.assert_called_once_with(
+            input=["a", "b"], model="dep", dimensions=2
+        )
+        assert provider.model_id == "dep"
+
+
+# ── Provider selection via settings ───────────────────────────────────────────
+
+
+class TestProviderSelection:
+    def _settings(self, mock_settings, provider):
+        mock_settings.embedding_provider = provider
+        mock_settings.local_embedding_seed = 0
+        mock_settings.vector_dim = 32
+        mock_settings.embedding_dim = 32
+        mock_settings.azure_embedding_deployment = "test-deployment"
+        mock_settings.embedding_cache_enabled = False
+        mock_settings.embedding_batch_enabled = False
+        mock_settings.embedding_max_items_per_request = 2048
+        mock_settings.embedding_max_tokens_per_input = 8191
+        mock_settings.embedding_max_tokens_per_request = 300_000
+        mock_settings.embedding_max_concurrency = 2
+        mock_settings.embedding_max_retries = 0
+        mock_settings.embedding_retry_base_delay = 0.0
+        mock_settings.embedding_retry_max_delay = 0.0
+
+    def test_local_provider_runs_offline(self):
+        with (
+            patch("app.embeddings.settings") as mock_settings,
+            patch("app.embeddings.AzureOpenAI") as mock_azure,
+        ):
+            self._settings(mock_settings, "local")
+            from app.embeddings import EmbeddingService
+
+            service = EmbeddingService()
+            vectors = service.encode_batch(["Python", "Guitar"])
+            single = service.encode("Python")
+
+        mock_azure.assert_not_called()
+        assert service.provider.name == "local"
+        assert len(vectors) == 2 and len(vectors[0]) == 32
+        assert single == vectors[0]
+
+    def test_azure_provider_is_default(self):
+        with (
+            patch("app.embeddings.settings") as mock_settings,
+            patch("app.embeddings.AzureOpenAI") as mock_azure,
+        ):
+            self._settings(mock_settings, "azure")
+            from app.embeddings import create_embedding_provider
+
+            provider = create_embedding_provider()
+
+        mock_azure.assert_called_once()
+        assert provider.name == "azure"
+        assert provider.model_id == "test-deployment"
+
+    def test_unknown_provider_raises(self):
+        with patch("app.embeddings.settings") as mock_settings:
+            self._settings(mock_settings, "bogus")
+            from app.embeddings import create_embedding_provider
+
+            with pytest.raises(ValueError):
+                create_embedding_provider()
@@ -0,0 +1,239 @@
+"""Tests for embedding request chunking and 429/5xx retries."""
+from __future__ import annotations
+
+import threading
+from typing import List
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+
+from app.embedding_providers import EmbeddingProvider
+from app.embedding_requests import (
+    RetryPolicy,
+    estimate_tokens,
+    is_retryable,
+    plan_chunks,
+    retry_after_seconds,
+    truncate_to_tokens,
+)
+
+
+def _api_error(status: int, headers=None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://test.openai.azure.com/embeddings")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    cls = openai.RateLimitError if status == 429 else openai.InternalServerError
+    if status < 500 and status != 429:
+        cls = openai.BadRequestError
+    return cls("error", response=response, body=None)
+
+
+# ── Chunk planning ────────────────────────────────────────────────────────────
+
+
+class TestPlanChunks:
+    def test_item_limit(self):
+        texts = [f"t{i}" for i in range(7)]
+        assert plan_chunks(texts, max_items=3, max_tokens=None) == [(0, 3), (3, 6), (6, 7)]
+
+    def test_token_limit(self):
+        texts = ["x" * 30] * 4  # 10 estimated tokens each
+        assert plan_chunks(texts, max_items=100, max_tokens=25) == [(0, 2), (2, 4)]
+
+    def test_oversize_single_input_gets_own_chunk(self):
+        texts = ["a", "x" * 300, "b"]
+        assert plan_chunks(texts, max_items=100, max_tokens=50) == [(0, 1), (1, 2), (2, 3)]
+
+    def test_no_limits_single_chunk(self):
+        assert plan_chunks(["a", "b"], None, None) == [(0, 2)]
+        assert plan_chunks([], None, None) == []
+
+    def test_ranges_cover_input_in_order(self):
+        texts = [("y" * (i % 7 + 1)) for i in range(50)]
+        chunks = plan_chunks(texts, max_items=4, max_tokens=6)
+        assert chunks[0][0] == 0 and chunks[-1][1] == 50
+        assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+class TestTokenEstimates:
+    def test_estimate_is_conservative_for_english(self):
+        # "hello world" is 2 tokens in cl100k; the estimate must not undercount
+        assert estimate_tokens("hello world") >= 2
+
+    def test_truncate_respects_limit_and_utf8(self):
+        text = "é" * 100  # 2 bytes each
+        cut = truncate_to_tokens(text, 10)
+        assert estimate_tokens(cut) <= 10
+        assert cut == "é" * len(cut)
+
+    def test_truncate_keeps_short_text(self):
+        assert truncate_to_tokens("python", 10) == "python"
+
+
+# ── Retry classification ──────────────────────────────────────────────────────
+
+
+class TestRetryClassification:
+    def test_retryable_statuses(self):
+        assert is_retryable(_api_error(429))
+        assert is_retryable(_api_error(503))
+        assert not is_retryable(_api_error(400))
+        assert not is_retryable(ValueError("bad"))
+
+    def test_retry_after_seconds(self):
+        assert retry_after_seconds(_api_error(429, {"retry-after": "3"})) == 3.0
+
+    def test_retry_after_ms_preferred(self):
+        err = _api_error(429, {"retry-after": "3", "retry-after-ms": "250"})
+        assert retry_after_seconds(err) == 0.25
+
+    def test_retry_after_http_date(self):
+        err = _api_error(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        assert retry_after_seconds(err) == 0.0  # In the past → no wait
+
+    def test_no_header(self):
+        assert retry_after_seconds(_api_error(429)) is None
+
+
+# ── RetryPolicy ───────────────────────────────────────────────────────────────
+
+
+class TestRetryPolicy:
+    def _flaky(self, errors):
+        calls = {"n": 0}
+
+        def fn():
+            calls["n"] += 1
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        return fn, calls
+
+    def test_retries_until_success(self):
+        fn, calls = self._flaky([_api_error(429), _api_error(502)])
+        with patch("app.embedding_requests.time.sleep") as sleep:
+            assert RetryPolicy(max_retries=3, base_delay=0.1).call(fn) == "ok"
+        assert calls["n"] == 3
+        assert sleep.call_count == 2
+
+    def test_honours_retry_after(self):
+        fn, _ = self._flaky([_api_error(429, {"retry-after": "2"})])
+        with patch("app.embedding_requests.time.sleep") as sleep:
+            RetryPolicy(max_retries=1, base_delay=0.1, max_delay=30).call(fn)
+        delay = sleep.call_args[0][0]
+        assert 2.0 <= delay <= 2.1
+
+    def test_retry_after_capped_by_max_delay(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=5)
+        assert policy.delay_for(0, _api_error(429, {"retry-after": "120"})) == 5
+
+    def test_backoff_is_jittered_and_bounded(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=4)
+        delays = [
+            policy.delay_for(attempt, _api_error(503)) for attempt in range(6) for _ in range(20)
+        ]
+        assert all(0 <= d <= 4 for d in delays)
+        assert len(set(delays)) > 1
+
+    def test_gives_up_after_max_retries(self):
+        fn, calls = self._flaky([_api_error(429)] * 5)
+        with patch("app.embedding_requests.time.sleep"):
+            with pytest.raises(openai.RateLimitError):
+                RetryPolicy(max_retries=2).call(fn)
+        assert calls["n"] == 3
+
+    def test_non_retryable_raises_immediately(self):
+        fn, calls = self._flaky([_api_error(400)])
+        with pytest.raises(openai.BadRequestError):
+            RetryPolicy(max_retries=5).call(fn)
+        assert calls["n"] == 1
+
+    async def test_async_retries(self):
+        errors = [_api_error(429, {"retry-after-ms": "1"})]
+
+        async def fn():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        retried = []
+        policy = RetryPolicy(max_retries=2, base_delay=0.0, on_retry=lambda e, d: retried.append(d))
+        assert await policy.acall(fn) == "ok"
+        assert len(retried) == 1
+
+
+# ── EmbeddingService chunking ─────────────────────────────────────────────────
+
+
+class _RecordingProvider(EmbeddingProvider):
+    """Returns [len(text)] per text; optionally throttles the first call."""
+
+    name = "recording"
+
+    def __init__(self, max_items=None, throttle_first=False):
+        super().__init__(model_id="recording", dimension=1)
+        self.max_items_per_request = max_items
+        self.throttle_first = throttle_first
+        self.requests: List[List[str]] = []
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        with self._lock:
+            first = not self.requests and self.throttle_first
+            self.requests.append(list(texts))
+        if first:
+            raise _api_error(429, {"retry-after-ms": "1"})
+        return [[float(len(t))] for t in texts]
+
+
+def _service(provider, service_cls_name="EmbeddingService"):
+    with patch("app.embeddings.settings") as mock_settings:
+        mock_settings.vector_dim = 1
+        mock_settings.embedding_dim = 1
+        mock_settings.embedding_cache_enabled = False
+        mock_settings.embedding_batch_enabled = False
+        mock_settings.embedding_max_concurrency = 3
+        mock_settings.embedding_max_retries = 2
+        mock_settings.embedding_retry_base_delay = 0.0
+        mock_settings.embedding_retry_max_delay = 0.01
+        import app.embeddings as embeddings_module
+
+        embeddings_module._embedding_cache = None
+        return getattr(embeddings_module, service_cls_name)(provider=provider)
+
+
+class TestEncodeBatchChunking:
+    def test_large_batch_split_and_order_kept(self):
+        provider = _RecordingProvider(max_items=4)
+        service = _service(provider)
+        texts = ["x" * i for i in range(1, 12)]
+
+        vectors = service.encode_batch(texts)
+
+        assert vectors == [[float(i)] for i in range(1, 12)]
+        assert all(len(r) <= 4 for r in provider.requests)
+        assert len(provider.requests) == 3
+        assert service.get_stats()["provider_calls"] == 3
+
+    def test_throttled_chunk_is_retried(self):
+        provider = _RecordingProvider(max_items=2, throttle_first=True)
+        service = _service(provider)
+
+        vectors = service.encode_batch(["a", "bb", "ccc", "dddd"])
+
+        assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+        stats = service.get_stats()
+        assert stats["provider_retries"] == 1
+        assert stats["provider_throttled"] == 1
+
+    async def test_async_service_chunks_in_order(self):
+        provider = _RecordingProvider(max_items=3, throttle_first=True)
+        service = _service(provider, "AsyncEmbeddingService")
+        texts = ["x" * i for i in range(1, 9)]
+
+        vectors = await service.encode_batch(texts)
+
+        assert vectors == [[float(i)] for i in range(1, 9)]
+        assert all(len(r) <= 3 for r in provider.requests)
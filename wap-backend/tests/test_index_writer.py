@@ -0,0 +1,278 @@
+"""Tests for write-behind buffered index actions."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.index_writer import AsyncIndexWriter, IndexWriter
+
+
+def _ok(actions, status=200):
+    return [
+        SimpleNamespace(key=doc["id"], succeeded=status < 300, status_code=status)
+        for _, doc in actions
+    ]
+
+
+class _Sender:
+    """Records batches; statuses maps key -> status codes returned on successive sends."""
+
+    def __init__(self, statuses=None, raises=0):
+        self.batches = []
+        self.statuses = statuses or {}
+        self.raises = raises
+
+    def __call__(self, actions):
+        self.batches.append(list(actions))
+        if self.raises:
+            self.raises -= 1
+            raise RuntimeError("service unavailable")
+        results = []
+        for _, doc in actions:
+            codes = self.statuses.get(doc["id"], [])
+            status = codes.pop(0) if codes else 200
+            results.append(
+                SimpleNamespace(key=doc["id"], succeeded=status < 300, status_code=status)
+            )
+        return results
+
+
+def _writer(send, **kwargs):
+    # Long interval: nothing is sent unless the test flushes or fills a batch
+    kwargs.setdefault("flush_interval_ms", 60_000)
+    return IndexWriter(send, **kwargs)
+
+
+class TestCoalescing:
+    def test_repeated_merges_become_one_merged_action(self):
+        send = _Sender()
+        writer = _writer(send)
+        writer.merge_or_upload({"id": "u1", "bio": "old", "city": "Austin"})
+        writer.merge_or_upload({"id": "u1", "bio": "new"})
+
+        assert writer.flush() == 1
+        assert send.batches == [[("merge_or_upload", {"id": "u1", "bio": "new", "city": "Austin"})]]
+        assert writer.get_stats()["coalesced"] == 1
+        writer.close()
+
+    def test_delete_wins_and_merge_after_delete_replaces(self):
+        send = _Sender()
+        writer = _writer(send)
+        writer.merge_or_upload({"id": "u1", "bio": "x"})
+        writer.delete({"id": "u1"})
+        writer.delete({"id": "u2"})
+        writer.merge_or_upload({"id": "u2", "bio": "back"})
+
+        writer.flush()
+
+        assert send.batches == [[("delete", {"id": "u1"}), ("upload", {"id": "u2", "bio": "back"})]]
+        writer.close()
+
+
+class TestFlushing:
+    def test_full_batch_is_sent_by_the_worker(self):
+        sent = threading.Event()
+
+        def send(actions):
+            sent.set()
+            return _ok(actions)
+
+        writer = _writer(send, max_batch=2)
+        writer.merge_or_upload({"id": "a"})
+        writer.merge_or_upload({"id": "b"})
+
+        assert sent.wait(2)
+        writer.close()
+        assert writer.get_stats()["succeeded"] == 2
+
+    def test_interval_flushes_a_partial_batch(self):
+        sent = threading.Event()
+
+        def send(actions):
+            sent.set()
+            return _ok(actions)
+
+        writer = IndexWriter(send, flush_interval_ms=10)
+        writer.merge_or_upload({"id": "a"})
+
+        assert sent.wait(2)
+        writer.close()
+
+    def test_flush_splits_into_max_batch(self):
+        send = _Sender()
+        writer = _writer(send, max_batch=2)
+        with writer._send_lock:  # Keep the worker from sending the first full batch
+            for key in "abcde":
+                writer.merge_or_upload({"id": key})
+
+        writer.flush()
+
+        assert sum(len(b) for b in send.batches) == 5
+        assert max(len(b) for b in send.batches) == 2
+        writer.close()
+
+    def test_close_flushes_pending(self):
+        send = _Sender()
+        writer = _writer(send)
+        writer.merge_or_upload({"id": "a"})
+
+        writer.close()
+
+        assert send.batches == [[("merge_or_upload", {"id": "a"})]]
+
+
+class TestRetries:
+    def test_transient_item_failure_is_retried(self):
+        send = _Sender(statuses={"a": [503]})
+        writer = _writer(send)
+        writer.merge_or_upload({"id": "a"})
+        writer.merge_or_upload({"id": "b"})
+
+        assert writer.flush() == 1
+        assert writer.get_stats()["pending"] == 1
+        assert writer.flush() == 1
+
+        stats = writer.get_stats()
+        assert stats["retried"] == 1 and stats["dropped"] == 0 and stats["pending"] == 0
+        writer.close()
+
+    def test_permanent_failure_is_dropped(self):
+        send = _Sender(statuses={"a": [400]})
+        writer = _writer(send)
+        writer.merge_or_upload({"id": "a"})
+
+        writer.flush()
+
+        assert writer.get_stats()["dropped"] == 1
+        assert writer.get_stats()["pending"] == 0
+        writer.close()
+
+    def test_failed_batch_gives_up_after_max_retries(self):
+        send = _Sender(raises=10)
+        writer = _writer(send, max_retries=2)
+        writer.merge_or_upload({"id": "a"})
+
+        writer.flush()
+        writer.flush()
+
+        stats = writer.get_stats()
+        assert len(send.batches) == 2
+        assert stats["batch_errors"] == 2 and stats["retried"] == 1 and stats["dropped"] == 1
+        writer.close()
+
+    def test_retry_merges_under_newer_action(self):
+        send = _Sender(statuses={"a": [503]})
+        writer = _writer(send)
+        writer.merge_or_upload({"id": "a", "bio": "first", "city": "Austin"})
+        writer.flush()
+        writer.merge_or_upload({"id": "a", "bio": "second"})
+
+        writer.flush()
+
+        assert send.batches[-1] == [
+            ("merge_or_upload", {"id": "a", "bio": "second", "city": "Austin"})
+        ]
+        writer.close()
+
+    def test_failing_index_is_not_resent_without_backoff(self):
+        send = _Sender(raises=1000)
+        writer = IndexWriter(send, max_batch=2, flush_interval_ms=300, max_retries=1000)
+        for key in "abcd":
+            writer.merge_or_upload({"id": key})
+
+        time.sleep(0.15)
+
+        # A full batch is pending throughout, but after the error the worker waits
+        assert len(send.batches) == 1
+        assert writer.get_stats()["pending"] == 4
+        writer.close()
+
+
+class TestAsyncIndexWriter:
+    async def test_failed_batch_backs_off_even_when_full(self):
+        batches = []
+
+        async def send(actions):
+            batches.append(list(actions))
+            raise RuntimeError("service unavailable")
+
+        writer = AsyncIndexWriter(send, max_batch=2, flush_interval_ms=60_000, max_retries=1000)
+        writer.merge_or_upload({"id": "a"})
+        writer.merge_or_upload({"id": "b"})
+        await asyncio.sleep(0.01)
+        writer.merge_or_upload({"id": "c"})
+        writer.merge_or_upload({"id": "d"})
+        await asyncio.sleep(0.01)
+
+        assert len(batches) == 1
+        await writer.close()
+
+    async def test_flush_and_coalesce(self):
+        batches = []
+
+        async def send(actions):
+            batches.append(list(actions))
+            return _ok(actions)
+
+        writer = AsyncIndexWriter(send, flush_interval_ms=60_000)
+        writer.merge_or_upload({"id": "a", "bio": "x"})
+        writer.delete({"id": "a"})
+
+        assert await writer.flush() == 1
+        assert batches == [[("delete", {"id": "a"})]]
+        await writer.close()
+
+    async def test_interval_dispatches_in_background(self):
+        sent = asyncio.Event()
+
+        async def send(actions):
+            sent.set()
+            return _ok(actions)
+
+        writer = AsyncIndexWriter(send, flush_interval_ms=10)
+        writer.merge_or_upload({"id": "a"})
+
+        await asyncio.wait_for(sent.wait(), 2)
+        await writer.close()
+        assert writer.get_stats()["succeeded"] == 1
+
+
+class TestServiceWrites:
+    def test_upsert_is_queued_not_sent_inline(self):
+        from app import azure_search
+
+        with (
+            patch.object(azure_search, "SearchClient") as client_cls,
+            patch.object(azure_search.settings, "search_write_behind_enabled", True),
+        ):
+            client = client_cls.return_value
+            client.index_documents.side_effect = lambda batch: []
+            service = azure_search.AzureSearchService()
+            service.delete_profile("u1")
+
+            client.delete_documents.assert_not_called()
+            assert service.writer.get_stats()["pending"] == 1
+            service.flush()
+
+        client.index_documents.assert_called_once()
+
+    def test_off_by_default(self):
+        from app.config import Settings
+
+        assert Settings.model_fields["search_write_behind_enabled"].default is False
+
+    def test_disabled_sends_inline(self):
+        from app import azure_search
+
+        with (
+            patch.object(azure_search, "SearchClient") as client_cls,
+            patch.object(azure_search.settings, "search_write_behind_enabled", False),
+        ):
+            service = azure_search.AzureSearchService()
+            service.delete_profile("u1")
+
+        assert service.writer is None
+        client_cls.return_value.delete_documents.assert_called_once_with([{"id": "u1"}])
@@ -0,0 +1,198 @@
+"""Tests for the in-process exact search backend (SEARCH_BACKEND=local)."""
+from __future__ import annotations
+
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.azure_search import azure_cosine_score
+from app.local_search import (
+    AsyncLocalSearchService,
+    ExactVectorIndex,
+    LocalSearchService,
+    LocalSkillsSearchService,
+)
+
+DIM = 4
+
+
+def _e(i, dim=DIM):
+    return np.eye(dim)[i].tolist()
+
+
+def _profiles(service, rows):
+    for uid, offer, need, extra in rows:
+        service.upsert_profile(uid, offer, need, {"uid": uid, "display_name": uid.title(), **extra})
+
+
+class TestExactVectorIndex:
+    def test_exact_top_k_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((50, 8)).astype(np.float32)
+        index = ExactVectorIndex(("v",), 8, initial_capacity=4)  # forces growth
+        for i, vec in enumerate(vectors):
+            index.upsert(f"d{i}", {"id": f"d{i}", "v": vec.tolist()})
+        query = rng.standard_normal(8)
+
+        _, rows, scores = index.search({"v": query}, k=5, skip=2)
+
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = azure_cosine_score(unit @ (query / np.linalg.norm(query)))
+        assert rows["v"] == np.argsort(-expected)[2:7].tolist()
+        np.testing.assert_allclose(scores["v"][rows["v"]], np.sort(expected)[::-1][2:7], rtol=1e-5)
+
+    def test_delete_tombstones_then_compacts(self):
+        index = ExactVectorIndex(("v",), DIM)
+        for i in range(8):
+            index.upsert(f"d{i}", {"id": f"d{i}", "v": _e(i % DIM)})
+
+        index.delete("d0")
+        assert index._tombstones == 1 and len(index) == 7
+        _, rows, _ = index.search({"v": _e(0)}, k=8)
+        assert 0 not in rows["v"]
+
+        index.delete("d1")  # 2 of 8 rows dead: compacted
+        assert index._tombstones == 0 and len(index._ids) == 6
+        documents, rows, _ = index.search({"v": _e(0)}, k=1)
+        assert documents[rows["v"][0]]["id"] == "d4"
+
+    def test_upsert_overwrites_in_place_and_missing_vectors_are_skipped(self):
+        index = ExactVectorIndex(("a", "b"), DIM)
+        index.upsert("x", {"id": "x", "a": _e(0), "b": None})
+        index.upsert("x", {"id": "x", "a": _e(1), "b": [0.0] * DIM})
+
+        _, rows, _ = index.search({"a": _e(1), "b": _e(1)}, k=3)
+
+        assert rows == {"a": [0], "b": []}
+        assert len(index._ids) == 1
+
+    def test_wrong_dimension_is_rejected(self):
+        with pytest.raises(ValueError):
+            ExactVectorIndex(("v",), DIM).upsert("x", {"id": "x", "v": [1.0, 0.0]})
+
+    def test_snapshot_round_trip(self, tmp_path):
+        index = ExactVectorIndex(("v",), DIM)
+        for i in range(3):
+            index.upsert(f"d{i}", {"id": f"d{i}", "v": _e(i), "title": f"T{i}"})
+        index.delete("d1")
+        index.save(tmp_path / "snap.npz")
+
+        restored = ExactVectorIndex(("v",), DIM)
+        assert restored.load(tmp_path / "snap.npz") == 2
+        assert restored.get("d2")["title"] == "T2"
+        assert restored.get("d1") is None
+        documents, rows, _ = restored.search({"v": _e(2)}, k=1)
+        assert documents[rows["v"][0]]["id"] == "d2"
+
+
+class TestLocalSearchService:
+    def _service(self):
+        service = LocalSearchService(dimension=DIM)
+        _profiles(
+            service,
+            [
+                ("ana", _e(0), _e(1), {"skills_to_offer": "Figma prototyping", "swap_credits": 3}),
+                ("bo", _e(1), _e(0), {"skills_to_offer": "Guitar"}),
+                ("cy", _e(0), _e(2), {"skills_to_offer": "Drawing"}),
+            ],
+        )
+        return service
+
+    def test_search_offers_threshold_and_exclusions(self):
+        service = self._service()
+
+        matches = service.search_offers(_e(0), limit=5, score_threshold=0.9, exclude_uids=["cy"])
+
+        assert [m["uid"] for m in matches] == ["ana"]
+        assert matches[0]["score"] == pytest.approx(1.0)
+        assert matches[0]["swap_credits"] == 3 and "offer_vec" not in matches[0]
+
+    def test_skip_pages_through_neighbours(self):
+        service = self._service()
+
+        first = service.search_needs(_e(0), limit=1, score_threshold=0.0)
+        second = service.search_needs(_e(0), limit=1, score_threshold=0.0, skip=1)
+
+        assert first[0]["uid"] == "bo" and second[0]["uid"] != "bo"
+
+    def test_multi_vector_reports_per_field_scores(self):
+        service = self._service()
+
+        matches = service.search_multi_vector({"offer_vec": _e(1), "need_vec": _e(1)}, limit=1)
+
+        by_uid = {m["uid"]: m for m in matches}
+        assert set(by_uid) == {"ana", "bo"}
+        assert by_uid["bo"]["offer_score"] == pytest.approx(1.0)
+        assert by_uid["ana"]["need_score"] == pytest.approx(1.0)
+
+    def test_hybrid_promotes_keyword_hits(self):
+        service = self._service()
+
+        matches = service.search_hybrid("figma", {"offer_vec": _e(3)}, limit=3)
+
+        assert matches[0]["uid"] == "ana"
+        assert 0 < matches[-1]["score"] <= matches[0]["score"] <= 1
+
+    def test_vectors_delete_and_iteration(self):
+        service = self._service()
+
+        offer, need = service.get_profile_vectors("ana")
+        assert offer == pytest.approx(_e(0)) and need == pytest.approx(_e(1))
+        service.delete_profile("ana")
+        assert service.get_profile_vectors("ana") is None
+        assert sorted(d["id"] for d in service.iter_profile_documents()) == ["bo", "cy"]
+
+    async def test_async_service_shares_the_index(self):
+        service = self._service()
+        async_service = AsyncLocalSearchService(service)
+
+        await async_service.delete_profile("bo")
+        matches = await async_service.search_offers(_e(1), score_threshold=0.9)
+
+        assert matches == []
+        assert [d["id"] async for d in async_service.iter_profile_documents()] == ["ana", "cy"]
+
+    async def test_async_searches_run_off_the_event_loop(self):
+        service = self._service()
+        threads = []
+        search_offers = service.search_offers
+
+        def recording_search(*args):
+            threads.append(threading.current_thread())
+            return search_offers(*args)
+
+        with patch.object(service, "search_offers", recording_search):
+            await AsyncLocalSearchService(service).search_offers(_e(0))
+
+        assert threads and threads[0] is not threading.current_thread()
+
+
+class TestLocalSkillsSearchService:
+    def test_category_filter_and_hybrid(self):
+        service = LocalSkillsSearchService(dimension=DIM)
+        service.upsert_skill("s1", _e(0), {"title": "Kubernetes basics", "category": "Programming"})
+        service.upsert_skill("s2", _e(0), {"title": "Watercolor", "category": "Arts"})
+
+        assert [m["id"] for m in service.search_skills(_e(0), category_filter="Arts")] == ["s2"]
+        assert service.search_skills_hybrid("kubernetes", _e(1), limit=1)[0]["id"] == "s1"
+        service.delete_skill("s1")
+        assert [m["id"] for m in service.search_skills(_e(0))] == ["s2"]
+
+
+class TestBackendSelection:
+    def test_local_backend_shares_one_store(self):
+        from app import azure_search, local_search
+
+        with (
+            patch.object(azure_search.settings, "search_backend", "local"),
+            patch.object(azure_search, "_azure_search_service", None),
+            patch.object(azure_search, "_async_azure_search_service", None),
+            patch.object(local_search, "_local_search_service", None),
+        ):
+            sync_service = azure_search.get_azure_search_service()
+            async_service = azure_search.get_async_azure_search_service()
+
+        assert isinstance(sync_service, LocalSearchService)
+        assert async_service.service is sync_service
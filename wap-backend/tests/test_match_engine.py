@@ -0,0 +1,253 @@
+"""Tests for the in-process reciprocal match engine."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.match_engine import ReciprocalMatchEngine, azure_cosine_score
+from app.matching import combine_reciprocal_matches
+from app.search_filters import ProfileFilter
+
+DIM = 16
+
+
+def _unit_rows(rng, n):
+    rows = rng.standard_normal((n, DIM)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _engine(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    offers, needs = _unit_rows(rng, n), _unit_rows(rng, n)
+    engine = ReciprocalMatchEngine(dimension=DIM, initial_capacity=8)
+    for i in range(n):
+        engine.upsert_profile(f"u{i}", offers[i].tolist(), needs[i].tolist(), {"uid": f"u{i}"})
+    return engine, offers, needs, rng
+
+
+def _brute_force(offers, needs, my_offer, my_need, threshold=0.0):
+    rows = []
+    for i in range(len(offers)):
+        a = 1 / (2 - float(needs[i] @ my_offer))
+        b = 1 / (2 - float(offers[i] @ my_need))
+        if a >= threshold and b >= threshold:
+            rows.append((2 * a * b / (a + b), f"u{i}"))
+    rows.sort(reverse=True)
+    return rows
+
+
+class TestTopMatches:
+    def test_exact_top_k_matches_brute_force(self):
+        engine, offers, needs, rng = _engine()
+        my_offer, my_need = _unit_rows(rng, 2)
+
+        matches = engine.top_matches(my_offer, my_need, limit=10, score_threshold=0.0)
+
+        expected = _brute_force(offers, needs, my_offer, my_need)[:10]
+        assert [m["uid"] for m in matches] == [uid for _, uid in expected]
+        assert [m["reciprocal_score"] for m in matches] == pytest.approx(
+            [score for score, _ in expected], abs=1e-4
+        )
+
+    def test_result_shape_matches_remote_path(self):
+        engine, offers, needs, rng = _engine(n=5)
+        my_offer, my_need = _unit_rows(rng, 2)
+
+        local = engine.top_matches(my_offer, my_need, limit=5, score_threshold=0.0)
+
+        # Remote path with both top-50 lists covering every profile
+        need_hits = [
+            {
+                "uid": f"u{i}",
+                "username": f"u{i}",
+                "score": float(azure_cosine_score(needs[i] @ my_offer)),
+            }
+            for i in range(5)
+        ]
+        offer_hits = [
+            {
+                "uid": f"u{i}",
+                "username": f"u{i}",
+                "score": float(azure_cosine_score(offers[i] @ my_need)),
+            }
+            for i in range(5)
+        ]
+        remote = combine_reciprocal_matches(need_hits, offer_hits, 5)
+
+        assert [m["uid"] for m in local] == [m["uid"] for m in remote]
+        for lm, rm in zip(local, remote):
+            for key in ("reciprocal_score", "offer_match_score", "need_match_score"):
+                assert lm[key] == pytest.approx(rm[key], abs=1e-4)
+            assert lm["score"] == pytest.approx(rm["score"], abs=1e-5)
+            assert lm["username"] == rm["uid"]
+
+    def test_limit_larger_than_population(self):
+        engine, _, _, rng = _engine(n=3)
+        my_offer, my_need = _unit_rows(rng, 2)
+        assert len(engine.top_matches(my_offer, my_need, limit=50, score_threshold=0.0)) == 3
+
+    def test_threshold_filters_each_direction(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        engine.upsert_profile("good", [1.0, 0.0], [1.0, 0.0], {})
+        engine.upsert_profile("one_sided", [-1.0, 0.0], [1.0, 0.0], {})  # offer score 1/3
+
+        matches = engine.top_matches([1.0, 0.0], [1.0, 0.0], limit=5, score_threshold=0.5)
+
+        assert [m["username"] for m in matches] == ["good"]
+
+    def test_exclude_uids(self):
+        engine, offers, needs, rng = _engine(n=20)
+        my_offer, my_need = _unit_rows(rng, 2)
+        best = engine.top_matches(my_offer, my_need, limit=1, score_threshold=0.0)[0]["username"]
+
+        matches = engine.top_matches(
+            my_offer, my_need, limit=20, score_threshold=0.0, exclude_uids=[best, "unknown"]
+        )
+
+        assert best not in [m["username"] for m in matches]
+        assert len(matches) == 19
+
+    def test_profiles_missing_a_vector_never_match(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        engine.upsert_profile("no_needs", [1.0, 0.0], [0.0, 0.0], {})
+        engine.upsert_profile("bad_dim", [1.0, 0.0, 0.0], [1.0, 0.0], {})
+        assert engine.top_matches([1.0, 0.0], [1.0, 0.0], score_threshold=0.0) == []
+
+    def test_zero_query_vector_returns_nothing(self):
+        engine, _, _, _ = _engine(n=5)
+        assert engine.top_matches([0.0] * DIM, [1.0] + [0.0] * (DIM - 1)) == []
+
+
+class TestWrites:
+    def test_upsert_replaces_vectors_in_place(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        engine.upsert_profile("a", [1.0, 0.0], [1.0, 0.0], {"bio": "old"})
+        engine.upsert_profile("a", [0.0, 1.0], [0.0, 1.0], {"bio": "new"})
+
+        (match,) = engine.top_matches([0.0, 1.0], [0.0, 1.0], score_threshold=0.0)
+
+        assert len(engine) == 1
+        assert match["reciprocal_score"] == pytest.approx(1.0)
+        assert match["bio"] == "new"
+
+    def test_remove_keeps_remaining_rows_consistent(self):
+        engine, offers, needs, rng = _engine(n=30)
+        for uid in ("u0", "u7", "u29"):
+            assert engine.remove(uid)
+        assert not engine.remove("u0")
+        my_offer, my_need = _unit_rows(rng, 2)
+
+        matches = engine.top_matches(my_offer, my_need, limit=30, score_threshold=0.0)
+
+        expected = [
+            uid
+            for _, uid in _brute_force(offers, needs, my_offer, my_need)
+            if uid not in ("u0", "u7", "u29")
+        ]
+        assert [m["uid"] for m in matches] == expected
+
+    def test_documents_drop_vectors_from_profile(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        engine.load_documents(
+            [{"id": "a", "uid": "a", "bio": "hi", "offer_vec": [1.0, 0.0], "need_vec": [1.0, 0.0]}]
+        )
+        (match,) = engine.top_matches([1.0, 0.0], [1.0, 0.0])
+        assert match["bio"] == "hi" and "offer_vec" not in match
+        assert engine.get_stats()["matchable"] == 1
+
+
+class TestFilters:
+    def test_filters_follow_rows_moved_by_remove(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        for uid, city in [("a", "Austin"), ("b", "Boston"), ("c", "Austin")]:
+            engine.upsert_profile(uid, [1.0, 0.0], [1.0, 0.0], {"uid": uid, "city": city})
+        engine.remove("a")  # "c" moves into row 0
+
+        matches = engine.top_matches(
+            [1.0, 0.0], [1.0, 0.0], filters=ProfileFilter(city="Austin", min_swap_credits=0)
+        )
+
+        assert [m["uid"] for m in matches] == ["c"]
+
+    def test_empty_filters_keep_everyone(self):
+        engine, offers, needs, _ = _engine(n=20)
+
+        matches = engine.top_matches(offers[0], needs[0], limit=20, filters=ProfileFilter())
+
+        assert len(matches) == len(engine.top_matches(offers[0], needs[0], limit=20))
+
+
+class TestMatchingIntegration:
+    def test_ready_engine_replaces_remote_searches(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        engine.upsert_profile("a", [1.0, 0.0], [1.0, 0.0], {"uid": "a"})
+        engine.ready = True
+        mock_emb = MagicMock()
+        mock_emb.encode_batch.return_value = [[1.0, 0.0], [1.0, 0.0]]
+        mock_search = MagicMock()
+        with (
+            patch("app.matching.get_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_azure_search_service", return_value=mock_search),
+            patch("app.matching.get_match_engine", return_value=engine),
+        ):
+            from app.matching import compute_reciprocal_matches
+
+            results = compute_reciprocal_matches("Python", "Guitar", limit=5)
+
+        assert [r["uid"] for r in results] == ["a"]
+        mock_search.search_offers.assert_not_called()
+
+    def test_engine_not_ready_uses_search(self):
+        engine = ReciprocalMatchEngine(dimension=2)
+        mock_emb = MagicMock()
+        mock_emb.encode_batch.return_value = [[1.0, 0.0], [1.0, 0.0]]
+        mock_search = MagicMock()
+        mock_search.search_needs.return_value = []
+        mock_search.search_offers.return_value = []
+        with (
+            patch("app.matching.get_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_azure_search_service", return_value=mock_search),
+            patch("app.matching.get_match_engine", return_value=engine),
+        ):
+            from app.matching import compute_reciprocal_matches
+
+            compute_reciprocal_matches("Python", "Guitar")
+
+        mock_search.search_offers.assert_called_once()
+
+    async def test_load_match_engine_marks_ready(self):
+        async def docs():
+            yield {"id": "a", "uid": "a", "offer_vec": [1.0, 0.0], "need_vec": [0.0, 1.0]}
+
+        search = MagicMock()
+        search.iter_profile_documents = docs
+        engine = ReciprocalMatchEngine(dimension=2)
+        with patch("app.match_engine.get_match_engine", return_value=engine):
+            from app.match_engine import load_match_engine
+
+            assert await load_match_engine(search) == 1
+        assert engine.ready and len(engine) == 1
+
+    async def test_reload_swaps_in_the_index_contents(self):
+        async def docs():
+            yield {"id": "b", "uid": "b", "offer_vec": [1.0, 0.0], "need_vec": [0.0, 1.0]}
+
+        search = MagicMock()
+        search.iter_profile_documents = docs
+        stale = ReciprocalMatchEngine(dimension=2)
+        stale.upsert_profile("a", [1.0, 0.0], [0.0, 1.0], {"uid": "a"})
+        from app import match_engine
+
+        with (
+            patch.object(match_engine, "_match_engine", stale),
+            patch.object(match_engine, "settings") as mock_settings,
+        ):
+            mock_settings.matching_engine = "local"
+            mock_settings.embedding_dim = 2
+            assert await match_engine.reload_match_engine(search) == 1
+            fresh = match_engine.get_match_engine()
+
+        assert fresh is not stale and fresh.ready
+        assert fresh.uids() == ["b"] and stale.uids() == ["a"]
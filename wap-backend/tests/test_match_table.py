@@ -0,0 +1,293 @@
+"""Tests for the precomputed reciprocal match table."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.match_engine import ReciprocalMatchEngine
+from app.match_table import MatchTableUpdater, row_floor
+
+DIM = 8
+
+
+def _documents(n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    docs = []
+    for i in range(n):
+        offer, need = rng.standard_normal((2, DIM))
+        docs.append(
+            {
+                "id": f"u{i}",
+                "uid": f"u{i}",
+                "display_name": f"User {i}",
+                "offer_vec": offer.tolist(),
+                "need_vec": need.tolist(),
+            }
+        )
+    return docs
+
+
+class TestIterAllTopMatches:
+    def test_matches_per_profile_queries(self):
+        docs = _documents()
+        engine = ReciprocalMatchEngine(dimension=DIM)
+        engine.load_documents(docs)
+
+        rows = dict(engine.iter_all_top_matches(limit=5, score_threshold=0.0, block_size=4))
+
+        assert set(rows) == {d["id"] for d in docs}
+        for doc in docs:
+            expected = engine.top_matches(
+                doc["offer_vec"],
+                doc["need_vec"],
+                limit=5,
+                score_threshold=0.0,
+                exclude_uids=[doc["id"]],
+            )
+            assert [m["uid"] for m in rows[doc["id"]]] == [m["uid"] for m in expected]
+
+    def test_never_matches_self_and_skips_incomplete_profiles(self):
+        docs = _documents(n=4)
+        docs[3]["need_vec"] = [0.0] * DIM
+        engine = ReciprocalMatchEngine(dimension=DIM)
+        engine.load_documents(docs)
+
+        rows = dict(engine.iter_all_top_matches(limit=10, score_threshold=0.0))
+
+        assert set(rows) == {"u0", "u1", "u2"}
+        for uid, matches in rows.items():
+            assert uid not in [m["uid"] for m in matches]
+            assert "u3" not in [m["uid"] for m in matches]
+
+
+class TestRefreshMatchTable:
+    def _run(self, docs, **kwargs):
+        search = MagicMock()
+        search.iter_profile_documents.return_value = iter(docs)
+        cosmos = MagicMock()
+        with patch("app.match_table.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            mock_settings.match_table_top_k = 3
+            from app.match_table import refresh_match_table
+
+            summary = refresh_match_table(search_service=search, cosmos_service=cosmos, **kwargs)
+        return summary, cosmos
+
+    def test_writes_one_row_per_profile_with_shared_timestamp(self):
+        summary, cosmos = self._run(_documents(n=6), score_threshold=0.0)
+
+        assert summary["profiles"] == 6 and summary["written"] == 6
+        calls = cosmos.upsert_match_row.call_args_list
+        assert {c.args[0] for c in calls} == {f"u{i}" for i in range(6)}
+        assert {c.kwargs["computed_at"] for c in calls} == {summary["computed_at"]}
+        assert all(len(c.args[1]) == 3 for c in calls)  # match_table_top_k
+
+    def test_write_failures_are_counted_not_raised(self):
+        search = MagicMock()
+        search.iter_profile_documents.return_value = iter(_documents(n=3))
+        cosmos = MagicMock()
+        cosmos.upsert_match_row.side_effect = [RuntimeError("429"), None, None]
+        with patch("app.match_table.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            from app.match_table import refresh_match_table
+
+            summary = refresh_match_table(
+                top_k=2, score_threshold=0.0, search_service=search, cosmos_service=cosmos
+            )
+
+        assert summary["written"] == 2 and summary["failed"] == 1
+
+
+class TestCosmosMatchRows:
+    def test_upsert_and_get(self):
+        from tests.test_cosmos_db import _make_cosmos_service
+
+        svc, mock_db = _make_cosmos_service()
+        container = MagicMock()
+        mock_db.get_container_client.return_value = container
+        container.read_item.return_value = {
+            "id": "u1",
+            "uid": "u1",
+            "matches": [],
+            "computed_at": "t",
+            "_etag": "x",
+        }
+
+        doc = svc.upsert_match_row("u1", [{"uid": "u2"}], computed_at="t")
+        row = svc.get_match_row("u1")
+
+        mock_db.get_container_client.assert_called_with("matches")
+        assert container.upsert_item.call_args.kwargs["body"] == doc
+        assert doc["matches"] == [{"uid": "u2"}] and doc["id"] == "u1"
+        assert "_etag" not in row
+
+
+# ── Incremental maintenance ───────────────────────────────────────────────────
+
+
+class _FakeMatchRows:
+    """In-memory stand-in for the Cosmos match-row methods; counts row reads/writes."""
+
+    def __init__(self):
+        self.rows = {}
+        self.writes = 0
+        self.reads = 0
+
+    def upsert_match_row(self, uid, matches, computed_at=None, floor=0.0):
+        self.writes += 1
+        self.rows[uid] = {
+            "uid": uid,
+            "matches": matches,
+            "floor": floor,
+            "match_uids": [m["uid"] for m in matches],
+            "computed_at": computed_at,
+        }
+
+    def get_match_row(self, uid):
+        self.reads += 1
+        return self.rows.get(uid)
+
+    def delete_match_row(self, uid):
+        self.rows.pop(uid, None)
+
+    def query_match_rows_containing(self, uid):
+        found = [r for r in self.rows.values() if uid in r["match_uids"]]
+        self.reads += len(found)
+        return found
+
+    def list_match_floors(self):
+        return {uid: r["floor"] for uid, r in self.rows.items()}
+
+    # Update queue and profiles (MatchTableUpdater.apply_queued)
+    queue = None
+
+    def list_match_updates(self, limit=500):
+        return list(self.queue.values())[:limit]
+
+    def delete_match_update(self, item):
+        self.queue.pop(item["uid"], None)
+        return True
+
+    def get_profile(self, uid):
+        return {"uid": uid, "display_name": uid}
+
+
+TOP_K = 4
+
+
+def _table(n=40, seed=1):
+    engine = ReciprocalMatchEngine(dimension=DIM)
+    engine.load_documents(_documents(n=n, seed=seed))
+    store = _FakeMatchRows()
+    for uid, matches in engine.iter_all_top_matches(limit=TOP_K, score_threshold=0.0):
+        store.upsert_match_row(uid, matches, floor=row_floor(matches, TOP_K))
+    store.writes = 0
+    updater = MatchTableUpdater(engine, store, top_k=TOP_K, score_threshold=0.0)
+    return engine, store, updater
+
+
+def _expected(engine):
+    return {
+        uid: [m["uid"] for m in matches]
+        for uid, matches in engine.iter_all_top_matches(limit=TOP_K, score_threshold=0.0)
+    }
+
+
+def _actual(store):
+    return {uid: [m["uid"] for m in row["matches"]] for uid, row in store.rows.items()}
+
+
+class TestMatchTableUpdater:
+    def test_changes_keep_table_equal_to_full_recompute(self):
+        engine, store, updater = _table()
+        rng = np.random.default_rng(7)
+        for step in range(15):
+            uid = f"u{rng.integers(40)}"
+            offer, need = rng.standard_normal((2, DIM))
+            engine.upsert_profile(uid, offer.tolist(), need.tolist(), {"uid": uid})
+            updater.on_profile_changed(uid)
+            assert _actual(store) == _expected(engine), f"diverged at step {step}"
+
+    def test_only_affected_rows_are_touched(self):
+        engine, store, updater = _table(n=40)
+        offer, need = np.random.default_rng(3).standard_normal((2, DIM))
+        engine.upsert_profile("u5", offer.tolist(), need.tolist(), {"uid": "u5"})
+
+        counts = updater.on_profile_changed("u5")
+
+        touched = counts["patched"] + counts["recomputed"]
+        assert store.writes == touched + 1  # + u5's own row
+        assert counts["skipped"] == 39 - touched
+        assert touched < 39
+
+    def test_new_profile_gets_row_and_enters_others(self):
+        engine, store, updater = _table()
+        engine.upsert_profile("new", [1.0] * DIM, [1.0] * DIM, {"uid": "new"})
+        updater.on_profile_changed("new")
+        assert "new" in store.rows
+        assert _actual(store) == _expected(engine)
+
+    def test_profile_losing_a_vector_leaves_all_rows(self):
+        engine, store, updater = _table()
+        engine.upsert_profile("u3", [1.0] * DIM, [0.0] * DIM, {"uid": "u3"})
+        updater.on_profile_changed("u3")
+        assert "u3" not in store.rows
+        assert not any("u3" in r["match_uids"] for r in store.rows.values())
+        assert _actual(store) == _expected(engine)
+
+    def test_delete_removes_profile_everywhere(self):
+        engine, store, updater = _table()
+        engine.remove("u0")
+        updater.on_profile_deleted("u0")
+        assert _actual(store) == _expected(engine)
+
+    def test_queued_changes_are_read_from_the_index(self):
+        # Another worker changed u1 and deleted u2: this updater's engine never saw either
+        engine, store, updater = _table()
+        fresh = ReciprocalMatchEngine(dimension=DIM)
+        fresh.load_documents(_documents(n=40, seed=1))
+        offer, need = np.random.default_rng(5).standard_normal((2, DIM))
+        fresh.upsert_profile("u1", offer.tolist(), need.tolist(), {"uid": "u1"})
+        fresh.remove("u2")
+        index = MagicMock()
+        index.get_profile_vectors.side_effect = lambda uid: (offer.tolist(), need.tolist())
+        store.queue = {
+            "u1": {"uid": "u1", "queued_at": "2024-01-01T00:00:00+00:00"},
+            "u2": {"uid": "u2", "deleted": True, "queued_at": "2024-01-01T00:00:01+00:00"},
+            "u3": {"uid": "u3", "queued_at": "9999-01-01T00:00:00+00:00"},  # not settled yet
+        }
+
+        counts = updater.apply_queued(index, settle_seconds=5)
+
+        assert counts == {"applied": 2, "deferred": 1}
+        assert list(store.queue) == ["u3"]
+        index.get_profile_vectors.assert_called_once_with("u1")
+        assert _actual(store) == _expected(fresh)
+
+    def test_update_match_rows_only_queues(self):
+        cosmos = MagicMock()
+        with (
+            patch("app.cosmos_db.get_cosmos_service", return_value=cosmos),
+            patch("app.match_table.settings.match_table_incremental", True),
+        ):
+            from app.match_table import update_match_rows
+
+            update_match_rows("u1", deleted=True)
+
+        cosmos.queue_match_update.assert_called_once_with("u1", deleted=True)
+
+    def test_nothing_is_queued_by_default(self):
+        cosmos = MagicMock()
+        with patch("app.cosmos_db.get_cosmos_service", return_value=cosmos):
+            from app.match_table import update_match_rows
+
+            update_match_rows("u1")
+
+        cosmos.queue_match_update.assert_not_called()
+
+    def test_update_match_rows_never_raises(self):
+        with patch("app.cosmos_db.get_cosmos_service", side_effect=RuntimeError("down")):
+            from app.match_table import update_match_rows
+
+            update_match_rows("u1")  # Must not raise
@@ -1,7 +1,7 @@
 """Tests for matching logic."""
 from __future__ import annotations
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -11,7 +11,7 @@ import pytest
 class TestComputeReciprocalMatches:
     def _mock_services(self, search_results_offer=None, search_results_need=None):
         mock_embedding = MagicMock()
-        mock_embedding.encode.return_value = [0.1] * 1536
+        mock_embedding.encode_batch.return_value = [[0.1] * 1536] * 2
 
         mock_search = MagicMock()
         mock_search.search.side_effect = [
@@ -40,7 +40,7 @@ class TestComputeReciprocalMatches:
             result = compute_reciprocal_matches("Python", "Guitar")
             assert result == []
 
-    def test_calls_embedding_encode_twice(self):
+    def test_embeds_both_texts_in_one_batch(self):
         mock_emb, mock_srch = self._mock_services()
         with (
             patch("app.matching.get_embedding_service", return_value=mock_emb),
@@ -48,7 +48,26 @@ class TestComputeReciprocalMatches:
         ):
             from app.matching import compute_reciprocal_matches
             compute_reciprocal_matches("Python", "Guitar")
-            assert mock_emb.encode.call_count == 2
+            mock_emb.encode_batch.assert_called_once_with(["Python", "Guitar"])
+            mock_emb.encode.assert_not_called()
+
+    def test_directional_searches_run_concurrently(self):
+        import threading
+        barrier = threading.Barrier(2, timeout=5)  # Deadlocks if run one after the other
+
+        def search(**_):
+            barrier.wait()
+            return []
+
+        mock_emb, mock_srch = self._mock_services()
+        mock_srch.search_needs.side_effect = search
+        mock_srch.search_offers.side_effect = search
+        with (
+            patch("app.matching.get_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_azure_search_service", return_value=mock_srch),
+        ):
+            from app.matching import compute_reciprocal_matches
+            assert compute_reciprocal_matches("Python", "Guitar") == []
 
     def test_calls_search_twice(self):
         mock_emb, mock_srch = self._mock_services()
@@ -76,7 +95,7 @@ class TestComputeReciprocalMatches:
              "city": None, "timezone": None, "dm_open": True, "show_city": True},
         ]
         mock_emb = MagicMock()
-        mock_emb.encode.return_value = [0.1] * 1536
+        mock_emb.encode_batch.return_value = [[0.1] * 1536] * 2
         mock_srch = MagicMock()
         mock_srch.search.side_effect = [offer_results, need_results]
 
@@ -101,7 +120,7 @@ class TestComputeReciprocalMatches:
         need_results  = [{"uid": "u1", "score": 0.7, **common}]
 
         mock_emb = MagicMock()
-        mock_emb.encode.return_value = [0.1] * 1536
+        mock_emb.encode_batch.return_value = [[0.1] * 1536] * 2
         mock_srch = MagicMock()
         mock_srch.search.side_effect = [offer_results, need_results]
 
@@ -127,7 +146,7 @@ class TestComputeReciprocalMatches:
         need  = [{"uid": f"u{i}", "score": 0.8 - i * 0.1, **common} for i in range(5)]
 
         mock_emb = MagicMock()
-        mock_emb.encode.return_value = [0.1] * 1536
+        mock_emb.encode_batch.return_value = [[0.1] * 1536] * 2
         mock_srch = MagicMock()
         mock_srch.search.side_effect = [offer, need]
 
@@ -138,3 +157,282 @@ class TestComputeReciprocalMatches:
             from app.matching import compute_reciprocal_matches
             result = compute_reciprocal_matches("Python", "Guitar", limit=3)
             assert len(result) <= 3
+
+
+# ── compute_reciprocal_matches_async ──────────────────────────────────────────
+
+class TestComputeReciprocalMatchesAsync:
+    async def test_ranks_by_harmonic_mean(self):
+        they_need = [{"uid": "u1", "score": 0.9}, {"uid": "u2", "score": 0.5}]
+        they_offer = [
+            {"uid": "u1", "score": 0.6},
+            {"uid": "u2", "score": 0.9},
+            {"uid": "u3", "score": 0.99},
+        ]
+
+        mock_emb = AsyncMock()
+        mock_emb.encode_batch.return_value = [[0.1] * 1536] * 2
+        mock_srch = AsyncMock()
+        mock_srch.search_needs.return_value = they_need
+        mock_srch.search_offers.return_value = they_offer
+
+        with (
+            patch("app.matching.get_async_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_async_azure_search_service", return_value=mock_srch),
+        ):
+            from app.matching import compute_reciprocal_matches_async
+            result = await compute_reciprocal_matches_async("Python", "Guitar", limit=5)
+
+        assert [m["uid"] for m in result] == ["u1", "u2"]
+        assert result[0]["reciprocal_score"] == round(2 * 0.9 * 0.6 / 1.5, 4)
+        assert result[0]["need_match_score"] == 0.9
+        assert result[0]["offer_match_score"] == 0.6
+
+    async def test_searches_overlap(self):
+        import asyncio
+        both_started = asyncio.Event()
+        started = []
+
+        async def search(**_):
+            started.append(1)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=5)
+            return []
+
+        mock_emb = AsyncMock()
+        mock_emb.encode_batch.return_value = [[0.1] * 1536] * 2
+        mock_srch = MagicMock()
+        mock_srch.search_needs.side_effect = search
+        mock_srch.search_offers.side_effect = search
+
+        with (
+            patch("app.matching.get_async_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_async_azure_search_service", return_value=mock_srch),
+        ):
+            from app.matching import compute_reciprocal_matches_async
+            assert await compute_reciprocal_matches_async("Python", "Guitar") == []
+
+        mock_emb.encode_batch.assert_awaited_once_with(["Python", "Guitar"])
+
+
+# ── Iterative deepening ───────────────────────────────────────────────────────
+
+class _RankedSearch:
+    """Search service over fixed ranked lists that records every (skip, limit) page."""
+
+    def __init__(self, needs_uids, offers_uids):
+        self.ranked = {"needs": needs_uids, "offers": offers_uids}
+        self.pages = {"needs": [], "offers": []}
+
+    def _page(self, direction, limit, skip, exclude_uids=None):
+        self.pages[direction].append((skip, limit))
+        # Filters apply before ranking, as with an OData $filter
+        ranked = [u for u in self.ranked[direction] if u not in (exclude_uids or ())]
+        uids = ranked[skip:skip + limit]
+        return [{"uid": u, "score": 0.9 - 0.001 * (skip + i)} for i, u in enumerate(uids)]
+
+    def search_needs(
+        self, query_vec, limit, score_threshold, skip=0, exclude_uids=None, filters=None
+    ):
+        return self._page("needs", limit, skip, exclude_uids)
+
+    def search_offers(
+        self, query_vec, limit, score_threshold, skip=0, exclude_uids=None, filters=None
+    ):
+        return self._page("offers", limit, skip, exclude_uids)
+
+
+class TestIterativeDeepening:
+    def _run(self, search, limit=5, initial=4, cap=64):
+        mock_emb = MagicMock()
+        mock_emb.encode_batch.return_value = [[0.1] * 4] * 2
+        with (
+            patch("app.matching.get_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_azure_search_service", return_value=search),
+            patch("app.matching.settings") as mock_settings,
+        ):
+            mock_settings.matching_initial_depth = initial
+            mock_settings.matching_max_depth = cap
+            from app.matching import compute_reciprocal_matches
+            return compute_reciprocal_matches("Python", "Guitar", limit=limit)
+
+    def test_popular_query_stops_after_first_round(self):
+        common = [f"u{i}" for i in range(100)]
+        search = _RankedSearch(common, common)
+
+        result = self._run(search, limit=5, initial=8)
+
+        assert len(result) == 5
+        assert search.pages == {"needs": [(0, 8)], "offers": [(0, 8)]}
+
+    def test_niche_query_deepens_until_matches_found(self):
+        # The only common profiles sit at rank ~30 in both directions
+        needs = [f"n{i}" for i in range(30)] + ["a", "b"] + [f"n{i}" for i in range(30, 100)]
+        offers = [f"o{i}" for i in range(31)] + ["b", "a"] + [f"o{i}" for i in range(31, 100)]
+        search = _RankedSearch(needs, offers)
+
+        result = self._run(search, limit=2, initial=4, cap=64)
+
+        assert {m["uid"] for m in result} == {"a", "b"}
+        # Pages tile the ranking without refetching: 0-4, 4-8, 8-16, 16-32, 32-64
+        assert search.pages["needs"] == [(0, 4), (4, 4), (8, 8), (16, 16), (32, 32)]
+
+    def test_stops_at_cap(self):
+        search = _RankedSearch([f"n{i}" for i in range(500)], [f"o{i}" for i in range(500)])
+
+        assert self._run(search, limit=3, initial=4, cap=16) == []
+        assert sum(size for _, size in search.pages["needs"]) == 16
+
+    def test_excluded_profiles_do_not_take_slots(self):
+        # The two best candidates are blocked; the filter lets the next two fill the page
+        common = ["x", "y", "a", "b"] + [f"u{i}" for i in range(50)]
+        search = _RankedSearch(common, common)
+        mock_emb = MagicMock()
+        mock_emb.encode_batch.return_value = [[0.1] * 4] * 2
+        with (
+            patch("app.matching.get_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_azure_search_service", return_value=search),
+            patch("app.matching.settings") as mock_settings,
+        ):
+            mock_settings.matching_initial_depth = 2
+            mock_settings.matching_max_depth = 64
+            from app.matching import compute_reciprocal_matches
+            result = compute_reciprocal_matches(
+                "Python", "Guitar", limit=2, exclude_uids={"x", "y"}
+            )
+
+        assert [m["uid"] for m in result] == ["a", "b"]
+        assert search.pages["needs"] == [(0, 2)]
+
+    def test_exhausted_direction_is_not_refetched(self):
+        search = _RankedSearch(["a", "x"], [f"o{i}" for i in range(40)] + ["a"])
+
+        result = self._run(search, limit=1, initial=4, cap=64)
+
+        assert [m["uid"] for m in result] == ["a"]
+        assert search.pages["needs"] == [(0, 4)]
+
+
+class TestVectorSearchKwargs:
+    def test_skip_pages_through_neighbours(self):
+        with patch("app.azure_search.VectorizedQuery") as mock_query:
+            from app.azure_search import _vector_search_kwargs
+            kwargs = _vector_search_kwargs([0.1], "need_vec", 20, skip=40)
+
+        assert mock_query.call_args.kwargs["k_nearest_neighbors"] == 60
+        assert kwargs["top"] == 20 and kwargs["skip"] == 40
+
+
+class TestMatchesForUid:
+    def _run(self, search, engine=None, uid="alice", exclude_uids=()):
+        mock_emb = MagicMock()
+        with (
+            patch("app.matching.get_embedding_service", return_value=mock_emb),
+            patch("app.matching.get_azure_search_service", return_value=search),
+            patch("app.matching.get_match_engine", return_value=engine),
+        ):
+            from app.matching import compute_reciprocal_matches_for_uid
+            result = compute_reciprocal_matches_for_uid(uid, limit=5, exclude_uids=exclude_uids)
+        mock_emb.encode_batch.assert_not_called()
+        return result
+
+    def test_uses_stored_vectors_and_excludes_self(self):
+        search = _RankedSearch(["alice", "bob", "carol"], ["carol", "alice", "bob"])
+        search.get_profile_vectors = MagicMock(return_value=([0.1] * 4, [0.2] * 4))
+
+        result = self._run(search)
+
+        search.get_profile_vectors.assert_called_once_with("alice")
+        assert {m["uid"] for m in result} == {"bob", "carol"}
+
+    def test_exclusions_pushed_into_searches(self):
+        search = _RankedSearch(["alice", "bob", "carol"], ["carol", "alice", "bob"])
+        search.get_profile_vectors = MagicMock(return_value=([0.1] * 4, [0.2] * 4))
+        calls = []
+        for name in ("search_needs", "search_offers"):
+            original = getattr(search, name)
+
+            def recording(*args, _original=original, **kwargs):
+                calls.append(set(kwargs["exclude_uids"]))
+                return _original(*args, **kwargs)
+            setattr(search, name, recording)
+
+        result = self._run(search, exclude_uids={"bob"})
+
+        assert calls and all(c == {"alice", "bob"} for c in calls)
+        assert [m["uid"] for m in result] == ["carol"]
+
+    def test_unindexed_user_returns_none(self):
+        search = _RankedSearch([], [])
+        search.get_profile_vectors = MagicMock(return_value=None)
+
+        assert self._run(search) is None
+
+    def test_loaded_engine_serves_vectors(self):
+        search = MagicMock()
+        engine = MagicMock(ready=True)
+        engine.get_vectors.return_value = ([0.1] * 4, [0.2] * 4)
+        engine.top_matches.return_value = [{"uid": "bob", "reciprocal_score": 0.7}]
+
+        result = self._run(search, engine=engine)
+
+        engine.get_vectors.assert_called_once_with("alice")
+        search.get_profile_vectors.assert_not_called()
+        assert engine.top_matches.call_args.kwargs["exclude_uids"] == {"alice"}
+        assert [m["uid"] for m in result] == ["bob"]
+
+
+class TestProfileVectorLookup:
+    def test_zero_or_missing_vectors_rejected(self):
+        from app.azure_search import _stored_vectors
+        assert _stored_vectors({"offer_vec": [0.0, 0.0], "need_vec": [0.1, 0.2]}) is None
+        assert _stored_vectors({"offer_vec": [0.1, 0.2]}) is None
+        assert _stored_vectors({"offer_vec": [0.1], "need_vec": [0.2]}) == ([0.1], [0.2])
+
+    def test_missing_document_returns_none(self):
+        from azure.core.exceptions import ResourceNotFoundError
+        from app.azure_search import AzureSearchService
+        service = AzureSearchService.__new__(AzureSearchService)
+        service.search_client = MagicMock()
+        service.search_client.get_document.side_effect = ResourceNotFoundError("gone")
+
+        assert service.get_profile_vectors("ghost") is None
+
+
+class TestExclusionFilter:
+    def test_compiles_to_search_in(self):
+        from app.azure_search import exclusion_filter
+        assert exclusion_filter(["b", "a", "a"]) == "not search.in(uid, 'a,b', ',')"
+
+    def test_empty_means_no_filter(self):
+        from app.azure_search import exclusion_filter
+        assert exclusion_filter(None) is None
+        assert exclusion_filter([]) is None
+
+    def test_quotes_escaped_and_delimiter_falls_back(self):
+        from app.azure_search import exclusion_filter
+        expr = exclusion_filter(["o'neil", "a,b"])
+        assert expr == "not search.in(uid, 'o''neil', ',') and uid ne 'a,b'"
+
+    def test_search_passes_filter(self):
+        from app.azure_search import AzureSearchService
+        service = AzureSearchService.__new__(AzureSearchService)
+        service.search_client = MagicMock()
+        service.search_client.search.return_value = []
+        with patch("app.azure_search.VectorizedQuery"):
+            service.search_needs([0.1], limit=5, exclude_uids={"me"})
+
+        assert (
+            service.search_client.search.call_args.kwargs["filter"]
+            == "not search.in(uid, 'me', ',')"
+        )
+
+
+class TestExcludedUids:
+    async def test_falls_back_to_self_when_cosmos_fails(self):
+        cosmos = MagicMock()
+        cosmos.get_excluded_uids = AsyncMock(side_effect=RuntimeError("down"))
+        with patch("app.matching.get_async_cosmos_service", return_value=cosmos):
+            from app.matching import get_excluded_uids_async
+            assert await get_excluded_uids_async("me") == {"me"}
@@ -0,0 +1,88 @@
+"""Tests for Matryoshka dimension truncation."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.matryoshka import truncate, truncate_list
+
+
+class TestTruncate:
+    def test_keeps_prefix_and_renormalizes(self):
+        vec = np.array([3.0, 4.0, 12.0], dtype=np.float32)
+        out = truncate(vec, 2)
+        np.testing.assert_allclose(out, [0.6, 0.8], rtol=1e-6)
+
+    def test_matrix_rows_are_unit_norm(self):
+        rng = np.random.default_rng(0)
+        out = truncate(rng.standard_normal((5, 64)), 16)
+        assert out.shape == (5, 16)
+        np.testing.assert_allclose(np.linalg.norm(out, axis=1), 1.0, rtol=1e-5)
+
+    def test_zero_rows_stay_zero(self):
+        out = truncate([[0.0, 0.0, 1.0]], 2)
+        assert out.tolist() == [[0.0, 0.0]]
+
+    @pytest.mark.parametrize("dim", [0, 4])
+    def test_invalid_dimension(self, dim):
+        with pytest.raises(ValueError):
+            truncate([[1.0, 2.0, 3.0]], dim)
+
+    def test_truncate_list_empty(self):
+        assert truncate_list([], 4) == []
+
+
+class TestEmbeddingServiceTruncation:
+    def _service(self, truncate_dim):
+        with patch("app.embeddings.settings") as mock_settings:
+            mock_settings.embedding_provider = "local"
+            mock_settings.local_embedding_seed = 0
+            mock_settings.vector_dim = 64
+            mock_settings.embedding_truncate_dim = truncate_dim
+            mock_settings.embedding_dim = truncate_dim or 64
+            mock_settings.embedding_cache_enabled = False
+            mock_settings.embedding_batch_enabled = False
+            mock_settings.embedding_max_concurrency = 1
+            mock_settings.embedding_max_retries = 0
+            mock_settings.embedding_retry_base_delay = 0.0
+            mock_settings.embedding_retry_max_delay = 0.0
+            from app.embeddings import EmbeddingService
+
+            return EmbeddingService()
+
+    def test_vectors_are_truncated_and_unit_norm(self):
+        service = self._service(16)
+        vectors = service.encode_batch(["Python programming", "Guitar lessons"])
+        assert all(len(v) == 16 for v in vectors)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+    def test_truncated_vector_is_prefix_of_full(self):
+        full = np.array(self._service(None).encode("Python programming"))
+        short = np.array(self._service(16).encode("Python programming"))
+        np.testing.assert_allclose(short, full[:16] / np.linalg.norm(full[:16]), rtol=1e-5)
+
+    def test_truncate_dim_larger_than_vector_dim_rejected(self):
+        with pytest.raises(ValueError):
+            self._service(128)
+
+
+class TestIndexDimensions:
+    def test_indexes_use_embedding_dim(self):
+        with (
+            patch("app.azure_search.settings") as mock_settings,
+            patch("app.azure_search.SearchField") as mock_field,
+        ):
+            mock_settings.embedding_dim = 256
+            from app.azure_search import build_profiles_index, build_skills_index
+
+            build_profiles_index("p")
+            build_skills_index("s")
+
+        dims = {
+            c.kwargs["name"]: c.kwargs["vector_search_dimensions"]
+            for c in mock_field.call_args_list
+            if "vector_search_dimensions" in c.kwargs
+        }
+        assert dims == {"offer_vec": 256, "need_vec": 256, "skill_vec": 256}
@@ -1,6 +1,8 @@
 """Integration tests for /profiles router (all external services mocked)."""
 from __future__ import annotations
 
+from unittest.mock import MagicMock, patch
+
 import pytest
 
 
@@ -73,7 +75,7 @@ class TestUpsertProfile:
         assert "created_at" in resp.json()
 
     def test_upsert_triggers_search_indexing_when_skills_present(
-        self, client, mock_search_service, mock_embedding_service
+        self, client, mock_async_search_service, mock_async_embedding_service
     ):
         client.post("/profiles/upsert", json={
             "uid": "uid_idx",
@@ -82,21 +84,21 @@ class TestUpsertProfile:
             "skills_to_offer": "Python",
             "services_needed": "Guitar",
         })
-        mock_embedding_service.encode.assert_called()
-        mock_search_service.upsert_profile.assert_called()
+        mock_async_embedding_service.encode_profile_texts.assert_called()
+        mock_async_search_service.upsert_profile.assert_called()
 
     def test_upsert_skips_indexing_when_no_skills(
-        self, client, mock_search_service, mock_embedding_service
+        self, client, mock_async_search_service, mock_async_embedding_service
     ):
-        mock_embedding_service.encode.reset_mock()
-        mock_search_service.upsert_profile.reset_mock()
+        mock_async_embedding_service.encode_profile_texts.reset_mock()
+        mock_async_search_service.upsert_profile.reset_mock()
 
         client.post("/profiles/upsert", json={
             "uid": "uid_noskills",
             "email": "noskills@example.com",
         })
-        mock_embedding_service.encode.assert_not_called()
-        mock_search_service.upsert_profile.assert_not_called()
+        mock_async_embedding_service.encode_profile_texts.assert_not_called()
+        mock_async_search_service.upsert_profile.assert_not_called()
 
 
 # ── GET /profiles/{uid} ───────────────────────────────────────────────────────
@@ -182,7 +184,7 @@ class TestPatchProfile:
         assert resp.status_code == 404
 
     def test_patch_updates_search_index_when_skills_change(
-        self, client, mock_search_service, mock_embedding_service
+        self, client, mock_async_search_service, mock_async_embedding_service
     ):
         client.post("/profiles/upsert", json={
             "uid": "uid_skills_patch",
@@ -190,11 +192,11 @@ class TestPatchProfile:
             "skills_to_offer": "Python",
             "services_needed": "Guitar",
         })
-        mock_embedding_service.encode.reset_mock()
-        mock_search_service.upsert_profile.reset_mock()
+        mock_async_embedding_service.encode_profile_texts.reset_mock()
+        mock_async_search_service.upsert_profile.reset_mock()
 
         client.patch("/profiles/uid_skills_patch", json={"skills_to_offer": "Go, Rust"})
-        mock_embedding_service.encode.assert_called()
+        mock_async_embedding_service.encode_profile_texts.assert_called()
 
 
 # ── DELETE /profiles/{uid} ────────────────────────────────────────────────────
@@ -219,10 +221,51 @@ class TestDeleteProfile:
         resp = client.delete("/profiles/no_such_uid")
         assert resp.status_code == 404
 
-    def test_delete_removes_from_search_index(self, client, mock_search_service):
+    def test_delete_removes_from_search_index(self, client, mock_async_search_service):
         client.post("/profiles/upsert", json={
             "uid": "uid_del_idx", "email": "delidx@example.com",
         })
-        mock_search_service.delete_profile.reset_mock()
+        mock_async_search_service.delete_profile.reset_mock()
         client.delete("/profiles/uid_del_idx")
-        mock_search_service.delete_profile.assert_called_once_with("uid_del_idx")
+        mock_async_search_service.delete_profile.assert_called_once_with("uid_del_idx")
+
+
+# ── Background tasks ──────────────────────────────────────────────────────────
+
+class TestBackgroundTasks:
+    def test_new_profile_gets_welcome_email_and_match_update(self, client):
+        email_service = MagicMock()
+        with (
+            patch("app.routers.profiles.get_email_service", return_value=email_service),
+            patch("app.routers.profiles.update_match_rows") as update_rows,
+        ):
+            resp = client.post("/profiles/upsert", json={
+                "uid": "uid_bg_new",
+                "email": "bgnew@example.com",
+                "display_name": "Background",
+                "skills_to_offer": "Python",
+                "services_needed": "Guitar",
+            })
+
+        assert resp.status_code == 200
+        email_service.send_welcome.assert_called_once()
+        assert email_service.send_welcome.call_args.kwargs["to_email"] == "bgnew@example.com"
+        update_rows.assert_called_once_with("uid_bg_new")
+
+    def test_existing_profile_gets_no_welcome_email(self, client):
+        client.post("/profiles/upsert", json={"uid": "uid_bg_old", "email": "bgold@example.com"})
+        email_service = MagicMock()
+        with patch("app.routers.profiles.get_email_service", return_value=email_service):
+            client.post(
+                "/profiles/upsert", json={"uid": "uid_bg_old", "email": "bgold@example.com"}
+            )
+
+        email_service.send_welcome.assert_not_called()
+
+    def test_delete_queues_match_row_removal(self, client):
+        client.post("/profiles/upsert", json={"uid": "uid_bg_del", "email": "bgdel@example.com"})
+        with patch("app.routers.profiles.update_match_rows") as update_rows:
+            resp = client.delete("/profiles/uid_bg_del")
+
+        assert resp.status_code == 200
+        update_rows.assert_called_once_with("uid_bg_del", deleted=True)
@@ -0,0 +1,195 @@
+"""Tests for the typed search filters and their pushdown into each backend."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app import azure_search
+from app.local_search import LocalSearchService, LocalSkillsSearchService
+from app.match_engine import ReciprocalMatchEngine
+from app.search_filters import ProfileFilter, SkillFilter, all_of, one_of, with_category
+
+DIM = 4
+
+
+def _e(i):
+    return np.eye(DIM)[i].tolist()
+
+
+class TestCompile:
+    def test_profile_filter(self):
+        expr = ProfileFilter(
+            city="Austin", dm_open=True, min_swap_credits=2, min_swaps_completed=0
+        ).to_odata()
+
+        assert expr == (
+            "city eq 'Austin' and show_city eq true and dm_open eq true "
+            "and swap_credits ge 2 and swaps_completed ge 0"
+        )
+
+    def test_empty_filters_compile_to_none(self):
+        assert ProfileFilter().to_odata() is None and ProfileFilter().is_empty()
+        assert SkillFilter(tags=[]).to_odata() is None and SkillFilter(tags=[]).is_empty()
+        assert not ProfileFilter(dm_open=False).is_empty()
+
+    def test_skill_filter_lists_use_search_in_and_tags_any(self):
+        expr = SkillFilter(
+            difficulty=["beginner", "advanced"], delivery=["Remote Only"], tags=["k8s"]
+        ).to_odata()
+
+        assert expr == (
+            "(search.in(difficulty, 'advanced,beginner', ',')) and (delivery eq 'Remote Only') "
+            "and (tags/any(t: t eq 'k8s'))"
+        )
+
+    def test_values_cannot_escape_their_literal(self):
+        assert (
+            ProfileFilter(city="x' or true or city eq 'y")
+            .to_odata()
+            .startswith("city eq 'x'' or true or city eq ''y' and")
+        )
+        assert one_of("delivery", ["In person, Austin", "o'brien", "Remote"]) == (
+            "(search.in(delivery, 'Remote,o''brien', ',') or delivery eq 'In person, Austin')"
+        )
+
+    def test_validation(self):
+        with pytest.raises(ValidationError):
+            ProfileFilter(min_swap_credits=-1)
+        with pytest.raises(ValidationError):
+            SkillFilter(tags=["t"] * 51)
+
+    def test_all_of_and_category_shorthand(self):
+        assert all_of(None, "a eq 1") == "a eq 1"
+        assert all_of("a eq 1", "b eq 2") == "(a eq 1) and (b eq 2)"
+        assert all_of(None, None) is None
+        assert with_category(None, None) is None
+        assert with_category(SkillFilter(tags=["x"]), "Arts").category == "Arts"
+
+
+class TestMatches:
+    def test_profile_predicate_agrees_with_filter(self):
+        f = ProfileFilter(city="Austin", min_swap_credits=1)
+
+        assert f.matches({"city": "Austin", "show_city": True, "swap_credits": 3})
+        assert not f.matches({"city": "Austin", "show_city": False, "swap_credits": 3})
+        assert not f.matches({"city": "Austin", "swap_credits": 0})
+        assert not f.matches({"city": "Boston", "swap_credits": 3})
+        assert ProfileFilter(dm_open=True).matches({})  # index default
+
+    def test_mask_agrees_with_predicate(self):
+        documents = [
+            {"city": "Austin", "show_city": True, "dm_open": True, "swap_credits": 3},
+            {"city": "Austin", "show_city": False, "dm_open": False, "swap_credits": None},
+            {"city": "Boston", "dm_open": None, "swaps_completed": 2},
+            {"city": "", "show_city": None, "swap_credits": 1},
+            {},
+        ]
+        engine = ReciprocalMatchEngine(dimension=DIM)
+        for i, document in enumerate(documents):
+            engine.upsert(f"u{i}", _e(0), _e(1), document)
+        columns = {name: column[: len(documents)] for name, column in engine._columns.items()}
+
+        for f in [
+            ProfileFilter(city="Austin"),
+            ProfileFilter(city="Paris"),
+            ProfileFilter(dm_open=True),
+            ProfileFilter(dm_open=False),
+            ProfileFilter(show_city=True),
+            ProfileFilter(show_city=False),
+            ProfileFilter(min_swap_credits=1, min_swaps_completed=0),
+            ProfileFilter(min_swaps_completed=1),
+        ]:
+            expected = [f.matches(d) for d in documents]
+            assert f.mask(columns, engine._city_codes).tolist() == expected, f
+
+    def test_skill_predicate(self):
+        f = SkillFilter(difficulty=["beginner"], tags=["k8s", "docker"])
+
+        assert f.matches({"difficulty": "beginner", "tags": ["docker"]})
+        assert not f.matches({"difficulty": "beginner", "tags": ["go"]})
+        assert not f.matches({"difficulty": "advanced", "tags": ["docker"]})
+
+
+class TestAzurePushdown:
+    def test_profile_filters_join_exclusions_inside_the_search(self):
+        with patch.object(azure_search, "SearchClient") as client_cls:
+            search = client_cls.return_value.search
+            search.return_value = []
+            service = azure_search.AzureSearchService()
+            service.search_needs(
+                [0.1], limit=5, exclude_uids={"me"}, filters=ProfileFilter(dm_open=True)
+            )
+            single = search.call_args.kwargs["filter"]
+            service.search_multi_vector({"offer_vec": [0.1]}, filters=ProfileFilter(dm_open=True))
+            multi = search.call_args.kwargs["filter"]
+
+        assert single == "(not search.in(uid, 'me', ',')) and (dm_open eq true)"
+        assert multi == "dm_open eq true"
+
+    def test_skill_category_merges_into_filters(self):
+        with patch.object(azure_search, "SearchClient") as client_cls:
+            search = client_cls.return_value.search
+            search.return_value = []
+            azure_search.SkillsSearchService().search_skills(
+                [0.1], category_filter="Programming", filters=SkillFilter(delivery=["Remote Only"])
+            )
+
+        assert search.call_args.kwargs["filter"] == (
+            "(category eq 'Programming') and (delivery eq 'Remote Only')"
+        )
+
+
+class TestInProcessBackends:
+    def test_local_profile_search_fills_top_k_with_eligible_profiles(self):
+        service = LocalSearchService(dimension=DIM)
+        for i, (city, dm_open) in enumerate(
+            [("Austin", True), ("Austin", False), ("Boston", True)]
+        ):
+            service.upsert_profile(f"u{i}", _e(0), _e(1), {"city": city, "dm_open": dm_open})
+
+        matches = service.search_offers(
+            _e(0), limit=1, filters=ProfileFilter(dm_open=True, city="Boston")
+        )
+
+        assert [m["uid"] for m in matches] == ["u2"]
+
+    def test_local_skill_search(self):
+        service = LocalSkillsSearchService(dimension=DIM)
+        service.upsert_skill(
+            "s1", _e(0), {"title": "K8s", "difficulty": "advanced", "tags": ["k8s"]}
+        )
+        service.upsert_skill(
+            "s2", _e(0), {"title": "Docker", "difficulty": "beginner", "tags": ["docker"]}
+        )
+
+        matches = service.search_skills(_e(0), filters=SkillFilter(difficulty=["beginner"]))
+
+        assert [m["id"] for m in matches] == ["s2"]
+
+    def test_match_engine_where(self):
+        engine = ReciprocalMatchEngine(dimension=DIM)
+        engine.upsert("a", _e(1), _e(0), {"uid": "a", "dm_open": False})
+        engine.upsert("b", _e(1), _e(0), {"uid": "b", "dm_open": True})
+
+        matches = engine.top_matches(_e(0), _e(1), limit=5, filters=ProfileFilter(dm_open=True))
+
+        assert [m["uid"] for m in matches] == ["b"]
+
+    def test_matching_passes_filters_to_both_searches(self):
+        search = MagicMock()
+        search.search_needs.return_value = []
+        search.search_offers.return_value = []
+        filters = ProfileFilter(city="Austin")
+        with (
+            patch("app.matching.get_match_engine", return_value=None),
+            patch("app.matching.get_azure_search_service", return_value=search),
+        ):
+            from app.matching import match_vectors
+
+            match_vectors([0.1], [0.2], limit=3, filters=filters)
+
+        assert search.search_needs.call_args.kwargs["filters"] is filters
+        assert search.search_offers.call_args.kwargs["filters"] is filters
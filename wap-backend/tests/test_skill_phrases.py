@@ -0,0 +1,129 @@
+"""Tests for skill-phrase decomposition and composed profile vectors."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.skill_phrases import compose_vector, split_skill_phrases
+
+
+class TestSplitSkillPhrases:
+    def test_rebuild_profile_skills_format(self):
+        text = "Python (Intermediate), Guitar (Beginner)"
+        assert split_skill_phrases(text) == ["Python (Intermediate)", "Guitar (Beginner)"]
+
+    def test_commas_inside_parentheses_are_kept(self):
+        assert split_skill_phrases("Python (Advanced, 5 yrs), Go") == [
+            "Python (Advanced, 5 yrs)",
+            "Go",
+        ]
+
+    def test_whitespace_empties_and_duplicates(self):
+        assert split_skill_phrases(" Python ,, python,  Web   dev ,") == ["Python", "Web dev"]
+
+    def test_free_text_is_one_phrase(self):
+        assert split_skill_phrases("I can teach guitar and piano") == [
+            "I can teach guitar and piano"
+        ]
+
+    def test_empty(self):
+        assert split_skill_phrases("") == []
+        assert split_skill_phrases(None) == []
+
+
+class TestComposeVector:
+    def test_normalized_mean(self):
+        vec = compose_vector([[1.0, 0.0], [0.0, 1.0]], 2)
+        np.testing.assert_allclose(vec, [2**-0.5, 2**-0.5], rtol=1e-6)
+
+    def test_single_phrase_is_itself(self):
+        assert compose_vector([[0.6, 0.8]], 2) == pytest.approx([0.6, 0.8])
+
+    def test_no_phrases_is_zero_vector(self):
+        assert compose_vector([], 3) == [0.0, 0.0, 0.0]
+
+
+def _service(mode="phrases"):
+    """EmbeddingService over a fake provider returning one-hot-ish vectors per text."""
+    client = MagicMock()
+
+    def create(input, **_):
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=[float(len(t)), 1.0, 0.0]) for t in input]
+        )
+
+    client.embeddings.create.side_effect = create
+    import app.embeddings as embeddings_module
+
+    embeddings_module._embedding_cache = None
+    with (
+        patch("app.embeddings.AzureOpenAI", return_value=client),
+        patch("app.embeddings.get_cache_service", return_value=None),
+        patch("app.embeddings.settings") as mock_settings,
+    ):
+        mock_settings.embedding_provider = "azure"
+        mock_settings.azure_embedding_deployment = "test-deployment"
+        mock_settings.vector_dim = 3
+        mock_settings.embedding_dim = 3
+        mock_settings.embedding_cache_enabled = True
+        mock_settings.embedding_cache_max_entries = 64
+        mock_settings.embedding_cache_ttl = 60
+        mock_settings.embedding_cache_codec = "float32"
+        mock_settings.embedding_batch_enabled = False
+        mock_settings.embedding_max_items_per_request = 2048
+        mock_settings.embedding_max_tokens_per_input = 8191
+        mock_settings.embedding_max_tokens_per_request = 300_000
+        mock_settings.embedding_max_concurrency = 1
+        mock_settings.embedding_max_retries = 0
+        mock_settings.embedding_retry_base_delay = 0.0
+        mock_settings.embedding_retry_max_delay = 0.0
+        mock_settings.profile_embedding_mode = mode
+        from app.embeddings import EmbeddingService
+
+        svc = EmbeddingService()
+    return svc, client, mock_settings
+
+
+class TestEncodeProfileTexts:
+    def test_each_distinct_phrase_embedded_once(self):
+        svc, client, mock_settings = _service()
+        with patch("app.embeddings.settings", mock_settings):
+            svc.encode_profile_texts(["Python, Guitar", "Guitar, Chess"])
+
+        sent = client.embeddings.create.call_args[1]["input"]
+        assert sorted(sent) == ["Chess", "Guitar", "Python"]
+
+    def test_common_phrases_need_no_new_calls(self):
+        svc, client, mock_settings = _service()
+        with patch("app.embeddings.settings", mock_settings):
+            svc.encode_profile_texts(["Python, Guitar"])
+            client.embeddings.create.reset_mock()
+            svc.encode_profile_texts(["Guitar, Python"])
+
+        client.embeddings.create.assert_not_called()
+
+    def test_vector_is_normalized_mean_of_phrases(self):
+        svc, _, mock_settings = _service()
+        with patch("app.embeddings.settings", mock_settings):
+            (composed,) = svc.encode_profile_texts(["Go, Rust"])
+            go, rust = svc.encode_batch(["Go", "Rust"])
+
+        assert composed == pytest.approx(compose_vector([go, rust], 3))
+
+    def test_empty_text_gets_zero_vector(self):
+        svc, client, mock_settings = _service()
+        with patch("app.embeddings.settings", mock_settings):
+            offer, need = svc.encode_profile_texts(["Python", ""])
+
+        assert need == [0.0, 0.0, 0.0]
+        assert np.linalg.norm(offer) == pytest.approx(1.0)
+
+    def test_whole_mode_embeds_full_string(self):
+        svc, client, mock_settings = _service(mode="whole")
+        with patch("app.embeddings.settings", mock_settings):
+            svc.encode_profile_texts(["Python, Guitar", ""])
+
+        assert client.embeddings.create.call_args[1]["input"] == ["Python, Guitar"]
@@ -0,0 +1,231 @@
+"""Tests for the indirect swap-cycle finder."""
+from __future__ import annotations
+
+import itertools
+import random
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.match_engine import ReciprocalMatchEngine, azure_cosine_score
+from app.swap_cycles import TeachGraph, cycle_entry, find_cycles
+
+DIM = 8
+
+
+def _graph(n, edges):
+    out_edges = [{} for _ in range(n)]
+    for (x, y), score in edges.items():
+        out_edges[x][y] = score
+    return TeachGraph([f"u{i}" for i in range(n)], out_edges, list(range(n)))
+
+
+def _brute_force_cycles(graph, max_length):
+    """Every simple directed cycle, canonical (smallest row first), with its min edge."""
+    found = {}
+    n = len(graph.uids)
+    for length in range(3, max_length + 1):
+        for cycle in itertools.permutations(range(n), length):
+            if cycle[0] != min(cycle):
+                continue
+            pairs = list(zip(cycle, cycle[1:] + cycle[:1]))
+            if all(y in graph.out_edges[x] for x, y in pairs):
+                found[cycle] = min(graph.out_edges[x][y] for x, y in pairs)
+    return found
+
+
+class TestFindCycles:
+    def test_triangle_and_square(self):
+        graph = _graph(
+            5,
+            {
+                (0, 1): 0.9,
+                (1, 2): 0.8,
+                (2, 0): 0.7,  # 3-cycle, score 0.7
+                (2, 3): 0.95,
+                (3, 4): 0.9,
+                (4, 1): 0.85,  # 1 → 2 → 3 → 4 → 1
+            },
+        )
+
+        cycles = find_cycles(graph, max_length=4)
+
+        assert cycles[0] == [(0.7, (0, 1, 2))]
+        assert cycles[1] == [(0.8, (1, 2, 3, 4)), (0.7, (0, 1, 2))]
+        assert 4 in cycles and 3 in cycles
+
+    def test_max_length_three_skips_squares(self):
+        graph = _graph(4, {(0, 1): 0.9, (1, 2): 0.9, (2, 3): 0.9, (3, 0): 0.9})
+
+        assert find_cycles(graph, max_length=3) == {}
+        assert find_cycles(graph, max_length=4)[2] == [(0.9, (0, 1, 2, 3))]
+
+    def test_two_cycles_are_not_swap_rings(self):
+        graph = _graph(2, {(0, 1): 0.9, (1, 0): 0.9})
+
+        assert find_cycles(graph) == {}
+
+    def test_matches_brute_force_on_random_graphs(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            n = 8
+            edges = {
+                (x, y): round(rng.uniform(0.5, 1.0), 3)
+                for x in range(n)
+                for y in range(n)
+                if x != y and rng.random() < 0.3
+            }
+            graph = _graph(n, edges)
+            expected = _brute_force_cycles(graph, max_length=4)
+
+            cycles = find_cycles(graph, max_length=4, per_user=1000)
+
+            found = {cycle: score for entries in cycles.values() for score, cycle in entries}
+            assert found == expected
+            for row, entries in cycles.items():
+                assert [s for s, _ in entries] == sorted((s for s, _ in entries), reverse=True)
+                assert all(row in cycle for _, cycle in entries)
+
+    def test_per_user_keeps_best(self):
+        # Ring 0 → 1 → k → 0 for several k, with increasing strength
+        edges = {(0, 1): 1.0}
+        for k, score in zip(range(2, 6), (0.6, 0.7, 0.8, 0.9)):
+            edges[(1, k)] = 1.0
+            edges[(k, 0)] = score
+        cycles = find_cycles(_graph(6, edges), per_user=2)
+
+        assert [s for s, _ in cycles[0]] == [0.9, 0.8]
+
+
+class TestTeachGraph:
+    def test_in_degree_is_bounded(self):
+        # Five teachers for learner 0; only the best two edges survive
+        edges = [(x, np.array([0]), np.array([0.5 + 0.1 * x])) for x in range(1, 6)]
+        graph = TeachGraph.from_edges([f"u{i}" for i in range(6)], edges, max_in_degree=2)
+
+        assert graph.in_edges[0] == {5: 1.0, 4: 0.9}
+        assert graph.edge_count == 2
+        assert graph.nodes == [1, 2, 3, 4, 5]
+
+    def test_cycle_entry_rotates_to_user(self):
+        graph = _graph(3, {(0, 1): 0.9, (1, 2): 0.8, (2, 0): 0.7})
+        profiles = {"u1": {"uid": "u1", "display_name": "Bo"}}
+
+        entry = cycle_entry(graph, (0, 1, 2), 0.7, start=1, profiles=profiles)
+
+        assert [m["uid"] for m in entry["members"]] == ["u1", "u2", "u0"]
+        assert [m["teach_score"] for m in entry["members"]] == [0.8, 0.7, 0.9]
+        assert entry["members"][0]["display_name"] == "Bo"
+        assert entry["score"] == 0.7
+
+
+class TestIterTeachEdges:
+    def _engine(self):
+        engine = ReciprocalMatchEngine(dimension=DIM)
+        rng = np.random.default_rng(3)
+        for i in range(10):
+            offer, need = rng.standard_normal((2, DIM))
+            engine.upsert(f"u{i}", offer, need, {"id": f"u{i}"})
+        engine.upsert("no-needs", rng.standard_normal(DIM), None, {"id": "no-needs"})
+        return engine
+
+    def test_edges_match_exact_scores(self):
+        engine = self._engine()
+        uids = engine.uids()
+        vectors = {uid: engine.get_vectors(uid) for uid in uids}
+
+        edges = list(engine.iter_teach_edges(min_score=0.5, max_degree=4, block_size=3))
+
+        assert sorted(x for x, _, _ in edges) == list(range(10))  # no-needs can't take part
+        for x, ys, scores in edges:
+            offer = np.asarray(vectors[uids[x]][0])
+            expected = {
+                y: float(azure_cosine_score(offer @ np.asarray(vectors[uids[y]][1])))
+                for y in range(10)
+                if y != x
+            }
+            best = sorted(expected, key=expected.get, reverse=True)[:4]
+            assert list(ys) == [y for y in best if expected[y] >= 0.5]
+            np.testing.assert_allclose(scores, [expected[y] for y in ys], rtol=1e-5)
+
+
+class TestRefreshSwapCycles:
+    def test_writes_a_row_per_matchable_profile(self):
+        docs = []
+        for i, (offer, need) in enumerate([(0, 1), (1, 2), (2, 0), (3, 4)]):
+            docs.append(
+                {
+                    "id": f"u{i}",
+                    "uid": f"u{i}",
+                    "display_name": f"User {i}",
+                    "offer_vec": np.eye(DIM)[offer].tolist(),
+                    "need_vec": np.eye(DIM)[need].tolist(),
+                }
+            )
+        search = MagicMock()
+        search.iter_profile_documents.return_value = iter(docs)
+        cosmos = MagicMock()
+        with patch("app.swap_cycles.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            from app.swap_cycles import refresh_swap_cycles
+
+            summary = refresh_swap_cycles(
+                min_score=0.9,
+                max_degree=5,
+                max_length=4,
+                per_user=5,
+                search_service=search,
+                cosmos_service=cosmos,
+            )
+
+        rows = {c.args[0]: c.args[1] for c in cosmos.upsert_cycle_row.call_args_list}
+        assert summary["written"] == 4 and summary["users_with_cycles"] == 3
+        # u0 offers topic 0, which u2 needs: u0 → u2 → u1 → u0
+        assert [m["uid"] for m in rows["u0"][0]["members"]] == ["u0", "u2", "u1"]
+        assert rows["u3"] == []
+
+    def test_rows_not_written_this_run_are_removed(self):
+        docs = [
+            {
+                "id": "u0",
+                "uid": "u0",
+                "offer_vec": np.eye(DIM)[0].tolist(),
+                "need_vec": np.eye(DIM)[1].tolist(),
+            },
+            {
+                "id": "u1",
+                "uid": "u1",
+                "offer_vec": np.eye(DIM)[1].tolist(),
+                "need_vec": np.eye(DIM)[0].tolist(),
+            },
+        ]
+        search = MagicMock()
+        search.iter_profile_documents.return_value = iter(docs)
+        cosmos = MagicMock()
+        cosmos.upsert_cycle_row.side_effect = [None, RuntimeError("throttled")]
+
+        def stamps():
+            this_run = cosmos.upsert_cycle_row.call_args.kwargs["computed_at"]
+            # u0 written now; u1's write failed; "gone" was deleted since the last run
+            return {
+                "u0": this_run,
+                "u1": "2024-01-01T00:00:00+00:00",
+                "gone": "2024-01-01T00:00:00+00:00",
+            }
+
+        cosmos.list_cycle_row_stamps.side_effect = stamps
+        with patch("app.swap_cycles.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            from app.swap_cycles import refresh_swap_cycles
+
+            summary = refresh_swap_cycles(
+                min_score=0.9,
+                max_degree=5,
+                max_length=4,
+                per_user=5,
+                search_service=search,
+                cosmos_service=cosmos,
+            )
+
+        cosmos.delete_cycle_row.assert_called_once_with("gone")
+        assert summary["removed"] == 1 and summary["failed"] == 1
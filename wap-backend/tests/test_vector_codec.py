@@ -0,0 +1,67 @@
+"""Tests for the compact vector codec."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import vector_codec
+
+
+def _unit_vectors(n: int, dim: int = 1536, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+class TestRoundTrip:
+    @pytest.mark.parametrize("codec", vector_codec.CODECS)
+    def test_size_matches_encoded_size(self, codec):
+        data = vector_codec.encode(np.ones(1536), codec)
+        assert len(data) == vector_codec.encoded_size(1536, codec)
+        assert vector_codec.codec_of(data) == codec
+
+    def test_float32_is_exact(self):
+        vec = _unit_vectors(1)[0]
+        np.testing.assert_array_equal(vector_codec.decode(vector_codec.encode(vec, "float32")), vec)
+
+    def test_int8_is_four_times_smaller_than_float32(self):
+        assert vector_codec.encoded_size(1536, "int8") * 3.9 < vector_codec.encoded_size(
+            1536, "float32"
+        )
+
+    @pytest.mark.parametrize("codec", ["float16", "int8"])
+    def test_documented_cosine_error(self, codec):
+        vecs = _unit_vectors(200)
+        queries = _unit_vectors(200, seed=1)
+        for vec, query in zip(vecs, queries):
+            decoded = vector_codec.decode(vector_codec.encode(vec, codec))
+            cos = float(vec @ decoded) / float(np.linalg.norm(decoded))
+            assert 1 - cos <= vector_codec.MAX_COSINE_ERROR[codec]
+
+            score_err = abs(float(query @ vec) - float(query @ decoded))
+            assert score_err <= vector_codec.MAX_SCORE_ERROR[codec]
+            assert score_err <= vector_codec.score_error_bound(vec, codec) + 1e-7
+
+    def test_zero_vector_int8(self):
+        decoded = vector_codec.decode(vector_codec.encode(np.zeros(8), "int8"))
+        assert decoded.tolist() == [0.0] * 8
+
+
+class TestDecodeValidation:
+    def test_wrong_dimension_rejected(self):
+        data = vector_codec.encode([0.1, 0.2, 0.3], "float16")
+        assert vector_codec.decode(data, dimension=4) is None
+        assert vector_codec.decode(data, dimension=3) is not None
+
+    def test_garbage_rejected(self):
+        assert vector_codec.decode(b"") is None
+        assert vector_codec.decode(b"[0.1, 0.2]") is None
+        assert vector_codec.decode(b"\x02\x00") is None  # odd-length float16 body
+
+    def test_truncated_payload_rejected(self):
+        data = vector_codec.encode([0.1, 0.2, 0.3], "float32")
+        assert vector_codec.decode(data[:-1]) is None
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            vector_codec.encode([1.0], "bfloat16")
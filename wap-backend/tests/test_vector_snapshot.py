@@ -0,0 +1,282 @@
+"""Tests for the memory-mapped vector snapshot format and its exports."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.match_engine import ReciprocalMatchEngine
+from app.vector_snapshot import (
+    HEADER_SIZE,
+    VectorSnapshotWriter,
+    export_cosmos_snapshot,
+    export_index_snapshot,
+    open_snapshot,
+)
+
+DIM = 8
+
+
+def _documents(n=10, seed=0):
+    rng = np.random.default_rng(seed)
+    docs = []
+    for i in range(n):
+        offer, need = rng.standard_normal((2, DIM))
+        docs.append(
+            {
+                "id": f"u{i}",
+                "uid": f"u{i}",
+                "display_name": f"User {i}",
+                "offer_vec": offer.tolist(),
+                "need_vec": need.tolist(),
+            }
+        )
+    return docs
+
+
+def _write(path, docs, **kwargs):
+    with VectorSnapshotWriter(str(path), dimension=DIM, **kwargs) as writer:
+        for doc in docs:
+            writer.add_document(doc)
+
+
+class TestSnapshotFormat:
+    def test_float32_round_trip_is_exact(self, tmp_path):
+        docs = _documents()
+        _write(tmp_path / "v.snap", docs, dtype="float32")
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert len(snapshot) == 10 and snapshot.dimension == DIM
+            assert snapshot.ids == [d["id"] for d in docs]
+            assert snapshot.document(3) == {"id": "u3", "uid": "u3", "display_name": "User 3"}
+            assert isinstance(snapshot.matrix, np.memmap)
+            np.testing.assert_array_equal(
+                snapshot.vectors("need_vec"),
+                np.array([d["need_vec"] for d in docs], dtype=np.float32),
+            )
+
+    def test_float16_halves_the_matrix(self, tmp_path):
+        docs = _documents(n=4)
+        _write(tmp_path / "v.snap", docs, dtype="float16")
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert snapshot.matrix.dtype.itemsize == 2
+            assert snapshot.matrix.nbytes == 4 * 2 * DIM * 2
+            np.testing.assert_allclose(
+                snapshot.vectors("offer_vec")[1], docs[1]["offer_vec"], atol=1e-2
+            )
+
+    def test_iter_blocks_and_documents_cover_every_row(self, tmp_path):
+        docs = _documents(n=7)
+        _write(tmp_path / "v.snap", docs, dtype="float32")
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            blocks = list(snapshot.iter_blocks(block_size=3))
+            restored = list(snapshot.iter_documents(block_size=3))
+
+        assert [start for start, _ in blocks] == [0, 3, 6]
+        assert [block.shape for _, block in blocks] == [(3, 2, DIM), (3, 2, DIM), (1, 2, DIM)]
+        assert [d["id"] for d in restored] == [d["id"] for d in docs]
+        np.testing.assert_allclose(restored[5]["offer_vec"], docs[5]["offer_vec"], rtol=1e-6)
+
+    def test_missing_vectors_are_zero_and_wrong_size_raises(self, tmp_path):
+        with VectorSnapshotWriter(str(tmp_path / "v.snap"), dimension=DIM) as writer:
+            writer.add("u0", {"offer_vec": [1.0] * DIM, "need_vec": None})
+            with pytest.raises(ValueError):
+                writer.add("u1", {"offer_vec": [1.0] * (DIM + 1)})
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert snapshot.ids == ["u0"]
+            assert not snapshot.vectors("need_vec")[0].any()
+
+    def test_empty_snapshot_opens(self, tmp_path):
+        _write(tmp_path / "v.snap", [])
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert len(snapshot) == 0 and list(snapshot.iter_documents()) == []
+
+    def test_append_overwrites_known_ids_and_adds_new_ones(self, tmp_path):
+        path = tmp_path / "v.snap"
+        docs = _documents(n=4)
+        _write(path, docs[:3], dtype="float32")
+        changed = dict(docs[1], display_name="Renamed", offer_vec=[0.5] * DIM)
+
+        _write(path, [changed, docs[3]], append=True)
+
+        with open_snapshot(str(path)) as snapshot:
+            assert snapshot.ids == ["u0", "u1", "u2", "u3"]
+            assert snapshot.document(1)["display_name"] == "Renamed"
+            np.testing.assert_array_equal(snapshot.vectors("offer_vec")[1], [0.5] * DIM)
+            np.testing.assert_array_equal(
+                snapshot.vectors("need_vec")[2], np.float32(docs[2]["need_vec"])
+            )
+
+    def test_documents_are_read_on_demand(self, tmp_path):
+        docs = _documents(n=6)
+        _write(tmp_path / "v.snap", docs)
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert not hasattr(snapshot, "documents")
+            assert [d["id"] for d in snapshot.read_documents(2, 5)] == ["u2", "u3", "u4"]
+            assert snapshot.read_documents(5, 100) == [
+                {"id": "u5", "uid": "u5", "display_name": "User 5"}
+            ]
+            with pytest.raises(IndexError):
+                snapshot.document(6)
+
+    def test_repeated_appends_keep_documents_in_row_order(self, tmp_path):
+        path = tmp_path / "v.snap"
+        docs = _documents(n=5)
+        _write(path, docs[:3])
+        _write(path, [dict(docs[1], display_name="B")], append=True)
+        _write(
+            path,
+            [dict(docs[0], display_name="A"), docs[3], dict(docs[1], display_name="B2"), docs[4]],
+            append=True,
+        )
+
+        with open_snapshot(str(path)) as snapshot:
+            names = [d["display_name"] for d in snapshot.iter_documents(block_size=2)]
+        assert names == ["A", "B2", "User 2", "User 3", "User 4"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["v.snap"]
+
+    def test_unfinished_append_is_rejected(self, tmp_path):
+        path = tmp_path / "v.snap"
+        _write(path, _documents(n=2))
+        writer = VectorSnapshotWriter(str(path), append=True)
+        writer.add_document(_documents(n=3)[2])
+        writer._handle.close()  # process died before close()
+
+        with pytest.raises(ValueError, match="not closed cleanly"):
+            open_snapshot(str(path))
+
+    def test_failed_export_keeps_previous_snapshot(self, tmp_path):
+        path = tmp_path / "v.snap"
+        _write(path, _documents(n=2))
+
+        with pytest.raises(RuntimeError):
+            with VectorSnapshotWriter(str(path), dimension=DIM) as writer:
+                writer.add_document(_documents(n=1)[0])
+                raise RuntimeError("index unavailable")
+
+        with open_snapshot(str(path)) as snapshot:
+            assert snapshot.ids == ["u0", "u1"]
+        assert not (tmp_path / "v.snap.tmp").exists()
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "not.snap"
+        path.write_bytes(b"x" * HEADER_SIZE)
+
+        with pytest.raises(ValueError, match="bad magic"):
+            open_snapshot(str(path))
+
+
+class TestEngineLoadSnapshot:
+    def test_same_matches_as_loading_documents(self, tmp_path):
+        docs = _documents(n=20)
+        docs[4]["need_vec"] = [0.0] * DIM
+        _write(tmp_path / "v.snap", docs, dtype="float32")
+        from_docs = ReciprocalMatchEngine(dimension=DIM)
+        from_docs.load_documents(docs)
+        from_snapshot = ReciprocalMatchEngine(dimension=DIM, initial_capacity=2)
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert from_snapshot.load_snapshot(snapshot, block_size=6) == 20
+
+        assert len(from_snapshot) == 20
+        assert from_snapshot.profile("u7") == {"id": "u7", "uid": "u7", "display_name": "User 7"}
+        expected = dict(from_docs.iter_all_top_matches(limit=5, score_threshold=0.0))
+        actual = dict(from_snapshot.iter_all_top_matches(limit=5, score_threshold=0.0))
+        assert set(actual) == set(expected) and "u4" not in actual
+        for uid, matches in expected.items():
+            assert [m["uid"] for m in actual[uid]] == [m["uid"] for m in matches]
+            np.testing.assert_allclose(
+                [m["reciprocal_score"] for m in actual[uid]],
+                [m["reciprocal_score"] for m in matches],
+                atol=1e-4,
+            )
+
+    def test_dimension_mismatch_raises(self, tmp_path):
+        _write(tmp_path / "v.snap", _documents(n=2))
+        engine = ReciprocalMatchEngine(dimension=DIM * 2)
+
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot, pytest.raises(ValueError):
+            engine.load_snapshot(snapshot)
+
+    def test_refresh_match_table_reads_snapshot(self, tmp_path):
+        _write(tmp_path / "v.snap", _documents(n=6))
+        cosmos = MagicMock()
+        with patch("app.match_table.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            from app.match_table import refresh_match_table
+
+            summary = refresh_match_table(
+                top_k=3,
+                score_threshold=0.0,
+                cosmos_service=cosmos,
+                snapshot_path=str(tmp_path / "v.snap"),
+            )
+
+        assert summary["profiles"] == 6 and summary["written"] == 6
+
+
+class TestExports:
+    def test_index_export_strips_search_metadata(self, tmp_path):
+        docs = [dict(d, **{"@search.score": 1.0}) for d in _documents(n=3)]
+        search = MagicMock()
+        search.iter_profile_documents.return_value = iter(docs)
+
+        with patch("app.vector_snapshot.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            summary = export_index_snapshot(str(tmp_path / "v.snap"), search_service=search)
+
+        assert summary["written"] == 3 and summary["rows"] == 3
+        with open_snapshot(str(tmp_path / "v.snap")) as snapshot:
+            assert "@search.score" not in snapshot.document(0)
+
+    def test_cosmos_append_embeds_only_new_profiles(self, tmp_path):
+        path = tmp_path / "v.snap"
+        _write(path, _documents(n=2))
+        cosmos = MagicMock()
+        cosmos.iter_profiles.return_value = iter(
+            [
+                {"uid": "u0", "skills_to_offer": "python", "services_needed": "guitar"},
+                {"uid": "u9", "skills_to_offer": "cooking", "services_needed": "french"},
+                {"uid": "u8", "skills_to_offer": "", "services_needed": "french"},
+            ]
+        )
+        embeddings = MagicMock()
+        embeddings.encode_profile_texts.side_effect = lambda texts: [[1.0] * DIM for _ in texts]
+
+        summary = export_cosmos_snapshot(
+            str(path), append=True, cosmos_service=cosmos, embedding_service=embeddings
+        )
+
+        embeddings.encode_profile_texts.assert_called_once_with(["cooking", "french"])
+        assert summary["written"] == 1 and summary["skipped"] == 2 and summary["rows"] == 3
+        with open_snapshot(str(path)) as snapshot:
+            assert snapshot.ids == ["u0", "u1", "u9"]
+            assert snapshot.document(2)["skills_to_offer"] == "cooking"
+
+    def test_cosmos_export_pages_through_every_profile(self, tmp_path):
+        cosmos = MagicMock()
+        cosmos.iter_profiles.return_value = iter(
+            {"uid": f"p{i}", "skills_to_offer": f"skill {i}", "services_needed": "help"}
+            for i in range(7)
+        )
+        embeddings = MagicMock()
+        embeddings.encode_profile_texts.side_effect = lambda texts: [[1.0] * DIM for _ in texts]
+
+        with patch("app.vector_snapshot.settings") as mock_settings:
+            mock_settings.embedding_dim = DIM
+            summary = export_cosmos_snapshot(
+                str(tmp_path / "v.snap"),
+                batch_size=3,
+                cosmos_service=cosmos,
+                embedding_service=embeddings,
+            )
+
+        cosmos.list_profiles.assert_not_called()
+        assert embeddings.encode_profile_texts.call_count == 3
+        assert summary["written"] == 7 and summary["rows"] == 7